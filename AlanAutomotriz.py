@@ -1,156 +1,22 @@
-import datetime
-import hashlib
+import logging
 import sqlite3
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-
-
-# ======================== BASE DE DATOS ========================
-class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect('alan_automotriz.db')
-        self.cursor = self.conn.cursor()
-        self.crear_tablas()
-        self.crear_usuarios_default()
-
-    def crear_tablas(self):
-        # Tabla de usuarios
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                usuario TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                rol TEXT NOT NULL,
-                nombre TEXT NOT NULL,
-                activo INTEGER DEFAULT 1
-            )
-        ''')
-
-        # Tabla de clientes
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS clientes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nombre TEXT NOT NULL,
-                telefono TEXT NOT NULL,
-                correo TEXT,
-                direccion TEXT,
-                activo INTEGER DEFAULT 1
-            )
-        ''')
-
-        # Tabla de vehículos
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vehiculos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                marca TEXT NOT NULL,
-                modelo TEXT NOT NULL,
-                placa TEXT UNIQUE NOT NULL,
-                anio TEXT,
-                color TEXT,
-                activo INTEGER DEFAULT 1
-            )
-        ''')
-
-        # Tabla de ingresos (relación cliente-vehículo)
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ingresos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cliente_id INTEGER NOT NULL,
-                vehiculo_id INTEGER NOT NULL,
-                estado TEXT DEFAULT 'Ingreso',
-                fecha_ingreso TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                fecha_entrega TIMESTAMP,
-                asignado_a INTEGER,
-                motivo_ingreso TEXT,
-                plazo_dias INTEGER,
-                plazo_horas INTEGER,
-                plazo_minutos INTEGER,
-                fecha_inicio_plazo TIMESTAMP,
-                plazo_activo INTEGER DEFAULT 0,
-                FOREIGN KEY (cliente_id) REFERENCES clientes(id),
-                FOREIGN KEY (vehiculo_id) REFERENCES vehiculos(id),
-                FOREIGN KEY (asignado_a) REFERENCES usuarios(id)
-            )
-        ''')
-
-        # Tabla de servicios/historial
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS servicios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ingreso_id INTEGER NOT NULL,
-                tipo_servicio TEXT NOT NULL,
-                descripcion TEXT,
-                fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                realizado_por INTEGER,
-                FOREIGN KEY (ingreso_id) REFERENCES ingresos(id),
-                FOREIGN KEY (realizado_por) REFERENCES usuarios(id)
-            )
-        ''')
-
-        self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS pagos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ingreso_id INTEGER NOT NULL,
-                    monto_total REAL DEFAULT 0,
-                    monto_pagado REAL DEFAULT 0,
-                    estado_pago TEXT DEFAULT 'Pendiente',
-                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    ultimo_pago REAL DEFAULT 0,
-                    ultimo_metodo_pago TEXT,
-                    ultimo_fecha_pago TIMESTAMP,
-                    ultimo_registrado_por INTEGER,
-                    historial_pagos TEXT,
-                    notas TEXT,
-                    FOREIGN KEY (ingreso_id) REFERENCES ingresos(id),
-                    FOREIGN KEY (ultimo_registrado_por) REFERENCES usuarios(id)
-                )
-            ''')
-
-        # Tabla de mensajes/reportes entre gerente y técnicos
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS mensajes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ingreso_id INTEGER NOT NULL,
-                de_usuario INTEGER NOT NULL,
-                para_usuario INTEGER NOT NULL,
-                mensaje TEXT NOT NULL,
-                tipo TEXT NOT NULL,
-                leido INTEGER DEFAULT 0,
-                fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (ingreso_id) REFERENCES ingresos(id),
-                FOREIGN KEY (de_usuario) REFERENCES usuarios(id),
-                FOREIGN KEY (para_usuario) REFERENCES usuarios(id)
-            )
-        ''')
-
-        self.conn.commit()
-
-    def crear_usuarios_default(self):
-        usuarios = [
-            ('ejecutivo', self.hash_password('123'), 'Ejecutivo', 'Ejecutivo de Cuenta'),
-            ('gerente', self.hash_password('123'), 'Gerente', 'Gerente del Taller')
-        ]
-
-        for usuario, password, rol, nombre in usuarios:
-            try:
-                self.cursor.execute(
-                    'INSERT INTO usuarios (usuario, password, rol, nombre) VALUES (?, ?, ?, ?)',
-                    (usuario, password, rol, nombre)
-                )
-            except sqlite3.IntegrityError:
-                pass
-        self.conn.commit()
-
-    def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    def autenticar(self, usuario, password):
-        password_hash = self.hash_password(password)
-        self.cursor.execute(
-            'SELECT id, rol, nombre FROM usuarios WHERE usuario = ? AND password = ? AND activo = 1',
-            (usuario, password_hash)
-        )
-        return self.cursor.fetchone()
+from datetime import datetime
+from tkinter import ttk, filedialog, messagebox, scrolledtext
+
+from base_datos import Database
+from buzon import Buzon, aviso_en_pestana
+from ejecutor_consultas import BusquedaDiferida, EjecutorConsultas
+from eventos import INGRESO, INGRESOS
+from exportar import TIPOS as TIPOS_EXPORTACION, ErrorExportacion, exportar
+from grilla_virtual import GrillaVirtual, actualizar_fila_tree, ids_seleccionados
+from importar import ErrorImportacion, importar, resumen as resumen_importacion
+from pestanas import PestanasDiferidas
+from plazos import ProgramadorPlazos, texto_plazo
+from reportes import texto_historial, texto_reporte_general
+from repositorios import TIPO_REPORTE, TIPO_TAREA
+from respaldos import RespaldoPeriodico
 
 
 # ======================== VENTANA DE LOGIN ========================
@@ -268,11 +134,7 @@ class LoginWindow:
 
             try:
                 password_hash = self.db.hash_password(password)
-                self.db.cursor.execute(
-                    'INSERT INTO usuarios (usuario, password, rol, nombre) VALUES (?, ?, ?, ?)',
-                    (usuario, password_hash, 'Tecnico', nombre)
-                )
-                self.db.conn.commit()
+                self.db.usuarios.registrar(usuario, password_hash, 'Tecnico', nombre)
                 messagebox.showinfo("Éxito", f"Empleado '{nombre}' registrado correctamente")
                 registro_win.destroy()
             except sqlite3.IntegrityError:
@@ -282,18 +144,33 @@ class LoginWindow:
                                                                   columnspan=2, pady=20)
 
     def abrir_sistema(self, user_id, rol, nombre):
+        inicio = time.perf_counter()
         root = tk.Tk()
+        # Cada tk.Tk() es un intérprete nuevo: el atajo del login no pasa a esta ventana
+        atajo_reporte_consultas(root, self.db)
+        ventana = None
         if rol == 'Ejecutivo':
-            EjecutivoWindow(root, self.db, user_id, nombre)
+            ventana = EjecutivoWindow(root, self.db, user_id, nombre)
         elif rol == 'Gerente':
-            GerenteWindow(root, self.db, user_id, nombre)
+            ventana = GerenteWindow(root, self.db, user_id, nombre)
         elif rol == 'Tecnico':
-            TecnicoWindow(root, self.db, user_id, nombre)
+            ventana = TecnicoWindow(root, self.db, user_id, nombre)
+        if ventana is not None:
+            root.update_idletasks()
+            ventana.pestanas.registrar_arranque((time.perf_counter() - inicio) * 1000)
         root.mainloop()
 
 
 # ======================== VENTANA EJECUTIVO DE CUENTA ========================
 class EjecutivoWindow:
+    # Tablas de las que sale cada búsqueda: una escritura en ellas descarta sus resultados en caché
+    TABLAS_CLIENTES = ('clientes',)
+    TABLAS_VEHICULOS = ('vehiculos',)
+    TABLAS_INGRESOS = ('ingresos', 'clientes', 'vehiculos', 'usuarios', 'servicios', 'mensajes')
+    TABLAS_FACTURACION = ('ingresos', 'clientes', 'vehiculos', 'pagos')
+    TABLAS_HISTORIAL = ('ingresos', 'clientes', 'vehiculos', 'usuarios', 'servicios', 'mensajes',
+                        'pagos', 'movimientos_pago')
+
     def __init__(self, root, db, user_id, nombre):
         self.root = root
         self.db = db
@@ -303,38 +180,40 @@ class EjecutivoWindow:
         self.root.title(f"Alan Automotriz - {nombre}")
         self.root.geometry("1000x650")
 
+        # Lecturas pesadas en segundo plano, con su propia conexión
+        self.ejecutor = EjecutorConsultas(self.root, db.ruta, db.configuracion, db.instrumentacion,
+                                          cache=db.cache)
+
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        # Cada pestaña se construye (y carga sus datos) la primera vez que se abre
+        self.pestanas = PestanasDiferidas(self.notebook, 'EjecutivoWindow')
 
         # Pestaña: Gestionar Clientes
         self.tab_clientes = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_clientes, text="Gestionar Clientes")
-        self.crear_tab_clientes()
+        self.pestanas.agregar(self.tab_clientes, "Gestionar Clientes", self.crear_tab_clientes)
 
         # Pestaña: Gestionar Vehículos
         self.tab_vehiculos = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_vehiculos, text="Gestionar Vehículos")
-        self.crear_tab_vehiculos()
+        self.pestanas.agregar(self.tab_vehiculos, "Gestionar Vehículos", self.crear_tab_vehiculos)
 
         # Pestaña: Registrar Ingreso
         self.tab_ingreso = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_ingreso, text="Registrar Ingreso")
-        self.crear_tab_ingreso()
+        self.pestanas.agregar(self.tab_ingreso, "Registrar Ingreso", self.crear_tab_ingreso)
 
         # Pestaña: Consultar Ingresos
         self.tab_consulta = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_consulta, text="Consultar Ingresos")
-        self.crear_tab_consulta()
+        self.pestanas.agregar(self.tab_consulta, "Consultar Ingresos", self.crear_tab_consulta)
 
         # Pestaña: Historial
         self.tab_historial = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_historial, text="Generar Historial")
-        self.crear_tab_historial()
+        self.pestanas.agregar(self.tab_historial, "Generar Historial", self.crear_tab_historial)
 
         # Pestaña: Facturación y Pagos
         self.tab_facturacion = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_facturacion, text="Facturación y Pagos")
-        self.crear_tab_facturacion()
+        self.pestanas.agregar(self.tab_facturacion, "Facturación y Pagos", self.crear_tab_facturacion)
+
+        self.pestanas.construir(self.tab_clientes)
 
     def crear_tab_clientes(self):
         frame = ttk.Frame(self.tab_clientes, padding="20")
@@ -369,6 +248,8 @@ class EjecutivoWindow:
                    command=self.actualizar_cliente).pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Limpiar",
                    command=self.limpiar_form_cliente).pack(side='left', padx=5)
+        ttk.Button(btn_frame, text="📥 Importar CSV/Excel",
+                   command=self.importar_archivo).pack(side='left', padx=5)
 
         # Frame inferior - Lista
         list_frame = ttk.LabelFrame(frame, text="Clientes Registrados", padding="10")
@@ -384,6 +265,9 @@ class EjecutivoWindow:
                    command=self.buscar_cliente).pack(side='left', padx=5)
         ttk.Button(search_frame, text="Mostrar Todos",
                    command=self.cargar_clientes).pack(side='left', padx=5)
+        self.cli_cargando = ttk.Label(search_frame, text="", foreground="gray")
+        self.cli_cargando.pack(side='left', padx=5)
+        BusquedaDiferida(self.cli_search, self.buscar_cliente)
 
         columns = ('ID', 'Nombre', 'Teléfono', 'Correo', 'Dirección')
         self.tree_clientes = ttk.Treeview(list_frame, columns=columns, show='headings', height=10)
@@ -458,6 +342,9 @@ class EjecutivoWindow:
                    command=self.buscar_vehiculo).pack(side='left', padx=5)
         ttk.Button(search_frame, text="Mostrar Todos",
                    command=self.cargar_vehiculos).pack(side='left', padx=5)
+        self.veh_cargando = ttk.Label(search_frame, text="", foreground="gray")
+        self.veh_cargando.pack(side='left', padx=5)
+        BusquedaDiferida(self.veh_search, self.buscar_vehiculo)
 
         columns = ('ID', 'Marca', 'Modelo', 'Placa', 'Año', 'Color')
         self.tree_vehiculos = ttk.Treeview(list_frame, columns=columns, show='headings', height=10)
@@ -763,18 +650,7 @@ class EjecutivoWindow:
 
         # 7. Registrar
         try:
-            self.db.cursor.execute(
-                'INSERT INTO ingresos (cliente_id, vehiculo_id, motivo_ingreso) VALUES (?, ?, ?)',
-                (cliente_id, vehiculo_id, motivo)
-            )
-            ingreso_id = self.db.cursor.lastrowid
-
-            self.db.cursor.execute(
-                'INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por) VALUES (?, ?, ?, ?)',
-                (ingreso_id, 'Ingreso', f'Vehículo ingresado al taller. Motivo: {motivo}', self.user_id)
-            )
-
-            self.db.conn.commit()
+            ingreso_id = self.db.ingresos.registrar(cliente_id, vehiculo_id, motivo, self.user_id)
 
             messagebox.showinfo(
                 "✅ ¡Ingreso Registrado!",
@@ -794,13 +670,11 @@ class EjecutivoWindow:
             self.label_vehiculo_seleccionado.config(text="❌ Vehículo: Ninguno", foreground="red")
             self.label_resumen_cliente.config(text="👤 Cliente: -", foreground="gray", font=('Arial', 9))
             self.label_resumen_vehiculo.config(text="🚗 Vehículo: -", foreground="gray", font=('Arial', 9))
-
-            # Actualizar vista de ingresos
-            self.cargar_ingresos()
+            # Las grillas abiertas agregan el ingreso con el evento del registro; si la
+            # pestaña no se ha abierto, cargará al abrirla
 
         except Exception as e:
             messagebox.showerror("Error", f"❌ Error al registrar:\n\n{str(e)}")
-            self.db.conn.rollback()
 
 
     def crear_tab_consulta(self):
@@ -817,6 +691,9 @@ class EjecutivoWindow:
                    command=self.buscar_ingreso).pack(side='left', padx=5)
         ttk.Button(search_frame, text="Mostrar Todos",
                    command=self.cargar_ingresos).pack(side='left', padx=5)
+        self.cons_cargando = ttk.Label(search_frame, text="", foreground="gray")
+        self.cons_cargando.pack(side='left', padx=5)
+        BusquedaDiferida(self.cons_search, self.buscar_ingreso)
 
         columns = ('ID', 'Cliente', 'Vehículo', 'Placa', 'Estado', 'Fecha Ingreso', 'Asignado')
         self.tree_ingresos = ttk.Treeview(frame, columns=columns, show='headings', height=12)
@@ -826,7 +703,15 @@ class EjecutivoWindow:
             self.tree_ingresos.column(col, width=120)
 
         scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.tree_ingresos.yview)
-        self.tree_ingresos.configure(yscrollcommand=scrollbar.set)
+        self.grilla_ingresos = GrillaVirtual(self.tree_ingresos, self.db,
+                                             lambda repos, limite, **clave: repos.ingresos.pagina(limite, **clave),
+                                             clave=lambda f: (f.fecha_ingreso, f.id),
+                                             identificador=lambda f: str(f.id),
+                                             scrollbar=scrollbar,
+                                             ejecutor=self.ejecutor, indicador=self.cons_cargando,
+                                             fila=lambda repos, ingreso_id: repos.ingresos.fila_listado(ingreso_id))
+        # Después de cada escritura se corrige solo la fila del ingreso
+        self.db.eventos.suscribir(INGRESO, self.grilla_ingresos.actualizar_fila, widget=self.tree_ingresos)
 
         self.tree_ingresos.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
@@ -842,6 +727,8 @@ class EjecutivoWindow:
         self.cons_estado_combo.pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Actualizar Estado",
                    command=self.actualizar_estado_ingreso).pack(side='left', padx=5)
+        ttk.Label(btn_frame, text="(Ctrl/Shift + clic para varios)",
+                  foreground="gray").pack(side='left', padx=5)
 
         self.cargar_ingresos()
 
@@ -857,6 +744,10 @@ class EjecutivoWindow:
         self.hist_search.pack(side='left', padx=5)
         ttk.Button(search_frame, text="Generar Historial",
                    command=self.generar_historial).pack(side='left', padx=5)
+        self.hist_cargando = ttk.Label(search_frame, text="", foreground="gray")
+        self.hist_cargando.pack(side='left', padx=5)
+        # El historial es un reporte largo: se genera desde el tercer carácter
+        BusquedaDiferida(self.hist_search, self.generar_historial, minimo=3)
 
         self.hist_text = scrolledtext.ScrolledText(frame, width=90, height=30)
         self.hist_text.pack(fill='both', expand=True)
@@ -873,17 +764,39 @@ class EjecutivoWindow:
             return
 
         try:
-            self.db.cursor.execute(
-                'INSERT INTO clientes (nombre, telefono, correo, direccion) VALUES (?, ?, ?, ?)',
-                (nombre, telefono, correo, direccion)
-            )
-            self.db.conn.commit()
+            self.db.clientes.registrar(nombre, telefono, correo, direccion)
             messagebox.showinfo("Éxito", "Cliente registrado correctamente")
             self.limpiar_form_cliente()
             self.cargar_clientes()
         except Exception as e:
             messagebox.showerror("Error", f"Error al registrar: {str(e)}")
 
+    def importar_archivo(self):
+        """Alta masiva de clientes, vehículos e ingresos (ver importar.py), en segundo plano"""
+        ruta = filedialog.askopenfilename(
+            title="Importar clientes y vehículos",
+            filetypes=[("CSV o Excel", "*.csv *.xlsx"), ("Todos los archivos", "*.*")])
+        if not ruta:
+            return
+        self.ejecutor.enviar('importar', lambda repos: importar(repos.conn, ruta, self.user_id),
+                             self._importacion_terminada, self._importacion_fallida,
+                             indicador=self.cli_cargando)
+
+    def _importacion_terminada(self, resultado):
+        messagebox.showinfo("Importación terminada", resumen_importacion(resultado))
+        self.cargar_clientes()
+        self.pestanas.refrescar(self.tab_vehiculos, self.cargar_vehiculos)
+        if resultado.ingresos:
+            self.pestanas.refrescar(self.tab_consulta, self.cargar_ingresos)
+
+    def _importacion_fallida(self, error):
+        # Los lotes anteriores al error ya quedaron guardados
+        self.cargar_clientes()
+        if isinstance(error, ErrorImportacion):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Error", f"La importación se detuvo: {error}")
+
     def actualizar_cliente(self):
         selected = self.tree_clientes.selection()
         if not selected:
@@ -900,11 +813,7 @@ class EjecutivoWindow:
             messagebox.showerror("Error", "Nombre y teléfono son obligatorios")
             return
 
-        self.db.cursor.execute(
-            'UPDATE clientes SET nombre=?, telefono=?, correo=?, direccion=? WHERE id=?',
-            (nombre, telefono, correo, direccion, cliente_id)
-        )
-        self.db.conn.commit()
+        self.db.clientes.actualizar(cliente_id, nombre, telefono, correo, direccion)
         messagebox.showinfo("Éxito", "Cliente actualizado")
         self.limpiar_form_cliente()
         self.cargar_clientes()
@@ -917,30 +826,30 @@ class EjecutivoWindow:
 
         if messagebox.askyesno("Confirmar", "¿Eliminar este cliente?"):
             cliente_id = self.tree_clientes.item(selected[0])['values'][0]
-            self.db.cursor.execute('UPDATE clientes SET activo=0 WHERE id=?', (cliente_id,))
-            self.db.conn.commit()
+            self.db.clientes.desactivar(cliente_id)
             messagebox.showinfo("Éxito", "Cliente eliminado")
             self.cargar_clientes()
 
     def cargar_clientes(self):
-        for item in self.tree_clientes.get_children():
-            self.tree_clientes.delete(item)
-
-        self.db.cursor.execute('SELECT * FROM clientes WHERE activo=1 ORDER BY nombre')
-        for row in self.db.cursor.fetchall():
-            self.tree_clientes.insert('', 'end', values=row[:-1])
+        self.ejecutor.enviar('clientes', lambda repos: repos.clientes.listar(),
+                             self._mostrar_clientes, indicador=self.cli_cargando,
+                             cache=(('clientes.listar',), self.TABLAS_CLIENTES))
 
     def buscar_cliente(self):
         busqueda = self.cli_search.get().strip()
-        for item in self.tree_clientes.get_children():
-            self.tree_clientes.delete(item)
+        if not busqueda:
+            self.cargar_clientes()
+            return
+        self.ejecutor.enviar('clientes', lambda repos: repos.busqueda.clientes(busqueda),
+                             self._mostrar_clientes, indicador=self.cli_cargando,
+                             cache=(('clientes.buscar', busqueda.lower()), self.TABLAS_CLIENTES))
 
-        self.db.cursor.execute(
-            'SELECT * FROM clientes WHERE activo=1 AND (nombre LIKE ? OR telefono LIKE ?)',
-            (f'%{busqueda}%', f'%{busqueda}%')
-        )
-        for row in self.db.cursor.fetchall():
-            self.tree_clientes.insert('', 'end', values=row[:-1])
+    def _mostrar_clientes(self, clientes):
+        hijos = self.tree_clientes.get_children()
+        if hijos:
+            self.tree_clientes.delete(*hijos)
+        for cliente in clientes:
+            self.tree_clientes.insert('', 'end', values=cliente)
 
     def cargar_cliente_seleccionado(self, event):
         selected = self.tree_clientes.selection()
@@ -974,11 +883,7 @@ class EjecutivoWindow:
             return
 
         try:
-            self.db.cursor.execute(
-                'INSERT INTO vehiculos (marca, modelo, placa, anio, color) VALUES (?, ?, ?, ?, ?)',
-                (marca, modelo, placa, anio, color)
-            )
-            self.db.conn.commit()
+            self.db.vehiculos.registrar(marca, modelo, placa, anio, color)
             messagebox.showinfo("Éxito", "Vehículo registrado correctamente")
             self.limpiar_form_vehiculo()
             self.cargar_vehiculos()
@@ -1003,11 +908,7 @@ class EjecutivoWindow:
             return
 
         try:
-            self.db.cursor.execute(
-                'UPDATE vehiculos SET marca=?, modelo=?, placa=?, anio=?, color=? WHERE id=?',
-                (marca, modelo, placa, anio, color, vehiculo_id)
-            )
-            self.db.conn.commit()
+            self.db.vehiculos.actualizar(vehiculo_id, marca, modelo, placa, anio, color)
             messagebox.showinfo("Éxito", "Vehículo actualizado")
             self.limpiar_form_vehiculo()
             self.cargar_vehiculos()
@@ -1022,31 +923,30 @@ class EjecutivoWindow:
 
         if messagebox.askyesno("Confirmar", "¿Eliminar este vehículo?"):
             vehiculo_id = self.tree_vehiculos.item(selected[0])['values'][0]
-            self.db.cursor.execute('UPDATE vehiculos SET activo=0 WHERE id=?', (vehiculo_id,))
-            self.db.conn.commit()
+            self.db.vehiculos.desactivar(vehiculo_id)
             messagebox.showinfo("Éxito", "Vehículo eliminado")
             self.cargar_vehiculos()
 
     def cargar_vehiculos(self):
-        for item in self.tree_vehiculos.get_children():
-            self.tree_vehiculos.delete(item)
-
-        self.db.cursor.execute('SELECT * FROM vehiculos WHERE activo=1 ORDER BY marca, modelo')
-        for row in self.db.cursor.fetchall():
-            self.tree_vehiculos.insert('', 'end', values=row[:-1])
+        self.ejecutor.enviar('vehiculos', lambda repos: repos.vehiculos.listar(),
+                             self._mostrar_vehiculos, indicador=self.veh_cargando,
+                             cache=(('vehiculos.listar',), self.TABLAS_VEHICULOS))
 
     def buscar_vehiculo(self):
         busqueda = self.veh_search.get().strip()
-        for item in self.tree_vehiculos.get_children():
-            self.tree_vehiculos.delete(item)
+        if not busqueda:
+            self.cargar_vehiculos()
+            return
+        self.ejecutor.enviar('vehiculos', lambda repos: repos.busqueda.vehiculos(busqueda),
+                             self._mostrar_vehiculos, indicador=self.veh_cargando,
+                             cache=(('vehiculos.buscar', busqueda.lower()), self.TABLAS_VEHICULOS))
 
-        self.db.cursor.execute(
-            '''SELECT * FROM vehiculos WHERE activo=1 AND 
-               (marca LIKE ? OR modelo LIKE ? OR placa LIKE ?)''',
-            (f'%{busqueda}%', f'%{busqueda}%', f'%{busqueda}%')
-        )
-        for row in self.db.cursor.fetchall():
-            self.tree_vehiculos.insert('', 'end', values=row[:-1])
+    def _mostrar_vehiculos(self, vehiculos):
+        hijos = self.tree_vehiculos.get_children()
+        if hijos:
+            self.tree_vehiculos.delete(*hijos)
+        for vehiculo in vehiculos:
+            self.tree_vehiculos.insert('', 'end', values=vehiculo)
 
     def cargar_vehiculo_seleccionado(self, event):
         selected = self.tree_vehiculos.selection()
@@ -1075,116 +975,49 @@ class EjecutivoWindow:
         for item in self.tree_ing_cli.get_children():
             self.tree_ing_cli.delete(item)
 
-        self.db.cursor.execute('SELECT id, nombre, telefono FROM clientes WHERE activo=1')
-        for row in self.db.cursor.fetchall():
-            self.tree_ing_cli.insert('', 'end', values=row)
+        for cliente in self.db.clientes.listar_breve():
+            self.tree_ing_cli.insert('', 'end', values=cliente)
 
     def buscar_cliente_ingreso(self):
         busqueda = self.ing_cli_search.get().strip()
         for item in self.tree_ing_cli.get_children():
             self.tree_ing_cli.delete(item)
 
-        self.db.cursor.execute(
-            'SELECT id, nombre, telefono FROM clientes WHERE activo=1 AND (nombre LIKE ? OR telefono LIKE ?)',
-            (f'%{busqueda}%', f'%{busqueda}%')
-        )
-        for row in self.db.cursor.fetchall():
-            self.tree_ing_cli.insert('', 'end', values=row)
+        clientes = self.db.busqueda.clientes_breve(busqueda) if busqueda else self.db.clientes.listar_breve()
+        for cliente in clientes:
+            self.tree_ing_cli.insert('', 'end', values=cliente)
 
     def cargar_vehiculos_ingreso(self):
         for item in self.tree_ing_veh.get_children():
             self.tree_ing_veh.delete(item)
 
-        self.db.cursor.execute('SELECT id, marca, modelo, placa FROM vehiculos WHERE activo=1')
-        for row in self.db.cursor.fetchall():
-            self.tree_ing_veh.insert('', 'end', values=row)
+        for vehiculo in self.db.vehiculos.listar_breve():
+            self.tree_ing_veh.insert('', 'end', values=vehiculo)
 
     def buscar_vehiculo_ingreso(self):
         busqueda = self.ing_veh_search.get().strip()
         for item in self.tree_ing_veh.get_children():
             self.tree_ing_veh.delete(item)
 
-        self.db.cursor.execute(
-            '''SELECT id, marca, modelo, placa FROM vehiculos WHERE activo=1 AND 
-               (marca LIKE ? OR modelo LIKE ? OR placa LIKE ?)''',
-            (f'%{busqueda}%', f'%{busqueda}%', f'%{busqueda}%')
-        )
-        for row in self.db.cursor.fetchall():
-            self.tree_ing_veh.insert('', 'end', values=row)
-
-    def registrar_ingreso_vehiculo(self):
-        sel_cli = self.tree_ing_cli.selection()
-        sel_veh = self.tree_ing_veh.selection()
-
-        if not sel_cli or not sel_veh:
-            messagebox.showerror("Error", "Seleccione un cliente y un vehículo")
-            return
-
-        cliente_id = self.tree_ing_cli.item(sel_cli[0])['values'][0]
-        vehiculo_id = self.tree_ing_veh.item(sel_veh[0])['values'][0]
-        motivo = self.ing_motivo.get(1.0, tk.END).strip()
-
-        if not motivo:
-            messagebox.showerror("Error", "Escriba el motivo del ingreso")
-            return
-
-        try:
-            self.db.cursor.execute(
-                'INSERT INTO ingresos (cliente_id, vehiculo_id, motivo_ingreso) VALUES (?, ?, ?)',
-                (cliente_id, vehiculo_id, motivo)
-            )
-            ingreso_id = self.db.cursor.lastrowid
-
-            self.db.cursor.execute(
-                'INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por) VALUES (?, ?, ?, ?)',
-                (ingreso_id, 'Ingreso', f'Vehículo ingresado al taller. Motivo: {motivo}', self.user_id)
-            )
-
-            self.db.conn.commit()
-            messagebox.showinfo("Éxito", "Ingreso registrado correctamente")
-            self.ing_motivo.delete(1.0, tk.END)
-            self.cargar_ingresos()
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al registrar: {str(e)}")
+        vehiculos = self.db.busqueda.vehiculos_breve(busqueda) if busqueda else self.db.vehiculos.listar_breve()
+        for vehiculo in vehiculos:
+            self.tree_ing_veh.insert('', 'end', values=vehiculo)
 
     def cargar_ingresos(self):
-        for item in self.tree_ingresos.get_children():
-            self.tree_ingresos.delete(item)
-
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado, 
-                   i.fecha_ingreso, COALESCE(u.nombre, 'Sin asignar')
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            LEFT JOIN usuarios u ON i.asignado_a = u.id
-            ORDER BY i.fecha_ingreso DESC
-        ''')
-        for row in self.db.cursor.fetchall():
-            self.tree_ingresos.insert('', 'end', values=row)
+        self.grilla_ingresos.recargar(
+            lambda repos, limite, **clave: repos.ingresos.pagina(limite, **clave),
+            cache=(('ingresos.pagina', ''), self.TABLAS_INGRESOS))
 
     def buscar_ingreso(self):
         busqueda = self.cons_search.get().strip()
-        for item in self.tree_ingresos.get_children():
-            self.tree_ingresos.delete(item)
-
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado, 
-                   i.fecha_ingreso, COALESCE(u.nombre, 'Sin asignar')
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            LEFT JOIN usuarios u ON i.asignado_a = u.id
-            WHERE c.nombre LIKE ? OR v.placa LIKE ?
-            ORDER BY i.fecha_ingreso DESC
-        ''', (f'%{busqueda}%', f'%{busqueda}%'))
-        for row in self.db.cursor.fetchall():
-            self.tree_ingresos.insert('', 'end', values=row)
+        self.grilla_ingresos.recargar(
+            lambda repos, limite, **clave: repos.ingresos.pagina(limite, texto=busqueda, **clave),
+            cache=(('ingresos.pagina', busqueda.lower()), self.TABLAS_INGRESOS), filtrada=bool(busqueda))
 
     def actualizar_estado_ingreso(self):
-        selected = self.tree_ingresos.selection()
-        if not selected:
-            messagebox.showwarning("Advertencia", "Seleccione un ingreso")
+        ingreso_ids = ids_seleccionados(self.tree_ingresos)
+        if not ingreso_ids:
+            messagebox.showwarning("Advertencia", "Seleccione uno o más ingresos")
             return
 
         nuevo_estado = self.cons_estado_combo.get()
@@ -1192,21 +1025,10 @@ class EjecutivoWindow:
             messagebox.showwarning("Advertencia", "Seleccione un estado")
             return
 
-        ingreso_id = self.tree_ingresos.item(selected[0])['values'][0]
-
-        self.db.cursor.execute('UPDATE ingresos SET estado=? WHERE id=?', (nuevo_estado, ingreso_id))
-        self.db.cursor.execute(
-            'INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por) VALUES (?, ?, ?, ?)',
-            (ingreso_id, 'Cambio de estado', f'Estado actualizado a: {nuevo_estado}', self.user_id)
-        )
-
-        if nuevo_estado == 'Entregado':
-            self.db.cursor.execute('UPDATE ingresos SET fecha_entrega=CURRENT_TIMESTAMP WHERE id=?',
-                                   (ingreso_id,))
-
-        self.db.conn.commit()
-        messagebox.showinfo("Éxito", "Estado actualizado")
-        self.cargar_ingresos()
+        # Todos en una transacción; las filas se corrigen solas con los eventos (ver eventos.py)
+        self.db.ingresos.cambiar_estados(ingreso_ids, nuevo_estado, self.user_id)
+        messagebox.showinfo("Éxito", "Estado actualizado" if len(ingreso_ids) == 1
+                            else f"Estado actualizado en {len(ingreso_ids)} ingresos")
 
     def generar_historial(self):
         busqueda = self.hist_search.get().strip()
@@ -1214,177 +1036,20 @@ class EjecutivoWindow:
             messagebox.showwarning("Advertencia", "Ingrese un nombre o placa")
             return
 
+        # Ingresos ordenados por última actividad, con pagos, servicios y
+        # mensajes ya agrupados: cinco consultas en total, en segundo plano
+        self.ejecutor.enviar('historial', lambda repos: repos.historial.cargar(busqueda),
+                             self._mostrar_historial, indicador=self.hist_cargando,
+                             cache=(('historial', busqueda.lower()), self.TABLAS_HISTORIAL))
+
+    def _mostrar_historial(self, historial):
         self.hist_text.delete(1.0, tk.END)
 
-        # Consulta mejorada: ordenar por última actividad
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, c.telefono, c.correo, v.marca, v.modelo, v.placa, 
-                   v.anio, v.color, i.estado, i.fecha_ingreso, i.fecha_entrega, i.motivo_ingreso,
-                   (SELECT MAX(s.fecha) FROM servicios s WHERE s.ingreso_id = i.id) as ultima_actividad
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            WHERE c.nombre LIKE ? OR v.placa LIKE ?
-            ORDER BY ultima_actividad DESC, i.fecha_ingreso DESC
-        ''', (f'%{busqueda}%', f'%{busqueda}%'))
-
-        ingresos = self.db.cursor.fetchall()
-
-        if not ingresos:
+        if not historial:
             self.hist_text.insert(tk.END, "No se encontraron registros\n")
             return
 
-        # Encabezado
-        self.hist_text.insert(tk.END, "╔" + "═" * 78 + "╗\n")
-        self.hist_text.insert(tk.END, f"║  📋 HISTORIAL DE SERVICIOS - {len(ingresos)} resultado(s) encontrado(s)".ljust(
-            79) + "║\n")
-        self.hist_text.insert(tk.END, "║  Ordenado por: Última actividad (más reciente primero)".ljust(79) + "║\n")
-        self.hist_text.insert(tk.END, "╚" + "═" * 78 + "╝\n\n")
-
-        for idx, ingreso in enumerate(ingresos, 1):
-            ing_id, cli_nom, cli_tel, cli_corr, v_marca, v_modelo, v_placa, v_anio, v_color, \
-                estado, f_ing, f_ent, motivo, ultima_actividad = ingreso
-
-            # Separador
-            self.hist_text.insert(tk.END, "╔" + "═" * 78 + "╗\n")
-            self.hist_text.insert(tk.END, f"║  SERVICIO #{idx} - FOLIO: {ing_id}".ljust(79) + "║\n")
-            self.hist_text.insert(tk.END, "╚" + "═" * 78 + "╝\n\n")
-
-            # CLIENTE
-            self.hist_text.insert(tk.END, "👤 CLIENTE:\n")
-            self.hist_text.insert(tk.END, "─" * 80 + "\n")
-            self.hist_text.insert(tk.END, f"   Nombre:    {cli_nom}\n")
-            self.hist_text.insert(tk.END, f"   Teléfono:  {cli_tel}\n")
-            self.hist_text.insert(tk.END, f"   Correo:    {cli_corr if cli_corr else 'N/A'}\n\n")
-
-            # VEHÍCULO
-            self.hist_text.insert(tk.END, "🚗 VEHÍCULO:\n")
-            self.hist_text.insert(tk.END, "─" * 80 + "\n")
-            self.hist_text.insert(tk.END, f"   {v_marca} {v_modelo}\n")
-            self.hist_text.insert(tk.END, f"   Placa:  {v_placa}\n")
-            self.hist_text.insert(tk.END, f"   Año:    {v_anio if v_anio else 'N/A'}\n")
-            self.hist_text.insert(tk.END, f"   Color:  {v_color if v_color else 'N/A'}\n\n")
-
-            # SERVICIO
-            self.hist_text.insert(tk.END, "📊 INFORMACIÓN DEL SERVICIO:\n")
-            self.hist_text.insert(tk.END, "─" * 80 + "\n")
-            self.hist_text.insert(tk.END, f"   Estado Actual:      {estado}\n")
-            self.hist_text.insert(tk.END, f"   Fecha de Ingreso:   {f_ing}\n")
-            self.hist_text.insert(tk.END, f"   Fecha de Entrega:   {f_ent if f_ent else 'Pendiente'}\n")
-            self.hist_text.insert(tk.END, f"   Última Actividad:   {ultima_actividad if ultima_actividad else 'N/A'}\n")
-            self.hist_text.insert(tk.END, f"   Motivo:             {motivo}\n\n")
-
-            # ========== FACTURACIÓN Y PAGOS (CORREGIDO) ==========
-            self.hist_text.insert(tk.END, "💰 FACTURACIÓN Y PAGOS:\n")
-            self.hist_text.insert(tk.END, "─" * 80 + "\n")
-
-            # 👇 CONSULTA CORREGIDA - usa tabla 'pagos' unificada
-            self.db.cursor.execute('''
-                SELECT id, monto_total, monto_pagado, estado_pago, fecha_creacion, historial_pagos
-                FROM pagos
-                WHERE ingreso_id = ?
-            ''', (ing_id,))
-
-            pago = self.db.cursor.fetchone()
-
-            if pago:
-                import json
-
-                pago_id, monto_total, monto_pagado, estado_pago, fecha_pago, historial_str = pago
-                pendiente = monto_total - monto_pagado
-
-                # Símbolo según estado
-                if estado_pago == 'Pagado':
-                    simbolo = "✅"
-                elif estado_pago == 'Parcial':
-                    simbolo = "⏳"
-                else:
-                    simbolo = "⏰"
-
-                self.hist_text.insert(tk.END, f"   {simbolo} Estado: {estado_pago}\n")
-                self.hist_text.insert(tk.END, f"   💵 Monto Total:     ${monto_total:,.2f}\n")
-                self.hist_text.insert(tk.END, f"   ✅ Monto Pagado:    ${monto_pagado:,.2f}\n")
-                self.hist_text.insert(tk.END, f"   ⏳ Pendiente:       ${pendiente:,.2f}\n")
-                self.hist_text.insert(tk.END, f"   📅 Fecha:           {fecha_pago}\n\n")
-
-                # Mostrar historial de pagos
-                historial_pagos = []
-                if historial_str:
-                    try:
-                        historial_pagos = json.loads(historial_str)
-                    except:
-                        pass
-
-                if historial_pagos:
-                    self.hist_text.insert(tk.END, f"   💳 HISTORIAL ({len(historial_pagos)} pago(s)):\n")
-                    self.hist_text.insert(tk.END, "   " + "·" * 76 + "\n")
-
-                    for idx_pago, p in enumerate(historial_pagos, 1):
-                        self.hist_text.insert(tk.END, f"\n   Pago #{idx_pago}:\n")
-                        self.hist_text.insert(tk.END, f"      • Fecha:  {p.get('fecha', 'N/A')}\n")
-                        self.hist_text.insert(tk.END, f"      • Monto:  ${p.get('monto', 0):.2f}\n")
-                        self.hist_text.insert(tk.END, f"      • Método: {p.get('metodo', 'N/A')}\n")
-                        if p.get('notas'):
-                            self.hist_text.insert(tk.END, f"      • Notas:  {p['notas']}\n")
-                    self.hist_text.insert(tk.END, "\n")
-                else:
-                    self.hist_text.insert(tk.END, "   📭 Sin pagos registrados\n\n")
-            else:
-                self.hist_text.insert(tk.END, "   ❌ SIN PRECIO ESTABLECIDO\n")
-                self.hist_text.insert(tk.END, "   Este servicio aún no tiene un precio asignado.\n\n")
-
-            # ========== HISTORIAL DE SERVICIOS ==========
-            self.db.cursor.execute('''
-                SELECT s.tipo_servicio, s.descripcion, s.fecha, u.nombre
-                FROM servicios s
-                LEFT JOIN usuarios u ON s.realizado_por = u.id
-                WHERE s.ingreso_id = ?
-                ORDER BY s.fecha DESC
-            ''', (ing_id,))
-
-            servicios = self.db.cursor.fetchall()
-
-            self.hist_text.insert(tk.END, "🔧 HISTORIAL DE SERVICIOS:\n")
-            self.hist_text.insert(tk.END, "─" * 80 + "\n")
-
-            if servicios:
-                for servicio in servicios:
-                    tipo, desc, fecha, usuario = servicio
-                    self.hist_text.insert(tk.END, f"   📅 [{fecha}] {tipo}\n")
-                    self.hist_text.insert(tk.END, f"      {desc}\n")
-                    self.hist_text.insert(tk.END, f"      👤 Por: {usuario if usuario else 'Sistema'}\n\n")
-            else:
-                self.hist_text.insert(tk.END, "   Sin actividad registrada\n\n")
-
-            # ========== MENSAJES/REPORTES ==========
-            self.db.cursor.execute('''
-                SELECT m.mensaje, m.tipo, m.fecha, u1.nombre, u2.nombre
-                FROM mensajes m
-                JOIN usuarios u1 ON m.de_usuario = u1.id
-                JOIN usuarios u2 ON m.para_usuario = u2.id
-                WHERE m.ingreso_id = ?
-                ORDER BY m.fecha DESC
-            ''', (ing_id,))
-
-            mensajes = self.db.cursor.fetchall()
-
-            if mensajes:
-                self.hist_text.insert(tk.END, "💬 REPORTES Y COMUNICACIONES:\n")
-                self.hist_text.insert(tk.END, "─" * 80 + "\n")
-                for msg in mensajes:
-                    mensaje, tipo, fecha, de_user, para_user = msg
-                    self.hist_text.insert(tk.END, f"   📅 [{fecha}] {tipo}\n")
-                    self.hist_text.insert(tk.END, f"      De: {de_user} → Para: {para_user}\n")
-                    self.hist_text.insert(tk.END, f"      💬 {mensaje}\n\n")
-
-            # Separador final
-            self.hist_text.insert(tk.END, "\n" + "═" * 80 + "\n\n")
-
-        # Resumen final
-        self.hist_text.insert(tk.END, "\n╔" + "═" * 78 + "╗\n")
-        self.hist_text.insert(tk.END,
-                              f"║  ✅ Fin del historial - {len(ingresos)} servicio(s) mostrado(s)".ljust(79) + "║\n")
-        self.hist_text.insert(tk.END, "╚" + "═" * 78 + "╝\n")
+        self.hist_text.insert(tk.END, texto_historial(historial))
 
         # Scroll al inicio
         self.hist_text.see("1.0")
@@ -1486,6 +1151,11 @@ class EjecutivoWindow:
                    command=self.buscar_facturacion).pack(side='left', padx=5)
         ttk.Button(search_factura_frame, text="Mostrar Todos",
                    command=self.cargar_facturacion).pack(side='left', padx=5)
+        ttk.Button(search_factura_frame, text="📤 Exportar...",
+                   command=self.exportar_datos).pack(side='left', padx=5)
+        self.factura_cargando = ttk.Label(search_factura_frame, text="", foreground="gray")
+        self.factura_cargando.pack(side='left', padx=5)
+        BusquedaDiferida(self.factura_search, self.buscar_facturacion)
 
         # Tabla de servicios facturables
         columns = ('ID', 'Folio', 'Cliente', 'Vehículo', 'Placa', 'Total', 'Pagado', 'Pendiente', 'Estado')
@@ -1498,7 +1168,16 @@ class EjecutivoWindow:
 
         scroll_factura = ttk.Scrollbar(factura_frame, orient='vertical',
                                        command=self.tree_facturacion.yview)
-        self.tree_facturacion.configure(yscrollcommand=scroll_factura.set)
+        self.grilla_facturacion = GrillaVirtual(
+            self.tree_facturacion, self.db,
+            lambda repos, limite, **clave: repos.pagos.pagina_facturacion(limite, **clave),
+            clave=lambda f: (f.fecha_ingreso, f.ingreso_id),
+            formatear=self._fila_facturacion,
+            identificador=lambda f: str(f.ingreso_id),
+            scrollbar=scroll_factura,
+            ejecutor=self.ejecutor, indicador=self.factura_cargando,
+            fila=lambda repos, ingreso_id: repos.pagos.fila_facturacion(ingreso_id))
+        self.db.eventos.suscribir(INGRESO, self.grilla_facturacion.actualizar_fila, widget=self.tree_facturacion)
 
         self.tree_facturacion.pack(side='left', fill='both', expand=True)
         scroll_factura.pack(side='right', fill='y')
@@ -1579,115 +1258,198 @@ class EjecutivoWindow:
                 foreground="red"
             )
 
-    def cargar_facturacion(self):
-        for item in self.tree_facturacion.get_children():
-            self.tree_facturacion.delete(item)
-
-        # Consulta simplificada - ya no necesita LEFT JOIN
-        self.db.cursor.execute('''
-            SELECT 
-                p.id,
-                i.id,
-                c.nombre,
-                v.marca || ' ' || v.modelo,
-                v.placa,
-                COALESCE(p.monto_total, 0),
-                COALESCE(p.monto_pagado, 0),
-                COALESCE(p.monto_total, 0) - COALESCE(p.monto_pagado, 0),
-                COALESCE(p.estado_pago, 'Sin precio')
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            LEFT JOIN pagos p ON i.id = p.ingreso_id
-            ORDER BY i.fecha_ingreso DESC
-        ''')
-
-        for row in self.db.cursor.fetchall():
-            pago_id, ingreso_id, cliente, vehiculo, placa, total, pagado, pendiente, estado = row
-
-            if estado == 'Pagado':
-                tag = 'pagado'
-            elif estado == 'Parcial':
-                tag = 'parcial'
-            else:
-                tag = 'pendiente'
-
-            valores = (
-                pago_id if pago_id else 'N/A',
-                ingreso_id,
-                cliente,
-                vehiculo,
-                placa,
-                f'${total:.2f}',
-                f'${pagado:.2f}',
-                f'${pendiente:.2f}',
-                estado
-            )
+    def ver_detalle_facturacion(self):
+        selected = self.tree_facturacion.selection()
+        if not selected:
+            messagebox.showwarning("Advertencia", "⚠️ Seleccione un servicio")
+            return
+
+        values = self.tree_facturacion.item(selected[0])['values']
+        pago_id = values[0]
+
+        if pago_id == 'N/A':
+            messagebox.showinfo("Sin Facturación", "Este servicio no tiene precio establecido")
+            return
+
+        # Obtener información completa
+        pago_info = self.db.pagos.detalle(pago_id)
+        if not pago_info:
+            messagebox.showerror("Error", "No se encontró información")
+            return
+
+        monto_total, monto_pagado, estado, fecha_creacion, \
+            ingreso_id, cliente, vehiculo, placa = pago_info
+
+        pendiente = monto_total - monto_pagado
+
+        historial_pagos = self.db.pagos.movimientos(ingreso_id)
+
+        # Crear ventana de detalle
+        detalle_win = tk.Toplevel(self.root)
+        detalle_win.title("Detalle de Facturación")
+        detalle_win.geometry("700x600")
+
+        frame = ttk.Frame(detalle_win, padding="20")
+        frame.pack(fill='both', expand=True)
+
+        ttk.Label(frame, text="DETALLE DE FACTURACIÓN",
+                  font=('Arial', 14, 'bold')).pack(pady=10)
+
+        info_text = scrolledtext.ScrolledText(frame, width=80, height=30, wrap=tk.WORD)
+        info_text.pack(fill='both', expand=True)
+
+        # Escribir información
+        info_text.insert(tk.END, "═" * 70 + "\n")
+        info_text.insert(tk.END, "  INFORMACIÓN DEL SERVICIO\n")
+        info_text.insert(tk.END, "═" * 70 + "\n\n")
+
+        info_text.insert(tk.END, f"📋 Folio: #{ingreso_id}\n")
+        info_text.insert(tk.END, f"👤 Cliente: {cliente}\n")
+        info_text.insert(tk.END, f"🚗 Vehículo: {vehiculo}\n")
+        info_text.insert(tk.END, f"🔖 Placa: {placa}\n")
+        info_text.insert(tk.END, f"📅 Fecha: {fecha_creacion}\n\n")
+
+        info_text.insert(tk.END, "═" * 70 + "\n")
+        info_text.insert(tk.END, "  RESUMEN FINANCIERO\n")
+        info_text.insert(tk.END, "═" * 70 + "\n\n")
+
+        info_text.insert(tk.END, f"💰 Monto Total:     ${monto_total:>12.2f}\n")
+        info_text.insert(tk.END, f"✅ Monto Pagado:    ${monto_pagado:>12.2f}\n")
+        info_text.insert(tk.END, f"⏳ Pendiente:       ${pendiente:>12.2f}\n")
+        info_text.insert(tk.END, f"📊 Estado:          {estado}\n\n")
+
+        if historial_pagos:
+            info_text.insert(tk.END, "═" * 70 + "\n")
+            info_text.insert(tk.END, f"  HISTORIAL DE PAGOS ({len(historial_pagos)} pago(s))\n")
+            info_text.insert(tk.END, "═" * 70 + "\n\n")
+
+            for idx, pago in enumerate(historial_pagos, 1):
+                info_text.insert(tk.END, f"PAGO #{idx}\n")
+                info_text.insert(tk.END, f"  📅 Fecha:   {pago.fecha}\n")
+                info_text.insert(tk.END, f"  💵 Monto:   ${pago.monto:.2f}\n")
+                info_text.insert(tk.END, f"  💳 Método:  {pago.metodo or 'N/A'}\n")
+
+                # El nombre del usuario ya viene en el movimiento
+                if pago.registrado_por:
+                    info_text.insert(tk.END, f"  👤 Por:     {pago.usuario if pago.usuario else 'N/A'}\n")
+
+                if pago.notas:
+                    info_text.insert(tk.END, f"  📝 Notas:   {pago.notas}\n")
+                info_text.insert(tk.END, "\n")
+        else:
+            info_text.insert(tk.END, "═" * 70 + "\n")
+            info_text.insert(tk.END, "  📭 Sin pagos registrados\n")
+            info_text.insert(tk.END, "═" * 70 + "\n")
+
+        info_text.config(state='disabled')
+
+        ttk.Button(frame, text="Cerrar", command=detalle_win.destroy).pack(pady=10)
+
+    def _fila_facturacion(self, row):
+        """Valores y color de una fila de la tabla de facturación"""
+        # Determinar tag de color
+        if row.estado == 'Pagado':
+            tag = 'pagado'
+        elif row.estado == 'Parcial':
+            tag = 'parcial'
+        else:
+            tag = 'pendiente'
+
+        valores = (
+            row.pago_id if row.pago_id else 'N/A',
+            row.ingreso_id,
+            row.cliente,
+            row.vehiculo,
+            row.placa,
+            f'${row.total:.2f}',
+            f'${row.pagado:.2f}',
+            f'${row.pendiente:.2f}',
+            row.estado
+        )
+        return valores, (tag,)
 
-            self.tree_facturacion.insert('', 'end', values=valores, tags=(tag,))
+    def cargar_facturacion(self):
+        """Carga los servicios con su información de facturación, por páginas"""
+        self.grilla_facturacion.recargar(
+            lambda repos, limite, **clave: repos.pagos.pagina_facturacion(limite, **clave),
+            cache=(('facturacion.pagina', ''), self.TABLAS_FACTURACION))
 
     def buscar_facturacion(self):
         """Busca en la facturación"""
         busqueda = self.factura_search.get().strip()
+        self.grilla_facturacion.recargar(
+            lambda repos, limite, **clave: repos.pagos.pagina_facturacion(limite, texto=busqueda, **clave),
+            cache=(('facturacion.pagina', busqueda.lower()), self.TABLAS_FACTURACION), filtrada=bool(busqueda))
 
-        for item in self.tree_facturacion.get_children():
-            self.tree_facturacion.delete(item)
-
-        self.db.cursor.execute('''
-            SELECT 
-                f.id,
-                i.id,
-                c.nombre,
-                v.marca || ' ' || v.modelo,
-                v.placa,
-                COALESCE(f.monto_total, 0),
-                COALESCE(f.monto_pagado, 0),
-                COALESCE(f.monto_total, 0) - COALESCE(f.monto_pagado, 0),
-                f.estado_pago
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            LEFT JOIN pagos f ON i.id = f.ingreso_id
-            WHERE c.nombre LIKE ? OR v.placa LIKE ?
-            ORDER BY i.fecha_ingreso DESC
-        ''', (f'%{busqueda}%', f'%{busqueda}%'))
-
-        for row in self.db.cursor.fetchall():
-            factura_id, ingreso_id, cliente, vehiculo, placa, total, pagado, pendiente, estado = row
-
-            if not estado:
-                estado = 'Sin precio'
-
-            if estado == 'Pagado':
-                tag = 'pagado'
-            elif estado == 'Parcial':
-                tag = 'parcial'
-            else:
-                tag = 'pendiente'
-
-            valores = (
-                factura_id if factura_id else 'N/A',
-                ingreso_id,
-                cliente,
-                vehiculo,
-                placa,
-                f'${total:.2f}',
-                f'${pagado:.2f}',
-                f'${pendiente:.2f}',
-                estado
-            )
+    def exportar_datos(self):
+        """Exporta facturación, pagos, ingresos o servicios de un periodo a CSV/JSON Lines (ver exportar.py)"""
+        exportar_win = tk.Toplevel(self.root)
+        exportar_win.title("Exportar")
+        exportar_win.resizable(False, False)
 
-            self.tree_facturacion.insert('', 'end', values=valores, tags=(tag,))
+        frame = ttk.Frame(exportar_win, padding="20")
+        frame.pack(fill='both', expand=True)
+
+        tipos = {nombre: tipo for tipo, nombre in TIPOS_EXPORTACION.items()}
+        ttk.Label(frame, text="Datos:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        tipo_combo = ttk.Combobox(frame, values=list(tipos), state='readonly', width=25)
+        tipo_combo.current(0)
+        tipo_combo.grid(row=0, column=1, pady=5)
+
+        ttk.Label(frame, text="Desde (AAAA-MM-DD):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        desde_entry = ttk.Entry(frame, width=28)
+        desde_entry.insert(0, time.strftime('%Y-%m-01'))
+        desde_entry.grid(row=1, column=1, pady=5)
+
+        ttk.Label(frame, text="Hasta (AAAA-MM-DD):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        hasta_entry = ttk.Entry(frame, width=28)
+        hasta_entry.insert(0, time.strftime('%Y-%m-%d'))
+        hasta_entry.grid(row=2, column=1, pady=5)
+
+        ttk.Label(frame, text="Deje una fecha vacía para no limitar el periodo",
+                  foreground='gray').grid(row=3, column=0, columnspan=2, sticky=tk.W)
+
+        def aceptar():
+            tipo = tipos[tipo_combo.get()]
+            desde = desde_entry.get().strip() or None
+            hasta = hasta_entry.get().strip() or None
+            ruta = filedialog.asksaveasfilename(
+                parent=exportar_win, title="Guardar exportación", defaultextension='.csv',
+                initialfile=f"{tipo}_{desde or 'inicio'}_{hasta or 'hoy'}.csv",
+                filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Todos los archivos", "*.*")])
+            if not ruta:
+                return
+            exportar_win.destroy()
+            # Las filas van del cursor al archivo en el hilo de consultas, sin pasar por una tabla
+            self.ejecutor.enviar('exportar', lambda repos: exportar(repos, tipo, ruta, desde, hasta),
+                                 lambda filas: messagebox.showinfo(
+                                     "Exportación terminada", f"{filas} filas exportadas a {ruta}"),
+                                 self._exportacion_fallida, indicador=self.factura_cargando)
+
+        ttk.Button(frame, text="Exportar", command=aceptar).grid(row=4, column=0, columnspan=2, pady=15)
+
+    def _exportacion_fallida(self, error):
+        if isinstance(error, ErrorExportacion):
+            messagebox.showerror("Error", str(error))
+        else:
+            messagebox.showerror("Error", f"No se pudo exportar: {error}")
 
     def establecer_precio_servicio(self):
+        """Establece o actualiza el precio de un servicio"""
         selected = self.tree_facturacion.selection()
         if not selected:
-            messagebox.showwarning("Advertencia", "⚠️ Seleccione un servicio de la tabla")
+            messagebox.showwarning(
+                "Advertencia",
+                "⚠️ Seleccione un servicio de la tabla"
+            )
             return
 
         monto_str = self.entry_monto_total.get().strip()
         if not monto_str:
-            messagebox.showwarning("Advertencia", "⚠️ Ingrese el monto total del servicio")
+            messagebox.showwarning(
+                "Advertencia",
+                "⚠️ Ingrese el monto total del servicio"
+            )
             return
 
         try:
@@ -1695,65 +1457,62 @@ class EjecutivoWindow:
             if monto < 0:
                 raise ValueError("El monto no puede ser negativo")
         except ValueError:
-            messagebox.showerror("Error", "❌ Ingrese un monto válido")
+            messagebox.showerror(
+                "Error",
+                "❌ Ingrese un monto válido"
+            )
             return
 
         values = self.tree_facturacion.item(selected[0])['values']
         ingreso_id = values[1]
+        cliente = values[2]
+        vehiculo = values[3]
+
+        confirmacion = messagebox.askyesno(
+            "Confirmar Precio",
+            f"¿Establecer precio del servicio?\n\n"
+            f"Cliente: {cliente}\n"
+            f"Vehículo: {vehiculo}\n\n"
+            f"💰 Monto Total: ${monto:.2f}"
+        )
 
-        # Verificar si ya existe registro de pago
-        self.db.cursor.execute('SELECT id, monto_pagado FROM pagos WHERE ingreso_id = ?', (ingreso_id,))
-        resultado = self.db.cursor.fetchone()
+        if not confirmacion:
+            return
 
         try:
-            if resultado:
-                pago_id, monto_pagado = resultado
-
-                # Recalcular estado
-                if monto_pagado >= monto:
-                    estado = 'Pagado'
-                elif monto_pagado > 0:
-                    estado = 'Parcial'
-                else:
-                    estado = 'Pendiente'
-
-                self.db.cursor.execute('''
-                    UPDATE pagos 
-                    SET monto_total = ?, estado_pago = ?
-                    WHERE id = ?
-                ''', (monto, estado, pago_id))
-            else:
-                # Crear nuevo registro
-                self.db.cursor.execute('''
-                    INSERT INTO pagos (ingreso_id, monto_total, monto_pagado, estado_pago)
-                    VALUES (?, ?, 0, 'Pendiente')
-                ''', (ingreso_id, monto))
+            # Crea la facturación o actualiza el precio y recalcula el estado
+            self.db.pagos.establecer_precio(ingreso_id, monto)
 
-            self.db.conn.commit()
-            messagebox.showinfo("✓ Precio Establecido", f"Se estableció el precio: ${monto:.2f}")
+            messagebox.showinfo(
+                "✓ Precio Establecido",
+                f"Se estableció el precio correctamente\n\n"
+                f"💰 Monto: ${monto:.2f}"
+            )
 
+            # La fila de la tabla ya se corrigió con el evento del cambio
             self.entry_monto_total.delete(0, tk.END)
-            self.cargar_facturacion()
             self.actualizar_resumen_financiero()
 
         except Exception as e:
-            messagebox.showerror("Error", f"❌ Error: {str(e)}")
-            self.db.conn.rollback()
+            messagebox.showerror("Error", f"❌ Error al establecer precio:\n\n{str(e)}")
 
     def registrar_pago(self):
-        """Registra un nuevo pago para un servicio usando la interfaz existente"""
+        """Registra un nuevo pago usando los campos de la interfaz existente (sin ventana emergente)"""
 
         # Verificar que hay un servicio seleccionado
         selection = self.tree_facturacion.selection()
         if not selection:
-            messagebox.showwarning("Advertencia", "Selecciona un servicio primero")
+            messagebox.showwarning("Advertencia", "⚠️ Selecciona un servicio de la tabla primero")
             return
 
-        # Obtener datos del formulario de la interfaz
         try:
-            # Obtener el monto ingresado
+            # Obtener el monto ingresado del campo de la interfaz
             monto_str = self.entry_monto_pago.get().strip()
 
+            if not monto_str:
+                messagebox.showwarning("Advertencia", "⚠️ Ingresa el monto a pagar")
+                return
+
             # Limpiar el monto (eliminar símbolos de moneda, comas, espacios)
             monto_str = monto_str.replace('$', '').replace(',', '').replace(' ', '')
 
@@ -1762,1002 +1521,111 @@ class EjecutivoWindow:
                 monto = float(monto_str)
             except ValueError:
                 messagebox.showerror("Error",
-                                     f"El monto debe ser un número válido.\nRecibido: '{self.entry_monto_pago.get()}'")
+                                     f"❌ El monto debe ser un número válido\n\nRecibido: '{self.entry_monto_pago.get()}'")
                 return
 
             if monto <= 0:
-                messagebox.showerror("Error", "El monto debe ser mayor a 0")
+                messagebox.showerror("Error", "❌ El monto debe ser mayor a 0")
                 return
 
-            # Obtener método de pago
+            # Obtener método de pago del combobox de la interfaz
             metodo_pago = self.combo_metodo_pago.get()
             if not metodo_pago:
-                messagebox.showerror("Error", "Selecciona un método de pago")
+                messagebox.showerror("Error", "⚠️ Selecciona un método de pago")
                 return
 
-            # Obtener notas (opcional)
+            # Obtener notas del campo de la interfaz
             notas = self.entry_notas_pago.get().strip()
 
-            # ⚠️ CORRECCIÓN CRÍTICA: Obtener el ingreso_id del servicio seleccionado
+            # Obtener el ingreso_id del servicio seleccionado
             item = self.tree_facturacion.item(selection[0])
             values = item['values']
 
-            # El ingreso_id está en la posición [1], NO en [0]
-            # Posición [0] = pago_id (o 'N/A')
-            # Posición [1] = ingreso_id ✓
+            # IMPORTANTE: El ingreso_id está en la posición [1]
             ingreso_id = values[1]
-
-            # Importar módulos necesarios
-            import json
-            from datetime import datetime
+            cliente = values[2]
+            vehiculo = values[3]
 
             # Obtener información actual del pago
-            self.db.cursor.execute('''
-                SELECT id, monto_total, monto_pagado, historial_pagos, estado_pago
-                FROM pagos
-                WHERE ingreso_id = ?
-            ''', (ingreso_id,))
-
-            pago_registro = self.db.cursor.fetchone()
+            pago_registro = self.db.pagos.de_ingreso(ingreso_id)
 
             if not pago_registro:
-                messagebox.showerror("Error", "No se encontró información de pago para este servicio")
+                messagebox.showerror("Error",
+                                     "❌ No se encontró información de pago\n\n"
+                                     "Primero debes establecer un precio para este servicio")
                 return
 
-            pago_id, monto_total, monto_pagado_actual, historial_json, estado_actual = pago_registro
+            monto_total, monto_pagado_actual = pago_registro.monto_total, pago_registro.monto_pagado
 
             # Calcular el monto pendiente
             monto_pendiente = monto_total - (monto_pagado_actual or 0)
 
             # Advertir si el pago es mayor al pendiente
             if monto > monto_pendiente:
-                respuesta = messagebox.askyesno("Confirmar",
-                                                f"El monto a pagar (${monto:.2f}) es mayor al pendiente (${monto_pendiente:.2f}).\n\n"
-                                                "¿Deseas continuar de todas formas?")
+                respuesta = messagebox.askyesno("Confirmar Pago",
+                                                f"⚠️ El monto a pagar (${monto:.2f}) es MAYOR\n"
+                                                f"al pendiente (${monto_pendiente:.2f})\n\n"
+                                                f"¿Deseas continuar de todas formas?")
                 if not respuesta:
                     return
 
-            # Calcular nuevo monto pagado
-            nuevo_monto_pagado = (monto_pagado_actual or 0) + monto
+            # Confirmar el pago
+            confirmacion = messagebox.askyesno(
+                "Confirmar Registro de Pago",
+                f"¿Registrar el siguiente pago?\n\n"
+                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+                f"👤 Cliente: {cliente}\n"
+                f"🚗 Vehículo: {vehiculo}\n"
+                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+                f"💵 Monto: ${monto:.2f}\n"
+                f"💳 Método: {metodo_pago}\n"
+                f"📝 Notas: {notas if notas else '(sin notas)'}\n\n"
+                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+                f"💰 Total del servicio: ${monto_total:.2f}\n"
+                f"✅ Ya pagado: ${monto_pagado_actual or 0:.2f}\n"
+                f"🔜 Nuevo total pagado: ${(monto_pagado_actual or 0) + monto:.2f}"
+            )
+
+            if not confirmacion:
+                return
 
-            # Actualizar historial de pagos
-            if historial_json:
-                try:
-                    historial = json.loads(historial_json)
-                except:
-                    historial = []
-            else:
-                historial = []
-
-            # Agregar el nuevo pago al historial
-            historial.append({
-                'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'monto': monto,
-                'metodo': metodo_pago,
-                'registrado_por': self.user_id,
-                'notas': notas if notas else None
-            })
-
-            # Determinar el nuevo estado del pago
-            if nuevo_monto_pagado >= monto_total:
-                nuevo_estado = 'Pagado'
-            elif nuevo_monto_pagado > 0:
-                nuevo_estado = 'Parcial'
-            else:
-                nuevo_estado = 'Pendiente'
-
-            # Actualizar el registro en la base de datos
-            self.db.cursor.execute('''
-                UPDATE pagos
-                SET monto_pagado = ?,
-                    estado_pago = ?,
-                    ultimo_pago = ?,
-                    ultimo_metodo_pago = ?,
-                    ultimo_fecha_pago = CURRENT_TIMESTAMP,
-                    ultimo_registrado_por = ?,
-                    historial_pagos = ?
-                WHERE ingreso_id = ?
-            ''', (nuevo_monto_pagado, nuevo_estado, monto, metodo_pago,
-                  self.user_id, json.dumps(historial), ingreso_id))
-
-            # Guardar cambios
-            self.db.conn.commit()
+            # Agregar el pago al historial y recalcular el estado en una sola transacción
+            nuevo_monto_pagado, nuevo_estado, monto_total = self.db.pagos.registrar_abono(
+                ingreso_id, monto, metodo_pago, notas, self.user_id)
 
             # Mostrar mensaje de éxito
-            messagebox.showinfo("Éxito",
+            messagebox.showinfo("✅ Pago Registrado",
                                 f"Pago registrado correctamente\n\n"
-                                f"Monto: ${monto:.2f}\n"
-                                f"Método: {metodo_pago}\n"
-                                f"Nuevo estado: {nuevo_estado}\n"
-                                f"Total pagado: ${nuevo_monto_pagado:.2f} de ${monto_total:.2f}")
+                                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+                                f"💵 Monto pagado: ${monto:.2f}\n"
+                                f"💳 Método: {metodo_pago}\n"
+                                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+                                f"📊 Nuevo estado: {nuevo_estado}\n"
+                                f"💰 Total pagado: ${nuevo_monto_pagado:.2f} de ${monto_total:.2f}\n"
+                                f"⏳ Pendiente: ${monto_total - nuevo_monto_pagado:.2f}")
 
             # Limpiar los campos del formulario
             self.entry_monto_pago.delete(0, tk.END)
             self.entry_notas_pago.delete(0, tk.END)
             self.combo_metodo_pago.current(0)
 
-            # Recargar la tabla de facturación
-            self.cargar_facturacion()
-
-            # Actualizar resumen financiero
+            # La fila de la tabla ya se corrigió con el evento del pago; falta el resumen
             self.actualizar_resumen_financiero()
 
         except Exception as e:
-            messagebox.showerror("Error", f"Error al registrar el pago:\n{str(e)}")
+            messagebox.showerror("Error", f"❌ Error al registrar el pago:\n\n{str(e)}")
             import traceback
             print("Error completo:")
             print(traceback.format_exc())
 
-    def ver_detalle_facturacion(self):
-        import json
-
-        selected = self.tree_facturacion.selection()
-        if not selected:
-            messagebox.showwarning("Advertencia", "⚠️ Seleccione un servicio")
-            return
-
-        values = self.tree_facturacion.item(selected[0])['values']
-        pago_id = values[0]
-
-        if pago_id == 'N/A':
-            messagebox.showinfo("Sin Facturación", "Este servicio no tiene precio establecido")
-            return
-
-        # Obtener información completa
-        self.db.cursor.execute('''
-            SELECT p.monto_total, p.monto_pagado, p.estado_pago, p.fecha_creacion, 
-                   p.historial_pagos, i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa
-            FROM pagos p
-            JOIN ingresos i ON p.ingreso_id = i.id
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            WHERE p.id = ?
-        ''', (pago_id,))
-
-        pago_info = self.db.cursor.fetchone()
-        if not pago_info:
-            messagebox.showerror("Error", "No se encontró información")
-            return
-
-        monto_total, monto_pagado, estado, fecha_creacion, historial_str, \
-            ingreso_id, cliente, vehiculo, placa = pago_info
-
-        pendiente = monto_total - monto_pagado
-
-        # Parsear historial
-        historial_pagos = []
-        if historial_str:
-            try:
-                historial_pagos = json.loads(historial_str)
-            except:
-                historial_pagos = []
-
-        # Crear ventana de detalle
-        detalle_win = tk.Toplevel(self.root)
-        detalle_win.title("Detalle de Facturación")
-        detalle_win.geometry("700x600")
-
-        frame = ttk.Frame(detalle_win, padding="20")
-        frame.pack(fill='both', expand=True)
-
-        ttk.Label(frame, text="DETALLE DE FACTURACIÓN",
-                  font=('Arial', 14, 'bold')).pack(pady=10)
-
-        info_text = scrolledtext.ScrolledText(frame, width=80, height=30, wrap=tk.WORD)
-        info_text.pack(fill='both', expand=True)
-
-        # Escribir información
-        info_text.insert(tk.END, "═" * 70 + "\n")
-        info_text.insert(tk.END, "  INFORMACIÓN DEL SERVICIO\n")
-        info_text.insert(tk.END, "═" * 70 + "\n\n")
-
-        info_text.insert(tk.END, f"📋 Folio: #{ingreso_id}\n")
-        info_text.insert(tk.END, f"👤 Cliente: {cliente}\n")
-        info_text.insert(tk.END, f"🚗 Vehículo: {vehiculo}\n")
-        info_text.insert(tk.END, f"🔖 Placa: {placa}\n")
-        info_text.insert(tk.END, f"📅 Fecha: {fecha_creacion}\n\n")
-
-        info_text.insert(tk.END, "═" * 70 + "\n")
-        info_text.insert(tk.END, "  RESUMEN FINANCIERO\n")
-        info_text.insert(tk.END, "═" * 70 + "\n\n")
-
-        info_text.insert(tk.END, f"💰 Monto Total:     ${monto_total:>12.2f}\n")
-        info_text.insert(tk.END, f"✅ Monto Pagado:    ${monto_pagado:>12.2f}\n")
-        info_text.insert(tk.END, f"⏳ Pendiente:       ${pendiente:>12.2f}\n")
-        info_text.insert(tk.END, f"📊 Estado:          {estado}\n\n")
-
-        if historial_pagos:
-            info_text.insert(tk.END, "═" * 70 + "\n")
-            info_text.insert(tk.END, f"  HISTORIAL DE PAGOS ({len(historial_pagos)} pago(s))\n")
-            info_text.insert(tk.END, "═" * 70 + "\n\n")
-
-            for idx, pago in enumerate(historial_pagos, 1):
-                info_text.insert(tk.END, f"PAGO #{idx}\n")
-                info_text.insert(tk.END, f"  📅 Fecha:   {pago.get('fecha', 'N/A')}\n")
-                info_text.insert(tk.END, f"  💵 Monto:   ${pago.get('monto', 0):.2f}\n")
-                info_text.insert(tk.END, f"  💳 Método:  {pago.get('metodo', 'N/A')}\n")
-
-                # Obtener nombre del usuario
-                usuario_id = pago.get('registrado_por')
-                if usuario_id:
-                    self.db.cursor.execute('SELECT nombre FROM usuarios WHERE id = ?', (usuario_id,))
-                    usuario = self.db.cursor.fetchone()
-                    info_text.insert(tk.END, f"  👤 Por:     {usuario[0] if usuario else 'N/A'}\n")
-
-                if pago.get('notas'):
-                    info_text.insert(tk.END, f"  📝 Notas:   {pago['notas']}\n")
-                info_text.insert(tk.END, "\n")
-        else:
-            info_text.insert(tk.END, "═" * 70 + "\n")
-            info_text.insert(tk.END, "  📭 Sin pagos registrados\n")
-            info_text.insert(tk.END, "═" * 70 + "\n")
-
-        info_text.config(state='disabled')
-
-        ttk.Button(frame, text="Cerrar", command=detalle_win.destroy).pack(pady=10)
-
-    def actualizar_resumen_financiero(self):
-        import datetime
-
-        fecha_actual = datetime.datetime.now()
-        mes_actual = fecha_actual.month
-        anio_actual = fecha_actual.year
-
-        # Estadísticas del mes - tabla unificada
-        self.db.cursor.execute('''
-            SELECT 
-                COUNT(*),
-                COALESCE(SUM(monto_total), 0),
-                COALESCE(SUM(monto_pagado), 0),
-                COALESCE(SUM(monto_total - monto_pagado), 0),
-                SUM(CASE WHEN estado_pago = 'Pagado' THEN 1 ELSE 0 END),
-                SUM(CASE WHEN estado_pago != 'Pagado' THEN 1 ELSE 0 END)
-            FROM pagos
-            WHERE strftime('%m', fecha_creacion) = ? 
-            AND strftime('%Y', fecha_creacion) = ?
-        ''', (f'{mes_actual:02d}', str(anio_actual)))
-
-        mes_data = self.db.cursor.fetchone()
-
-        if mes_data:
-            servicios_mes, total_mes, pagado_mes, pendiente_mes, pagados_mes, pendientes_mes = mes_data
-            self.label_mes_total.config(text=f"${total_mes:,.2f}")
-            self.label_mes_pagado.config(text=f"Pagado: ${pagado_mes:,.2f}")
-            self.label_mes_pendiente.config(text=f"Pendiente: ${pendiente_mes:,.2f}")
-
-        # Estadísticas del año
-        self.db.cursor.execute('''
-            SELECT 
-                COUNT(*),
-                COALESCE(SUM(monto_total), 0),
-                COALESCE(SUM(monto_pagado), 0),
-                COALESCE(SUM(monto_total - monto_pagado), 0),
-                SUM(CASE WHEN estado_pago = 'Pagado' THEN 1 ELSE 0 END),
-                SUM(CASE WHEN estado_pago != 'Pagado' THEN 1 ELSE 0 END)
-            FROM pagos
-            WHERE strftime('%Y', fecha_creacion) = ?
-        ''', (str(anio_actual),))
-
-        anio_data = self.db.cursor.fetchone()
-
-        if anio_data:
-            servicios_anio, total_anio, pagado_anio, pendiente_anio, pagados_anio, pendientes_anio = anio_data
-            self.label_anio_total.config(text=f"${total_anio:,.2f}")
-            self.label_anio_pagado.config(text=f"Pagado: ${pagado_anio:,.2f}")
-            self.label_anio_pendiente.config(text=f"Pendiente: ${pendiente_anio:,.2f}")
-
-        # Estadísticas generales
-        self.db.cursor.execute('''
-            SELECT 
-                COUNT(*),
-                SUM(CASE WHEN estado_pago = 'Pagado' THEN 1 ELSE 0 END),
-                SUM(CASE WHEN estado_pago != 'Pagado' THEN 1 ELSE 0 END)
-            FROM pagos
-        ''')
-
-        stats = self.db.cursor.fetchone()
-        if stats:
-            total, pagados, pendientes = stats
-            self.label_total_servicios.config(text=f"Servicios: {total if total else 0}")
-            self.label_servicios_pagados.config(text=f"Pagados: {pagados if pagados else 0}")
-            self.label_servicios_pendientes.config(text=f"Pendientes: {pendientes if pendientes else 0}")
-
-    def crear_tab_facturacion(self):
-        """Crea la pestaña de facturación y pagos"""
-
-        # Frame principal con scroll
-        main_frame = ttk.Frame(self.tab_facturacion)
-        main_frame.pack(fill='both', expand=True)
-
-        canvas = tk.Canvas(main_frame, bg='white')
-        scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas, padding="20")
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
-
-        # ========== SECCIÓN 1: RESUMEN FINANCIERO ==========
-        resumen_frame = ttk.LabelFrame(scrollable_frame, text="📊 Resumen Financiero", padding="15")
-        resumen_frame.pack(fill='x', pady=10)
-
-        btn_actualizar_frame = ttk.Frame(resumen_frame)
-        btn_actualizar_frame.pack(fill='x', pady=5)
-
-        ttk.Button(btn_actualizar_frame, text="🔄 Actualizar Datos",
-                   command=self.actualizar_resumen_financiero).pack(side='left', padx=5)
-
-        # Labels para mostrar estadísticas
-        stats_frame = ttk.Frame(resumen_frame)
-        stats_frame.pack(fill='x', pady=10)
-
-        # Columna 1: Ingresos del mes
-        col1 = ttk.Frame(stats_frame)
-        col1.pack(side='left', padx=20, fill='x', expand=True)
-
-        ttk.Label(col1, text="💰 INGRESOS DEL MES",
-                  font=('Arial', 11, 'bold')).pack(anchor='w')
-        self.label_mes_total = ttk.Label(col1, text="$0.00",
-                                         font=('Arial', 16, 'bold'), foreground='green')
-        self.label_mes_total.pack(anchor='w')
-        self.label_mes_pagado = ttk.Label(col1, text="Pagado: $0.00", foreground='darkgreen')
-        self.label_mes_pagado.pack(anchor='w')
-        self.label_mes_pendiente = ttk.Label(col1, text="Pendiente: $0.00", foreground='red')
-        self.label_mes_pendiente.pack(anchor='w')
-
-        # Columna 2: Ingresos del año
-        col2 = ttk.Frame(stats_frame)
-        col2.pack(side='left', padx=20, fill='x', expand=True)
-
-        ttk.Label(col2, text="💎 INGRESOS DEL AÑO",
-                  font=('Arial', 11, 'bold')).pack(anchor='w')
-        self.label_anio_total = ttk.Label(col2, text="$0.00",
-                                          font=('Arial', 16, 'bold'), foreground='blue')
-        self.label_anio_total.pack(anchor='w')
-        self.label_anio_pagado = ttk.Label(col2, text="Pagado: $0.00", foreground='darkblue')
-        self.label_anio_pagado.pack(anchor='w')
-        self.label_anio_pendiente = ttk.Label(col2, text="Pendiente: $0.00", foreground='red')
-        self.label_anio_pendiente.pack(anchor='w')
-
-        # Columna 3: Estadísticas generales
-        col3 = ttk.Frame(stats_frame)
-        col3.pack(side='left', padx=20, fill='x', expand=True)
-
-        ttk.Label(col3, text="📈 ESTADÍSTICAS",
-                  font=('Arial', 11, 'bold')).pack(anchor='w')
-        self.label_total_servicios = ttk.Label(col3, text="Servicios: 0")
-        self.label_total_servicios.pack(anchor='w')
-        self.label_servicios_pagados = ttk.Label(col3, text="Pagados: 0", foreground='green')
-        self.label_servicios_pagados.pack(anchor='w')
-        self.label_servicios_pendientes = ttk.Label(col3, text="Pendientes: 0", foreground='red')
-        self.label_servicios_pendientes.pack(anchor='w')
-
-        # ========== SECCIÓN 2: GESTIONAR FACTURACIÓN ==========
-        factura_frame = ttk.LabelFrame(scrollable_frame, text="💵 Gestionar Facturación de Servicios", padding="15")
-        factura_frame.pack(fill='x', pady=10)
-
-        # Búsqueda
-        search_factura_frame = ttk.Frame(factura_frame)
-        search_factura_frame.pack(fill='x', pady=5)
-
-        ttk.Label(search_factura_frame, text="Buscar:").pack(side='left', padx=5)
-        self.factura_search = ttk.Entry(search_factura_frame, width=30)
-        self.factura_search.pack(side='left', padx=5)
-        ttk.Button(search_factura_frame, text="🔍 Buscar",
-                   command=self.buscar_facturacion).pack(side='left', padx=5)
-        ttk.Button(search_factura_frame, text="Mostrar Todos",
-                   command=self.cargar_facturacion).pack(side='left', padx=5)
-
-        # Tabla de servicios facturables
-        columns = ('ID', 'Folio', 'Cliente', 'Vehículo', 'Placa', 'Total', 'Pagado', 'Pendiente', 'Estado')
-        self.tree_facturacion = ttk.Treeview(factura_frame, columns=columns, show='headings', height=8)
-
-        anchos = [40, 50, 150, 150, 80, 90, 90, 90, 100]
-        for col, ancho in zip(columns, anchos):
-            self.tree_facturacion.heading(col, text=col)
-            self.tree_facturacion.column(col, width=ancho, anchor='center')
-
-        scroll_factura = ttk.Scrollbar(factura_frame, orient='vertical',
-                                       command=self.tree_facturacion.yview)
-        self.tree_facturacion.configure(yscrollcommand=scroll_factura.set)
-
-        self.tree_facturacion.pack(side='left', fill='both', expand=True)
-        scroll_factura.pack(side='right', fill='y')
-
-        # Configurar colores
-        self.tree_facturacion.tag_configure('pagado', background='#C8E6C9', foreground='#1B5E20')
-        self.tree_facturacion.tag_configure('parcial', background='#FFF9C4', foreground='#F57F17')
-        self.tree_facturacion.tag_configure('pendiente', background='#FFCDD2', foreground='#B71C1C')
-
-        # Controles de facturación
-        control_factura_frame = ttk.Frame(factura_frame)
-        control_factura_frame.pack(fill='x', pady=10)
-
-        ttk.Label(control_factura_frame, text="Monto Total del Servicio: $").pack(side='left', padx=5)
-        self.entry_monto_total = ttk.Entry(control_factura_frame, width=12)
-        self.entry_monto_total.pack(side='left', padx=5)
-
-        ttk.Button(control_factura_frame, text="💰 Establecer/Actualizar Precio",
-                   command=self.establecer_precio_servicio).pack(side='left', padx=10)
-
-        ttk.Button(control_factura_frame, text="📋 Ver Detalle y Pagos",
-                   command=self.ver_detalle_facturacion).pack(side='left', padx=5)
-
-        # ========== SECCIÓN 3: REGISTRAR PAGOS ==========
-        pago_frame = ttk.LabelFrame(scrollable_frame, text="💳 Registrar Pago", padding="15")
-        pago_frame.pack(fill='x', pady=10)
-
-        ttk.Label(pago_frame, text="Servicio seleccionado:").pack(anchor='w', pady=5)
-        self.label_servicio_seleccionado = ttk.Label(pago_frame, text="Ninguno",
-                                                     font=('Arial', 10, 'bold'), foreground='red')
-        self.label_servicio_seleccionado.pack(anchor='w')
-
-        form_pago_frame = ttk.Frame(pago_frame)
-        form_pago_frame.pack(fill='x', pady=10)
-
-        ttk.Label(form_pago_frame, text="Monto a pagar: $").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        self.entry_monto_pago = ttk.Entry(form_pago_frame, width=15)
-        self.entry_monto_pago.grid(row=0, column=1, padx=5, pady=5)
-
-        ttk.Label(form_pago_frame, text="Método de pago:").grid(row=0, column=2, padx=5, pady=5, sticky='w')
-        self.combo_metodo_pago = ttk.Combobox(form_pago_frame, width=15, values=[
-            'Efectivo', 'Tarjeta', 'Transferencia', 'Cheque', 'Otro'
-        ])
-        self.combo_metodo_pago.grid(row=0, column=3, padx=5, pady=5)
-        self.combo_metodo_pago.set('Efectivo')
-
-        ttk.Label(form_pago_frame, text="Notas:").grid(row=1, column=0, padx=5, pady=5, sticky='w')
-        self.entry_notas_pago = ttk.Entry(form_pago_frame, width=60)
-        self.entry_notas_pago.grid(row=1, column=1, columnspan=3, padx=5, pady=5, sticky='ew')
-
-        ttk.Button(pago_frame, text="✅ REGISTRAR PAGO",
-                   command=self.registrar_pago).pack(pady=10)
-
-        # Bind para actualizar servicio seleccionado
-        self.tree_facturacion.bind('<<TreeviewSelect>>', self.actualizar_servicio_seleccionado)
-
-        # Cargar datos iniciales
-        self.cargar_facturacion()
-        self.actualizar_resumen_financiero()
-
-    def actualizar_servicio_seleccionado(self, event):
-        """Actualiza la etiqueta del servicio seleccionado para pago"""
-        selected = self.tree_facturacion.selection()
-        if selected:
-            values = self.tree_facturacion.item(selected[0])['values']
-            cliente = values[2]
-            vehiculo = values[3]
-            total = values[5]
-            pendiente = values[7]
-
-            self.label_servicio_seleccionado.config(
-                text=f"✓ {cliente} - {vehiculo} | Total: ${total} | Pendiente: ${pendiente}",
-                foreground="green"
-            )
-        else:
-            self.label_servicio_seleccionado.config(
-                text="Ninguno",
-                foreground="red"
-            )
-
-    def cargar_facturacion(self):
-        """Carga todos los servicios con su información de facturación"""
-        for item in self.tree_facturacion.get_children():
-            self.tree_facturacion.delete(item)
-
-        self.db.cursor.execute('''
-                    SELECT 
-                        f.id,
-                        i.id,
-                        c.nombre,
-                        v.marca || ' ' || v.modelo,
-                        v.placa,
-                        COALESCE(f.monto_total, 0),
-                        COALESCE(f.monto_pagado, 0),
-                        COALESCE(f.monto_total, 0) - COALESCE(f.monto_pagado, 0),
-                        f.estado_pago
-                    FROM ingresos i
-                    JOIN clientes c ON i.cliente_id = c.id
-                    JOIN vehiculos v ON i.vehiculo_id = v.id
-                    LEFT JOIN pagos f ON i.id = f.ingreso_id
-                    ORDER BY i.fecha_ingreso DESC
-                ''')
-
-        for row in self.db.cursor.fetchall():
-            factura_id, ingreso_id, cliente, vehiculo, placa, total, pagado, pendiente, estado = row
-
-            # Si no tiene factura, crear una pendiente
-            if not estado:
-                estado = 'Sin precio'
-
-            # Determinar tag de color
-            if estado == 'Pagado':
-                tag = 'pagado'
-            elif estado == 'Parcial':
-                tag = 'parcial'
-            else:
-                tag = 'pendiente'
-
-            valores = (
-                factura_id if factura_id else 'N/A',
-                ingreso_id,
-                cliente,
-                vehiculo,
-                placa,
-                f'${total:.2f}',
-                f'${pagado:.2f}',
-                f'${pendiente:.2f}',
-                estado
-            )
-
-            self.tree_facturacion.insert('', 'end', values=valores, tags=(tag,))
-
-    def buscar_facturacion(self):
-        """Busca en la facturación"""
-        busqueda = self.factura_search.get().strip()
-
-        for item in self.tree_facturacion.get_children():
-            self.tree_facturacion.delete(item)
-
-        self.db.cursor.execute('''
-                    SELECT 
-                        f.id,
-                        i.id,
-                        c.nombre,
-                        v.marca || ' ' || v.modelo,
-                        v.placa,
-                        COALESCE(f.monto_total, 0),
-                        COALESCE(f.monto_pagado, 0),
-                        COALESCE(f.monto_total, 0) - COALESCE(f.monto_pagado, 0),
-                        f.estado_pago
-                    FROM ingresos i
-                    JOIN clientes c ON i.cliente_id = c.id
-                    JOIN vehiculos v ON i.vehiculo_id = v.id
-                    LEFT JOIN pagos f ON i.id = f.ingreso_id
-                    WHERE c.nombre LIKE ? OR v.placa LIKE ?
-                    ORDER BY i.fecha_ingreso DESC
-                ''', (f'%{busqueda}%', f'%{busqueda}%'))
-
-        for row in self.db.cursor.fetchall():
-            factura_id, ingreso_id, cliente, vehiculo, placa, total, pagado, pendiente, estado = row
-
-            if not estado:
-                estado = 'Sin precio'
-
-            if estado == 'Pagado':
-                tag = 'pagado'
-            elif estado == 'Parcial':
-                tag = 'parcial'
-            else:
-                tag = 'pendiente'
-
-            valores = (
-                factura_id if factura_id else 'N/A',
-                ingreso_id,
-                cliente,
-                vehiculo,
-                placa,
-                f'${total:.2f}',
-                f'${pagado:.2f}',
-                f'${pendiente:.2f}',
-                estado
-            )
-
-            self.tree_facturacion.insert('', 'end', values=valores, tags=(tag,))
-
-    def establecer_precio_servicio(self):
-        """Establece o actualiza el precio de un servicio"""
-        selected = self.tree_facturacion.selection()
-        if not selected:
-            messagebox.showwarning(
-                "Advertencia",
-                "⚠️ Seleccione un servicio de la tabla"
-            )
-            return
-
-        monto_str = self.entry_monto_total.get().strip()
-        if not monto_str:
-            messagebox.showwarning(
-                "Advertencia",
-                "⚠️ Ingrese el monto total del servicio"
-            )
-            return
-
-        try:
-            monto = float(monto_str)
-            if monto < 0:
-                raise ValueError("El monto no puede ser negativo")
-        except ValueError:
-            messagebox.showerror(
-                "Error",
-                "❌ Ingrese un monto válido"
-            )
-            return
-
-        values = self.tree_facturacion.item(selected[0])['values']
-        ingreso_id = values[1]
-        cliente = values[2]
-        vehiculo = values[3]
-
-        # Verificar si ya existe facturación
-        self.db.cursor.execute('SELECT id, monto_pagado FROM pagos WHERE ingreso_id = ?',
-                               (ingreso_id,))
-        resultado = self.db.cursor.fetchone()
-
-        confirmacion = messagebox.askyesno(
-            "Confirmar Precio",
-            f"¿Establecer precio del servicio?\n\n"
-            f"Cliente: {cliente}\n"
-            f"Vehículo: {vehiculo}\n\n"
-            f"💰 Monto Total: ${monto:.2f}"
-        )
-
-        if not confirmacion:
-            return
-
-        try:
-            if resultado:
-                # Actualizar precio existente
-                factura_id, monto_pagado = resultado
-
-                # Recalcular estado
-                if monto_pagado >= monto:
-                    estado = 'Pagado'
-                elif monto_pagado > 0:
-                    estado = 'Parcial'
-                else:
-                    estado = 'Pendiente'
-
-                self.db.cursor.execute('''
-                            UPDATE pagos 
-                            SET monto_total = ?, estado_pago = ?
-                            WHERE id = ?
-                        ''', (monto, estado, factura_id))
-            else:
-                # Crear nueva facturación
-                self.db.cursor.execute('''
-                            INSERT INTO pagos (ingreso_id, monto_total, monto_pagado, estado_pago)
-                            VALUES (?, ?, 0, 'Pendiente')
-                        ''', (ingreso_id, monto))
-
-            self.db.conn.commit()
-
-            messagebox.showinfo(
-                "✓ Precio Establecido",
-                f"Se estableció el precio correctamente\n\n"
-                f"💰 Monto: ${monto:.2f}"
-            )
-
-            self.entry_monto_total.delete(0, tk.END)
-            self.cargar_facturacion()
-            self.actualizar_resumen_financiero()
-
-        except Exception as e:
-            messagebox.showerror("Error", f"❌ Error al establecer precio:\n\n{str(e)}")
-            self.db.conn.rollback()
-
-    def registrar_pago(self):
-        """Registra un nuevo pago usando los campos de la interfaz existente (sin ventana emergente)"""
-
-        # Verificar que hay un servicio seleccionado
-        selection = self.tree_facturacion.selection()
-        if not selection:
-            messagebox.showwarning("Advertencia", "⚠️ Selecciona un servicio de la tabla primero")
-            return
-
-        try:
-            # Obtener el monto ingresado del campo de la interfaz
-            monto_str = self.entry_monto_pago.get().strip()
-
-            if not monto_str:
-                messagebox.showwarning("Advertencia", "⚠️ Ingresa el monto a pagar")
-                return
-
-            # Limpiar el monto (eliminar símbolos de moneda, comas, espacios)
-            monto_str = monto_str.replace('$', '').replace(',', '').replace(' ', '')
-
-            # Validar que sea un número
-            try:
-                monto = float(monto_str)
-            except ValueError:
-                messagebox.showerror("Error",
-                                     f"❌ El monto debe ser un número válido\n\nRecibido: '{self.entry_monto_pago.get()}'")
-                return
-
-            if monto <= 0:
-                messagebox.showerror("Error", "❌ El monto debe ser mayor a 0")
-                return
-
-            # Obtener método de pago del combobox de la interfaz
-            metodo_pago = self.combo_metodo_pago.get()
-            if not metodo_pago:
-                messagebox.showerror("Error", "⚠️ Selecciona un método de pago")
-                return
-
-            # Obtener notas del campo de la interfaz
-            notas = self.entry_notas_pago.get().strip()
-
-            # Obtener el ingreso_id del servicio seleccionado
-            item = self.tree_facturacion.item(selection[0])
-            values = item['values']
-
-            # IMPORTANTE: El ingreso_id está en la posición [1]
-            ingreso_id = values[1]
-            cliente = values[2]
-            vehiculo = values[3]
-
-            # Importar módulos necesarios
-            import json
-            from datetime import datetime
-
-            # Obtener información actual del pago
-            self.db.cursor.execute('''
-                SELECT id, monto_total, monto_pagado, historial_pagos, estado_pago
-                FROM pagos
-                WHERE ingreso_id = ?
-            ''', (ingreso_id,))
-
-            pago_registro = self.db.cursor.fetchone()
-
-            if not pago_registro:
-                messagebox.showerror("Error",
-                                     "❌ No se encontró información de pago\n\n"
-                                     "Primero debes establecer un precio para este servicio")
-                return
-
-            pago_id, monto_total, monto_pagado_actual, historial_json, estado_actual = pago_registro
-
-            # Calcular el monto pendiente
-            monto_pendiente = monto_total - (monto_pagado_actual or 0)
-
-            # Advertir si el pago es mayor al pendiente
-            if monto > monto_pendiente:
-                respuesta = messagebox.askyesno("Confirmar Pago",
-                                                f"⚠️ El monto a pagar (${monto:.2f}) es MAYOR\n"
-                                                f"al pendiente (${monto_pendiente:.2f})\n\n"
-                                                f"¿Deseas continuar de todas formas?")
-                if not respuesta:
-                    return
-
-            # Confirmar el pago
-            confirmacion = messagebox.askyesno(
-                "Confirmar Registro de Pago",
-                f"¿Registrar el siguiente pago?\n\n"
-                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-                f"👤 Cliente: {cliente}\n"
-                f"🚗 Vehículo: {vehiculo}\n"
-                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-                f"💵 Monto: ${monto:.2f}\n"
-                f"💳 Método: {metodo_pago}\n"
-                f"📝 Notas: {notas if notas else '(sin notas)'}\n\n"
-                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-                f"💰 Total del servicio: ${monto_total:.2f}\n"
-                f"✅ Ya pagado: ${monto_pagado_actual or 0:.2f}\n"
-                f"🔜 Nuevo total pagado: ${(monto_pagado_actual or 0) + monto:.2f}"
-            )
-
-            if not confirmacion:
-                return
-
-            # Calcular nuevo monto pagado
-            nuevo_monto_pagado = (monto_pagado_actual or 0) + monto
-
-            # Actualizar historial de pagos
-            if historial_json:
-                try:
-                    historial = json.loads(historial_json)
-                except:
-                    historial = []
-            else:
-                historial = []
-
-            # Agregar el nuevo pago al historial
-            historial.append({
-                'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'monto': monto,
-                'metodo': metodo_pago,
-                'registrado_por': self.user_id,
-                'notas': notas if notas else None
-            })
-
-            # Determinar el nuevo estado del pago
-            if nuevo_monto_pagado >= monto_total:
-                nuevo_estado = 'Pagado'
-            elif nuevo_monto_pagado > 0:
-                nuevo_estado = 'Parcial'
-            else:
-                nuevo_estado = 'Pendiente'
-
-            # Actualizar el registro en la base de datos
-            self.db.cursor.execute('''
-                UPDATE pagos
-                SET monto_pagado = ?,
-                    estado_pago = ?,
-                    ultimo_pago = ?,
-                    ultimo_metodo_pago = ?,
-                    ultimo_fecha_pago = CURRENT_TIMESTAMP,
-                    ultimo_registrado_por = ?,
-                    historial_pagos = ?
-                WHERE ingreso_id = ?
-            ''', (nuevo_monto_pagado, nuevo_estado, monto, metodo_pago,
-                  self.user_id, json.dumps(historial), ingreso_id))
-
-            # Guardar cambios
-            self.db.conn.commit()
-
-            # Mostrar mensaje de éxito
-            messagebox.showinfo("✅ Pago Registrado",
-                                f"Pago registrado correctamente\n\n"
-                                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-                                f"💵 Monto pagado: ${monto:.2f}\n"
-                                f"💳 Método: {metodo_pago}\n"
-                                f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-                                f"📊 Nuevo estado: {nuevo_estado}\n"
-                                f"💰 Total pagado: ${nuevo_monto_pagado:.2f} de ${monto_total:.2f}\n"
-                                f"⏳ Pendiente: ${monto_total - nuevo_monto_pagado:.2f}")
-
-            # Limpiar los campos del formulario
-            self.entry_monto_pago.delete(0, tk.END)
-            self.entry_notas_pago.delete(0, tk.END)
-            self.combo_metodo_pago.current(0)
-
-            # Recargar la tabla de facturación
-            self.cargar_facturacion()
-
-            # Actualizar resumen financiero
-            self.actualizar_resumen_financiero()
-
-        except Exception as e:
-            messagebox.showerror("Error", f"❌ Error al registrar el pago:\n\n{str(e)}")
-            import traceback
-            print("Error completo:")
-            print(traceback.format_exc())
-    def ver_detalle_facturacion(self):
-        """Muestra el detalle completo de facturación y pagos"""
-        selected = self.tree_facturacion.selection()
-        if not selected:
-            messagebox.showwarning(
-                "Advertencia",
-                "⚠️ Seleccione un servicio"
-            )
-            return
-
-        values = self.tree_facturacion.item(selected[0])['values']
-        factura_id = values[0]
-
-        if factura_id == 'N/A':
-            messagebox.showinfo(
-                "Sin Facturación",
-                "Este servicio aún no tiene precio establecido"
-            )
-            return
-
-        ingreso_id = values[1]
-        cliente = values[2]
-        vehiculo = values[3]
-        placa = values[4]
-
-        # Obtener información completa
-        self.db.cursor.execute('''
-            SELECT monto_total, monto_pagado, estado_pago, fecha_creacion
-            FROM pagos
-            WHERE id = ?
-        ''', (factura_id,))
-
-        factura_info = self.db.cursor.fetchone()
-        if not factura_info:
-            return
-
-        monto_total, monto_pagado, estado, fecha_creacion = factura_info
-        pendiente = monto_total - monto_pagado
-
-        # Obtener historial de pagos
-        self.db.cursor.execute('''
-            SELECT p.fecha_pago, p.monto, p.metodo_pago, u.nombre, p.notas
-            FROM pagos p
-            LEFT JOIN usuarios u ON p.registrado_por = u.id
-            WHERE p.facturacion_id = ?
-            ORDER BY p.fecha_pago DESC
-        ''', (factura_id,))
-
-        pagos = self.db.cursor.fetchall()
-
-        # Crear ventana de detalle
-        detalle_win = tk.Toplevel(self.root)
-        detalle_win.title("Detalle de Facturación")
-        detalle_win.geometry("700x600")
-
-        frame = ttk.Frame(detalle_win, padding="20")
-        frame.pack(fill='both', expand=True)
-
-        # Información del servicio
-        ttk.Label(frame, text="DETALLE DE FACTURACIÓN",
-                  font=('Arial', 14, 'bold')).pack(pady=10)
-
-        info_text = scrolledtext.ScrolledText(frame, width=80, height=30, wrap=tk.WORD)
-        info_text.pack(fill='both', expand=True)
-
-        # Escribir información
-        info_text.insert(tk.END, "═" * 70 + "\n")
-        info_text.insert(tk.END, "  INFORMACIÓN DEL SERVICIO\n")
-        info_text.insert(tk.END, "═" * 70 + "\n\n")
-
-        info_text.insert(tk.END, f"📋 Folio de Ingreso: #{ingreso_id}\n")
-        info_text.insert(tk.END, f"👤 Cliente: {cliente}\n")
-        info_text.insert(tk.END, f"🚗 Vehículo: {vehiculo}\n")
-        info_text.insert(tk.END, f"🔖 Placa: {placa}\n")
-        info_text.insert(tk.END, f"📅 Fecha de facturación: {fecha_creacion}\n\n")
-
-        info_text.insert(tk.END, "═" * 70 + "\n")
-        info_text.insert(tk.END, "  RESUMEN FINANCIERO\n")
-        info_text.insert(tk.END, "═" * 70 + "\n\n")
-
-        info_text.insert(tk.END, f"💰 Monto Total:        ${monto_total:>12.2f}\n")
-        info_text.insert(tk.END, f"✅ Monto Pagado:       ${monto_pagado:>12.2f}\n")
-        info_text.insert(tk.END, f"⏳ Monto Pendiente:    ${pendiente:>12.2f}\n")
-        info_text.insert(tk.END, f"📊 Estado:             {estado}\n\n")
-
-        if pagos:
-            info_text.insert(tk.END, "═" * 70 + "\n")
-            info_text.insert(tk.END, f"  HISTORIAL DE PAGOS ({len(pagos)} pago(s) registrado(s))\n")
-            info_text.insert(tk.END, "═" * 70 + "\n\n")
-
-            for idx, pago in enumerate(pagos, 1):
-                fecha_pago, monto, metodo, usuario, notas = pago
-
-                info_text.insert(tk.END, f"PAGO #{idx}\n")
-                info_text.insert(tk.END, f"  📅 Fecha: {fecha_pago}\n")
-                info_text.insert(tk.END, f"  💵 Monto: ${monto:.2f}\n")
-                info_text.insert(tk.END, f"  💳 Método: {metodo}\n")
-                info_text.insert(tk.END, f"  👤 Registrado por: {usuario if usuario else 'N/A'}\n")
-                if notas:
-                    info_text.insert(tk.END, f"  📝 Notas: {notas}\n")
-                info_text.insert(tk.END, "\n")
-        else:
-            info_text.insert(tk.END, "═" * 70 + "\n")
-            info_text.insert(tk.END, "  📭 Sin pagos registrados\n")
-            info_text.insert(tk.END, "═" * 70 + "\n")
-
-        info_text.config(state='disabled')
-
-        ttk.Button(frame, text="Cerrar",
-                   command=detalle_win.destroy).pack(pady=10)
-
     def actualizar_resumen_financiero(self):
         """Actualiza las estadísticas financieras del mes y año"""
-        import datetime
-
-        fecha_actual = datetime.datetime.now()
+        fecha_actual = datetime.now()
         mes_actual = fecha_actual.month
         anio_actual = fecha_actual.year
 
         # Estadísticas del mes
-        self.db.cursor.execute('''
-            SELECT 
-                COUNT(*),
-                COALESCE(SUM(monto_total), 0),
-                COALESCE(SUM(monto_pagado), 0),
-                COALESCE(SUM(monto_total - monto_pagado), 0),
-                SUM(CASE WHEN estado_pago = 'Pagado' THEN 1 ELSE 0 END),
-                SUM(CASE WHEN estado_pago != 'Pagado' THEN 1 ELSE 0 END)
-            FROM pagos
-            WHERE strftime('%m', fecha_creacion) = ? 
-            AND strftime('%Y', fecha_creacion) = ?
-        ''', (f'{mes_actual:02d}', str(anio_actual)))
-
-        mes_data = self.db.cursor.fetchone()
+        mes_data = self.db.pagos.resumen_mes(mes_actual, anio_actual)
 
         if mes_data:
             servicios_mes, total_mes, pagado_mes, pendiente_mes, pagados_mes, pendientes_mes = mes_data
@@ -2767,19 +1635,7 @@ class EjecutivoWindow:
             self.label_mes_pendiente.config(text=f"Pendiente: ${pendiente_mes:,.2f}")
 
         # Estadísticas del año
-        self.db.cursor.execute('''
-            SELECT 
-                COUNT(*),
-                COALESCE(SUM(monto_total), 0),
-                COALESCE(SUM(monto_pagado), 0),
-                COALESCE(SUM(monto_total - monto_pagado), 0),
-                SUM(CASE WHEN estado_pago = 'Pagado' THEN 1 ELSE 0 END),
-                SUM(CASE WHEN estado_pago != 'Pagado' THEN 1 ELSE 0 END)
-            FROM pagos
-            WHERE strftime('%Y', fecha_creacion) = ?
-        ''', (str(anio_actual),))
-
-        anio_data = self.db.cursor.fetchone()
+        anio_data = self.db.pagos.resumen_anio(anio_actual)
 
         if anio_data:
             servicios_anio, total_anio, pagado_anio, pendiente_anio, pagados_anio, pendientes_anio = anio_data
@@ -2789,15 +1645,7 @@ class EjecutivoWindow:
             self.label_anio_pendiente.config(text=f"Pendiente: ${pendiente_anio:,.2f}")
 
         # Estadísticas generales
-        self.db.cursor.execute('''
-            SELECT 
-                COUNT(*),
-                SUM(CASE WHEN estado_pago = 'Pagado' THEN 1 ELSE 0 END),
-                SUM(CASE WHEN estado_pago != 'Pagado' THEN 1 ELSE 0 END)
-            FROM pagos
-        ''')
-
-        stats = self.db.cursor.fetchone()
+        stats = self.db.pagos.estadisticas()
         if stats:
             total, pagados, pendientes = stats
             self.label_total_servicios.config(text=f"Servicios: {total if total else 0}")
@@ -2816,31 +1664,31 @@ class GerenteWindow:
         self.root.title(f"Alan Automotriz - {nombre}")
         self.root.geometry("1000x650")
 
+        # Lecturas pesadas en segundo plano, con su propia conexión
+        self.ejecutor = EjecutorConsultas(self.root, db.ruta, db.configuracion, db.instrumentacion,
+                                          cache=db.cache)
+
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        self.pestanas = PestanasDiferidas(self.notebook, 'GerenteWindow')
 
         self.tab_asignar = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_asignar, text="Asignar Servicios")
-        self.crear_tab_asignar()
+        self.pestanas.agregar(self.tab_asignar, "Asignar Servicios", self.crear_tab_asignar)
 
         self.tab_consulta = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_consulta, text="Consultar Vehículos")
-        self.crear_tab_consulta()
+        self.pestanas.agregar(self.tab_consulta, "Consultar Vehículos", self.crear_tab_consulta)
 
         self.tab_mensajes = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_mensajes, text="Mensajes/Tareas")
-        self.crear_tab_mensajes()
+        self.pestanas.agregar(self.tab_mensajes, "Mensajes/Tareas", self.crear_tab_mensajes)
 
         self.tab_reportes = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_reportes, text="Reportes")
-        self.crear_tab_reportes()
+        self.pestanas.agregar(self.tab_reportes, "Reportes", self.crear_tab_reportes)
 
-        self.tiempos_inicio = {}
-        self.plazos = {}
-        self.thread_activo = True
+        # Reportes nuevos de los técnicos sin recargar la lista (ver buzon.py)
+        self.total_reportes = 0
+        self.buzon_reportes = Buzon(db, user_id, TIPO_REPORTE, self.notebook, self._reportes_nuevos).iniciar()
 
-        self.root.title(f"Alan Automotriz - {nombre}")
-        self.root.geometry("1000x650")
+        self.pestanas.construir(self.tab_asignar)
 
 
     def crear_tab_asignar(self):
@@ -2861,14 +1709,14 @@ class GerenteWindow:
             self.tree_pendientes.column(col, width=130)
 
         self.tree_pendientes.pack(fill='both', expand=True, pady=10)
+        self.db.eventos.suscribir(INGRESO, self._actualizar_pendiente, widget=self.tree_pendientes)
 
         asignar_frame = ttk.LabelFrame(frame, text="Asignar Servicio", padding="10")
         asignar_frame.pack(fill='x', pady=10)
 
         ttk.Label(asignar_frame, text="Asignar a:").grid(row=0, column=0, padx=5, pady=5)
 
-        self.db.cursor.execute("SELECT id, nombre FROM usuarios WHERE rol='Tecnico' AND activo=1")
-        tecnicos = self.db.cursor.fetchall()
+        tecnicos = self.db.usuarios.tecnicos_activos()
 
         self.tecnico_combo = ttk.Combobox(asignar_frame,
                                           values=[f"{t[0]} - {t[1]}" for t in tecnicos],
@@ -2877,17 +1725,14 @@ class GerenteWindow:
 
         ttk.Button(asignar_frame, text="Asignar",
                    command=self.asignar_servicio).grid(row=1, column=0, columnspan=2, pady=10)
+        ttk.Label(asignar_frame, text="Ctrl/Shift + clic en la lista para asignar varios vehículos al mismo técnico",
+                  foreground="gray").grid(row=2, column=0, columnspan=2)
 
         self.cargar_pendientes()
 
     def crear_tab_consulta(self):
         """Pestaña de consulta con sistema de tiempo y colores"""
 
-        # Variables para control de tiempo
-        self.tiempos_inicio = {}
-        self.plazos = {}
-        self.thread_activo = True
-
         frame = ttk.Frame(self.tab_consulta, padding="20")
         frame.pack(fill='both', expand=True)
 
@@ -2897,6 +1742,8 @@ class GerenteWindow:
 
         ttk.Button(btn_frame, text="🔄 Actualizar Lista",
                    command=self.cargar_todos_vehiculos).pack(side='left', padx=5)
+        self.todos_cargando = ttk.Label(btn_frame, text="", foreground="gray")
+        self.todos_cargando.pack(side='right', padx=5)
 
         ttk.Label(btn_frame, text="Cambiar estado a:").pack(side='left', padx=5)
         self.estado_combo = ttk.Combobox(btn_frame, values=[
@@ -2906,6 +1753,8 @@ class GerenteWindow:
         self.estado_combo.pack(side='left', padx=5)
         ttk.Button(btn_frame, text="Actualizar Estado",
                    command=self.actualizar_estado).pack(side='left', padx=5)
+        ttk.Label(btn_frame, text="(Ctrl/Shift + clic para varios)",
+                  foreground="gray").pack(side='left', padx=5)
 
         # Frame para controles de plazo
         control_frame = ttk.LabelFrame(frame, text="⏱️ Asignar Plazo Personalizado a Vehículo Seleccionado",
@@ -2947,6 +1796,13 @@ class GerenteWindow:
         ttk.Label(leyenda_frame, text="🟣 +100% (Retrasado)",
                   foreground="purple").pack(side='left', padx=5)
 
+        # Conteos con el índice de vencimientos; se actualizan al recargar y con cada cambio
+        self.horas_por_vencer = float(self.db.configuracion['plazos_por_vencer_horas'])
+        ttk.Button(leyenda_frame, text="🚨 Retrasados y por vencer",
+                   command=self.ver_plazos_por_vencer).pack(side='right', padx=5)
+        self.resumen_plazos = ttk.Label(leyenda_frame, text="")
+        self.resumen_plazos.pack(side='right', padx=5)
+
         # Tabla de vehículos
         columns = ('ID', 'Cliente', 'Vehículo', 'Placa', 'Estado', 'Asignado a', 'Plazo')
         self.tree_todos = ttk.Treeview(frame, columns=columns, show='headings', height=15)
@@ -2956,8 +1812,23 @@ class GerenteWindow:
             self.tree_todos.heading(col, text=col)
             self.tree_todos.column(col, width=ancho, anchor='center')
 
+        # Cuenta regresiva de los plazos activos, por iid (id del ingreso)
+        self.programador_plazos = ProgramadorPlazos(self.tree_todos, 'Plazo')
+
         scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.tree_todos.yview)
-        self.tree_todos.configure(yscrollcommand=scrollbar.set)
+        self.grilla_todos = GrillaVirtual(self.tree_todos, self.db,
+                                          lambda repos, limite, **clave: repos.ingresos.pagina_con_plazo(limite, **clave),
+                                          clave=lambda f: (f.fecha_ingreso, f.id),
+                                          formatear=self._fila_todos,
+                                          identificador=lambda f: str(f.id),
+                                          scrollbar=scrollbar,
+                                          al_mover=self.programador_plazos.refrescar,
+                                          ejecutor=self.ejecutor, indicador=self.todos_cargando,
+                                          fila=lambda repos, ingreso_id: repos.ingresos.fila_con_plazo(ingreso_id))
+        self.db.eventos.suscribir(INGRESO, self.grilla_todos.actualizar_fila, widget=self.tree_todos)
+        # Una vez por transacción, aunque cambien varios ingresos a la vez
+        self.db.eventos.suscribir(INGRESOS, lambda ingreso_ids: self.actualizar_resumen_plazos(),
+                                  widget=self.tree_todos)
 
         self.tree_todos.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
@@ -2969,22 +1840,17 @@ class GerenteWindow:
         self.tree_todos.tag_configure('morado', background='#9C27B0', foreground='white')
         self.tree_todos.tag_configure('blanco', background='white', foreground='black')
 
-        # Cargar datos y comenzar actualización
+        # Cargar datos; el programador actualiza los plazos desde aquí
         self.cargar_todos_vehiculos()
-        self.iniciar_actualizacion_tiempo()
 
     def asignar_plazo_vehiculo(self):
         """Asigna un plazo personalizado al vehículo seleccionado y lo guarda en BD"""
-        from datetime import datetime, timedelta
-
         seleccion = self.tree_todos.selection()
         if not seleccion:
             messagebox.showwarning("Advertencia", "⚠️ Seleccione un vehículo de la tabla")
             return
 
-        item_id = seleccion[0]
-        valores = self.tree_todos.item(item_id)['values']
-        ingreso_id = valores[0]
+        ingreso_id = self.tree_todos.item(seleccion[0])['values'][0]
 
         # Obtener valores de tiempo
         try:
@@ -3000,62 +1866,17 @@ class GerenteWindow:
             messagebox.showerror("Error", "❌ El plazo debe ser mayor a 0")
             return
 
-        # Crear plazo
-        plazo_personalizado = timedelta(days=dias, hours=horas, minutes=minutos)
         tiempo_inicio = datetime.now()
 
-        # Asignar en memoria
-        self.tiempos_inicio[item_id] = tiempo_inicio
-        self.plazos[item_id] = plazo_personalizado
-
         # ===== GUARDAR EN BASE DE DATOS =====
         try:
-            self.db.cursor.execute('''
-                UPDATE ingresos 
-                SET plazo_dias = ?, 
-                    plazo_horas = ?, 
-                    plazo_minutos = ?,
-                    fecha_inicio_plazo = ?,
-                    plazo_activo = 1
-                WHERE id = ?
-            ''', (dias, horas, minutos, tiempo_inicio.strftime('%Y-%m-%d %H:%M:%S'), ingreso_id))
-
-            self.db.conn.commit()
-
-            # Registrar en historial de servicios
-            self.db.cursor.execute('''
-                INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por)
-                VALUES (?, ?, ?, ?)
-            ''', (ingreso_id, 'Plazo Asignado',
-                  f'Plazo establecido: {dias} días, {horas} horas, {minutos} minutos',
-                  self.user_id))
-
-            self.db.conn.commit()
-
+            # Guarda el plazo (con su vencimiento) y lo registra en el historial de servicios.
+            # El evento del cambio vuelve a leer la fila e inicia la cuenta regresiva.
+            self.db.ingresos.asignar_plazo(ingreso_id, dias, horas, minutos, tiempo_inicio, self.user_id)
         except Exception as e:
             messagebox.showerror("Error", f"❌ Error al guardar plazo:\n{str(e)}")
             return
 
-        # Actualizar vista
-        segundos_totales = plazo_personalizado.total_seconds()
-        dias_texto = int(segundos_totales // 86400)
-        horas_texto = int((segundos_totales % 86400) // 3600)
-        minutos_texto = int((segundos_totales % 3600) // 60)
-        segundos_texto = int(segundos_totales % 60)
-
-        if dias_texto > 0:
-            plazo_texto = f"⏳ {dias_texto}d {horas_texto}h {minutos_texto}m {segundos_texto}s"
-        elif horas_texto > 0:
-            plazo_texto = f"⏳ {horas_texto}h {minutos_texto}m {segundos_texto}s"
-        else:
-            plazo_texto = f"⏳ {minutos_texto}m {segundos_texto}s"
-
-        valores_actuales = list(valores)
-        while len(valores_actuales) < 7:
-            valores_actuales.append('')
-        valores_actuales[6] = plazo_texto
-        self.tree_todos.item(item_id, values=valores_actuales)
-
         messagebox.showinfo("✓ Plazo Asignado",
                             f"✅ Plazo guardado y cuenta regresiva iniciada\n\n"
                             f"⏱️ Tiempo asignado: {dias}d {horas}h {minutos}m\n\n"
@@ -3063,8 +1884,6 @@ class GerenteWindow:
 
     def pausar_plazo_vehiculo(self):
         """Pausa/finaliza el plazo y registra el resultado en historial"""
-        from datetime import datetime
-
         seleccion = self.tree_todos.selection()
         if not seleccion:
             messagebox.showwarning("Advertencia", "⚠️ Seleccione un vehículo")
@@ -3075,14 +1894,15 @@ class GerenteWindow:
         ingreso_id = valores[0]
 
         # Verificar si tiene plazo activo
-        if item_id not in self.tiempos_inicio or item_id not in self.plazos:
+        plazo = self.programador_plazos.plazo_de(item_id)
+        if plazo is None:
             messagebox.showinfo("Información", "Este vehículo no tiene un plazo activo")
             return
 
         # Calcular resultado del plazo
-        tiempo_transcurrido = datetime.now() - self.tiempos_inicio[item_id]
-        plazo_total = self.plazos[item_id]
-        porcentaje = (tiempo_transcurrido.total_seconds() / plazo_total.total_seconds()) * 100
+        inicio, fin = plazo
+        segundos_transcurridos = datetime.now().timestamp() - inicio
+        porcentaje = (segundos_transcurridos / (fin - inicio)) * 100
 
         # Determinar categoría
         if porcentaje < 33:
@@ -3100,8 +1920,8 @@ class GerenteWindow:
         else:
             categoria = "ATRASADO"
             emoji = "🔴"
-            retraso = tiempo_transcurrido - plazo_total
-            mensaje = f"El trabajo se completó con retraso de {int(retraso.total_seconds() / 3600)} horas"
+            retraso = segundos_transcurridos - (fin - inicio)
+            mensaje = f"El trabajo se completó con retraso de {int(retraso / 3600)} horas"
 
         # Confirmar finalización
         confirmacion = messagebox.askyesno(
@@ -3117,29 +1937,13 @@ class GerenteWindow:
             return
 
         try:
-            # Guardar en base de datos
-            self.db.cursor.execute('''
-                UPDATE ingresos 
-                SET plazo_activo = 0
-                WHERE id = ?
-            ''', (ingreso_id,))
-
-            # Registrar en historial
+            # Guardar en base de datos y registrar en historial
             descripcion = (f"Plazo finalizado - Categoría: {categoria} ({porcentaje:.1f}% del tiempo usado). "
                            f"{mensaje}")
+            self.db.ingresos.finalizar_plazo(ingreso_id, categoria, descripcion, self.user_id)
 
-            self.db.cursor.execute('''
-                INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por)
-                VALUES (?, ?, ?, ?)
-            ''', (ingreso_id, f'Plazo Finalizado - {categoria}', descripcion, self.user_id))
-
-            self.db.conn.commit()
-
-            # Eliminar de memoria
-            if item_id in self.tiempos_inicio:
-                del self.tiempos_inicio[item_id]
-            if item_id in self.plazos:
-                del self.plazos[item_id]
+            # Detener la cuenta regresiva
+            self.programador_plazos.quitar(item_id)
 
             # Actualizar vista
             self.tree_todos.item(item_id, tags=('blanco',))
@@ -3155,230 +1959,89 @@ class GerenteWindow:
 
         except Exception as e:
             messagebox.showerror("Error", f"❌ Error al finalizar plazo:\n{str(e)}")
-            self.db.conn.rollback()
-
-    def iniciar_actualizacion_tiempo(self):
-        """Inicia el thread que actualiza los colores y tiempo restante"""
-        import threading
-        import time
-        from datetime import datetime
-
-        def actualizar():
-            while self.thread_activo:
-                try:
-                    for item_id in self.tree_todos.get_children():
-                        if item_id in self.tiempos_inicio and item_id in self.plazos:
-                            tiempo_transcurrido = datetime.now() - self.tiempos_inicio[item_id]
-                            plazo = self.plazos[item_id]
-
-                            # Calcular tiempo restante o retraso
-                            tiempo_restante = plazo - tiempo_transcurrido
-                            segundos_restantes = tiempo_restante.total_seconds()
-
-                            # Calcular porcentaje para el color
-                            porcentaje = (tiempo_transcurrido.total_seconds() /
-                                          plazo.total_seconds()) * 100
-
-                            # Determinar color
-                            if porcentaje < 33:
-                                tag = 'verde'
-                            elif porcentaje < 66:
-                                tag = 'naranja'
-                            elif porcentaje < 100:
-                                tag = 'rojo'
-                            else:
-                                tag = 'morado'
-
-                            # Aplicar color
-                            self.tree_todos.item(item_id, tags=(tag,))
-
-                            # Formatear el texto del tiempo
-                            if segundos_restantes > 0:
-                                # Tiempo restante (cuenta regresiva)
-                                dias = int(segundos_restantes // 86400)
-                                horas = int((segundos_restantes % 86400) // 3600)
-                                minutos = int((segundos_restantes % 3600) // 60)
-                                segundos = int(segundos_restantes % 60)
-
-                                if dias > 0:
-                                    texto_tiempo = f"⏳ {dias}d {horas}h {minutos}m {segundos}s"
-                                elif horas > 0:
-                                    texto_tiempo = f"⏳ {horas}h {minutos}m {segundos}s"
-                                else:
-                                    texto_tiempo = f"⏳ {minutos}m {segundos}s"
-                            else:
-                                # Tiempo de retraso (después de llegar a 0)
-                                segundos_retraso = abs(segundos_restantes)
-                                dias = int(segundos_retraso // 86400)
-                                horas = int((segundos_retraso % 86400) // 3600)
-                                minutos = int((segundos_retraso % 3600) // 60)
-                                segundos = int(segundos_retraso % 60)
-
-                                if dias > 0:
-                                    texto_tiempo = f"🚨 RETRASO: {dias}d {horas}h {minutos}m {segundos}s"
-                                elif horas > 0:
-                                    texto_tiempo = f"🚨 RETRASO: {horas}h {minutos}m {segundos}s"
-                                else:
-                                    texto_tiempo = f"🚨 RETRASO: {minutos}m {segundos}s"
-
-                            # Actualizar la columna de plazo
-                            valores = list(self.tree_todos.item(item_id, 'values'))
-                            if len(valores) >= 7:
-                                valores[6] = texto_tiempo
-                                self.tree_todos.item(item_id, values=valores)
-
-                    time.sleep(1)  # Actualizar cada segundo
-                except:
-                    pass
-
-        thread = threading.Thread(target=actualizar, daemon=True)
-        thread.start()
 
     def cargar_todos_vehiculos(self):
-        """Carga todos los vehículos CON sus plazos guardados en BD"""
-        from datetime import datetime, timedelta
-
-        # GUARDAR plazos actuales en memoria antes de limpiar
-        plazos_guardados = {}
-        for item_id in self.tree_todos.get_children():
-            valores = self.tree_todos.item(item_id)['values']
-            if valores:
-                ingreso_id = valores[0]
-                if item_id in self.tiempos_inicio and item_id in self.plazos:
-                    plazos_guardados[ingreso_id] = {
-                        'inicio': self.tiempos_inicio[item_id],
-                        'plazo': self.plazos[item_id]
-                    }
-
-        # Limpiar vista
-        for item in self.tree_todos.get_children():
-            self.tree_todos.delete(item)
-
-        # Limpiar memoria
-        self.tiempos_inicio.clear()
-        self.plazos.clear()
-
-        # Cargar datos desde base de datos CON información de plazos
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado,
-                   COALESCE(u.nombre, 'Sin asignar'),
-                   i.plazo_dias, i.plazo_horas, i.plazo_minutos, 
-                   i.fecha_inicio_plazo, i.plazo_activo
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            LEFT JOIN usuarios u ON i.asignado_a = u.id
-            ORDER BY i.fecha_ingreso DESC
-        ''')
-
-        # RESTAURAR plazos desde la memoria guardada o desde BD
-        for row in self.db.cursor.fetchall():
-            ingreso_id, cliente, vehiculo, placa, estado, asignado, \
-                plazo_dias, plazo_horas, plazo_minutos, fecha_inicio_str, plazo_activo = row
-
-            plazo_texto = 'Sin plazo'
-            item_id = None
-
-            # PRIORIDAD 1: Restaurar desde memoria (si existe)
-            if ingreso_id in plazos_guardados:
-                tiempo_inicio = plazos_guardados[ingreso_id]['inicio']
-                plazo_total = plazos_guardados[ingreso_id]['plazo']
-
-                tiempo_transcurrido = datetime.now() - tiempo_inicio
-                tiempo_restante = plazo_total - tiempo_transcurrido
-                segundos_restantes = tiempo_restante.total_seconds()
-
-                # Formatear texto
-                if segundos_restantes > 0:
-                    dias = int(segundos_restantes // 86400)
-                    horas = int((segundos_restantes % 86400) // 3600)
-                    minutos = int((segundos_restantes % 3600) // 60)
-                    segundos = int(segundos_restantes % 60)
-
-                    if dias > 0:
-                        plazo_texto = f"⏳ {dias}d {horas}h {minutos}m {segundos}s"
-                    elif horas > 0:
-                        plazo_texto = f"⏳ {horas}h {minutos}m {segundos}s"
-                    else:
-                        plazo_texto = f"⏳ {minutos}m {segundos}s"
-                else:
-                    segundos_retraso = abs(segundos_restantes)
-                    dias = int(segundos_retraso // 86400)
-                    horas = int((segundos_retraso % 86400) // 3600)
-                    minutos = int((segundos_retraso % 3600) // 60)
-
-                    if dias > 0:
-                        plazo_texto = f"🚨 RETRASO: {dias}d {horas}h {minutos}m"
-                    elif horas > 0:
-                        plazo_texto = f"🚨 RETRASO: {horas}h {minutos}m"
-                    else:
-                        plazo_texto = f"🚨 RETRASO: {minutos}m"
-
-                valores_completos = [ingreso_id, cliente, vehiculo, placa, estado, asignado, plazo_texto]
-                item_id = self.tree_todos.insert('', 'end', values=valores_completos)
-
-                # RESTAURAR en memoria
-                self.tiempos_inicio[item_id] = tiempo_inicio
-                self.plazos[item_id] = plazo_total
-
-            # PRIORIDAD 2: Si tiene plazo activo en BD (nuevo ingreso o primera carga)
-            elif plazo_activo and fecha_inicio_str:
-                try:
-                    plazo_total = timedelta(days=plazo_dias or 0,
-                                            hours=plazo_horas or 0,
-                                            minutes=plazo_minutos or 0)
-
-                    fecha_inicio = datetime.strptime(fecha_inicio_str, '%Y-%m-%d %H:%M:%S')
-
-                    tiempo_transcurrido = datetime.now() - fecha_inicio
-                    tiempo_restante = plazo_total - tiempo_transcurrido
-                    segundos_restantes = tiempo_restante.total_seconds()
-
-                    if segundos_restantes > 0:
-                        dias = int(segundos_restantes // 86400)
-                        horas = int((segundos_restantes % 86400) // 3600)
-                        minutos = int((segundos_restantes % 3600) // 60)
-                        segundos = int(segundos_restantes % 60)
-
-                        if dias > 0:
-                            plazo_texto = f"⏳ {dias}d {horas}h {minutos}m {segundos}s"
-                        elif horas > 0:
-                            plazo_texto = f"⏳ {horas}h {minutos}m {segundos}s"
-                        else:
-                            plazo_texto = f"⏳ {minutos}m {segundos}s"
-                    else:
-                        segundos_retraso = abs(segundos_restantes)
-                        dias = int(segundos_retraso // 86400)
-                        horas = int((segundos_retraso % 86400) // 3600)
-                        minutos = int((segundos_retraso % 3600) // 60)
-
-                        if dias > 0:
-                            plazo_texto = f"🚨 RETRASO: {dias}d {horas}h {minutos}m"
-                        elif horas > 0:
-                            plazo_texto = f"🚨 RETRASO: {horas}h {minutos}m"
-                        else:
-                            plazo_texto = f"🚨 RETRASO: {minutos}m"
-
-                    valores_completos = [ingreso_id, cliente, vehiculo, placa, estado, asignado, plazo_texto]
-                    item_id = self.tree_todos.insert('', 'end', values=valores_completos)
-
-                    self.tiempos_inicio[item_id] = fecha_inicio
-                    self.plazos[item_id] = plazo_total
-
-                except Exception as e:
-                    valores_completos = [ingreso_id, cliente, vehiculo, placa, estado, asignado, 'Error en plazo']
-                    self.tree_todos.insert('', 'end', values=valores_completos)
-
-            # PRIORIDAD 3: Plazo finalizado
-            elif plazo_dias is not None and not plazo_activo:
+        """Carga los vehículos por páginas CON sus plazos guardados en BD.
+
+        Las filas usan el id del ingreso como iid, así que los plazos que ya
+        corren en el programador siguen valiendo al recargar.
+        """
+        self.grilla_todos.recargar()
+        self.actualizar_resumen_plazos()
+
+    def _fila_todos(self, row):
+        """Valores de una fila de la tabla de vehículos con su plazo.
+
+        El vencimiento viene guardado en segundos epoch (vence_plazo): la fila
+        no interpreta ninguna fecha.
+        """
+        item_id = str(row.id)
+        plazo_texto = 'Sin plazo'
+        tags = ()
+
+        if row.plazo_activo and row.vence_plazo is not None:
+            duracion = (row.plazo_dias or 0) * 86400 + (row.plazo_horas or 0) * 3600 + (row.plazo_minutos or 0) * 60
+            plazo = (row.vence_plazo - duracion, row.vence_plazo)
+            # Si la cuenta regresiva ya corre con el mismo vencimiento se conserva
+            if self.programador_plazos.plazo_de(item_id) != plazo:
+                self.programador_plazos.agregar_epoch(item_id, *plazo)
+            plazo_texto, banda = self.programador_plazos.vista(item_id)
+            tags = (banda,)
+        else:
+            self.programador_plazos.quitar(item_id)
+            if row.plazo_dias is not None and not row.plazo_activo:
                 plazo_texto = '✓ Finalizado'
-                valores_completos = [ingreso_id, cliente, vehiculo, placa, estado, asignado, plazo_texto]
-                self.tree_todos.insert('', 'end', values=valores_completos)
 
-            # PRIORIDAD 4: Sin plazo
-            else:
-                valores_completos = [ingreso_id, cliente, vehiculo, placa, estado, asignado, plazo_texto]
-                self.tree_todos.insert('', 'end', values=valores_completos)
+        valores = [row.id, row.cliente, row.vehiculo, row.placa, row.estado, row.asignado, plazo_texto]
+        return valores, tags
+
+    def actualizar_resumen_plazos(self):
+        """Cuántos plazos activos hay en cada banda y cuántos vencen pronto"""
+        bandas = self.db.ingresos.conteo_bandas()
+        por_vencer = len(self.db.ingresos.plazos_por_vencer(self.horas_por_vencer))
+        self.resumen_plazos.config(
+            text=f"🟢 {bandas.get('verde', 0)}  🟠 {bandas.get('naranja', 0)}  "
+                 f"🔴 {bandas.get('rojo', 0)}  🟣 {bandas.get('morado', 0)}  |  "
+                 f"⏰ {por_vencer} vencen en {self.horas_por_vencer:g} h")
+
+    def ver_plazos_por_vencer(self):
+        """Lista los plazos retrasados y los que vencen en las próximas horas, por vencimiento"""
+        ahora = int(time.time())
+        vencidos = self.db.ingresos.plazos_vencidos(ahora)
+        por_vencer = self.db.ingresos.plazos_por_vencer(self.horas_por_vencer, ahora)
+        self.actualizar_resumen_plazos()
+        if not vencidos and not por_vencer:
+            messagebox.showinfo("Plazos", f"No hay plazos retrasados ni por vencer en "
+                                          f"{self.horas_por_vencer:g} horas")
+            return
+
+        plazos_win = tk.Toplevel(self.root)
+        plazos_win.title("Plazos retrasados y por vencer")
+        plazos_win.geometry("850x400")
+
+        frame = ttk.Frame(plazos_win, padding="10")
+        frame.pack(fill='both', expand=True)
+
+        columns = ('ID', 'Cliente', 'Vehículo', 'Placa', 'Estado', 'Asignado a', 'Vence', 'Plazo')
+        tree = ttk.Treeview(frame, columns=columns, show='headings')
+        anchos = [50, 140, 140, 90, 90, 140, 130, 150]
+        for col, ancho in zip(columns, anchos):
+            tree.heading(col, text=col)
+            tree.column(col, width=ancho, anchor='center')
+        tree.tag_configure('morado', background='#9C27B0', foreground='white')
+        tree.tag_configure('rojo', background='#F44336', foreground='white')
+
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+
+        for row, tag in [(r, 'morado') for r in vencidos] + [(r, 'rojo') for r in por_vencer]:
+            tree.insert('', 'end', tags=(tag,), values=(
+                row.id, row.cliente, row.vehiculo, row.placa, row.estado, row.asignado,
+                time.strftime('%Y-%m-%d %H:%M', time.localtime(row.vence_plazo)),
+                texto_plazo(row.vence_plazo - ahora)))
+
+        tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
 
     def crear_tab_mensajes(self):
         """Crea la pestaña de mensajes/tareas con mejor distribución de espacio"""
@@ -3439,6 +2102,7 @@ class GerenteWindow:
                 self.tree_msg_ing.column(col, width=130)
 
         self.tree_msg_ing.pack(fill='x', pady=5)
+        self.db.eventos.suscribir(INGRESO, self._actualizar_en_taller, widget=self.tree_msg_ing)
 
         # Indicador de selección
         self.label_vehiculo_msg = ttk.Label(ing_frame, text="Vehículo seleccionado: Ninguno",
@@ -3549,10 +2213,9 @@ class GerenteWindow:
         tecnico_nombre = vehiculo_info[4] if vehiculo_info[4] else "Sin asignar"
 
         # 4. Verificar que tenga técnico asignado
-        self.db.cursor.execute('SELECT asignado_a FROM ingresos WHERE id=?', (ingreso_id,))
-        result = self.db.cursor.fetchone()
+        para_usuario = self.db.ingresos.tecnico_asignado(ingreso_id)
 
-        if not result or not result[0]:
+        if not para_usuario:
             messagebox.showwarning(
                 "Advertencia",
                 f"⚠️ Este vehículo NO tiene técnico asignado\n\n"
@@ -3562,8 +2225,6 @@ class GerenteWindow:
             )
             return
 
-        para_usuario = result[0]
-
         # 5. Confirmar envío
         confirmacion = messagebox.askyesno(
             "Confirmar Envío de Tarea",
@@ -3580,11 +2241,7 @@ class GerenteWindow:
 
         # 6. Insertar mensaje en base de datos
         try:
-            self.db.cursor.execute(
-                'INSERT INTO mensajes (ingreso_id, de_usuario, para_usuario, mensaje, tipo) VALUES (?, ?, ?, ?, ?)',
-                (ingreso_id, self.user_id, para_usuario, mensaje, 'Tarea del Gerente')
-            )
-            self.db.conn.commit()
+            self.db.mensajes.enviar(ingreso_id, self.user_id, para_usuario, mensaje, TIPO_TAREA)
 
             messagebox.showinfo(
                 "✓ Tarea Enviada",
@@ -3609,18 +2266,9 @@ class GerenteWindow:
 
         self.rep_text.delete(1.0, tk.END)
 
-        self.db.cursor.execute('''
-            SELECT m.id, m.fecha, v.placa, v.marca || ' ' || v.modelo, u.nombre, m.mensaje, m.leido, c.nombre
-            FROM mensajes m
-            JOIN ingresos i ON m.ingreso_id = i.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN usuarios u ON m.de_usuario = u.id
-            WHERE m.para_usuario = ? AND m.tipo = 'Reporte del Técnico'
-            ORDER BY m.leido ASC, m.fecha DESC
-        ''', (self.user_id,))
-
-        reportes = self.db.cursor.fetchall()
+        reportes = self.db.mensajes.reportes_recibidos(self.user_id)
+        self.total_reportes = len(reportes)
+        self.buzon_reportes.visto_hasta(max((r.id for r in reportes), default=0))
 
         if not reportes:
             self.rep_text.insert(tk.END, "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n")
@@ -3632,59 +2280,100 @@ class GerenteWindow:
             return
 
         # Contar reportes nuevos
-        nuevos = sum(1 for r in reportes if not r[6])
+        nuevos = sum(1 for r in reportes if not r.leido)
 
-        if nuevos > 0:
-            self.rep_text.insert(tk.END, "╔═══════════════════════════════════════════════════════╗\n", "nuevo")
-            self.rep_text.insert(tk.END, f"║  🔴 TIENES {nuevos} REPORTE(S) NUEVO(S) SIN LEER  🔴         ║\n", "nuevo")
-            self.rep_text.insert(tk.END, "╚═══════════════════════════════════════════════════════╝\n\n", "nuevo")
+        # Marcas: 'inicio_reportes' queda entre el aviso y el primer reporte (ahí
+        # entran los que llegan después) y 'pie_reportes' antes de los totales
+        self.rep_text.mark_set('inicio_reportes', '1.0')
+        self.rep_text.mark_gravity('inicio_reportes', 'left')
+        self._aviso_reportes(nuevos)
 
         # Mostrar cada reporte
-        for idx, rep in enumerate(reportes, 1):
-            msg_id, fecha, placa, vehiculo, tecnico, mensaje, leido, cliente = rep
+        for rep in reportes:
+            self._mostrar_reporte(rep, tk.END)
 
-            # Separador
-            self.rep_text.insert(tk.END, "━" * 70 + "\n")
+        self.rep_text.mark_set('pie_reportes', 'end-1c')
+        self.rep_text.mark_gravity('pie_reportes', 'left')
+        self._pie_reportes(nuevos)
 
-            # Estado y número
-            if leido:
-                estado = "✓ LEÍDO"
-                tag = "leido"
-            else:
-                estado = "● NUEVO"
-                tag = "nuevo"
+        # Scroll al inicio
+        self.rep_text.see("1.0")
 
-            self.rep_text.insert(tk.END, f"#{idx} - {estado}  ", tag)
-            self.rep_text.insert(tk.END, f"[{fecha}]\n", "fecha")
+    def _mostrar_reporte(self, rep, donde):
+        """Escribe un reporte en rep_text a partir de la posición donde"""
+        # 'escribir' avanza con cada insert, así el reporte queda en orden
+        self.rep_text.mark_set('escribir', donde)
+        self.rep_text.mark_gravity('escribir', 'right')
 
-            # Información del vehículo
-            self.rep_text.insert(tk.END, f"🚗 Vehículo: ", "vehiculo")
-            self.rep_text.insert(tk.END, f"{vehiculo} - Placa: {placa}\n")
+        def escribir(texto, *tags):
+            self.rep_text.insert('escribir', texto, tags)
 
-            self.rep_text.insert(tk.END, f"👤 Cliente: {cliente}\n")
-            self.rep_text.insert(tk.END, f"🔧 Técnico: {tecnico}\n\n")
+        # Separador
+        escribir("━" * 70 + "\n")
 
-            # Mensaje del reporte
-            self.rep_text.insert(tk.END, "📝 REPORTE:\n")
-            self.rep_text.insert(tk.END, f"{mensaje}\n\n")
+        # Estado y número
+        if rep.leido:
+            estado = "✓ LEÍDO"
+            tag = "leido"
+        else:
+            estado = "● NUEVO"
+            tag = "nuevo"
+
+        escribir(f"#{rep.id} - {estado}  ", tag)
+        escribir(f"[{rep.fecha}]\n", "fecha")
+
+        # Información del vehículo
+        escribir(f"🚗 Vehículo: ", "vehiculo")
+        escribir(f"{rep.vehiculo} - Placa: {rep.placa}\n")
+
+        escribir(f"👤 Cliente: {rep.cliente}\n")
+        escribir(f"🔧 Técnico: {rep.tecnico}\n\n")
 
+        # Mensaje del reporte
+        escribir("📝 REPORTE:\n")
+        escribir(f"{rep.mensaje}\n\n")
+
+    def _aviso_reportes(self, nuevos):
+        """(Re)escribe el aviso de reportes sin leer, antes de 'inicio_reportes'"""
+        self.rep_text.delete('1.0', 'inicio_reportes')
+        if nuevos > 0:
+            self.rep_text.mark_set('escribir', '1.0')
+            self.rep_text.mark_gravity('escribir', 'right')
+            self.rep_text.insert('escribir', "╔═══════════════════════════════════════════════════════╗\n", "nuevo")
+            self.rep_text.insert('escribir', f"║  🔴 TIENES {nuevos} REPORTE(S) NUEVO(S) SIN LEER  🔴         ║\n", "nuevo")
+            self.rep_text.insert('escribir', "╚═══════════════════════════════════════════════════════╝\n\n", "nuevo")
+            self.rep_text.mark_set('inicio_reportes', 'escribir')
+
+    def _pie_reportes(self, nuevos):
+        self.rep_text.delete('pie_reportes', tk.END)
         self.rep_text.insert(tk.END, "━" * 70 + "\n")
         self.rep_text.insert(tk.END,
-                             f"\n📊 Total de reportes: {len(reportes)} | Nuevos: {nuevos} | Leídos: {len(reportes) - nuevos}\n")
-
-        # Scroll al inicio
-        self.rep_text.see("1.0")
+                             f"\n📊 Total de reportes: {self.total_reportes} | Nuevos: {nuevos} | "
+                             f"Leídos: {self.total_reportes - nuevos}\n")
+
+    def _reportes_nuevos(self, nuevos, no_leidos):
+        """Llamada por el buzón: agrega los reportes que llegaron y actualiza el aviso de la pestaña"""
+        aviso_en_pestana(self.notebook, self.tab_mensajes, "Mensajes/Tareas", no_leidos)
+        if not self.pestanas.construida(self.tab_mensajes):
+            # Se cargan completos al abrir la pestaña
+            return
+        if nuevos and not self.total_reportes:
+            # Reemplaza el texto de "No hay reportes"
+            self.cargar_reportes_recibidos()
+            return
+        # Del más antiguo al más nuevo, cada uno arriba del anterior
+        for rep in nuevos:
+            self._mostrar_reporte(rep, 'inicio_reportes')
+        self.total_reportes += len(nuevos)
+        if self.total_reportes:
+            self._aviso_reportes(no_leidos)
+            self._pie_reportes(no_leidos)
 
     def marcar_reportes_leidos(self):
         """Marca todos los reportes como leídos"""
 
         # Contar reportes no leídos
-        self.db.cursor.execute('''
-            SELECT COUNT(*) FROM mensajes 
-            WHERE para_usuario = ? AND tipo = 'Reporte del Técnico' AND leido = 0
-        ''', (self.user_id,))
-
-        no_leidos = self.db.cursor.fetchone()[0]
+        no_leidos = self.db.mensajes.contar_no_leidos(self.user_id, TIPO_REPORTE)
 
         if no_leidos == 0:
             messagebox.showinfo(
@@ -3701,20 +2390,16 @@ class GerenteWindow:
         )
 
         if confirmacion:
-            self.db.cursor.execute('''
-                UPDATE mensajes SET leido = 1 
-                WHERE para_usuario = ? AND tipo = 'Reporte del Técnico' AND leido = 0
-            ''', (self.user_id,))
-
-            self.db.conn.commit()
+            self.db.mensajes.marcar_leidos(self.user_id, TIPO_REPORTE)
 
             messagebox.showinfo(
                 "✓ Actualizado",
                 f"Se marcaron {no_leidos} reporte(s) como leídos"
             )
 
-            # Recargar reportes
+            # Recargar reportes y quitar el aviso de la pestaña
             self.cargar_reportes_recibidos()
+            self.buzon_reportes.revisar()
 
     def crear_tab_reportes(self):
         frame = ttk.Frame(self.tab_reportes, padding="20")
@@ -3725,6 +2410,8 @@ class GerenteWindow:
 
         ttk.Button(frame, text="Reporte General",
                    command=self.reporte_general).pack(pady=5)
+        self.reporte_cargando = ttk.Label(frame, text="", foreground="gray")
+        self.reporte_cargando.pack()
 
         self.reporte_text = scrolledtext.ScrolledText(frame, width=80, height=25)
         self.reporte_text.pack(fill='both', expand=True, pady=10)
@@ -3733,39 +2420,17 @@ class GerenteWindow:
         for item in self.tree_pendientes.get_children():
             self.tree_pendientes.delete(item)
 
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado, i.fecha_ingreso
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            WHERE i.asignado_a IS NULL AND i.estado != 'Entregado'
-            ORDER BY i.fecha_ingreso
-        ''')
+        for ingreso in self.db.ingresos.pendientes_de_asignar():
+            self.tree_pendientes.insert('', 'end', iid=str(ingreso.id), values=ingreso)
 
-        for row in self.db.cursor.fetchall():
-            self.tree_pendientes.insert('', 'end', values=row)
-
-    def cargar_todos_vehiculos(self):
-        for item in self.tree_todos.get_children():
-            self.tree_todos.delete(item)
-
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado,
-                   COALESCE(u.nombre, 'Sin asignar')
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            LEFT JOIN usuarios u ON i.asignado_a = u.id
-            ORDER BY i.fecha_ingreso DESC
-        ''')
-
-        for row in self.db.cursor.fetchall():
-            self.tree_todos.insert('', 'end', values=row)
+    def _actualizar_pendiente(self, ingreso_id):
+        """Evento de escritura: corrige, agrega o quita el ingreso de la lista de pendientes"""
+        actualizar_fila_tree(self.tree_pendientes, str(ingreso_id), self.db.ingresos.fila_pendiente(ingreso_id))
 
     def asignar_servicio(self):
-        selected = self.tree_pendientes.selection()
-        if not selected:
-            messagebox.showwarning("Advertencia", "Seleccione un vehículo")
+        ingreso_ids = ids_seleccionados(self.tree_pendientes)
+        if not ingreso_ids:
+            messagebox.showwarning("Advertencia", "Seleccione uno o más vehículos")
             return
 
         tecnico_str = self.tecnico_combo.get()
@@ -3774,25 +2439,17 @@ class GerenteWindow:
             return
 
         tecnico_id = int(tecnico_str.split(' - ')[0])
-        ingreso_id = self.tree_pendientes.item(selected[0])['values'][0]
-
-        self.db.cursor.execute('UPDATE ingresos SET asignado_a=? WHERE id=?', (tecnico_id, ingreso_id))
-        self.db.cursor.execute(
-            'INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por) VALUES (?, ?, ?, ?)',
-            (ingreso_id, 'Asignación', f'Servicio asignado a técnico ID:{tecnico_id}', self.user_id)
-        )
 
-        self.db.conn.commit()
-        messagebox.showinfo("Éxito", "Servicio asignado correctamente")
-
-        self.cargar_pendientes()
-        self.cargar_todos_vehiculos()
+        # Salen de pendientes y se corrigen en Consultar Vehículos con los eventos de la asignación
+        self.db.ingresos.asignar_tecnicos(ingreso_ids, tecnico_id, self.user_id)
+        messagebox.showinfo("Éxito", "Servicio asignado correctamente" if len(ingreso_ids) == 1
+                            else f"{len(ingreso_ids)} servicios asignados correctamente")
 
     def actualizar_estado(self):
-        """Actualiza el estado del vehículo seleccionado"""
-        selected = self.tree_todos.selection()
-        if not selected:
-            messagebox.showwarning("Advertencia", "⚠️ Seleccione un vehículo")
+        """Actualiza el estado de los vehículos seleccionados"""
+        ingreso_ids = ids_seleccionados(self.tree_todos)
+        if not ingreso_ids:
+            messagebox.showwarning("Advertencia", "⚠️ Seleccione uno o más vehículos")
             return
 
         nuevo_estado = self.estado_combo.get()
@@ -3800,122 +2457,30 @@ class GerenteWindow:
             messagebox.showwarning("Advertencia", "⚠️ Seleccione un estado")
             return
 
-        ingreso_id = self.tree_todos.item(selected[0])['values'][0]
-
-        self.db.cursor.execute('UPDATE ingresos SET estado=? WHERE id=?', (nuevo_estado, ingreso_id))
-        self.db.cursor.execute(
-            'INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por) VALUES (?, ?, ?, ?)',
-            (ingreso_id, 'Cambio de estado', f'Estado actualizado a: {nuevo_estado}', self.user_id)
-        )
-
-        self.db.conn.commit()
-        messagebox.showinfo("✓ Éxito", f"Estado actualizado a: {nuevo_estado}")
-        self.cargar_todos_vehiculos()
+        self.db.ingresos.cambiar_estados(ingreso_ids, nuevo_estado, self.user_id)
+        cuantos = "" if len(ingreso_ids) == 1 else f" ({len(ingreso_ids)} vehículos)"
+        messagebox.showinfo("✓ Éxito", f"Estado actualizado a: {nuevo_estado}{cuantos}")
 
     def cargar_vehiculos_mensajes(self):
         for item in self.tree_msg_ing.get_children():
             self.tree_msg_ing.delete(item)
 
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, u.nombre
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            LEFT JOIN usuarios u ON i.asignado_a = u.id
-            WHERE i.estado != 'Entregado'
-            ORDER BY i.fecha_ingreso DESC
-        ''')
-
-        for row in self.db.cursor.fetchall():
-            self.tree_msg_ing.insert('', 'end', values=row)
-
-    def enviar_tarea(self):
-        selected = self.tree_msg_ing.selection()
-        if not selected:
-            messagebox.showwarning("Advertencia", "Seleccione un vehículo")
-            return
-
-        mensaje = self.msg_text.get(1.0, tk.END).strip()
-        if not mensaje:
-            messagebox.showwarning("Advertencia", "Escriba un mensaje")
-            return
-
-        ingreso_id = self.tree_msg_ing.item(selected[0])['values'][0]
-
-        # Obtener técnico asignado
-        self.db.cursor.execute('SELECT asignado_a FROM ingresos WHERE id=?', (ingreso_id,))
-        result = self.db.cursor.fetchone()
-
-        if not result or not result[0]:
-            messagebox.showwarning("Advertencia", "Este vehículo no tiene técnico asignado")
-            return
-
-        para_usuario = result[0]
-
-        self.db.cursor.execute(
-            'INSERT INTO mensajes (ingreso_id, de_usuario, para_usuario, mensaje, tipo) VALUES (?, ?, ?, ?, ?)',
-            (ingreso_id, self.user_id, para_usuario, mensaje, 'Tarea del Gerente')
-        )
-
-        self.db.conn.commit()
-        messagebox.showinfo("Éxito", "Tarea enviada al técnico")
-        self.msg_text.delete(1.0, tk.END)
-
-    def cargar_reportes_recibidos(self):
-        self.rep_text.delete(1.0, tk.END)
-
-        self.db.cursor.execute('''
-            SELECT m.fecha, v.placa, v.marca || ' ' || v.modelo, u.nombre, m.mensaje, m.leido
-            FROM mensajes m
-            JOIN ingresos i ON m.ingreso_id = i.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            JOIN usuarios u ON m.de_usuario = u.id
-            WHERE m.para_usuario = ? AND m.tipo = 'Reporte del Técnico'
-            ORDER BY m.fecha DESC
-            LIMIT 20
-        ''', (self.user_id,))
-
-        reportes = self.db.cursor.fetchall()
-
-        if not reportes:
-            self.rep_text.insert(tk.END, "No hay reportes recibidos\n")
-            return
+        for ingreso in self.db.ingresos.en_taller():
+            self.tree_msg_ing.insert('', 'end', iid=str(ingreso.id), values=ingreso)
 
-        for rep in reportes:
-            fecha, placa, vehiculo, tecnico, mensaje, leido = rep
-            estado = "✓ Leído" if leido else "● NUEVO"
-            self.rep_text.insert(tk.END, f"[{fecha}] {estado}\n")
-            self.rep_text.insert(tk.END, f"Vehículo: {vehiculo} - Placa: {placa}\n")
-            self.rep_text.insert(tk.END, f"Técnico: {tecnico}\n")
-            self.rep_text.insert(tk.END, f"Reporte: {mensaje}\n")
-            self.rep_text.insert(tk.END, "-" * 60 + "\n\n")
+    def _actualizar_en_taller(self, ingreso_id):
+        """Evento de escritura: corrige, agrega (arriba, es el más reciente) o quita el ingreso"""
+        actualizar_fila_tree(self.tree_msg_ing, str(ingreso_id), self.db.ingresos.fila_en_taller(ingreso_id),
+                             al_final=False)
 
     def reporte_general(self):
-        self.reporte_text.delete(1.0, tk.END)
-
-        self.db.cursor.execute('SELECT COUNT(*) FROM ingresos')
-        total = self.db.cursor.fetchone()[0]
-
-        self.db.cursor.execute("SELECT COUNT(*) FROM ingresos WHERE estado='Entregado'")
-        entregados = self.db.cursor.fetchone()[0]
-
-        self.db.cursor.execute("SELECT COUNT(*) FROM ingresos WHERE estado!='Entregado'")
-        en_proceso = self.db.cursor.fetchone()[0]
-
-        self.reporte_text.insert(tk.END, "REPORTE GENERAL DEL TALLER\n")
-        self.reporte_text.insert(tk.END, "=" * 60 + "\n\n")
-
-        self.reporte_text.insert(tk.END, f"Total de vehículos ingresados: {total}\n")
-        self.reporte_text.insert(tk.END, f"Vehículos entregados: {entregados}\n")
-        self.reporte_text.insert(tk.END, f"Vehículos en proceso: {en_proceso}\n\n")
+        # Una sola consulta agrupada, en segundo plano; el resto se suma en memoria
+        self.ejecutor.enviar('reporte_general', lambda repos: repos.ingresos.conteos(),
+                             self._mostrar_reporte_general, indicador=self.reporte_cargando)
 
-        self.reporte_text.insert(tk.END, "VEHÍCULOS POR ESTADO:\n")
-        self.reporte_text.insert(tk.END, "-" * 60 + "\n")
-
-        estados = ['Ingreso', 'Diagnóstico', 'Hojalatería', 'Pintura', 'Ensamble', 'Listo', 'Entregado']
-        for estado in estados:
-            self.db.cursor.execute('SELECT COUNT(*) FROM ingresos WHERE estado=?', (estado,))
-            count = self.db.cursor.fetchone()[0]
+    def _mostrar_reporte_general(self, conteos):
+        self.reporte_text.delete(1.0, tk.END)
+        self.reporte_text.insert(tk.END, texto_reporte_general(conteos))
 
 
 # ======================== VENTANA TÉCNICO (LAMINADOR Y PINTOR) ========================
@@ -3929,20 +2494,32 @@ class TecnicoWindow:
         self.root.title(f"Alan Automotriz - {nombre}")
         self.root.geometry("1000x650")
 
+        # Lecturas pesadas en segundo plano, con su propia conexión
+        self.ejecutor = EjecutorConsultas(self.root, db.ruta, db.configuracion, db.instrumentacion,
+                                          cache=db.cache)
+
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
+        self.pestanas = PestanasDiferidas(self.notebook, 'TecnicoWindow')
 
         self.tab_servicios = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_servicios, text="Mis Servicios")
-        self.crear_tab_servicios()
+        self.pestanas.agregar(self.tab_servicios, "Mis Servicios", self.crear_tab_servicios)
 
         self.tab_tareas = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_tareas, text="Tareas del Gerente")
-        self.crear_tab_tareas()
+        self.pestanas.agregar(self.tab_tareas, "Tareas del Gerente", self.crear_tab_tareas)
 
         self.tab_reportes = ttk.Frame(self.notebook)
-        self.notebook.add(self.tab_reportes, text="Enviar Reporte")
-        self.crear_tab_reportes()
+        self.pestanas.agregar(self.tab_reportes, "Enviar Reporte", self.crear_tab_reportes)
+
+        # Tareas nuevas del gerente sin recargar la lista (ver buzon.py)
+        self.total_tareas = 0
+        self.nuevas_tareas = 0
+        self.buzon_tareas = Buzon(db, user_id, TIPO_TAREA, self.notebook, self._tareas_nuevas).iniciar()
+        # Cambios de los ingresos asignados sin recargar las listas (ver eventos.py)
+        self.db.eventos.suscribir(INGRESO, self._actualizar_mi_servicio, widget=self.notebook)
+        self.notebook.bind('<<NotebookTabChanged>>', self._al_cambiar_pestana, add='+')
+
+        self.pestanas.construir(self.tab_servicios)
 
     def crear_tab_servicios(self):
         frame = ttk.Frame(self.tab_servicios, padding="20")
@@ -4033,17 +2610,18 @@ class TecnicoWindow:
         for item in self.tree_servicios.get_children():
             self.tree_servicios.delete(item)
 
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado, i.fecha_ingreso
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            WHERE i.asignado_a = ? AND i.estado != 'Entregado'
-            ORDER BY i.fecha_ingreso
-        ''', (self.user_id,))
+        for ingreso in self.db.ingresos.asignados_a(self.user_id):
+            self.tree_servicios.insert('', 'end', iid=str(ingreso.id), values=ingreso)
 
-        for row in self.db.cursor.fetchall():
-            self.tree_servicios.insert('', 'end', values=row)
+    def _actualizar_mi_servicio(self, ingreso_id):
+        """Evento de escritura: corrige o quita el ingreso de Mis Servicios y de Enviar Reporte"""
+        ingreso = self.db.ingresos.fila_de_tecnico(ingreso_id, self.user_id)
+        iid = str(ingreso_id)
+        if self.pestanas.construida(self.tab_servicios):
+            actualizar_fila_tree(self.tree_servicios, iid, ingreso)
+        if self.pestanas.construida(self.tab_reportes):
+            actualizar_fila_tree(self.tree_rep, iid, ingreso and (ingreso.id, ingreso.cliente,
+                                                                  ingreso.vehiculo, ingreso.placa))
 
     def actualizar_estado(self):
         selected = self.tree_servicios.selection()
@@ -4058,76 +2636,93 @@ class TecnicoWindow:
 
         ingreso_id = self.tree_servicios.item(selected[0])['values'][0]
 
-        self.db.cursor.execute('UPDATE ingresos SET estado=? WHERE id=?', (nuevo_estado, ingreso_id))
-        self.db.cursor.execute(
-            'INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por) VALUES (?, ?, ?, ?)',
-            (ingreso_id, 'Actualización de estado', f'Estado actualizado a: {nuevo_estado}', self.user_id)
-        )
-
-        self.db.conn.commit()
+        # La fila se corrige (o sale, si quedó Entregado) con el evento del cambio
+        self.db.ingresos.cambiar_estado(ingreso_id, nuevo_estado, self.user_id,
+                                        tipo_servicio='Actualización de estado')
         messagebox.showinfo("Éxito", "Estado actualizado correctamente")
-        self.cargar_mis_servicios()
 
     def cargar_tareas(self):
         self.tareas_text.delete(1.0, tk.END)
 
-        self.db.cursor.execute('''
-            SELECT m.fecha, v.placa, v.marca || ' ' || v.modelo, c.nombre, m.mensaje, m.leido
-            FROM mensajes m
-            JOIN ingresos i ON m.ingreso_id = i.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            JOIN clientes c ON i.cliente_id = c.id
-            WHERE m.para_usuario = ? AND m.tipo = 'Tarea del Gerente'
-            ORDER BY m.fecha DESC
-        ''', (self.user_id,))
-
-        tareas = self.db.cursor.fetchall()
+        tareas = self.db.mensajes.tareas_recibidas(self.user_id)
+        self.total_tareas = len(tareas)
+        self.buzon_tareas.visto_hasta(max((t.id for t in tareas), default=0))
 
         if not tareas:
             self.tareas_text.insert(tk.END, "No hay tareas asignadas\n")
             return
 
+        # Las tareas que llegan después se agregan en 'inicio_tareas' (ver _tareas_nuevas)
+        self.tareas_text.mark_set('inicio_tareas', '1.0')
+        self.tareas_text.mark_gravity('inicio_tareas', 'left')
+
         nuevas = 0
         for tarea in tareas:
-            fecha, placa, vehiculo, cliente, mensaje, leido = tarea
-
-            if not leido:
+            if not tarea.leido:
                 nuevas += 1
-                estado = "● NUEVA TAREA"
-            else:
-                estado = "✓ Vista"
-
-            self.tareas_text.insert(tk.END, f"[{fecha}] {estado}\n")
-            self.tareas_text.insert(tk.END, f"Cliente: {cliente}\n")
-            self.tareas_text.insert(tk.END, f"Vehículo: {vehiculo} - Placa: {placa}\n")
-            self.tareas_text.insert(tk.END, f"TAREA/INSTRUCCIONES:\n{mensaje}\n")
-            self.tareas_text.insert(tk.END, "=" * 70 + "\n\n")
+            self._mostrar_tarea(tarea, tk.END)
 
+        self.nuevas_tareas = nuevas
+        self._aviso_tareas()
         if nuevas > 0:
-            self.tareas_text.insert(1.0, f"*** TIENES {nuevas} TAREA(S) NUEVA(S) ***\n\n")
-
             # Marcar como leídas
-            self.db.cursor.execute(
-                'UPDATE mensajes SET leido=1 WHERE para_usuario=? AND tipo="Tarea del Gerente" AND leido=0',
-                (self.user_id,)
-            )
-            self.db.conn.commit()
+            self.db.mensajes.marcar_leidos(self.user_id, TIPO_TAREA)
+            self.buzon_tareas.revisar()
+
+    def _mostrar_tarea(self, tarea, donde):
+        """Escribe una tarea en tareas_text a partir de la posición donde"""
+        self.tareas_text.mark_set('escribir', donde)
+        self.tareas_text.mark_gravity('escribir', 'right')
+        estado = "✓ Vista" if tarea.leido else "● NUEVA TAREA"
+
+        self.tareas_text.insert('escribir', f"[{tarea.fecha}] {estado}\n")
+        self.tareas_text.insert('escribir', f"Cliente: {tarea.cliente}\n")
+        self.tareas_text.insert('escribir', f"Vehículo: {tarea.vehiculo} - Placa: {tarea.placa}\n")
+        self.tareas_text.insert('escribir', f"TAREA/INSTRUCCIONES:\n{tarea.mensaje}\n")
+        self.tareas_text.insert('escribir', "=" * 70 + "\n\n")
+
+    def _aviso_tareas(self):
+        """(Re)escribe el aviso de tareas nuevas, antes de 'inicio_tareas'"""
+        self.tareas_text.delete('1.0', 'inicio_tareas')
+        if self.nuevas_tareas > 0:
+            self.tareas_text.mark_set('escribir', '1.0')
+            self.tareas_text.mark_gravity('escribir', 'right')
+            self.tareas_text.insert('escribir', f"*** TIENES {self.nuevas_tareas} TAREA(S) NUEVA(S) ***\n\n")
+            self.tareas_text.mark_set('inicio_tareas', 'escribir')
+
+    def _tareas_nuevas(self, nuevas, no_leidos):
+        """Llamada por el buzón: agrega las tareas que llegaron y actualiza el aviso de la pestaña"""
+        construida = self.pestanas.construida(self.tab_tareas)
+        if nuevas and construida:
+            if not self.total_tareas:
+                # Reemplaza el texto de "No hay tareas"
+                self.cargar_tareas()
+                return
+            for tarea in nuevas:
+                self._mostrar_tarea(tarea, 'inicio_tareas')
+            self.total_tareas += len(nuevas)
+            self.nuevas_tareas += len(nuevas)
+            self._aviso_tareas()
+        if no_leidos and construida and self.notebook.select() == str(self.tab_tareas):
+            # La pestaña está a la vista: las tareas ya se están leyendo
+            self.db.mensajes.marcar_leidos(self.user_id, TIPO_TAREA)
+            no_leidos = 0
+        aviso_en_pestana(self.notebook, self.tab_tareas, "Tareas del Gerente", no_leidos)
+
+    def _al_cambiar_pestana(self, event):
+        """Al abrir la pestaña de tareas se dan por leídas las que llegaron mientras no se veía"""
+        if (event.widget is self.notebook and self.notebook.select() == str(self.tab_tareas)
+                and self.buzon_tareas.no_leidos and self.pestanas.construida(self.tab_tareas)):
+            self.db.mensajes.marcar_leidos(self.user_id, TIPO_TAREA)
+            self.buzon_tareas.revisar()
 
     def cargar_vehiculos_reporte(self):
         for item in self.tree_rep.get_children():
             self.tree_rep.delete(item)
 
-        self.db.cursor.execute('''
-            SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa
-            FROM ingresos i
-            JOIN clientes c ON i.cliente_id = c.id
-            JOIN vehiculos v ON i.vehiculo_id = v.id
-            WHERE i.asignado_a = ? AND i.estado != 'Entregado'
-            ORDER BY i.fecha_ingreso
-        ''', (self.user_id,))
-
-        for row in self.db.cursor.fetchall():
-            self.tree_rep.insert('', 'end', values=row)
+        for ingreso in self.db.ingresos.asignados_a(self.user_id):
+            self.tree_rep.insert('', 'end', iid=str(ingreso.id),
+                                 values=(ingreso.id, ingreso.cliente, ingreso.vehiculo, ingreso.placa))
 
     def enviar_reporte(self):
         selected = self.tree_rep.selection()
@@ -4143,32 +2738,46 @@ class TecnicoWindow:
         ingreso_id = self.tree_rep.item(selected[0])['values'][0]
 
         # Obtener el gerente
-        self.db.cursor.execute("SELECT id FROM usuarios WHERE rol='Gerente' LIMIT 1")
-        gerente = self.db.cursor.fetchone()
+        para_usuario = self.db.usuarios.primer_gerente()
 
-        if not gerente:
+        if not para_usuario:
             messagebox.showerror("Error", "No se encontró un gerente en el sistema")
             return
 
-        para_usuario = gerente[0]
-
-        self.db.cursor.execute(
-            'INSERT INTO mensajes (ingreso_id, de_usuario, para_usuario, mensaje, tipo) VALUES (?, ?, ?, ?, ?)',
-            (ingreso_id, self.user_id, para_usuario, reporte, 'Reporte del Técnico')
-        )
-
-        self.db.conn.commit()
+        self.db.mensajes.enviar(ingreso_id, self.user_id, para_usuario, reporte, TIPO_REPORTE)
         messagebox.showinfo("Éxito", "Reporte enviado al gerente")
         self.rep_text.delete(1.0, tk.END)
 
 
 # ======================== FUNCIÓN PRINCIPAL ========================
 def main():
+    # Reporte de tiempos de arranque y demás avisos en la consola
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s: %(message)s')
     db = Database()
     root = tk.Tk()
+    atajo_reporte_consultas(root, db)
+    cada_horas = float(db.configuracion['respaldo_cada_horas'])
+    if cada_horas > 0:
+        RespaldoPeriodico(db.respaldos, cada_horas).iniciar()
     LoginWindow(root, db)
     root.mainloop()
-from datetime import datetime, timedelta
+
+
+def atajo_reporte_consultas(root, db):
+    """Asocia F12 a guardar_reporte_consultas en toda la ventana, si la instrumentación está activa"""
+    if db.instrumentacion is not None:
+        root.bind_all('<F12>', lambda e: guardar_reporte_consultas(db))
+
+
+def guardar_reporte_consultas(db):
+    """F12: guarda el reporte de las consultas que más tiempo han consumido en esta sesión"""
+    archivo = f"reporte_consultas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    try:
+        db.instrumentacion.volcar(archivo)
+    except OSError as e:
+        messagebox.showerror("Error", f"No se pudo guardar el reporte de consultas: {e}")
+        return
+    messagebox.showinfo("Reporte de consultas", f"Reporte guardado en {archivo}")
 
 
 if __name__ == "__main__":
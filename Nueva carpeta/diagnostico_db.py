@@ -86,16 +86,15 @@ try:
         if 'monto_total' not in columnas:
             print("\n❌ PROBLEMA: Tu tabla 'pagos' no tiene las columnas correctas")
             print("\n📋 SOLUCIÓN:")
-            print("   1. Ejecuta el script: python migrar_base_datos.py")
-            print("   2. Esto agregará las columnas faltantes automáticamente")
-            print("   3. Se creará un backup antes de modificar")
+            print("   1. Abre el sistema (AlanAutomotriz.py)")
+            print("   2. Al iniciar aplica las migraciones pendientes (migraciones.py)")
         else:
             print("\n✅ Tu base de datos parece estar correcta")
     else:
         print("\n❌ PROBLEMA: No existe la tabla 'pagos'")
         print("\n📋 SOLUCIÓN:")
-        print("   1. Ejecuta el script: python migrar_base_datos.py")
-        print("   2. Esto creará la estructura correcta")
+        print("   1. Abre el sistema (AlanAutomotriz.py)")
+        print("   2. Al iniciar creará la estructura correcta (migraciones.py)")
     
 except FileNotFoundError:
     print("\n❌ ERROR: No se encontró el archivo 'alan_automotriz.db'")
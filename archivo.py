@@ -0,0 +1,134 @@
+"""
+Archivo de los ingresos entregados.
+
+Los ingresos con estado 'Entregado' cuya entrega tiene más de
+archivar_despues_de_dias días pasan, con sus servicios, pagos, movimientos
+y mensajes, a la base de archivo (ruta_archivo) que abrir_conexion adjunta
+a cada conexión como ESQUEMA_ARCHIVO. Así las grillas de trabajo recorren
+solo los ingresos vigentes; el historial, los conteos del reporte general y
+el resumen financiero siguen incluyendo los archivados.
+
+Cada lote se copia al archivo en una transacción y se quita de la base de
+trabajo en otra. Si el programa se interrumpe entre las dos, el lote queda
+en ambas bases y la siguiente corrida lo termina de mover.
+
+Uso:
+    python archivo.py
+    python archivo.py --dias 180
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+from migraciones import ESQUEMA_ARCHIVO, TABLAS_ARCHIVADAS
+
+registro = logging.getLogger('alan_automotriz.archivo')
+
+# Ingresos por transacción
+LOTE = 500
+
+# Las fechas se guardan con CURRENT_TIMESTAMP (UTC), por eso el límite se
+# calcula en SQLite. fecha_ingreso <= fecha_entrega, así la condición sobre
+# fecha_ingreso usa idx_ingresos_fecha.
+SQL_INGRESOS_A_ARCHIVAR = '''
+    SELECT id FROM main.ingresos
+    WHERE estado = 'Entregado'
+      AND fecha_ingreso < datetime('now', ?1)
+      AND COALESCE(fecha_entrega, fecha_ingreso) < datetime('now', ?1)
+    ORDER BY fecha_ingreso, id
+    LIMIT ?2
+'''
+# Lotes que quedaron en ambas bases por una corrida interrumpida
+SQL_INGRESOS_DUPLICADOS = f'''
+    SELECT i.id FROM main.ingresos i
+    WHERE i.id IN (SELECT id FROM {ESQUEMA_ARCHIVO}.ingresos)
+    LIMIT ?2
+'''
+# Al borrar de main.pagos los triggers restan esos cobros de resumen_pagos_mes;
+# esta sentencia los vuelve a sumar, porque el resumen incluye lo archivado
+SQL_RESUMEN_SUMAR_ARCHIVADOS = f'''
+    INSERT INTO main.resumen_pagos_mes (periodo, servicios, total, pagado, pagados, pendientes)
+    SELECT strftime('%Y-%m', fecha_creacion), COUNT(*),
+           COALESCE(SUM(monto_total), 0), COALESCE(SUM(monto_pagado), 0),
+           SUM(estado_pago = 'Pagado'), SUM(estado_pago != 'Pagado')
+    FROM {ESQUEMA_ARCHIVO}.pagos
+    WHERE ingreso_id IN (SELECT value FROM json_each(?))
+    GROUP BY 1
+    ON CONFLICT (periodo) DO UPDATE SET
+        servicios = servicios + excluded.servicios,
+        total = total + excluded.total,
+        pagado = pagado + excluded.pagado,
+        pagados = pagados + excluded.pagados,
+        pendientes = pendientes + excluded.pendientes
+'''
+
+
+def _columnas(conn, tabla):
+    """Columnas de la tabla del archivo; la de trabajo las tiene todas (ver migraciones)"""
+    return ', '.join(fila[1] for fila in conn.execute(f'PRAGMA {ESQUEMA_ARCHIVO}.table_info({tabla})'))
+
+
+def _mover(conn, ids):
+    lista = json.dumps(ids)
+    # 1. Copiar al archivo. Lo que ya estaba de una corrida interrumpida se
+    #    borra antes (con DELETE, para que los triggers de búsqueda lo quiten)
+    with conn:
+        for tabla, columna in TABLAS_ARCHIVADAS:
+            columnas = _columnas(conn, tabla)
+            conn.execute(f'DELETE FROM {ESQUEMA_ARCHIVO}.{tabla} '
+                         f'WHERE {columna} IN (SELECT value FROM json_each(?))', (lista,))
+            conn.execute(f'INSERT INTO {ESQUEMA_ARCHIVO}.{tabla} ({columnas}) '
+                         f'SELECT {columnas} FROM main.{tabla} '
+                         f'WHERE {columna} IN (SELECT value FROM json_each(?))', (lista,))
+
+    # 2. Quitar de la base de trabajo solo lo que ya quedó en el archivo
+    with conn:
+        archivados = json.dumps([fila[0] for fila in conn.execute(
+            f'SELECT id FROM {ESQUEMA_ARCHIVO}.ingresos WHERE id IN (SELECT value FROM json_each(?))',
+            (lista,))])
+        for tabla, columna in reversed(TABLAS_ARCHIVADAS):
+            conn.execute(f'DELETE FROM main.{tabla} WHERE {columna} IN (SELECT value FROM json_each(?))',
+                         (archivados,))
+        conn.execute(SQL_RESUMEN_SUMAR_ARCHIVADOS, (archivados,))
+
+
+def archivar(conn, dias, lote=LOTE, progreso=None):
+    """Mueve al archivo los ingresos entregados hace más de 'dias' días y devuelve cuántos"""
+    total = 0
+    for sql in (SQL_INGRESOS_DUPLICADOS, SQL_INGRESOS_A_ARCHIVAR):
+        while True:
+            ids = [fila[0] for fila in conn.execute(sql, (f'-{int(dias)} days', lote))]
+            if not ids:
+                break
+            _mover(conn, ids)
+            total += len(ids)
+            if progreso:
+                progreso(total)
+    registro.info('Ingresos archivados: %d', total)
+    return total
+
+
+def main(argv=None):
+    from base_datos import Database, cargar_configuracion
+
+    configuracion = cargar_configuracion()
+    parser = argparse.ArgumentParser(description='Mueve al archivo los ingresos entregados hace tiempo')
+    parser.add_argument('--ruta', help='Base de datos (por defecto la de alan_automotriz.ini)')
+    parser.add_argument('--dias', type=int, default=int(configuracion['archivar_despues_de_dias']),
+                        help='Antigüedad mínima de la entrega (por defecto archivar_despues_de_dias)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    db = Database(args.ruta)
+    total = archivar(db.conn, args.dias, progreso=lambda n: print(f"  {n} ingresos movidos", end='\r'))
+    print(f"✅ {total} ingresos entregados hace más de {args.dias} días pasaron al archivo")
+    if total:
+        # El archivo solo cambia aquí: se respalda después de cada corrida, junto con la base
+        db.respaldos.respaldar(db.conn)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""
+Acceso a la base de datos de Alan Automotriz.
+
+Contiene la configuración de la conexión (leída de alan_automotriz.ini)
+y la clase Database que usan las ventanas; el esquema está en migraciones.py.
+Este módulo no depende de tkinter.
+"""
+
+import configparser
+import hashlib
+import os
+import re
+import sqlite3
+
+from cache_consultas import CacheConsultas
+from eventos import BusEventos
+from instrumentacion import ConexionInstrumentada, Instrumentacion
+from migraciones import ESQUEMA_ARCHIVO, migrar, migrar_archivo
+from repositorios import (CONSULTAS_AUDITADAS, RECORRIDOS_PERMITIDOS, BusquedaRepo, ClienteRepo,
+                          ExportacionRepo, HistorialRepo, IngresoRepo, MensajeRepo, PagoRepo, UsuarioRepo,
+                          VehiculoRepo)
+from respaldos import Respaldos
+
+
+# ======================== CONFIGURACIÓN DE LA CONEXIÓN ========================
+ARCHIVO_CONFIGURACION = 'alan_automotriz.ini'
+
+# Valores por defecto si el archivo de configuración no existe o le falta una clave
+CONFIGURACION_DEFAULT = {
+    'ruta': 'alan_automotriz.db',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_kb': '20000',
+    'mmap_mb': '256',
+    'temp_store': 'MEMORY',
+    'busy_timeout_ms': '5000',
+    'cached_statements': '256',
+    'instrumentar': 'no',
+    'umbral_lento_ms': '200',
+    'registro_lentas': 'consultas_lentas.log',
+    'carpeta_respaldos': 'respaldos',
+    'respaldos_conservar': '10',
+    'respaldo_comprimir': 'no',
+    'respaldo_cada_horas': '0',
+    'respaldo_paginas_por_paso': '256',
+    'respaldo_pausa_ms': '50',
+    'ruta_archivo': '',
+    'archivar_despues_de_dias': '365',
+    'revisar_mensajes_ms': '3000',
+    'plazos_por_vencer_horas': '24',
+}
+
+
+def cargar_configuracion(archivo=ARCHIVO_CONFIGURACION):
+    """Lee la sección [base_datos] del archivo de configuración"""
+    parser = configparser.ConfigParser()
+    parser.read_dict({'base_datos': CONFIGURACION_DEFAULT})
+    if os.path.exists(archivo):
+        parser.read(archivo, encoding='utf-8')
+    return dict(parser['base_datos'])
+
+
+def abrir_conexion(ruta=None, configuracion=None):
+    """Abre una conexión a SQLite y aplica los PRAGMA de la configuración.
+
+    Con journal_mode=WAL los lectores no esperan a que termine una escritura
+    (por ejemplo un pago que se está guardando) y solo los escritores se
+    turnan entre sí; busy_timeout_ms es lo que espera un escritor antes de
+    reportar 'database is locked'.
+    """
+    if configuracion is None:
+        configuracion = cargar_configuracion()
+    ruta = ruta or configuracion['ruta']
+    instrumentar = configuracion['instrumentar'].strip().lower() in ('si', 'sí', 'true', '1')
+
+    conn = sqlite3.connect(ruta, timeout=int(configuracion['busy_timeout_ms']) / 1000,
+                           cached_statements=int(configuracion['cached_statements']),
+                           factory=ConexionInstrumentada if instrumentar else sqlite3.Connection)
+    if instrumentar:
+        conn.instrumentacion = Instrumentacion(float(configuracion['umbral_lento_ms']),
+                                               configuracion['registro_lentas'] or None)
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(configuracion['busy_timeout_ms'])}")
+    cursor.execute(f"PRAGMA journal_mode = {configuracion['journal_mode']}")
+    cursor.execute(f"PRAGMA synchronous = {configuracion['synchronous']}")
+    # cache_size negativo se interpreta en KiB
+    cursor.execute(f"PRAGMA cache_size = -{int(configuracion['cache_kb'])}")
+    cursor.execute(f"PRAGMA mmap_size = {int(configuracion['mmap_mb']) * 1024 * 1024}")
+    cursor.execute(f"PRAGMA temp_store = {configuracion['temp_store']}")
+
+    # Base de archivo con los ingresos entregados hace tiempo (ver archivo.py)
+    cursor.execute(f'ATTACH DATABASE ? AS {ESQUEMA_ARCHIVO}', (ruta_de_archivo(ruta, configuracion),))
+    cursor.execute(f"PRAGMA {ESQUEMA_ARCHIVO}.journal_mode = {configuracion['journal_mode']}")
+    cursor.execute(f"PRAGMA {ESQUEMA_ARCHIVO}.synchronous = {configuracion['synchronous']}")
+    cursor.close()
+    return conn
+
+
+def ruta_de_archivo(ruta, configuracion):
+    """ruta_archivo de la configuración, o <base>_archivo.db junto a la base"""
+    if configuracion['ruta_archivo']:
+        return configuracion['ruta_archivo']
+    return os.path.splitext(ruta)[0] + '_archivo.db'
+
+
+# ======================== AUDITORÍA DE CONSULTAS ========================
+# Paso de una tabla virtual que recibió su argumento: FTS5 anota cada
+# restricción en idxStr (M = MATCH, = = rowid) y json_each usa idxNum 1 cuando
+# tiene el arreglo. Sin argumento, ambas recorren todo su contenido.
+PASO_VIRTUAL = re.compile(r'SCAN (\S+) VIRTUAL TABLE INDEX (\d+):(\S*)$')
+
+
+def _busqueda_virtual(paso):
+    coincidencia = PASO_VIRTUAL.match(paso)
+    if not coincidencia:
+        return False
+    tabla, indice, restricciones = coincidencia.groups()
+    if tabla == 'json_each':
+        return indice != '0'
+    return 'M' in restricciones or '=' in restricciones
+
+
+# ======================== BASE DE DATOS ========================
+class Repositorios:
+    """Los repositorios de la aplicación sobre una conexión ya abierta"""
+
+    def __init__(self, conn, eventos=None):
+        """eventos: BusEventos donde publican las escrituras de ingresos (ver eventos.py)"""
+        self.conn = conn
+        self.eventos = eventos
+        self.usuarios = UsuarioRepo(conn)
+        self.clientes = ClienteRepo(conn)
+        self.vehiculos = VehiculoRepo(conn)
+        self.ingresos = IngresoRepo(conn, eventos)
+        self.pagos = PagoRepo(conn, eventos)
+        self.mensajes = MensajeRepo(conn)
+        self.busqueda = BusquedaRepo(conn)
+        self.historial = HistorialRepo(conn)
+        self.exportacion = ExportacionRepo(conn)
+
+
+class Database(Repositorios):
+    def __init__(self, ruta=None):
+        self.configuracion = cargar_configuracion()
+        self.ruta = ruta or self.configuracion['ruta']
+        self.conn = abrir_conexion(self.ruta, self.configuracion)
+        # None si la instrumentación de consultas está desactivada
+        self.instrumentacion = getattr(self.conn, 'instrumentacion', None)
+        self.cursor = self.conn.cursor()
+        self.respaldos = Respaldos(self.ruta, self.configuracion, ruta_de_archivo(self.ruta, self.configuracion))
+        # El archivo primero: el resumen de pagos que arma migrar() incluye los archivados
+        migrar_archivo(self.conn)
+        migrar(self.conn, antes_de_migrar=lambda: self.respaldos.respaldar(self.conn, motivo='antes_de_migrar'))
+        # Después del esquema: instala triggers temporales sobre las tablas
+        self.cache = CacheConsultas(self.conn)
+
+        # Las ventanas se suscriben para corregir solo las filas que cambian
+        super().__init__(self.conn, BusEventos())
+
+    def auditar_consultas(self):
+        """Ejecuta ANALYZE y después EXPLAIN QUERY PLAN sobre cada consulta de CONSULTAS_AUDITADAS.
+
+        Devuelve una lista de (nombre, pasos_del_plan, recorridos), donde recorridos
+        son los pasos 'SCAN' (con o sin índice) que no figuran en
+        RECORRIDOS_PERMITIDOS para esa consulta. Con las estadísticas al día el
+        plan es el mismo que verá el programa después de 'consola optimizar'.
+        """
+        self.conn.execute('ANALYZE')
+        resultados = []
+        for nombre, (sql, parametros) in CONSULTAS_AUDITADAS.items():
+            self.cursor.execute('EXPLAIN QUERY PLAN ' + sql, parametros)
+            plan = [fila[3] for fila in self.cursor.fetchall()]
+            permitidos = RECORRIDOS_PERMITIDOS.get(nombre, ())
+            recorridos = [paso for paso in plan
+                          if paso.startswith('SCAN ') and paso != 'SCAN CONSTANT ROW'
+                          and not _busqueda_virtual(paso)
+                          and re.sub(r'subquery-\d+', 'subquery-N', paso) not in permitidos]
+            resultados.append((nombre, plan, recorridos))
+        return resultados
+
+    def hash_password(self, password):
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def autenticar(self, usuario, password):
+        return self.usuarios.autenticar(usuario, self.hash_password(password))
@@ -0,0 +1,217 @@
+"""
+Benchmark de las pantallas sin interfaz gráfica.
+
+Mide, contra una o varias bases (por ejemplo las que crea generar_datos.py),
+las consultas y escrituras que hace cada ventana al cargar, buscar y guardar,
+y escribe un reporte JSON con el mismo formato en cada corrida para poder
+compararlas. Solo mide el acceso a datos: el dibujado en Tk no se incluye.
+
+Uso:
+    python benchmark.py prueba_10k.db prueba_100k.db --salida reporte.json
+    python benchmark.py prueba_100k.db --comparar reporte_anterior.json
+
+Los casos de guardado agregan filas a la base; use --solo-lectura para omitirlos.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from base_datos import Database
+from repositorios import TIPO_REPORTE, TIPO_TAREA
+
+VERSION_REPORTE = 1
+TAMANO_PAGINA = 100
+
+
+# ======================== CASOS ========================
+def _recorrer_paginas(consulta, clave, paginas):
+    """Simula desplazarse por la grilla virtual: primera página y las siguientes"""
+    filas = consulta(TAMANO_PAGINA)
+    total = len(filas)
+    for _ in range(paginas - 1):
+        if len(filas) < TAMANO_PAGINA:
+            break
+        filas = consulta(TAMANO_PAGINA, despues_de=clave(filas[-1]))
+        total += len(filas)
+    return total
+
+
+def _resumen_financiero(db):
+    hoy = datetime.now()
+    db.pagos.resumen_mes(hoy.month, hoy.year)
+    db.pagos.resumen_anio(hoy.year)
+    db.pagos.estadisticas()
+    return 3
+
+
+def _guardar_servicio(db, contexto):
+    """Recorrido completo de un servicio: ingreso, asignación, precio, abono y mensajes"""
+    ingreso_id = db.ingresos.registrar(contexto['cliente_id'], contexto['vehiculo_id'],
+                                       'Benchmark', contexto['ejecutivo'])
+    db.ingresos.asignar_tecnico(ingreso_id, contexto['tecnico'], contexto['gerente'])
+    db.ingresos.cambiar_estado(ingreso_id, 'Diagnóstico', contexto['tecnico'])
+    db.pagos.establecer_precio(ingreso_id, 1000)
+    db.pagos.registrar_abono(ingreso_id, 400, 'Efectivo', '', contexto['ejecutivo'])
+    db.mensajes.enviar(ingreso_id, contexto['gerente'], contexto['tecnico'], 'Benchmark', TIPO_TAREA)
+    db.mensajes.enviar(ingreso_id, contexto['tecnico'], contexto['gerente'], 'Benchmark', TIPO_REPORTE)
+    return 1
+
+
+def preparar_contexto(db):
+    """Usuarios y términos de búsqueda representativos de la base"""
+    conn = db.conn
+    cliente_id, veces = conn.execute('''
+        SELECT cliente_id, COUNT(*) FROM ingresos GROUP BY cliente_id ORDER BY 2 DESC LIMIT 1
+    ''').fetchone() or (None, 0)
+    nombre = conn.execute('SELECT nombre FROM clientes WHERE id = ?', (cliente_id,)).fetchone()
+    vehiculo = conn.execute('SELECT vehiculo_id FROM ingresos WHERE cliente_id = ? LIMIT 1',
+                            (cliente_id,)).fetchone()
+    placa = conn.execute('SELECT placa FROM vehiculos WHERE id = ?', vehiculo).fetchone() if vehiculo else None
+    tecnicos = db.usuarios.tecnicos_activos()
+
+    return {
+        'cliente_id': cliente_id,
+        'vehiculo_id': vehiculo[0] if vehiculo else None,
+        'visitas_cliente_frecuente': veces,
+        # Nombre completo del cliente con más visitas: historial más pesado
+        'busqueda_cliente': nombre[0] if nombre else '',
+        'busqueda_prefijo': nombre[0].split()[0][:3] if nombre else '',
+        'busqueda_placa': placa[0] if placa else '',
+        'ejecutivo': conn.execute("SELECT id FROM usuarios WHERE rol='Ejecutivo' LIMIT 1").fetchone()[0],
+        'gerente': db.usuarios.primer_gerente(),
+        'tecnico': tecnicos[0].id if tecnicos else None,
+    }
+
+
+def casos(db, contexto, escrituras=True):
+    """Lista de (ventana, caso, función); cada función devuelve la cantidad de filas"""
+    c = contexto
+    lista = [
+        ('EjecutivoWindow', 'cargar_clientes', lambda: len(db.clientes.listar())),
+        ('EjecutivoWindow', 'buscar_cliente', lambda: len(db.busqueda.clientes(c['busqueda_prefijo']))),
+        ('EjecutivoWindow', 'cargar_vehiculos', lambda: len(db.vehiculos.listar())),
+        ('EjecutivoWindow', 'buscar_vehiculo', lambda: len(db.busqueda.vehiculos(c['busqueda_placa']))),
+        ('EjecutivoWindow', 'cargar_ingresos', lambda: len(db.ingresos.pagina(TAMANO_PAGINA))),
+        ('EjecutivoWindow', 'cargar_ingresos (10 páginas)', lambda: _recorrer_paginas(
+            db.ingresos.pagina, lambda f: (f.fecha_ingreso, f.id), 10)),
+        ('EjecutivoWindow', 'buscar_ingreso',
+         lambda: len(db.ingresos.pagina(TAMANO_PAGINA, texto=c['busqueda_cliente']))),
+        ('EjecutivoWindow', 'generar_historial', lambda: len(db.historial.cargar(c['busqueda_cliente']))),
+        ('EjecutivoWindow', 'cargar_facturacion', lambda: len(db.pagos.pagina_facturacion(TAMANO_PAGINA))),
+        ('EjecutivoWindow', 'cargar_facturacion (10 páginas)',
+         lambda: _recorrer_paginas(
+            db.pagos.pagina_facturacion, lambda f: (f.fecha_ingreso, f.ingreso_id), 10)),
+        ('EjecutivoWindow', 'buscar_facturacion',
+         lambda: len(db.pagos.pagina_facturacion(TAMANO_PAGINA, texto=c['busqueda_placa']))),
+        ('EjecutivoWindow', 'actualizar_resumen_financiero', lambda: _resumen_financiero(db)),
+        ('GerenteWindow', 'cargar_pendientes', lambda: len(db.ingresos.pendientes_de_asignar())),
+        ('GerenteWindow', 'cargar_todos_vehiculos', lambda: len(db.ingresos.pagina_con_plazo(TAMANO_PAGINA))),
+        ('GerenteWindow', 'cargar_vehiculos_mensajes', lambda: len(db.ingresos.en_taller())),
+        ('GerenteWindow', 'cargar_reportes_recibidos',
+         lambda: len(db.mensajes.reportes_recibidos(c['gerente']))),
+        ('GerenteWindow', 'reporte_general', lambda: len(db.ingresos.conteos())),
+        ('TecnicoWindow', 'cargar_mis_servicios', lambda: len(db.ingresos.asignados_a(c['tecnico']))),
+        ('TecnicoWindow', 'cargar_tareas', lambda: len(db.mensajes.tareas_recibidas(c['tecnico']))),
+    ]
+    if escrituras and c['cliente_id'] and c['tecnico']:
+        lista.append(('EjecutivoWindow', 'guardar servicio completo', lambda: _guardar_servicio(db, c)))
+    return lista
+
+
+# ======================== MEDICIÓN ========================
+def medir(funcion, repeticiones):
+    funcion()  # calentar caché de páginas y de sentencias
+    tiempos = []
+    filas = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'min_ms': round(min(tiempos), 3),
+        'mediana_ms': round(statistics.median(tiempos), 3),
+        'max_ms': round(max(tiempos), 3),
+        'filas': filas,
+    }
+
+
+def medir_base(ruta, repeticiones, escrituras=True, progreso=print):
+    db = Database(ruta)
+    contexto = preparar_contexto(db)
+    resultado = {
+        'ruta': ruta,
+        'tamano_mb': round(os.path.getsize(ruta) / 1024 / 1024, 1),
+        'conteos': {tabla: db.conn.execute(f'SELECT COUNT(*) FROM {tabla}').fetchone()[0]
+                    for tabla in ('clientes', 'vehiculos', 'ingresos', 'servicios', 'mensajes', 'pagos')},
+        'visitas_cliente_frecuente': contexto['visitas_cliente_frecuente'],
+        'casos': {},
+    }
+    for ventana, caso, funcion in casos(db, contexto, escrituras):
+        nombre = f'{ventana}.{caso}'
+        resultado['casos'][nombre] = medir(funcion, repeticiones)
+        progreso(f"  {nombre:<55} {resultado['casos'][nombre]['mediana_ms']:>10.2f} ms")
+    db.conn.close()
+    return resultado
+
+
+def comparar(actual, anterior):
+    """Imprime la mediana de cada caso contra la del reporte anterior (misma ruta de base)"""
+    previas = {base['ruta']: base['casos'] for base in anterior.get('bases', [])}
+    for base in actual['bases']:
+        casos_previos = previas.get(base['ruta'])
+        if not casos_previos:
+            continue
+        print(f"\nComparación con el reporte anterior: {base['ruta']}")
+        for nombre, medida in base['casos'].items():
+            previa = casos_previos.get(nombre)
+            if not previa:
+                continue
+            razon = medida['mediana_ms'] / previa['mediana_ms'] if previa['mediana_ms'] else float('inf')
+            print(f"  {nombre:<55} {previa['mediana_ms']:>10.2f} → {medida['mediana_ms']:>10.2f} ms  (x{razon:.2f})")
+
+
+# ======================== LÍNEA DE COMANDOS ========================
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Mide las consultas de cada pantalla sin abrir la interfaz')
+    parser.add_argument('bases', nargs='+', help='bases de datos a medir')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--salida', default='benchmark.json', help='archivo del reporte JSON')
+    parser.add_argument('--comparar', help='reporte JSON anterior para comparar medianas')
+    parser.add_argument('--solo-lectura', action='store_true', help='omite los casos que guardan datos')
+    args = parser.parse_args(argumentos)
+
+    reporte = {
+        'version': VERSION_REPORTE,
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'repeticiones': args.repeticiones,
+        'bases': [],
+    }
+    for ruta in args.bases:
+        if not os.path.exists(ruta):
+            print(f"No existe la base {ruta}")
+            return 1
+        print(f"Midiendo {ruta}")
+        reporte['bases'].append(medir_base(ruta, args.repeticiones, escrituras=not args.solo_lectura))
+
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, ensure_ascii=False, indent=2)
+    print(f"\nReporte guardado en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            comparar(reporte, json.load(archivo))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
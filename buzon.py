@@ -0,0 +1,86 @@
+"""
+Aviso de mensajes nuevos: tareas del gerente y reportes de los técnicos.
+
+La ventana no vuelve a leer todos los mensajes del usuario para saber si
+llegó algo. Cada intervalo_ms el buzón compara una marca barata:
+PRAGMA data_version (cambia cuando otra terminal o el hilo de consultas
+confirma una escritura) y la cuenta de escrituras en mensajes que llevan los
+triggers de la caché (las de esta misma conexión). Solo si la marca cambió
+consulta mensajes, y solo los de id mayor al último que ya se mostró
+(idx_mensajes_recibidos), más la cantidad de no leídos para el aviso.
+
+El intervalo es revisar_mensajes_ms de alan_automotriz.ini.
+"""
+
+
+def aviso_en_pestana(notebook, frame, texto, no_leidos):
+    """Título de la pestaña con la cantidad de mensajes sin leer"""
+    notebook.tab(frame, text=f"{texto} 🔴 {no_leidos}" if no_leidos else texto)
+
+
+class Buzon:
+    def __init__(self, db, usuario_id, tipo, widget, al_cambiar):
+        """
+        db: Database de la ventana (usa configuracion, mensajes y cache).
+        widget: cualquier widget de la ventana; da el after() y al destruirse detiene el buzón.
+        al_cambiar: función (nuevos, no_leidos) que se llama cuando la marca cambia;
+        nuevos son los mensajes con id mayor al último visto, del más antiguo al más nuevo.
+        """
+        self.db = db
+        self.usuario_id = usuario_id
+        self.tipo = tipo
+        self.widget = widget
+        self.al_cambiar = al_cambiar
+        self.intervalo_ms = int(db.configuracion['revisar_mensajes_ms'])
+
+        self.ultimo_id = 0
+        self.no_leidos = 0
+        self._marca = None
+        self._pendiente = None
+
+        self.widget.bind('<Destroy>', lambda e: self.detener(), add='+')
+
+    def iniciar(self):
+        """Empieza a revisar; los mensajes que ya existen no cuentan como nuevos"""
+        self.ultimo_id = self.db.mensajes.ultimo_recibido(self.usuario_id, self.tipo)
+        self.revisar()
+        self._programar()
+        return self
+
+    def detener(self):
+        if self._pendiente is not None:
+            try:
+                self.widget.after_cancel(self._pendiente)
+            except Exception:
+                pass
+            self._pendiente = None
+
+    def _programar(self):
+        self._pendiente = self.widget.after(self.intervalo_ms, self._revisar_periodico)
+
+    def _revisar_periodico(self):
+        self._pendiente = None
+        try:
+            self.revisar()
+        finally:
+            self._programar()
+
+    def visto_hasta(self, ultimo_id):
+        """La ventana ya muestra los mensajes hasta ultimo_id (p. ej. tras una carga completa)"""
+        self.ultimo_id = max(self.ultimo_id, ultimo_id)
+
+    def _marca_actual(self):
+        data_version = self.db.conn.execute('PRAGMA data_version').fetchone()[0]
+        return data_version, self.db.cache.versiones['mensajes']
+
+    def revisar(self, forzar=False):
+        """Busca mensajes nuevos si la base cambió desde la última revisión"""
+        marca = self._marca_actual()
+        if marca == self._marca and not forzar:
+            return
+        self._marca = marca
+        nuevos = self.db.mensajes.recibidos_desde(self.usuario_id, self.tipo, self.ultimo_id)
+        if nuevos:
+            self.ultimo_id = nuevos[-1].id
+        self.no_leidos = self.db.mensajes.contar_no_leidos(self.usuario_id, self.tipo)
+        self.al_cambiar(nuevos, self.no_leidos)
@@ -0,0 +1,110 @@
+"""
+Caché de resultados de consultas de lectura.
+
+Guarda los resultados más recientes (LRU) con las tablas de las que salen.
+Los triggers temporales de la conexión anotan cada INSERT, UPDATE o DELETE
+de esas tablas y descartan las entradas que dependen de ellas; si otro
+programa escribe en la base, PRAGMA data_version cambia y se vacía todo.
+
+Un resultado que se pidió antes de una escritura y llega después no se
+guarda: cada consulta lleva la marca (versiones de sus tablas y
+data_version) del momento en que se pidió.
+
+Se usa solo desde el hilo de la conexión principal (el de Tk).
+"""
+
+from collections import OrderedDict
+
+# Tablas que vigilan los triggers temporales
+TABLAS_VIGILADAS = ('usuarios', 'clientes', 'vehiculos', 'ingresos', 'servicios',
+                    'mensajes', 'pagos', 'movimientos_pago')
+
+
+class CacheConsultas:
+    def __init__(self, conn, max_entradas=64, max_filas=50000):
+        """
+        max_entradas: resultados que se conservan como máximo.
+        max_filas: filas en total entre todos los resultados; al pasarse se
+        descartan los menos usados.
+        """
+        self.conn = conn
+        self.max_entradas = max_entradas
+        self.max_filas = max_filas
+
+        # clave -> (resultado, tablas, filas), del menos al más usado
+        self.entradas = OrderedDict()
+        self.filas = 0
+        # tabla -> cantidad de escrituras vistas
+        self.versiones = dict.fromkeys(TABLAS_VIGILADAS, 0)
+        self.aciertos = 0
+        self.fallos = 0
+
+        self._data_version = self._leer_data_version()
+        self._instalar_triggers()
+
+    def _instalar_triggers(self):
+        self.conn.create_function('cache_cambio', 1, self._al_cambiar, deterministic=False)
+        for tabla in TABLAS_VIGILADAS:
+            for evento in ('INSERT', 'UPDATE', 'DELETE'):
+                self.conn.execute(f'''
+                    CREATE TEMP TRIGGER IF NOT EXISTS cache_{tabla}_{evento.lower()}
+                    AFTER {evento} ON main.{tabla}
+                    BEGIN SELECT cache_cambio('{tabla}'); END
+                ''')
+
+    def _al_cambiar(self, tabla):
+        self.versiones[tabla] += 1
+        self.invalidar(tabla)
+
+    def _leer_data_version(self):
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _revisar_otros_programas(self):
+        data_version = self._leer_data_version()
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self.vaciar()
+
+    # ========== USO ==========
+    def obtener(self, clave):
+        """Resultado guardado o None"""
+        self._revisar_otros_programas()
+        entrada = self.entradas.get(clave)
+        if entrada is None:
+            self.fallos += 1
+            return None
+        self.entradas.move_to_end(clave)
+        self.aciertos += 1
+        return entrada[0]
+
+    def marca(self, tablas):
+        """Estado de las tablas al pedir una consulta; se pasa luego a guardar()"""
+        return tuple(self.versiones[t] for t in tablas), self._data_version
+
+    def guardar(self, clave, tablas, resultado, marca):
+        """Guarda el resultado si sus tablas no cambiaron desde que se pidió"""
+        self._revisar_otros_programas()
+        if marca != self.marca(tablas):
+            return False
+        filas = len(resultado) if hasattr(resultado, '__len__') else 1
+        if filas > self.max_filas:
+            return False
+
+        anterior = self.entradas.pop(clave, None)
+        if anterior is not None:
+            self.filas -= anterior[2]
+        self.entradas[clave] = (resultado, frozenset(tablas), filas)
+        self.filas += filas
+        while len(self.entradas) > self.max_entradas or self.filas > self.max_filas:
+            _, (_, _, filas_viejas) = self.entradas.popitem(last=False)
+            self.filas -= filas_viejas
+        return True
+
+    def invalidar(self, tabla):
+        for clave in [c for c, (_, tablas, _) in self.entradas.items() if tabla in tablas]:
+            _, _, filas = self.entradas.pop(clave)
+            self.filas -= filas
+
+    def vaciar(self):
+        self.entradas.clear()
+        self.filas = 0
@@ -0,0 +1,187 @@
+"""
+Reportes y mantenimiento de Alan Automotriz desde la línea de comandos.
+
+No importa tkinter ni abre ventanas: sirve para programar tareas con cron en
+el servidor del taller. Cada comando abre la base con la configuración de
+alan_automotriz.ini (o la de --ruta), hace su trabajo y termina; los
+comandos que delegan en otro módulo (exportar, respaldos, archivar,
+importar) se cargan solo cuando se piden y reciben sus propias opciones,
+incluida --ruta, después del nombre del comando.
+
+Uso:
+    python -m consola reporte
+    python -m consola finanzas --mes 3 --anio 2025
+    python -m consola historial "ABC-123"
+    python -m consola plazos --horas 12
+    python -m consola exportar facturacion --desde 2025-01-01 -o enero.csv
+    python -m consola respaldos respaldar
+    python -m consola archivar --dias 365
+    python -m consola auditar-indices
+    python -m consola optimizar
+
+Salida: 0 si todo salió bien, 1 si hubo un error (o una consulta auditada
+recorre una tabla o un índice sin acotar), para que cron avise.
+
+Ejemplo de crontab:
+    30 2 * * *  cd /srv/alan && python3 -m consola respaldos respaldar
+    0 3 * * 0   cd /srv/alan && python3 -m consola optimizar
+"""
+
+import argparse
+import importlib
+import logging
+import sqlite3
+import sys
+import time
+
+from base_datos import CONSULTAS_AUDITADAS, Database
+from migraciones import (BUSQUEDA, ESQUEMA_ARCHIVO, INDICES, TABLAS_ARCHIVADAS, crear_indices,
+                         crear_indices_archivo)
+from plazos import texto_plazo
+from reportes import texto_historial, texto_reporte_general, texto_resumen_financiero
+
+# Comandos que pasan sus argumentos tal cual al main() de otro módulo
+DELEGADOS = {
+    'exportar': ('exportar', 'Exporta facturación, pagos, ingresos o servicios (ver exportar.py)'),
+    'respaldos': ('respaldos', 'Respalda, lista, verifica o restaura (ver respaldos.py)'),
+    'archivar': ('archivo', 'Mueve al archivo los ingresos entregados hace tiempo (ver archivo.py)'),
+    'importar': ('importar', 'Importa clientes, vehículos e ingresos (ver importar.py)'),
+}
+
+
+# ======================== REPORTES ========================
+def reporte(db, args):
+    print(texto_reporte_general(db.ingresos.conteos()), end='')
+    return 0
+
+
+def finanzas(db, args):
+    hoy = time.localtime()
+    mes = args.mes or hoy.tm_mon
+    anio = args.anio or hoy.tm_year
+    print(texto_resumen_financiero(mes, anio, db.pagos.resumen_mes(mes, anio), db.pagos.resumen_anio(anio),
+                                   db.pagos.estadisticas()), end='')
+    return 0
+
+
+def historial(db, args):
+    resultado = db.historial.cargar(args.texto)
+    if not resultado:
+        print("No se encontraron registros")
+        return 0
+    print(texto_historial(resultado), end='')
+    return 0
+
+
+def plazos(db, args):
+    ahora = int(time.time())
+    vencidos = db.ingresos.plazos_vencidos(ahora)
+    por_vencer = db.ingresos.plazos_por_vencer(args.horas, ahora)
+    bandas = db.ingresos.conteo_bandas(ahora)
+    print(f"PLAZOS ACTIVOS: verde {bandas.get('verde', 0)}, naranja {bandas.get('naranja', 0)}, "
+          f"rojo {bandas.get('rojo', 0)}, retrasados {bandas.get('morado', 0)}")
+    for titulo, filas in (("RETRASADOS", vencidos), (f"VENCEN EN {args.horas:g} HORAS", por_vencer)):
+        print(f"\n{titulo} ({len(filas)}):")
+        print("-" * 60)
+        for fila in filas:
+            vence = time.strftime('%Y-%m-%d %H:%M', time.localtime(fila.vence_plazo))
+            print(f"  #{fila.id:<6} {fila.placa:<10} {fila.asignado:<20} {vence}  "
+                  f"{texto_plazo(fila.vence_plazo - ahora)}")
+    return 0
+
+
+# ======================== ÍNDICES ========================
+def auditar_indices(db, args):
+    """Imprime el plan de cada consulta auditada; devuelve 1 si alguna tiene un recorrido no permitido"""
+    fallas = 0
+    for nombre, plan, recorridos in db.auditar_consultas():
+        print(f"{'❌ RECORRIDO' if recorridos else '✅ OK'}  {nombre}")
+        for paso in plan:
+            print(f"   {'→' if paso in recorridos else ' '}  {paso}")
+        if recorridos:
+            fallas += 1
+    print("=" * 60)
+    print(f"Consultas auditadas: {len(CONSULTAS_AUDITADAS)} | Con recorridos no permitidos: {fallas}")
+    return 1 if fallas else 0
+
+
+def optimizar(db, args):
+    """Repone los índices que falten, actualiza las estadísticas del planificador
+    (ANALYZE), compacta la búsqueda (FTS5) y recorta el WAL"""
+    archivadas = [tabla for tabla, _ in TABLAS_ARCHIVADAS]
+    esquemas = [fila[1] for fila in db.conn.execute('PRAGMA database_list')]
+    inicio = time.perf_counter()
+    with db.conn:
+        cursor = db.conn.cursor()
+        crear_indices(cursor)
+        if ESQUEMA_ARCHIVO in esquemas:
+            crear_indices_archivo(cursor)
+    print(f"  {len(INDICES)} índices verificados")
+    db.conn.execute('ANALYZE')
+    print("  Estadísticas actualizadas (ANALYZE)")
+
+    for esquema in ('main', ESQUEMA_ARCHIVO):
+        if esquema not in esquemas:
+            continue
+        for tabla in BUSQUEDA:
+            if esquema == ESQUEMA_ARCHIVO and tabla not in archivadas:
+                continue
+            with db.conn:
+                db.conn.execute(f"INSERT INTO {esquema}.{tabla}_fts ({tabla}_fts) VALUES ('optimize')")
+            print(f"  {esquema}.{tabla}_fts compactado")
+        db.conn.execute(f'PRAGMA {esquema}.wal_checkpoint(TRUNCATE)')
+    print(f"✅ Mantenimiento terminado en {time.perf_counter() - inicio:.1f} s")
+    return 0
+
+
+# ======================== LÍNEA DE COMANDOS ========================
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in DELEGADOS:
+        modulo, _ = DELEGADOS[argv[0]]
+        return importlib.import_module(modulo).main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog='python -m consola',
+                                     description='Reportes y mantenimiento de Alan Automotriz sin ventanas')
+    parser.add_argument('--ruta', help='Base de datos (por defecto la de alan_automotriz.ini)')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    comandos.add_parser('reporte', help='Reporte general del taller').set_defaults(funcion=reporte)
+
+    sub = comandos.add_parser('finanzas', help='Resumen financiero del mes y del año')
+    sub.add_argument('--mes', type=int, choices=range(1, 13), help='Por defecto el mes actual')
+    sub.add_argument('--anio', type=int, help='Por defecto el año actual')
+    sub.set_defaults(funcion=finanzas)
+
+    sub = comandos.add_parser('historial', help='Historial de servicios de un cliente o placa')
+    sub.add_argument('texto', help='Nombre del cliente, placa o texto a buscar')
+    sub.set_defaults(funcion=historial)
+
+    sub = comandos.add_parser('plazos', help='Plazos retrasados y por vencer')
+    sub.add_argument('--horas', type=float, help='Por defecto plazos_por_vencer_horas')
+    sub.set_defaults(funcion=plazos)
+
+    comandos.add_parser('auditar-indices', help='Plan de las consultas auditadas (después de ANALYZE); '
+                                                'falla si alguna recorre una tabla o un índice').set_defaults(funcion=auditar_indices)
+    comandos.add_parser('optimizar', help='Repone índices faltantes, actualiza estadísticas, '
+                                          'compacta la búsqueda y recorta el WAL').set_defaults(funcion=optimizar)
+
+    for nombre, (_, ayuda) in DELEGADOS.items():
+        comandos.add_parser(nombre, help=ayuda, add_help=False).set_defaults(funcion=None)
+    args = parser.parse_args(argv)
+    if args.funcion is None:
+        parser.error(f"las opciones de '{args.comando}' (incluida --ruta) van después del nombre del comando")
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        db = Database(args.ruta)
+        if args.comando == 'plazos' and args.horas is None:
+            args.horas = float(db.configuracion['plazos_por_vencer_horas'])
+        return args.funcion(db, args)
+    except (OSError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Consultas en segundo plano para las ventanas.
+
+EjecutorConsultas tiene un hilo con su propia conexión a la base (en modo WAL
+lee sin esperar a las escrituras de la ventana) y ejecuta ahí las lecturas
+pesadas: historial, listas completas, reportes y la primera página de las
+grillas. El resultado vuelve al hilo de Tk por root.after, así la ventana
+sigue respondiendo mientras la consulta corre.
+
+Cada tarea pertenece a un canal (p. ej. 'historial'): una tarea nueva en el
+mismo canal cancela la anterior, interrumpiendo su consulta si ya empezó, y
+el resultado de una tarea cancelada nunca se entrega.
+
+Con una CacheConsultas, las tareas que indican su clave y sus tablas se
+responden desde la caché al instante si el resultado sigue vigente.
+
+BusquedaDiferida lanza la búsqueda de un Entry mientras se escribe, cuando
+se deja de teclear por un momento.
+
+Las escrituras siguen en la conexión principal de la ventana, salvo trabajos
+largos como la importación masiva (importar.py).
+"""
+
+import queue
+import sqlite3
+import threading
+from tkinter import messagebox
+
+from base_datos import Repositorios, abrir_conexion
+from instrumentacion import fijar_llamador, quien_llama
+
+# Cada cuánto revisa el hilo de Tk si hay resultados listos, mientras haya tareas
+INTERVALO_MS = 30
+TEXTO_CARGANDO = "⏳ Cargando..."
+
+# Pausa en el tecleo tras la cual se lanza la búsqueda
+ESPERA_BUSQUEDA_MS = 300
+
+
+class Tarea:
+    __slots__ = ('canal', 'funcion', 'al_terminar', 'al_fallar', 'indicador', 'llamador', 'cancelada',
+                 'cache', 'marca')
+
+    def __init__(self, canal, funcion, al_terminar, al_fallar, indicador, llamador, cache=None, marca=None):
+        self.canal = canal
+        self.funcion = funcion
+        self.al_terminar = al_terminar
+        self.al_fallar = al_fallar
+        self.indicador = indicador
+        self.llamador = llamador
+        self.cancelada = False
+        # (clave, tablas) en la caché y su marca al pedirse
+        self.cache = cache
+        self.marca = marca
+
+
+class EjecutorConsultas:
+    def __init__(self, widget, ruta, configuracion, instrumentacion=None, cache=None):
+        """
+        widget: cualquier widget de la ventana; se usa su after() y al destruirse se detiene el hilo.
+        ruta, configuracion: base y configuración con que se abre la conexión del hilo.
+        instrumentacion: la de la conexión principal, para que el reporte incluya estas consultas.
+        cache: CacheConsultas de la conexión principal.
+        """
+        self.widget = widget
+        self.ruta = ruta
+        self.configuracion = configuracion
+        self.instrumentacion = instrumentacion
+        self.cache = cache
+
+        self._entrada = queue.Queue()
+        self._salida = queue.Queue()
+        # canal -> última tarea enviada que todavía no se entrega (solo hilo de Tk)
+        self._vigentes = {}
+        self._revision = None
+
+        self._conn = None
+        self._en_curso = None
+        self._candado = threading.Lock()
+
+        self._hilo = threading.Thread(target=self._trabajar, name='consultas', daemon=True)
+        self._hilo.start()
+        self.widget.bind('<Destroy>', self._al_destruir, add='+')
+
+    # ========== HILO DE TK ==========
+    def enviar(self, canal, funcion, al_terminar, al_fallar=None, indicador=None, cache=None):
+        """Ejecuta funcion(repos) en segundo plano y entrega su resultado a al_terminar.
+
+        repos tiene los mismos repositorios que Database (clientes, pagos,
+        historial, ...) pero sobre la conexión del hilo. indicador es un
+        ttk.Label que muestra TEXTO_CARGANDO mientras la tarea está pendiente.
+        cache es (clave, tablas): si la caché tiene la clave se entrega en el
+        acto sin consultar la base.
+        """
+        anterior = self._vigentes.pop(canal, None)
+        if anterior is not None:
+            self._cancelar(anterior)
+
+        marca = None
+        if cache is not None and self.cache is not None:
+            resultado = self.cache.obtener(cache[0])
+            if resultado is not None:
+                if anterior is not None:
+                    self._ocultar_indicador(anterior)
+                al_terminar(resultado)
+                return None
+            marca = self.cache.marca(cache[1])
+
+        llamador = quien_llama() if self.instrumentacion is not None else None
+        tarea = Tarea(canal, funcion, al_terminar, al_fallar, indicador, llamador, cache, marca)
+        self._vigentes[canal] = tarea
+        if indicador is not None:
+            indicador.configure(text=TEXTO_CARGANDO)
+        self._entrada.put(tarea)
+        self._programar_revision()
+        return tarea
+
+    def cancelar(self, canal):
+        tarea = self._vigentes.pop(canal, None)
+        if tarea is not None:
+            self._cancelar(tarea)
+            self._ocultar_indicador(tarea)
+
+    def pendiente(self, canal):
+        return canal in self._vigentes
+
+    def detener(self):
+        for tarea in list(self._vigentes.values()):
+            self._cancelar(tarea)
+        self._vigentes.clear()
+        if self._revision is not None:
+            try:
+                self.widget.after_cancel(self._revision)
+            except Exception:
+                pass
+            self._revision = None
+        self._entrada.put(None)
+
+    def _al_destruir(self, event):
+        if event.widget is self.widget:
+            self.detener()
+
+    def _cancelar(self, tarea):
+        tarea.cancelada = True
+        with self._candado:
+            if self._en_curso is tarea and self._conn is not None:
+                # Hace que la consulta en curso termine con 'interrupted'
+                self._conn.interrupt()
+
+    def _ocultar_indicador(self, tarea):
+        # Si otra tarea pendiente usa el mismo indicador, sigue visible
+        if tarea.indicador is None:
+            return
+        if any(t.indicador is tarea.indicador for t in self._vigentes.values()):
+            return
+        try:
+            tarea.indicador.configure(text='')
+        except Exception:
+            pass
+
+    def _programar_revision(self):
+        if self._revision is None:
+            self._revision = self.widget.after(INTERVALO_MS, self._revisar)
+
+    def _revisar(self):
+        self._revision = None
+        while True:
+            try:
+                tarea, resultado, error = self._salida.get_nowait()
+            except queue.Empty:
+                break
+            if tarea.cancelada or self._vigentes.get(tarea.canal) is not tarea:
+                continue
+            del self._vigentes[tarea.canal]
+            self._ocultar_indicador(tarea)
+            if error is None:
+                if tarea.marca is not None:
+                    clave, tablas = tarea.cache
+                    self.cache.guardar(clave, tablas, resultado, tarea.marca)
+                tarea.al_terminar(resultado)
+            elif tarea.al_fallar is not None:
+                tarea.al_fallar(error)
+            else:
+                messagebox.showerror("Error", f"No se pudo cargar la información: {error}")
+
+        if self._vigentes:
+            self._programar_revision()
+
+    # ========== HILO DE CONSULTAS ==========
+    def _trabajar(self):
+        try:
+            conn = abrir_conexion(self.ruta, self.configuracion)
+        except Exception as e:
+            self._fallar_todas(e)
+            return
+        if self.instrumentacion is not None and hasattr(conn, 'instrumentacion'):
+            conn.instrumentacion = self.instrumentacion
+        repos = Repositorios(conn)
+        with self._candado:
+            self._conn = conn
+
+        while True:
+            tarea = self._entrada.get()
+            if tarea is None:
+                break
+            if tarea.cancelada:
+                continue
+            with self._candado:
+                self._en_curso = tarea
+            fijar_llamador(tarea.llamador)
+            try:
+                resultado, error = tarea.funcion(repos), None
+            except sqlite3.OperationalError as e:
+                if tarea.cancelada:
+                    continue
+                resultado, error = None, e
+            except Exception as e:
+                resultado, error = None, e
+            finally:
+                fijar_llamador(None)
+                with self._candado:
+                    self._en_curso = None
+            self._salida.put((tarea, resultado, error))
+
+        with self._candado:
+            self._conn = None
+        conn.close()
+
+    def _fallar_todas(self, error):
+        """Sin conexión, cada tarea pendiente o futura se entrega con el error
+        (a su al_fallar, por el mismo root.after que los resultados)"""
+        while True:
+            tarea = self._entrada.get()
+            if tarea is None:
+                break
+            if not tarea.cancelada:
+                self._salida.put((tarea, None, error))
+
+
+class BusquedaDiferida:
+    """Llama a buscar() cuando el usuario deja de escribir en el Entry por ESPERA_BUSQUEDA_MS"""
+
+    def __init__(self, entry, buscar, minimo=0, espera_ms=ESPERA_BUSQUEDA_MS):
+        """
+        minimo: caracteres necesarios para buscar; con menos no se hace nada.
+        Enter busca en el acto.
+        """
+        self.entry = entry
+        self.buscar = buscar
+        self.minimo = minimo
+        self.espera_ms = espera_ms
+        self._pendiente = None
+        self._ultimo = entry.get().strip()
+
+        entry.bind('<KeyRelease>', self._al_teclear, add='+')
+        entry.bind('<Return>', lambda e: self._lanzar(forzar=True), add='+')
+
+    def _al_teclear(self, event):
+        if self._pendiente is not None:
+            self.entry.after_cancel(self._pendiente)
+        self._pendiente = self.entry.after(self.espera_ms, self._lanzar)
+
+    def _lanzar(self, forzar=False):
+        if self._pendiente is not None:
+            self.entry.after_cancel(self._pendiente)
+        self._pendiente = None
+        texto = self.entry.get().strip()
+        # Flechas, Shift y demás teclas que no cambian el texto no buscan de nuevo
+        if texto == self._ultimo and not forzar:
+            return
+        if len(texto) < self.minimo:
+            return
+        self._ultimo = texto
+        self.buscar()
@@ -0,0 +1,53 @@
+"""
+Avisos entre los repositorios y las ventanas dentro del programa.
+
+Cada escritura sobre un ingreso (estado, técnico, plazo, precio, pago) publica
+el id del ingreso con el tema INGRESO una vez confirmada la transacción. Las
+grillas abiertas se suscriben y vuelven a leer solo esa fila, en lugar de
+recargar la tabla completa.
+
+Después se publica una sola vez INGRESOS con la lista de ids de la
+transacción: lo que se recalcula completo (resúmenes, conteos) se suscribe a
+este tema, así un cambio de estado de cincuenta ingresos lo refresca una vez
+y no cincuenta.
+
+Solo la conexión principal (la del hilo de Tk) publica: las escrituras del
+hilo de consultas (p. ej. importar.py) avisan al terminar con una recarga.
+"""
+
+import logging
+
+registro = logging.getLogger('alan_automotriz.eventos')
+
+INGRESO = 'ingreso'
+INGRESOS = 'ingresos'
+
+
+class BusEventos:
+    def __init__(self):
+        # tema -> funciones suscritas, en orden de suscripción
+        self.suscriptores = {}
+
+    def suscribir(self, tema, funcion, widget=None):
+        """funcion(clave) se llama con cada publicación del tema.
+
+        widget: si se da, la suscripción se cancela cuando el widget se destruye
+        (al cerrar sesión la ventana deja de escuchar).
+        """
+        self.suscriptores.setdefault(tema, []).append(funcion)
+        if widget is not None:
+            widget.bind('<Destroy>', lambda e: self.cancelar(tema, funcion), add='+')
+        return funcion
+
+    def cancelar(self, tema, funcion):
+        funciones = self.suscriptores.get(tema, [])
+        if funcion in funciones:
+            funciones.remove(funcion)
+
+    def publicar(self, tema, clave):
+        for funcion in list(self.suscriptores.get(tema, ())):
+            # La escritura ya se guardó: un error al pintar no debe parecer un error al guardar
+            try:
+                funcion(clave)
+            except Exception:
+                registro.exception('Error al procesar el evento %s %s', tema, clave)
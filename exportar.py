@@ -0,0 +1,135 @@
+"""
+Exportación de facturación, movimientos de pago, ingresos e historial de
+servicios a CSV o JSON Lines.
+
+Las filas pasan del cursor de SQLite al archivo por bloques de BLOQUE: no se
+cargan completas en memoria ni en una tabla de la ventana, así que el tamaño
+del periodo no importa. Incluye los ingresos archivados (ver archivo.py).
+
+El archivo se escribe con un nombre temporal y se renombra al terminar: si la
+exportación falla no queda un archivo a medias con el nombre pedido.
+
+Uso:
+    python exportar.py facturacion --desde 2025-01-01 --hasta 2025-01-31 -o enero.csv
+    python exportar.py movimientos --desde 2025-01-01 -o pagos.jsonl
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+
+from repositorios import EXPORTACIONES
+
+BLOQUE = 1000
+
+# Nombre para mostrar de cada exportación
+TIPOS = {
+    'facturacion': 'Facturación',
+    'movimientos': 'Movimientos de pago',
+    'ingresos': 'Ingresos',
+    'servicios': 'Historial de servicios',
+}
+FORMATOS = ('csv', 'jsonl')
+
+
+class ErrorExportacion(Exception):
+    pass
+
+
+def formato_de(ruta):
+    """'jsonl' si la extensión es .jsonl o .json; 'csv' en otro caso"""
+    return 'jsonl' if os.path.splitext(ruta)[1].lower() in ('.jsonl', '.json') else 'csv'
+
+
+def _filas(cursor):
+    while True:
+        bloque = cursor.fetchmany(BLOQUE)
+        if not bloque:
+            return
+        yield bloque
+
+
+def _escribir_csv(cursor, columnas, archivo):
+    escritor = csv.writer(archivo)
+    escritor.writerow(columnas)
+    total = 0
+    for bloque in _filas(cursor):
+        escritor.writerows(bloque)
+        total += len(bloque)
+        yield total
+
+
+def _escribir_jsonl(cursor, columnas, archivo):
+    total = 0
+    for bloque in _filas(cursor):
+        archivo.writelines(json.dumps(dict(zip(columnas, fila)), ensure_ascii=False) + '\n' for fila in bloque)
+        total += len(bloque)
+        yield total
+
+
+def exportar(repos, tipo, ruta, desde=None, hasta=None, formato=None, progreso=None):
+    """Escribe las filas de 'tipo' entre desde y hasta ('AAAA-MM-DD', inclusive)
+    en ruta y devuelve cuántas fueron.
+
+    formato: 'csv' o 'jsonl'; por defecto según la extensión de ruta.
+    progreso: función que recibe las filas escritas después de cada bloque.
+    """
+    if tipo not in EXPORTACIONES:
+        raise ErrorExportacion(f"Exportación desconocida: {tipo} (opciones: {', '.join(EXPORTACIONES)})")
+    formato = formato or formato_de(ruta)
+    if formato not in FORMATOS:
+        raise ErrorExportacion(f"Formato desconocido: {formato} (opciones: {', '.join(FORMATOS)})")
+    try:
+        cursor = repos.exportacion.cursor(tipo, desde, hasta)
+    except ValueError as e:
+        raise ErrorExportacion(str(e))
+    columnas = [descripcion[0] for descripcion in cursor.description]
+
+    temporal = ruta + '.tmp'
+    total = 0
+    try:
+        # utf-8-sig para que Excel reconozca los acentos al abrir el CSV
+        with open(temporal, 'w', encoding='utf-8-sig' if formato == 'csv' else 'utf-8', newline='') as archivo:
+            escribir = _escribir_csv if formato == 'csv' else _escribir_jsonl
+            for total in escribir(cursor, columnas, archivo):
+                if progreso:
+                    progreso(total)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    finally:
+        # Un cursor sin cerrar mantiene abierta la lectura (y el WAL sin recortar)
+        cursor.close()
+    return total
+
+
+def main(argv=None):
+    from base_datos import Database
+
+    parser = argparse.ArgumentParser(description='Exporta datos de Alan Automotriz a CSV o JSON Lines')
+    parser.add_argument('tipo', choices=list(TIPOS))
+    parser.add_argument('-o', '--salida', required=True, help='Archivo .csv o .jsonl')
+    parser.add_argument('--desde', help='Fecha inicial AAAA-MM-DD (inclusive)')
+    parser.add_argument('--hasta', help='Fecha final AAAA-MM-DD (inclusive)')
+    parser.add_argument('--formato', choices=FORMATOS, help='Por defecto según la extensión de la salida')
+    parser.add_argument('--ruta', help='Base de datos (por defecto la de alan_automotriz.ini)')
+    args = parser.parse_args(argv)
+
+    db = Database(args.ruta)
+    try:
+        total = exportar(db, args.tipo, args.salida, args.desde, args.hasta, args.formato,
+                         progreso=lambda n: print(f"  {n} filas", end='\r'))
+    except (ErrorExportacion, OSError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ {TIPOS[args.tipo]}: {total} filas exportadas a {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Generador de datos sintéticos para pruebas de carga.
+
+Crea una base compatible con alan_automotriz.db (mismo esquema, índices,
+búsqueda y resumen financiero, porque se abre con Database) y la llena con
+clientes, vehículos, ingresos, servicios, mensajes y pagos con una
+distribución parecida a la de un taller real: unos cuantos clientes
+frecuentes, la mayoría de los ingresos viejos ya entregados, los recientes
+repartidos entre los estados del taller, abonos parciales, etc.
+
+Uso:
+    python generar_datos.py --ingresos 100000 --ruta prueba_100k.db
+
+Nunca escribe sobre una base existente a menos que se pase --reemplazar.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from base_datos import Database
+from repositorios import TIPO_REPORTE, TIPO_TAREA, estado_de_pago
+
+# ======================== CATÁLOGOS ========================
+NOMBRES = ['Juan', 'María', 'José', 'Guadalupe', 'Luis', 'Ana', 'Carlos', 'Rosa', 'Jorge', 'Patricia',
+           'Miguel', 'Laura', 'Alejandro', 'Gabriela', 'Fernando', 'Sofía', 'Ricardo', 'Verónica',
+           'Eduardo', 'Adriana', 'Ángel', 'Mónica', 'Raúl', 'Claudia', 'Héctor', 'Leticia']
+APELLIDOS = ['Hernández', 'García', 'Martínez', 'López', 'González', 'Pérez', 'Rodríguez', 'Sánchez',
+             'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes', 'Jiménez', 'Torres',
+             'Díaz', 'Gutiérrez', 'Ruiz', 'Mendoza', 'Aguilar', 'Córdoba', 'Barradas']
+VEHICULOS = {
+    'Nissan': ['Versa', 'Sentra', 'March', 'Tsuru', 'Frontier'],
+    'Volkswagen': ['Jetta', 'Vento', 'Golf', 'Pointer', 'Tiguan'],
+    'Chevrolet': ['Aveo', 'Spark', 'Beat', 'Cruze', 'Silverado'],
+    'Toyota': ['Corolla', 'Yaris', 'Hilux', 'RAV4', 'Camry'],
+    'Honda': ['Civic', 'City', 'CR-V', 'Fit', 'Accord'],
+    'Ford': ['Fiesta', 'Focus', 'Ranger', 'Escape', 'Lobo'],
+    'Mazda': ['Mazda 2', 'Mazda 3', 'CX-3', 'CX-5'],
+    'Kia': ['Rio', 'Forte', 'Sportage', 'Soul'],
+}
+COLORES = ['Blanco', 'Negro', 'Gris', 'Plata', 'Rojo', 'Azul', 'Verde', 'Arena', 'Vino']
+MOTIVOS = ['Golpe en defensa delantera', 'Rayón en puerta del conductor', 'Pintura completa',
+           'Abolladura en cofre', 'Choque lateral derecho', 'Cambio de salpicadera',
+           'Retoque de pintura en techo', 'Reparación de facia trasera', 'Daño por granizo',
+           'Pulido y encerado', 'Golpe en cajuela', 'Cambio de espejo lateral']
+REPORTES = ['Se terminó el laminado, pasa a pintura', 'Falta pieza, se pidió al proveedor',
+            'Pintura aplicada, en secado', 'Listo para entrega', 'Se detectó daño adicional en chasis']
+TAREAS = ['Dar prioridad a este vehículo', 'El cliente pidió revisar también la defensa',
+          'Confirmar color con el cliente', 'Entregar antes del viernes']
+ESTADOS = ['Ingreso', 'Diagnóstico', 'Hojalatería', 'Pintura', 'Ensamble', 'Listo', 'Entregado']
+METODOS = ['Efectivo', 'Tarjeta', 'Transferencia', 'Cheque']
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S'
+
+
+# ======================== GENERACIÓN ========================
+class GeneradorDatos:
+    def __init__(self, db, ingresos, anios=3, semilla=2025, lote=5000):
+        self.db = db
+        self.conn = db.conn
+        self.total_ingresos = ingresos
+        self.anios = anios
+        self.lote = lote
+        self.azar = random.Random(semilla)
+
+        # Aproximadamente tres visitas por cliente y 1.2 vehículos por cliente
+        self.total_clientes = max(ingresos // 3, 1)
+        self.total_vehiculos = max(int(self.total_clientes * 1.2), 1)
+
+    def generar(self, progreso=print):
+        inicio = time.perf_counter()
+        self.crear_usuarios()
+        self.crear_clientes_y_vehiculos()
+        progreso(f"  {self.total_clientes} clientes y {self.total_vehiculos} vehículos")
+
+        fechas = self.fechas_de_ingreso()
+        for desde in range(0, self.total_ingresos, self.lote):
+            self.crear_lote(desde, fechas[desde:desde + self.lote])
+            progreso(f"  {min(desde + self.lote, self.total_ingresos)} / {self.total_ingresos} ingresos")
+
+        progreso(f"Listo en {time.perf_counter() - inicio:.1f} s")
+
+    def crear_usuarios(self):
+        password = self.db.hash_password('123')
+        with self.conn:
+            for i, nombre in enumerate(['Yair Torres', 'Daniel Ruiz', 'Martín Cruz', 'Pedro Flores'], 1):
+                self.conn.execute('INSERT INTO usuarios (usuario, password, rol, nombre) VALUES (?, ?, ?, ?)',
+                                  (f'tecnico{i}', password, 'Tecnico', nombre))
+        self.ejecutivo = self.conn.execute("SELECT id FROM usuarios WHERE rol='Ejecutivo' LIMIT 1").fetchone()[0]
+        self.gerente = self.db.usuarios.primer_gerente()
+        self.tecnicos = [t.id for t in self.db.usuarios.tecnicos_activos()]
+
+    def crear_clientes_y_vehiculos(self):
+        azar = self.azar
+        clientes = []
+        for cliente_id in range(1, self.total_clientes + 1):
+            nombre = f'{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}'
+            telefono = f'229{azar.randrange(10 ** 7):07d}'
+            correo = f'cliente{cliente_id}@correo.com' if azar.random() < 0.6 else ''
+            clientes.append((cliente_id, nombre, telefono, correo, ''))
+
+        vehiculos = []
+        # Cada vehículo pertenece a un cliente; los primeros clientes reciben los sobrantes
+        self.vehiculos_de = {}
+        for vehiculo_id in range(1, self.total_vehiculos + 1):
+            cliente_id = (vehiculo_id - 1) % self.total_clientes + 1
+            self.vehiculos_de.setdefault(cliente_id, []).append(vehiculo_id)
+            marca = azar.choice(list(VEHICULOS))
+            letras = ''.join(azar.choice('ABCDEFGHJKLMNPRSTUVWXYZ') for _ in range(3))
+            vehiculos.append((vehiculo_id, marca, azar.choice(VEHICULOS[marca]), f'{letras}-{vehiculo_id:06d}',
+                              str(azar.randint(2000, 2025)), azar.choice(COLORES)))
+
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO clientes (id, nombre, telefono, correo, direccion) VALUES (?, ?, ?, ?, ?)', clientes)
+            self.conn.executemany(
+                'INSERT INTO vehiculos (id, marca, modelo, placa, anio, color) VALUES (?, ?, ?, ?, ?, ?)', vehiculos)
+
+    def fechas_de_ingreso(self):
+        """Fechas ordenadas, con más movimiento en los meses recientes"""
+        ahora = datetime.now()
+        segundos = self.anios * 365 * 86400
+        fechas = [ahora - timedelta(seconds=segundos * (1 - self.azar.random() ** 0.8))
+                  for _ in range(self.total_ingresos)]
+        fechas.sort()
+        return fechas
+
+    def cliente_al_azar(self):
+        # El 5% de los clientes (los frecuentes) trae el 30% de las visitas
+        if self.azar.random() < 0.3:
+            return self.azar.randrange(max(self.total_clientes // 20, 1)) + 1
+        return self.azar.randrange(self.total_clientes) + 1
+
+    def crear_lote(self, desde, fechas):
+        azar = self.azar
+        ahora = datetime.now()
+        ingresos, servicios, mensajes, pagos, movimientos = [], [], [], [], []
+        siguiente_pago = self.conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM pagos').fetchone()[0]
+
+        for desplazamiento, fecha in enumerate(fechas):
+            ingreso_id = desde + desplazamiento + 1
+            cliente_id = self.cliente_al_azar()
+            vehiculo_id = azar.choice(self.vehiculos_de.get(cliente_id) or [azar.randint(1, self.total_vehiculos)])
+            motivo = azar.choice(MOTIVOS)
+            antiguedad = (ahora - fecha).days
+
+            # Los ingresos viejos casi siempre están entregados
+            if antiguedad > 30 and azar.random() < 0.97:
+                estado = 'Entregado'
+            else:
+                estado = azar.choice(ESTADOS)
+            avance = ESTADOS.index(estado)
+
+            momento = fecha
+            servicios.append((ingreso_id, 'Ingreso', f'Vehículo ingresado al taller. Motivo: {motivo}',
+                              self.ejecutivo, momento.strftime(FORMATO_FECHA)))
+
+            asignado = None
+            if avance > 0 or azar.random() < 0.5:
+                asignado = azar.choice(self.tecnicos)
+                momento += timedelta(hours=azar.uniform(1, 24))
+                servicios.append((ingreso_id, 'Asignación', f'Servicio asignado a técnico ID:{asignado}',
+                                  self.gerente, momento.strftime(FORMATO_FECHA)))
+
+            for paso in ESTADOS[1:avance + 1]:
+                momento += timedelta(hours=azar.uniform(2, 72))
+                servicios.append((ingreso_id, 'Cambio de estado', f'Estado actualizado a: {paso}',
+                                  asignado or self.gerente, momento.strftime(FORMATO_FECHA)))
+            fecha_entrega = momento.strftime(FORMATO_FECHA) if estado == 'Entregado' else None
+
+            # Plazo activo en una parte de los trabajos en curso
+            plazo = (None, None, None, None, 0, None)
+            if asignado and estado != 'Entregado' and azar.random() < 0.3:
+                dias = azar.randint(0, 7)
+                horas = azar.randint(0 if dias else 1, 23)
+                inicio = (ahora - timedelta(hours=azar.uniform(0, 24 * (dias + 1)))).replace(microsecond=0)
+                plazo = (dias, horas, 0, inicio.strftime(FORMATO_FECHA), 1,
+                         int(inicio.timestamp()) + dias * 86400 + horas * 3600)
+
+            ingresos.append((ingreso_id, cliente_id, vehiculo_id, estado, fecha.strftime(FORMATO_FECHA),
+                             fecha_entrega, asignado, motivo) + plazo)
+
+            if asignado and azar.random() < 0.25:
+                leido = int(antiguedad > 7)
+                mensajes.append((ingreso_id, self.gerente, asignado, azar.choice(TAREAS), TIPO_TAREA, leido,
+                                 (fecha + timedelta(hours=2)).strftime(FORMATO_FECHA)))
+                mensajes.append((ingreso_id, asignado, self.gerente, azar.choice(REPORTES), TIPO_REPORTE, leido,
+                                 momento.strftime(FORMATO_FECHA)))
+
+            # Cobro: casi todos los entregados y la mitad de los que siguen en el taller
+            if azar.random() < (0.95 if estado == 'Entregado' else 0.5):
+                total = azar.randrange(500, 15000, 50)
+                if estado == 'Entregado':
+                    abonos = azar.choice([1, 1, 2, 2, 3])
+                    pagado = total if azar.random() < 0.92 else azar.randrange(0, total, 50)
+                else:
+                    abonos = azar.choice([0, 0, 1, 1, 2])
+                    pagado = azar.randrange(0, total // 2 + 1, 50) if abonos else 0
+                fecha_pago = fecha + timedelta(hours=azar.uniform(1, 48))
+                pago_id = siguiente_pago + len(pagos)
+                pagos.append((pago_id, ingreso_id, total, pagado, estado_de_pago(pagado, total),
+                              fecha_pago.strftime(FORMATO_FECHA)))
+                restante = pagado
+                for numero in range(abonos):
+                    monto = restante if numero == abonos - 1 else round(restante * azar.uniform(0.3, 0.7), 2)
+                    restante -= monto
+                    fecha_pago += timedelta(hours=azar.uniform(1, 96))
+                    movimientos.append((pago_id, ingreso_id, fecha_pago.strftime(FORMATO_FECHA), monto,
+                                        azar.choice(METODOS), None, self.ejecutivo))
+
+        with self.conn:
+            self.conn.executemany('''
+                INSERT INTO ingresos (id, cliente_id, vehiculo_id, estado, fecha_ingreso, fecha_entrega,
+                                      asignado_a, motivo_ingreso, plazo_dias, plazo_horas, plazo_minutos,
+                                      fecha_inicio_plazo, plazo_activo, vence_plazo)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', ingresos)
+            self.conn.executemany('''
+                INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por, fecha)
+                VALUES (?, ?, ?, ?, ?)
+            ''', servicios)
+            self.conn.executemany('''
+                INSERT INTO mensajes (ingreso_id, de_usuario, para_usuario, mensaje, tipo, leido, fecha)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', mensajes)
+            self.conn.executemany('''
+                INSERT INTO pagos (id, ingreso_id, monto_total, monto_pagado, estado_pago, fecha_creacion)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', pagos)
+            self.conn.executemany('''
+                INSERT INTO movimientos_pago (pago_id, ingreso_id, fecha, monto, metodo, notas, registrado_por)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', movimientos)
+
+
+# ======================== LÍNEA DE COMANDOS ========================
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description='Genera una base de datos sintética para pruebas de carga')
+    parser.add_argument('--ingresos', type=int, default=10000, help='cantidad de órdenes de trabajo')
+    parser.add_argument('--ruta', default='alan_automotriz_prueba.db', help='archivo de la base a crear')
+    parser.add_argument('--anios', type=int, default=3, help='años de historia a repartir')
+    parser.add_argument('--semilla', type=int, default=2025, help='semilla del generador aleatorio')
+    parser.add_argument('--reemplazar', action='store_true', help='borra la base si ya existe')
+    args = parser.parse_args(argumentos)
+
+    if os.path.exists(args.ruta):
+        if not args.reemplazar:
+            print(f"La base {args.ruta} ya existe; use --reemplazar para sobrescribirla")
+            return 1
+        for sufijo in ('', '-wal', '-shm'):
+            if os.path.exists(args.ruta + sufijo):
+                os.remove(args.ruta + sufijo)
+
+    print(f"Generando {args.ingresos} ingresos en {args.ruta}")
+    db = Database(args.ruta)
+    GeneradorDatos(db, args.ingresos, anios=args.anios, semilla=args.semilla).generar()
+    db.conn.execute('PRAGMA optimize')
+    db.conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+"""
+Grilla virtual sobre un ttk.Treeview.
+
+En lugar de insertar todo el historial, la grilla pide al repositorio páginas
+por keyset (fecha_ingreso, id) y mantiene en el Treeview solo unas cuantas
+páginas alrededor de lo que se ve. Al acercarse al final del desplazamiento
+carga la página siguiente y suelta la más lejana; al volver hacia arriba hace
+lo contrario. La memoria de Tk queda acotada sin importar cuántos ingresos
+tenga la base.
+
+Con un EjecutorConsultas la primera página de cada recarga se pide en
+segundo plano; las páginas siguientes, que son consultas por índice de una
+sola página, se piden en el momento.
+
+Después de una escritura, actualizar_fila() vuelve a leer solo el ingreso
+afectado (ver eventos.py) y corrige, agrega o quita esa fila.
+"""
+
+
+class GrillaVirtual:
+    def __init__(self, tree, repos, consulta, clave, formatear=None, identificador=None,
+                 scrollbar=None, tamano_pagina=100, max_paginas=3, al_mover=None,
+                 ejecutor=None, indicador=None, fila=None):
+        """
+        tree: Treeview ya creado con sus columnas.
+        repos: Database de la ventana, con la que se piden las páginas al desplazarse.
+        consulta(repos, limite, despues_de=None, antes_de=None): devuelve una página de filas.
+        clave(fila): clave keyset (fecha_ingreso, id) de una fila.
+        formatear(fila): devuelve (valores, tags) a mostrar; por defecto la fila tal cual.
+        identificador(fila): iid estable de la fila en el Treeview (p. ej. el id del ingreso).
+        scrollbar: Scrollbar vertical ligada al Treeview, si la hay.
+        al_mover(): se llama cada vez que cambian las filas a la vista.
+        ejecutor: EjecutorConsultas para pedir la primera página sin bloquear la ventana.
+        indicador: Label que muestra que la recarga está en curso.
+        fila(repos, id): la fila de ese id como la devuelve consulta, o None si ya
+        no pertenece a la grilla; la usa actualizar_fila (requiere identificador).
+        """
+        self.tree = tree
+        self.repos = repos
+        self.consulta = consulta
+        self.clave = clave
+        self.formatear = formatear or (lambda fila: (tuple(fila), ()))
+        self.identificador = identificador
+        self.scrollbar = scrollbar
+        self.tamano_pagina = tamano_pagina
+        self.max_paginas = max_paginas
+        self.al_mover = al_mover
+        self.ejecutor = ejecutor
+        self.indicador = indicador
+        self.fila = fila
+
+        # Cada página es (iids, clave_primera_fila, clave_ultima_fila)
+        self.paginas = []
+        # iid -> clave keyset de cada fila en el Treeview
+        self.claves = {}
+        # Con un filtro de búsqueda no se agregan filas nuevas: podrían no coincidir
+        self.filtrada = False
+        self.hay_mas_abajo = False
+        self.hay_mas_arriba = False
+        self._pendiente = None
+
+        self.tree.configure(yscrollcommand=self._al_desplazar)
+
+    # ========== CARGA ==========
+    def recargar(self, consulta=None, cache=None, filtrada=False):
+        """Vacía la grilla y carga la primera página (opcionalmente con otra consulta).
+
+        cache: (clave, tablas) con que se guarda la primera página en la caché del ejecutor.
+        filtrada: la consulta es una búsqueda; actualizar_fila solo corrige o quita filas.
+        """
+        if consulta is not None:
+            self.consulta = consulta
+        self.filtrada = filtrada
+
+        if self.ejecutor is None:
+            self._mostrar_primera(self.consulta(self.repos, self.tamano_pagina))
+            return
+        consulta, tamano = self.consulta, self.tamano_pagina
+        # La grilla es su propio canal: una recarga nueva cancela la anterior
+        self.ejecutor.enviar(self, lambda repos: consulta(repos, tamano), self._mostrar_primera,
+                             indicador=self.indicador, cache=cache)
+
+    def _mostrar_primera(self, filas):
+        hijos = self.tree.get_children()
+        if hijos:
+            self.tree.delete(*hijos)
+        self.paginas = []
+        self.claves = {}
+        self.hay_mas_arriba = False
+
+        self.hay_mas_abajo = len(filas) == self.tamano_pagina
+        if filas:
+            self.paginas.append(self._insertar(filas, 'end'))
+        self.tree.yview_moveto(0)
+
+    def filas_cargadas(self):
+        return len(self.tree.get_children())
+
+    def _insertar(self, filas, posicion):
+        iids = []
+        indice = 0
+        for fila in filas:
+            valores, tags = self.formatear(fila)
+            iid = self.identificador(fila) if self.identificador else None
+            if iid is not None and self.tree.exists(iid):
+                self.tree.delete(iid)
+            destino = indice if posicion == 0 else 'end'
+            iid = self.tree.insert('', destino, iid=iid, values=valores, tags=tags)
+            self.claves[iid] = self.clave(fila)
+            iids.append(iid)
+            indice += 1
+        return iids, self.clave(filas[0]), self.clave(filas[-1])
+
+    def _soltar(self, iids):
+        # Una fila pudo haberse movido a otra página si cambió mientras se desplazaba
+        existentes = [iid for iid in iids if self.tree.exists(iid)]
+        if existentes:
+            self.tree.delete(*existentes)
+        for iid in iids:
+            self.claves.pop(iid, None)
+
+    def _cargar_siguiente(self):
+        if not self.hay_mas_abajo or not self.paginas:
+            return
+        filas = self.consulta(self.repos, self.tamano_pagina, despues_de=self.paginas[-1][2])
+        self.hay_mas_abajo = len(filas) == self.tamano_pagina
+        if not filas:
+            return
+
+        primera, _ = self.tree.yview()
+        total_antes = self.filas_cargadas()
+        self.paginas.append(self._insertar(filas, 'end'))
+
+        if len(self.paginas) > self.max_paginas:
+            iids, _, _ = self.paginas.pop(0)
+            self._soltar(iids)
+            self.hay_mas_arriba = True
+            # Conservar en pantalla las mismas filas después de soltar las de arriba
+            visibles_arriba = primera * (total_antes + len(filas)) - len(iids)
+            self.tree.yview_moveto(max(visibles_arriba, 0) / max(self.filas_cargadas(), 1))
+
+    def _cargar_anterior(self):
+        if not self.hay_mas_arriba or not self.paginas:
+            return
+        filas = self.consulta(self.repos, self.tamano_pagina, antes_de=self.paginas[0][1])
+        if len(filas) < self.tamano_pagina:
+            self.hay_mas_arriba = False
+        if not filas:
+            return
+
+        primera, _ = self.tree.yview()
+        total_antes = self.filas_cargadas()
+        self.paginas.insert(0, self._insertar(filas, 0))
+
+        if len(self.paginas) > self.max_paginas:
+            iids, _, _ = self.paginas.pop()
+            self._soltar(iids)
+            self.hay_mas_abajo = True
+
+        visibles_arriba = primera * total_antes + len(filas)
+        self.tree.yview_moveto(visibles_arriba / max(self.filas_cargadas(), 1))
+
+    # ========== UNA FILA ==========
+    def actualizar_fila(self, id_fila):
+        """Vuelve a leer la fila id_fila y la corrige en la grilla, la agrega en su
+        lugar (si cae dentro de las páginas cargadas), la mueve si cambió su clave
+        o la quita si ya no pertenece."""
+        if self.fila is None:
+            return
+        if self.ejecutor is not None and self.ejecutor.pendiente(self):
+            # La recarga en curso ya trae la fila al día
+            return
+        iid = str(id_fila)
+        fila = self.fila(self.repos, id_fila)
+
+        if fila is None:
+            if self.tree.exists(iid):
+                self._quitar(iid)
+            return
+
+        valores, tags = self.formatear(fila)
+        clave = self.clave(fila)
+        estaba = self.tree.exists(iid)
+        if estaba:
+            if self.claves.get(iid) == clave:
+                self.tree.item(iid, values=valores, tags=tags)
+                return
+            # Cambió de lugar en el orden: se quita y se vuelve a insertar
+            self._quitar(iid)
+        if self.filtrada and not estaba:
+            return
+
+        # Las filas van de la clave mayor a la menor; fuera de lo cargado no se agrega
+        if self.paginas:
+            if (self.hay_mas_arriba and clave > self.paginas[0][1]) or \
+                    (self.hay_mas_abajo and clave < self.paginas[-1][2]):
+                return
+        elif self.hay_mas_abajo:
+            return
+        else:
+            self.paginas.append(([], clave, clave))
+
+        hijos = self.tree.get_children()
+        posicion = next((i for i, hijo in enumerate(hijos) if self.claves.get(hijo, clave) < clave), len(hijos))
+        self.tree.insert('', posicion, iid=iid, values=valores, tags=tags)
+        self.claves[iid] = clave
+
+        # Se anota en la página de la fila vecina (la primera si quedó arriba de todo)
+        vecina = hijos[posicion - 1] if posicion else None
+        for numero, (iids, primera, ultima) in enumerate(self.paginas):
+            if vecina is None or vecina in iids:
+                iids.insert(iids.index(vecina) + 1 if vecina is not None else 0, iid)
+                self.paginas[numero] = (iids, max(primera, clave), min(ultima, clave))
+                break
+        else:
+            iids, primera, ultima = self.paginas[-1]
+            iids.append(iid)
+            self.paginas[-1] = (iids, max(primera, clave), min(ultima, clave))
+
+    def _quitar(self, iid):
+        self.tree.delete(iid)
+        self.claves.pop(iid, None)
+        for iids, _, _ in self.paginas:
+            if iid in iids:
+                iids.remove(iid)
+
+    # ========== DESPLAZAMIENTO ==========
+    def _al_desplazar(self, primera, ultima):
+        if self.scrollbar is not None:
+            self.scrollbar.set(primera, ultima)
+        if self.al_mover is not None:
+            self.al_mover()
+
+        if self._pendiente is not None:
+            return
+        if self.ejecutor is not None and self.ejecutor.pendiente(self):
+            # Las filas a la vista son de la consulta anterior a la recarga
+            return
+        primera, ultima = float(primera), float(ultima)
+        if ultima >= 0.9 and self.hay_mas_abajo:
+            self._pendiente = self.tree.after_idle(self._ejecutar, self._cargar_siguiente)
+        elif primera <= 0.1 and self.hay_mas_arriba:
+            self._pendiente = self.tree.after_idle(self._ejecutar, self._cargar_anterior)
+
+    def _ejecutar(self, accion):
+        try:
+            if self.ejecutor is None or not self.ejecutor.pendiente(self):
+                accion()
+        finally:
+            self._pendiente = None
+
+
+def actualizar_fila_tree(tree, iid, valores, al_final=True):
+    """Para un Treeview simple (sin GrillaVirtual) cuyas filas usan el id como iid:
+    corrige la fila, la agrega (al final o al principio) o la quita si valores es None."""
+    if valores is None:
+        if tree.exists(iid):
+            tree.delete(iid)
+    elif tree.exists(iid):
+        tree.item(iid, values=valores)
+    else:
+        tree.insert('', 'end' if al_final else 0, iid=iid, values=valores)
+
+
+def ids_seleccionados(tree):
+    """Ids (primera columna) de todas las filas seleccionadas, en el orden de la tabla"""
+    return [tree.item(iid)['values'][0] for iid in tree.selection()]
@@ -0,0 +1,273 @@
+"""
+Importación masiva de clientes, vehículos e ingresos desde CSV o Excel.
+
+Columnas reconocidas (el encabezado no distingue mayúsculas ni acentos):
+    nombre, telefono, correo, direccion        -> cliente
+    marca, modelo, placa, anio (o año), color  -> vehículo
+    motivo                                     -> ingreso del vehículo al taller
+Una fila puede traer solo el cliente, solo el vehículo o ambos; si además
+trae motivo se registra el ingreso, como en la pestaña Registrar Ingreso.
+
+Los clientes se identifican por teléfono y los vehículos por placa: si ya
+existen (en la base o en una fila anterior del archivo) se reutilizan en
+lugar de duplicarse. La revisión se hace en SQLite, no en memoria, así que
+el archivo se lee fila por fila sin importar su tamaño y se guarda por
+lotes de LOTE filas, cada lote en una transacción con executemany.
+
+Las filas con errores no detienen la importación: se escriben en
+<archivo>_rechazados.csv con su línea y el error.
+
+Uso:
+    python importar.py flotilla.csv --usuario ejecutivo
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+import unicodedata
+from collections import namedtuple
+from datetime import datetime
+
+LOTE = 1000
+
+CAMPOS_CLIENTE = ('nombre', 'telefono', 'correo', 'direccion')
+CAMPOS_VEHICULO = ('marca', 'modelo', 'placa', 'anio', 'color')
+CAMPOS = CAMPOS_CLIENTE + CAMPOS_VEHICULO + ('motivo',)
+# Otros encabezados frecuentes (ya sin acentos)
+SINONIMOS = {
+    'ano': 'anio',
+    'cliente': 'nombre',
+    'email': 'correo',
+    'motivo_ingreso': 'motivo',
+    'domicilio': 'direccion',
+}
+
+ResultadoImportacion = namedtuple('ResultadoImportacion', 'filas clientes_nuevos vehiculos_nuevos ingresos '
+                                                          'rechazadas archivo_rechazos')
+
+# Con :telefono repetido en el archivo la segunda fila ya ve al cliente de la primera
+SQL_IMPORTAR_CLIENTE = '''
+    INSERT INTO clientes (nombre, telefono, correo, direccion)
+    SELECT :nombre, :telefono, :correo, :direccion
+    WHERE NOT EXISTS (SELECT 1 FROM clientes WHERE telefono = :telefono)
+'''
+SQL_IMPORTAR_VEHICULO = '''
+    INSERT INTO vehiculos (marca, modelo, placa, anio, color)
+    VALUES (:marca, :modelo, :placa, :anio, :color)
+    ON CONFLICT (placa) DO NOTHING
+'''
+SQL_IMPORTAR_INGRESO = '''
+    INSERT INTO ingresos (cliente_id, vehiculo_id, motivo_ingreso)
+    VALUES ((SELECT id FROM clientes WHERE telefono = :telefono ORDER BY activo DESC, id LIMIT 1),
+            (SELECT id FROM vehiculos WHERE placa = :placa),
+            :motivo)
+'''
+# Primer servicio de cada ingreso del lote, igual que IngresoRepo.registrar
+SQL_IMPORTAR_SERVICIOS = '''
+    INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por)
+    SELECT id, 'Ingreso', 'Vehículo ingresado al taller. Motivo: ' || motivo_ingreso, ?
+    FROM ingresos
+    WHERE id > ?
+'''
+SQL_ULTIMO_INGRESO = 'SELECT COALESCE(MAX(id), 0) FROM ingresos'
+
+
+class ErrorImportacion(Exception):
+    pass
+
+
+# ======================== LECTURA ========================
+def _normalizar_encabezado(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode()
+    texto = re.sub(r'\W+', '_', texto.strip().lower()).strip('_')
+    return SINONIMOS.get(texto, texto)
+
+
+def _como_texto(valor):
+    # Excel entrega teléfonos y años como números: 5512345678.0 -> '5512345678'
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return '' if valor is None else str(valor).strip()
+
+
+def _leer_csv(ruta):
+    # utf-8-sig quita la marca BOM que agrega Excel al guardar como CSV UTF-8
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        muestra = archivo.read(8192)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(archivo, dialecto)
+        encabezado = [_normalizar_encabezado(c) for c in next(lector, [])]
+        for valores in lector:
+            if any(v.strip() for v in valores):
+                yield lector.line_num, dict(zip(encabezado, valores))
+
+
+def _leer_excel(ruta):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ErrorImportacion("Para importar archivos de Excel instale openpyxl (pip install openpyxl) "
+                               "o guarde el archivo como CSV")
+    # read_only lee la hoja por partes en lugar de cargarla completa
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = [_normalizar_encabezado(c) for c in next(filas, ())]
+        for linea, valores in enumerate(filas, start=2):
+            if any(v is not None and str(v).strip() for v in valores):
+                yield linea, dict(zip(encabezado, valores))
+    finally:
+        libro.close()
+
+
+def leer_filas(ruta):
+    """(línea, {columna: valor}) por cada fila con datos del archivo"""
+    if os.path.splitext(ruta)[1].lower() in ('.xlsx', '.xlsm'):
+        return _leer_excel(ruta)
+    return _leer_csv(ruta)
+
+
+# ======================== VALIDACIÓN ========================
+def validar(fila):
+    """Devuelve (datos, None) con los valores limpios, o (None, motivo) si la fila no sirve"""
+    datos = {campo: _como_texto(fila.get(campo)) for campo in CAMPOS}
+    datos['placa'] = datos['placa'].upper()
+
+    hay_cliente = any(datos[c] for c in CAMPOS_CLIENTE)
+    hay_vehiculo = any(datos[c] for c in CAMPOS_VEHICULO)
+    if not hay_cliente and not hay_vehiculo:
+        return None, "Fila sin datos de cliente ni de vehículo"
+
+    if hay_cliente:
+        if not datos['nombre'] or not datos['telefono']:
+            return None, "Nombre y teléfono son obligatorios"
+        if not re.fullmatch(r'[\d\s()+.-]+', datos['telefono']) or len(re.sub(r'\D', '', datos['telefono'])) < 7:
+            return None, f"Teléfono inválido: {datos['telefono']}"
+        if datos['correo'] and not re.fullmatch(r'[^@\s]+@[^@\s]+\.[^@\s]+', datos['correo']):
+            return None, f"Correo inválido: {datos['correo']}"
+
+    if hay_vehiculo:
+        if not datos['marca'] or not datos['modelo'] or not datos['placa']:
+            return None, "Marca, modelo y placa son obligatorios"
+        anio = datos['anio']
+        if anio and not (anio.isdigit() and 1900 <= int(anio) <= datetime.now().year + 1):
+            return None, f"Año inválido: {anio}"
+
+    if datos['motivo'] and not (hay_cliente and hay_vehiculo):
+        return None, "Para registrar el ingreso la fila necesita cliente y vehículo"
+
+    datos['_cliente'] = hay_cliente
+    datos['_vehiculo'] = hay_vehiculo
+    return datos, None
+
+
+# ======================== IMPORTACIÓN ========================
+def _guardar_lote(conn, lote, usuario_id):
+    """Guarda un lote en una transacción y devuelve (clientes, vehículos, ingresos) nuevos"""
+    with conn:
+        clientes = conn.executemany(SQL_IMPORTAR_CLIENTE, [d for d in lote if d['_cliente']]).rowcount
+        vehiculos = conn.executemany(SQL_IMPORTAR_VEHICULO, [d for d in lote if d['_vehiculo']]).rowcount
+        ingresos = [d for d in lote if d['motivo']]
+        if ingresos:
+            # Dentro de la transacción, con el bloqueo de escritura ya tomado por
+            # los INSERT anteriores: ningún otro programa agrega ingresos en medio
+            ultimo = conn.execute(SQL_ULTIMO_INGRESO).fetchone()[0]
+            conn.executemany(SQL_IMPORTAR_INGRESO, ingresos)
+            conn.execute(SQL_IMPORTAR_SERVICIOS, (usuario_id, ultimo))
+    return clientes, vehiculos, len(ingresos)
+
+
+def importar(conn, ruta, usuario_id, lote=LOTE, progreso=None):
+    """Importa el archivo y devuelve un ResultadoImportacion.
+
+    usuario_id: quien aparece como responsable del servicio 'Ingreso'.
+    progreso: función que recibe las filas leídas después de cada lote.
+    """
+    if not os.path.exists(ruta):
+        raise ErrorImportacion(f"No existe el archivo {ruta}")
+
+    archivo_rechazos = os.path.splitext(ruta)[0] + '_rechazados.csv'
+    rechazos = escritor = None
+    filas = rechazadas = clientes = vehiculos = ingresos = 0
+    pendientes = []
+
+    def guardar():
+        nonlocal clientes, vehiculos, ingresos
+        c, v, i = _guardar_lote(conn, pendientes, usuario_id)
+        clientes, vehiculos, ingresos = clientes + c, vehiculos + v, ingresos + i
+        pendientes.clear()
+        if progreso:
+            progreso(filas)
+
+    try:
+        for linea, fila in leer_filas(ruta):
+            filas += 1
+            datos, motivo = validar(fila)
+            if motivo:
+                rechazadas += 1
+                if escritor is None:
+                    rechazos = open(archivo_rechazos, 'w', encoding='utf-8-sig', newline='')
+                    escritor = csv.writer(rechazos)
+                    escritor.writerow(('linea', 'error') + CAMPOS)
+                escritor.writerow((linea, motivo) + tuple(_como_texto(fila.get(c)) for c in CAMPOS))
+                continue
+            pendientes.append(datos)
+            if len(pendientes) >= lote:
+                guardar()
+        if pendientes:
+            guardar()
+    finally:
+        if rechazos is not None:
+            rechazos.close()
+
+    return ResultadoImportacion(filas, clientes, vehiculos, ingresos, rechazadas,
+                                archivo_rechazos if rechazadas else None)
+
+
+def resumen(resultado):
+    """Texto para mostrar al terminar"""
+    lineas = [
+        f"Filas leídas: {resultado.filas}",
+        f"Clientes nuevos: {resultado.clientes_nuevos}",
+        f"Vehículos nuevos: {resultado.vehiculos_nuevos}",
+        f"Ingresos registrados: {resultado.ingresos}",
+        f"Filas rechazadas: {resultado.rechazadas}",
+    ]
+    if resultado.archivo_rechazos:
+        lineas.append(f"Detalle de rechazos en {resultado.archivo_rechazos}")
+    return "\n".join(lineas)
+
+
+def main(argv=None):
+    from base_datos import Database
+
+    parser = argparse.ArgumentParser(description='Importa clientes, vehículos e ingresos desde CSV o Excel')
+    parser.add_argument('archivo')
+    parser.add_argument('--usuario', default='ejecutivo', help='Usuario que registra los ingresos')
+    parser.add_argument('--ruta', help='Base de datos (por defecto la de alan_automotriz.ini)')
+    parser.add_argument('--lote', type=int, default=LOTE)
+    args = parser.parse_args(argv)
+
+    db = Database(args.ruta)
+    usuario_id = db.conn.execute('SELECT id FROM usuarios WHERE usuario = ?', (args.usuario,)).fetchone()
+    if not usuario_id:
+        print(f"❌ No existe el usuario {args.usuario}", file=sys.stderr)
+        return 1
+    try:
+        resultado = importar(db.conn, args.archivo, usuario_id[0], args.lote,
+                             progreso=lambda n: print(f"  {n} filas", end='\r'))
+    except (ErrorImportacion, OSError, csv.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(resumen(resultado))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
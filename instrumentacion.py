@@ -0,0 +1,283 @@
+"""
+Medición de las consultas SQL.
+
+ConexionInstrumentada es una sqlite3.Connection que mide cada execute /
+executemany (incluido el tiempo de leer las filas) y cada commit, y lo anota
+en Instrumentacion: histograma de latencias, filas y quién la pidió (el
+método de la ventana, p. ej. 'EjecutivoWindow.cargar_facturacion'). Las
+consultas más lentas que el umbral se escriben en el registro de consultas
+lentas, y reporte() devuelve las consultas ordenadas por tiempo total.
+
+Se activa con 'instrumentar' en alan_automotriz.ini.
+"""
+
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+# Límites superiores (ms) de cada cubeta del histograma; la última es "más de 5000"
+CUBETAS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Módulos que no cuentan como "quien pidió la consulta"
+MODULOS_INTERNOS = {__name__, 'repositorios', 'base_datos', 'sqlite3', 'contextlib'}
+# Componentes que ejecutan consultas a nombre de una ventana (grilla, temporizadores)
+MODULOS_COMPONENTES = {'grilla_virtual', 'plazos'}
+
+registro = logging.getLogger('alan_automotriz.sql')
+
+
+def normalizar_sql(sql):
+    """Misma clave para la misma sentencia aunque cambien espacios o saltos de línea"""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+# Llamador fijado para el hilo actual (consultas que se ejecutan en segundo plano)
+_contexto = threading.local()
+
+
+def fijar_llamador(nombre):
+    """Atribuye las consultas siguientes de este hilo a 'nombre' (None para volver a detectarlo)"""
+    _contexto.llamador = nombre
+
+
+def quien_llama():
+    """'Clase.metodo' del primer marco de la aplicación fuera del acceso a datos"""
+    fijado = getattr(_contexto, 'llamador', None)
+    if fijado is not None:
+        return fijado
+    marco = sys._getframe(2)
+    componente = interno = None
+    while marco is not None:
+        modulo = marco.f_globals.get('__name__', '')
+        nombre = marco.f_code.co_name
+        instancia = marco.f_locals.get('self')
+        etiqueta = f'{type(instancia).__name__}.{nombre}' if instancia is not None else f'{modulo}.{nombre}'
+        if modulo in MODULOS_INTERNOS or nombre.startswith('<'):
+            # Sin ventana detrás (arranque, scripts): vale el primer método del acceso a datos
+            if interno is None and modulo != __name__ and instancia is not None:
+                interno = etiqueta
+            marco = marco.f_back
+            continue
+
+        if modulo in MODULOS_COMPONENTES:
+            componente = componente or etiqueta
+        elif modulo.startswith('tkinter'):
+            # Llamado desde el ciclo de eventos (desplazamiento, after): vale el componente
+            return componente or etiqueta
+        else:
+            return etiqueta
+        marco = marco.f_back
+    return componente or interno or '?'
+
+
+class EstadisticaConsulta:
+    __slots__ = ('ejecuciones', 'total_ms', 'max_ms', 'filas', 'cubetas', 'llamadores')
+
+    def __init__(self):
+        self.ejecuciones = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.filas = 0
+        self.cubetas = [0] * (len(CUBETAS_MS) + 1)
+        self.llamadores = Counter()
+
+    def anotar(self, ms, filas, llamador):
+        self.ejecuciones += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.filas += filas
+        indice = 0
+        while indice < len(CUBETAS_MS) and ms > CUBETAS_MS[indice]:
+            indice += 1
+        self.cubetas[indice] += 1
+        self.llamadores[llamador] += 1
+
+    def percentil(self, fraccion):
+        """Límite superior (ms) de la cubeta donde cae el percentil pedido"""
+        objetivo = self.ejecuciones * fraccion
+        acumulado = 0
+        for indice, cantidad in enumerate(self.cubetas):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                return CUBETAS_MS[indice] if indice < len(CUBETAS_MS) else float('inf')
+        return float('inf')
+
+
+class Instrumentacion:
+    def __init__(self, umbral_lento_ms=200, archivo_lentas=None):
+        self.umbral_lento_ms = umbral_lento_ms
+        self.estadisticas = {}
+        self._candado = threading.Lock()
+        if archivo_lentas and not registro.handlers:
+            manejador = logging.FileHandler(archivo_lentas, encoding='utf-8')
+            manejador.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            registro.addHandler(manejador)
+            registro.setLevel(logging.INFO)
+            # Las lentas van solo al archivo, no a la consola de la aplicación
+            registro.propagate = False
+
+    def anotar(self, sql, ms, filas, llamador):
+        clave = normalizar_sql(sql)
+        with self._candado:
+            estadistica = self.estadisticas.get(clave)
+            if estadistica is None:
+                estadistica = self.estadisticas[clave] = EstadisticaConsulta()
+            estadistica.anotar(ms, filas, llamador)
+        if ms >= self.umbral_lento_ms:
+            # Sin parámetros: pueden llevar contraseñas o datos de clientes
+            registro.warning('LENTA %.1f ms | %d filas | %s | %s', ms, filas, llamador, clave[:500])
+
+    def reiniciar(self):
+        with self._candado:
+            self.estadisticas = {}
+
+    def consultas_frecuentes(self, limite=20):
+        """[(sql, EstadisticaConsulta)] ordenadas por tiempo total, de mayor a menor"""
+        with self._candado:
+            filas = list(self.estadisticas.items())
+        filas.sort(key=lambda par: par[1].total_ms, reverse=True)
+        return filas[:limite]
+
+    def reporte(self, limite=20):
+        """Texto con las consultas que más tiempo han consumido"""
+        lineas = ["CONSULTAS CON MÁS TIEMPO ACUMULADO", "=" * 100]
+        for posicion, (sql, e) in enumerate(self.consultas_frecuentes(limite), 1):
+            lineas.append(f"#{posicion}  total {e.total_ms:,.1f} ms | {e.ejecuciones} ejecuciones | "
+                          f"prom {e.total_ms / e.ejecuciones:.2f} ms | p95 ≤ {e.percentil(0.95)} ms | "
+                          f"máx {e.max_ms:.1f} ms | {e.filas} filas")
+            lineas.append(f"    {sql[:300]}")
+            histograma = ' '.join(f'≤{limite_ms}:{n}' for limite_ms, n in zip(CUBETAS_MS, e.cubetas) if n)
+            if e.cubetas[-1]:
+                histograma += f' >{CUBETAS_MS[-1]}:{e.cubetas[-1]}'
+            lineas.append(f"    histograma (ms): {histograma}")
+            lineas.append("    llamadores: " + ', '.join(f'{nombre} ({n})' for nombre, n in e.llamadores.most_common(5)))
+            lineas.append("")
+        return "\n".join(lineas)
+
+    def volcar(self, archivo, limite=50):
+        with open(archivo, 'w', encoding='utf-8') as salida:
+            salida.write(self.reporte(limite))
+        return archivo
+
+
+class CursorMedido:
+    """Envuelve un cursor para sumar el tiempo de leer sus filas a la consulta que lo produjo"""
+
+    def __init__(self, cursor, instrumentacion, sql, ms, llamador):
+        self._cursor = cursor
+        self._instrumentacion = instrumentacion
+        self._sql = sql
+        self._ms = ms
+        self._filas = 0
+        self._llamador = llamador
+        self._anotado = False
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        inicio = time.perf_counter()
+        try:
+            fila = next(self._cursor)
+        except StopIteration:
+            self._ms += (time.perf_counter() - inicio) * 1000
+            self._anotar()
+            raise
+        self._ms += (time.perf_counter() - inicio) * 1000
+        self._filas += 1
+        return fila
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = self._cursor.fetchone()
+        self._ms += (time.perf_counter() - inicio) * 1000
+        if fila is None:
+            self._anotar()
+        else:
+            self._filas += 1
+        return fila
+
+    def fetchmany(self, *args):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchmany(*args)
+        self._ms += (time.perf_counter() - inicio) * 1000
+        self._filas += len(filas)
+        if not filas:
+            self._anotar()
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchall()
+        self._ms += (time.perf_counter() - inicio) * 1000
+        self._filas += len(filas)
+        self._anotar()
+        return filas
+
+    def close(self):
+        self._anotar()
+        self._cursor.close()
+
+    def _anotar(self):
+        if self._anotado:
+            return
+        self._anotado = True
+        filas = self._filas if self._cursor.rowcount < 0 else self._cursor.rowcount
+        self._instrumentacion.anotar(self._sql, self._ms, filas, self._llamador)
+
+    def __del__(self):
+        # Consultas de una sola fila (fetchone) se anotan cuando el cursor se libera
+        try:
+            self._anotar()
+        except Exception:
+            pass
+
+
+class ConexionInstrumentada(sqlite3.Connection):
+    """Conexión que mide execute, executemany y commit; se crea con sqlite3.connect(factory=...)"""
+
+    instrumentacion = None
+
+    def execute(self, sql, parametros=()):
+        if self.instrumentacion is None:
+            return super().execute(sql, parametros)
+        llamador = quien_llama()
+        inicio = time.perf_counter()
+        cursor = super().execute(sql, parametros)
+        ms = (time.perf_counter() - inicio) * 1000
+        return CursorMedido(cursor, self.instrumentacion, sql, ms, llamador)
+
+    def executemany(self, sql, parametros):
+        if self.instrumentacion is None:
+            return super().executemany(sql, parametros)
+        llamador = quien_llama()
+        inicio = time.perf_counter()
+        cursor = super().executemany(sql, parametros)
+        self.instrumentacion.anotar(sql, (time.perf_counter() - inicio) * 1000,
+                                    max(cursor.rowcount, 0), llamador)
+        return cursor
+
+    def commit(self):
+        if self.instrumentacion is None or not self.in_transaction:
+            return super().commit()
+        llamador = quien_llama()
+        inicio = time.perf_counter()
+        super().commit()
+        self.instrumentacion.anotar('COMMIT', (time.perf_counter() - inicio) * 1000, 0, llamador)
+
+    def __exit__(self, tipo, valor, traza):
+        # 'with conn:' confirma sin pasar por commit(); se mide aquí
+        if self.instrumentacion is None or tipo is not None or not self.in_transaction:
+            return super().__exit__(tipo, valor, traza)
+        llamador = quien_llama()
+        inicio = time.perf_counter()
+        resultado = super().__exit__(tipo, valor, traza)
+        self.instrumentacion.anotar('COMMIT', (time.perf_counter() - inicio) * 1000, 0, llamador)
+        return resultado
@@ -0,0 +1,649 @@
+"""
+Migraciones del esquema de la base de datos.
+
+La versión del esquema se guarda en PRAGMA user_version. Al abrir la base,
+migrar() compara esa versión con la última de MIGRACIONES y aplica solo las
+pendientes, todas en una misma transacción: si una falla no queda ninguna a
+medias. Con la base al día no se ejecuta ningún CREATE.
+
+Para cambiar el esquema se agrega una migración al final de la lista con el
+número siguiente; nunca se modifica una que ya se publicó, ni el texto que
+usa (TABLAS_MIGRACION_1, INDICES_MIGRACION_2, ...): cada migración lleva su
+propio DDL. Por ejemplo, un índice nuevo se agrega a INDICES y a una
+migración que lo cree, y al cambiar BUSQUEDA se agrega una que llame a
+crear_busqueda().
+
+La base de archivo (ver archivo.py) se adjunta como ESQUEMA_ARCHIVO y lleva
+su propia versión en MIGRACIONES_ARCHIVO: una columna nueva en una de las
+TABLAS_ARCHIVADAS necesita una migración en cada lista.
+
+Este módulo reemplaza los scripts sueltos de 'Nueva carpeta'
+(migrar_base_datos.py, corregir_referencias_facturacion.py).
+"""
+
+import hashlib
+import logging
+import re
+
+registro = logging.getLogger('alan_automotriz.migraciones')
+
+
+# ======================== DEFINICIONES ========================
+# Tablas tal como las crea la migración 1. Es texto publicado: no se edita; una
+# columna nueva va en su propia migración (vence_plazo, por ejemplo, en la 10).
+TABLAS_MIGRACION_1 = {
+    'usuarios': '''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            rol TEXT NOT NULL,
+            nombre TEXT NOT NULL,
+            activo INTEGER DEFAULT 1
+        )
+    ''',
+    'clientes': '''
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            telefono TEXT NOT NULL,
+            correo TEXT,
+            direccion TEXT,
+            activo INTEGER DEFAULT 1
+        )
+    ''',
+    'vehiculos': '''
+        CREATE TABLE IF NOT EXISTS vehiculos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            marca TEXT NOT NULL,
+            modelo TEXT NOT NULL,
+            placa TEXT UNIQUE NOT NULL,
+            anio TEXT,
+            color TEXT,
+            activo INTEGER DEFAULT 1
+        )
+    ''',
+    # Relación cliente-vehículo
+    'ingresos': '''
+        CREATE TABLE IF NOT EXISTS ingresos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            vehiculo_id INTEGER NOT NULL,
+            estado TEXT DEFAULT 'Ingreso',
+            fecha_ingreso TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            fecha_entrega TIMESTAMP,
+            asignado_a INTEGER,
+            motivo_ingreso TEXT,
+            plazo_dias INTEGER,
+            plazo_horas INTEGER,
+            plazo_minutos INTEGER,
+            fecha_inicio_plazo TIMESTAMP,
+            plazo_activo INTEGER DEFAULT 0,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+            FOREIGN KEY (vehiculo_id) REFERENCES vehiculos(id),
+            FOREIGN KEY (asignado_a) REFERENCES usuarios(id)
+        )
+    ''',
+    # Historial de servicios
+    'servicios': '''
+        CREATE TABLE IF NOT EXISTS servicios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ingreso_id INTEGER NOT NULL,
+            tipo_servicio TEXT NOT NULL,
+            descripcion TEXT,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            realizado_por INTEGER,
+            FOREIGN KEY (ingreso_id) REFERENCES ingresos(id),
+            FOREIGN KEY (realizado_por) REFERENCES usuarios(id)
+        )
+    ''',
+    'pagos': '''
+        CREATE TABLE IF NOT EXISTS pagos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ingreso_id INTEGER NOT NULL,
+            monto_total REAL DEFAULT 0,
+            monto_pagado REAL DEFAULT 0,
+            estado_pago TEXT DEFAULT 'Pendiente',
+            fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ultimo_pago REAL DEFAULT 0,
+            ultimo_metodo_pago TEXT,
+            ultimo_fecha_pago TIMESTAMP,
+            ultimo_registrado_por INTEGER,
+            historial_pagos TEXT,
+            notas TEXT,
+            FOREIGN KEY (ingreso_id) REFERENCES ingresos(id),
+            FOREIGN KEY (ultimo_registrado_por) REFERENCES usuarios(id)
+        )
+    ''',
+    # Libro de pagos: una fila por abono, solo se agregan filas
+    'movimientos_pago': '''
+        CREATE TABLE IF NOT EXISTS movimientos_pago (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pago_id INTEGER NOT NULL,
+            ingreso_id INTEGER NOT NULL,
+            fecha TIMESTAMP NOT NULL,
+            monto REAL NOT NULL,
+            metodo TEXT,
+            notas TEXT,
+            registrado_por INTEGER,
+            FOREIGN KEY (pago_id) REFERENCES pagos(id),
+            FOREIGN KEY (ingreso_id) REFERENCES ingresos(id),
+            FOREIGN KEY (registrado_por) REFERENCES usuarios(id)
+        )
+    ''',
+    # Mensajes/reportes entre gerente y técnicos
+    'mensajes': '''
+        CREATE TABLE IF NOT EXISTS mensajes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ingreso_id INTEGER NOT NULL,
+            de_usuario INTEGER NOT NULL,
+            para_usuario INTEGER NOT NULL,
+            mensaje TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            leido INTEGER DEFAULT 0,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (ingreso_id) REFERENCES ingresos(id),
+            FOREIGN KEY (de_usuario) REFERENCES usuarios(id),
+            FOREIGN KEY (para_usuario) REFERENCES usuarios(id)
+        )
+    ''',
+}
+
+# Columnas que la migración 1 agrega a tablas de bases de versiones viejas
+COLUMNAS_MIGRACION_1 = {
+    'ingresos': {
+        'plazo_dias': 'INTEGER',
+        'plazo_horas': 'INTEGER',
+        'plazo_minutos': 'INTEGER',
+        'fecha_inicio_plazo': 'TIMESTAMP',
+        'plazo_activo': 'INTEGER DEFAULT 0',
+    },
+    'pagos': {
+        'monto_total': 'REAL DEFAULT 0',
+        'monto_pagado': 'REAL DEFAULT 0',
+        'estado_pago': "TEXT DEFAULT 'Pendiente'",
+        'ultimo_pago': 'REAL DEFAULT 0',
+        'ultimo_metodo_pago': 'TEXT',
+        'ultimo_fecha_pago': 'TIMESTAMP',
+        'ultimo_registrado_por': 'INTEGER',
+        'historial_pagos': 'TEXT',
+        'notas': 'TEXT',
+    },
+}
+
+# Conjunto actual de índices secundarios: crear_indices() deja la base
+# exactamente con él ('consola optimizar'). Cada índice nuevo va también en
+# una migración que lo cree con su propio texto.
+INDICES = {
+    'idx_ingresos_cliente': 'ingresos(cliente_id)',
+    'idx_ingresos_vehiculo': 'ingresos(vehiculo_id)',
+    'idx_ingresos_fecha': 'ingresos(fecha_ingreso, id)',
+    'idx_ingresos_asignado': 'ingresos(asignado_a, estado, fecha_ingreso)',
+    'idx_servicios_ingreso': 'servicios(ingreso_id, fecha)',
+    'idx_pagos_ingreso': 'pagos(ingreso_id)',
+    'idx_movimientos_ingreso': 'movimientos_pago(ingreso_id, fecha)',
+    'idx_movimientos_fecha': 'movimientos_pago(fecha)',
+    'idx_mensajes_para': 'mensajes(para_usuario, tipo, leido, fecha)',
+    'idx_mensajes_ingreso': 'mensajes(ingreso_id, fecha)',
+    'idx_clientes_activo': 'clientes(activo, nombre)',
+    'idx_vehiculos_activo': 'vehiculos(activo, marca, modelo)',
+    'idx_usuarios_rol': 'usuarios(rol, activo)',
+    # La importación masiva busca clientes existentes por teléfono
+    'idx_clientes_telefono': 'clientes(telefono)',
+    # Exportación del historial de servicios por rango de fechas
+    'idx_servicios_fecha': 'servicios(fecha)',
+    # Mensajes que llegaron después del último visto (buzon.py)
+    'idx_mensajes_recibidos': 'mensajes(para_usuario, tipo, id)',
+    # Plazos retrasados, por vencer y por banda de color (segundos epoch)
+    'idx_ingresos_vence': 'ingresos(plazo_activo, vence_plazo)',
+    # Ingresos en el taller (sin entregar): solo esas filas, ya en orden de llegada
+    'idx_ingresos_en_taller': "ingresos(fecha_ingreso) WHERE estado != 'Entregado'",
+    'idx_ingresos_taller_tecnico': "ingresos(asignado_a, fecha_ingreso) WHERE estado != 'Entregado'",
+    # Tareas y reportes recibidos, del más reciente al más antiguo
+    'idx_mensajes_recibidos_fecha': 'mensajes(para_usuario, tipo, fecha)',
+}
+
+# Índice de búsqueda de texto (FTS5). Cada tabla *_fts toma las columnas
+# indicadas de su tabla de origen y los triggers la mantienen al día en cada
+# INSERT, UPDATE y DELETE. Al cambiar el conjunto hay que agregar una
+# migración que llame a crear_busqueda().
+BUSQUEDA = {
+    'clientes': ('nombre', 'telefono'),
+    'vehiculos': ('placa', 'marca', 'modelo'),
+    'ingresos': ('motivo_ingreso',),
+    'servicios': ('descripcion',),
+    'mensajes': ('mensaje',),
+}
+
+# Sin distinguir acentos: 'cordoba' encuentra 'Córdoba'
+TOKENIZADOR_BUSQUEDA = 'unicode61 remove_diacritics 2'
+
+# Nombre con que se adjunta la base de archivo a cada conexión
+ESQUEMA_ARCHIVO = 'archivo'
+
+# Tablas que pasan al archivo junto con el ingreso: (tabla, columna con el id del ingreso)
+TABLAS_ARCHIVADAS = (
+    ('ingresos', 'id'),
+    ('servicios', 'ingreso_id'),
+    ('pagos', 'ingreso_id'),
+    ('movimientos_pago', 'ingreso_id'),
+    ('mensajes', 'ingreso_id'),
+)
+
+USUARIOS_DEFAULT = (
+    ('ejecutivo', '123', 'Ejecutivo', 'Ejecutivo de Cuenta'),
+    ('gerente', '123', 'Gerente', 'Gerente del Taller'),
+)
+
+
+# ======================== PASOS REUTILIZABLES ========================
+def _tablas(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    return {nombre for (nombre,) in cursor.fetchall()}
+
+
+def _tiene_archivo(cursor):
+    """True si la base de archivo está adjunta y ya tiene sus tablas"""
+    cursor.execute(f"SELECT 1 FROM pragma_database_list WHERE name = '{ESQUEMA_ARCHIVO}'")
+    if not cursor.fetchone():
+        return False
+    cursor.execute(f"SELECT 1 FROM {ESQUEMA_ARCHIVO}.sqlite_master WHERE type = 'table' AND name = 'pagos'")
+    return cursor.fetchone() is not None
+
+
+def _crear_indices(cursor, indices, esquema='main'):
+    """CREATE INDEX de cada nombre: definición; en el archivo, solo los de TABLAS_ARCHIVADAS"""
+    archivadas = [tabla for tabla, _ in TABLAS_ARCHIVADAS]
+    for nombre, definicion in indices.items():
+        if esquema == 'main' or definicion.split('(')[0] in archivadas:
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {esquema}.{nombre} ON {definicion}')
+
+
+def _quitar_indices_ajenos(cursor, indices):
+    """Elimina los 'idx_*' de la base de trabajo que no están en indices"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'idx!_%' ESCAPE '!'")
+    for (nombre,) in cursor.fetchall():
+        if nombre not in indices:
+            cursor.execute(f'DROP INDEX IF EXISTS {nombre}')
+
+
+def crear_indices(cursor):
+    """Deja en la base exactamente el conjunto INDICES"""
+    _quitar_indices_ajenos(cursor, INDICES)
+    _crear_indices(cursor, INDICES)
+
+
+def crear_busqueda(cursor, esquema='main', tablas=None):
+    """(Re)crea las tablas FTS5 de BUSQUEDA (o de tablas) con sus triggers e indexa lo existente"""
+    for tabla, columnas in (tablas or BUSQUEDA).items():
+        fts = f'{tabla}_fts'
+        lista = ', '.join(columnas)
+        nuevos = ', '.join(f'new.{c}' for c in columnas)
+        viejos = ', '.join(f'old.{c}' for c in columnas)
+
+        for sufijo in ('ai', 'ad', 'au'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {esquema}.{fts}_{sufijo}')
+        cursor.execute(f'DROP TABLE IF EXISTS {esquema}.{fts}')
+
+        # Tabla de contenido externo: el texto vive en la tabla original.
+        # Los triggers y la tabla de contenido quedan en el mismo esquema.
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE {esquema}.{fts} USING fts5(
+                {lista}, content='{tabla}', content_rowid='id',
+                tokenize='{TOKENIZADOR_BUSQUEDA}'
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER {esquema}.{fts}_ai AFTER INSERT ON {tabla} BEGIN
+                INSERT INTO {fts} (rowid, {lista}) VALUES (new.id, {nuevos});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER {esquema}.{fts}_ad AFTER DELETE ON {tabla} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejos});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER {esquema}.{fts}_au AFTER UPDATE OF {lista} ON {tabla} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {lista}) VALUES ('delete', old.id, {viejos});
+                INSERT INTO {fts} (rowid, {lista}) VALUES (new.id, {nuevos});
+            END
+        ''')
+        # Indexar las filas que ya existían
+        cursor.execute(f"INSERT INTO {esquema}.{fts} ({fts}) VALUES ('rebuild')")
+
+
+def crear_resumen_pagos(cursor):
+    """(Re)crea resumen_pagos_mes (periodo 'AAAA-MM' de pagos.fecha_creacion) y sus triggers.
+
+    Los triggers sobre pagos ajustan el resumen en la misma transacción que
+    cada cambio de precio o abono. Incluye los pagos archivados si la base de
+    archivo está adjunta a la conexión.
+    """
+    for sufijo in ('ai', 'ad', 'au'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS pagos_resumen_{sufijo}')
+    cursor.execute('DROP TABLE IF EXISTS resumen_pagos_mes')
+    cursor.execute('''
+        CREATE TABLE resumen_pagos_mes (
+            periodo TEXT PRIMARY KEY,
+            servicios INTEGER NOT NULL DEFAULT 0,
+            total REAL NOT NULL DEFAULT 0,
+            pagado REAL NOT NULL DEFAULT 0,
+            pagados INTEGER NOT NULL DEFAULT 0,
+            pendientes INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    # signo 1 suma la fila nueva, -1 resta la anterior
+    def ajuste(fila, signo):
+        return f'''
+            INSERT INTO resumen_pagos_mes (periodo, servicios, total, pagado, pagados, pendientes)
+            VALUES (strftime('%Y-%m', {fila}.fecha_creacion), {signo},
+                    {signo} * COALESCE({fila}.monto_total, 0),
+                    {signo} * COALESCE({fila}.monto_pagado, 0),
+                    {signo} * ({fila}.estado_pago = 'Pagado'),
+                    {signo} * ({fila}.estado_pago != 'Pagado'))
+            ON CONFLICT (periodo) DO UPDATE SET
+                servicios = servicios + excluded.servicios,
+                total = total + excluded.total,
+                pagado = pagado + excluded.pagado,
+                pagados = pagados + excluded.pagados,
+                pendientes = pendientes + excluded.pendientes;
+        '''
+
+    cursor.execute(f'CREATE TRIGGER pagos_resumen_ai AFTER INSERT ON pagos BEGIN {ajuste("new", 1)} END')
+    cursor.execute(f'CREATE TRIGGER pagos_resumen_ad AFTER DELETE ON pagos BEGIN {ajuste("old", -1)} END')
+    cursor.execute(f'''
+        CREATE TRIGGER pagos_resumen_au
+        AFTER UPDATE OF monto_total, monto_pagado, estado_pago, fecha_creacion ON pagos
+        BEGIN {ajuste("old", -1)} {ajuste("new", 1)} END
+    ''')
+
+    # Llenar con los pagos que ya existían
+    origen = 'main.pagos'
+    if _tiene_archivo(cursor):
+        columnas = 'fecha_creacion, monto_total, monto_pagado, estado_pago'
+        origen = (f'(SELECT {columnas} FROM main.pagos '
+                  f'UNION ALL SELECT {columnas} FROM {ESQUEMA_ARCHIVO}.pagos)')
+    cursor.execute(f'''
+        INSERT INTO resumen_pagos_mes (periodo, servicios, total, pagado, pagados, pendientes)
+        SELECT strftime('%Y-%m', fecha_creacion), COUNT(*),
+               COALESCE(SUM(monto_total), 0), COALESCE(SUM(monto_pagado), 0),
+               SUM(estado_pago = 'Pagado'), SUM(estado_pago != 'Pagado')
+        FROM {origen}
+        GROUP BY 1
+    ''')
+
+
+# ======================== MIGRACIONES ========================
+def _unificar_facturacion(cursor):
+    """Bases muy viejas: 'facturacion' (cobros) y 'pagos' (abonos por facturacion_id)
+    se unifican en la tabla pagos actual, con los abonos en historial_pagos"""
+    tablas = _tablas(cursor)
+    if 'facturacion' not in tablas:
+        return
+
+    hay_abonos = 'pagos' in tablas
+    if hay_abonos:
+        cursor.execute('ALTER TABLE pagos RENAME TO pagos_anterior')
+    cursor.execute('ALTER TABLE facturacion RENAME TO facturacion_anterior')
+    cursor.execute(TABLAS_MIGRACION_1['pagos'])
+    cursor.execute('''
+        INSERT INTO pagos (ingreso_id, monto_total, monto_pagado, estado_pago, fecha_creacion)
+        SELECT ingreso_id, monto_total, monto_pagado, estado_pago, fecha_creacion
+        FROM facturacion_anterior
+    ''')
+
+    if hay_abonos:
+        cursor.execute('''
+            UPDATE pagos SET historial_pagos = (
+                SELECT json_group_array(json_object(
+                           'fecha', a.fecha_pago, 'monto', a.monto, 'metodo', a.metodo_pago,
+                           'registrado_por', a.registrado_por, 'notas', a.notas))
+                FROM (SELECT p.* FROM pagos_anterior p
+                      JOIN facturacion_anterior f ON p.facturacion_id = f.id
+                      WHERE f.ingreso_id = pagos.ingreso_id
+                      ORDER BY p.id) a
+            )
+        ''')
+        cursor.execute('''
+            UPDATE pagos SET (ultimo_pago, ultimo_metodo_pago, ultimo_fecha_pago, ultimo_registrado_por) = (
+                SELECT p.monto, p.metodo_pago, p.fecha_pago, p.registrado_por
+                FROM pagos_anterior p JOIN facturacion_anterior f ON p.facturacion_id = f.id
+                WHERE f.ingreso_id = pagos.ingreso_id
+                ORDER BY p.id DESC LIMIT 1
+            )
+            WHERE json_array_length(historial_pagos) > 0
+        ''')
+        cursor.execute("UPDATE pagos SET historial_pagos = NULL WHERE historial_pagos = '[]'")
+        cursor.execute('DROP TABLE pagos_anterior')
+    cursor.execute('DROP TABLE facturacion_anterior')
+
+
+def _m1_esquema_base(cursor):
+    _unificar_facturacion(cursor)
+    for definicion in TABLAS_MIGRACION_1.values():
+        cursor.execute(definicion)
+
+    for tabla, columnas in COLUMNAS_MIGRACION_1.items():
+        cursor.execute(f'PRAGMA table_info({tabla})')
+        existentes = {fila[1] for fila in cursor.fetchall()}
+        for columna, tipo in columnas.items():
+            if columna not in existentes:
+                cursor.execute(f'ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}')
+
+
+INDICES_MIGRACION_2 = {
+    'idx_ingresos_cliente': 'ingresos(cliente_id)',
+    'idx_ingresos_vehiculo': 'ingresos(vehiculo_id)',
+    'idx_ingresos_fecha': 'ingresos(fecha_ingreso, id)',
+    'idx_ingresos_asignado': 'ingresos(asignado_a, estado, fecha_ingreso)',
+    'idx_servicios_ingreso': 'servicios(ingreso_id, fecha)',
+    'idx_pagos_ingreso': 'pagos(ingreso_id)',
+    'idx_movimientos_ingreso': 'movimientos_pago(ingreso_id, fecha)',
+    'idx_movimientos_fecha': 'movimientos_pago(fecha)',
+    'idx_mensajes_para': 'mensajes(para_usuario, tipo, leido, fecha)',
+    'idx_mensajes_ingreso': 'mensajes(ingreso_id, fecha)',
+    'idx_clientes_activo': 'clientes(activo, nombre)',
+    'idx_vehiculos_activo': 'vehiculos(activo, marca, modelo)',
+    'idx_usuarios_rol': 'usuarios(rol, activo)',
+}
+INDICES_MIGRACION_7 = {'idx_clientes_telefono': 'clientes(telefono)'}
+INDICES_MIGRACION_8 = {'idx_servicios_fecha': 'servicios(fecha)'}
+INDICES_MIGRACION_9 = {'idx_mensajes_recibidos': 'mensajes(para_usuario, tipo, id)'}
+INDICES_MIGRACION_10 = {'idx_ingresos_vence': 'ingresos(plazo_activo, vence_plazo)'}
+INDICES_MIGRACION_11 = {
+    'idx_ingresos_en_taller': "ingresos(fecha_ingreso) WHERE estado != 'Entregado'",
+    'idx_ingresos_taller_tecnico': "ingresos(asignado_a, fecha_ingreso) WHERE estado != 'Entregado'",
+    'idx_mensajes_recibidos_fecha': 'mensajes(para_usuario, tipo, fecha)',
+}
+
+
+def _m2_indices(cursor):
+    _crear_indices(cursor, INDICES_MIGRACION_2)
+
+
+def _m3_movimientos_pago(cursor):
+    """Copia los pagos guardados en pagos.historial_pagos (JSON) al libro
+    movimientos_pago. La columna queda como estaba pero ya no se usa."""
+    cursor.execute('''
+        INSERT INTO movimientos_pago (pago_id, ingreso_id, fecha, monto, metodo, notas, registrado_por)
+        SELECT p.id, p.ingreso_id,
+               COALESCE(json_extract(j.value, '$.fecha'), p.fecha_creacion),
+               COALESCE(json_extract(j.value, '$.monto'), 0),
+               json_extract(j.value, '$.metodo'),
+               NULLIF(json_extract(j.value, '$.notas'), ''),
+               json_extract(j.value, '$.registrado_por')
+        FROM pagos p, json_each(p.historial_pagos) j
+        WHERE json_valid(p.historial_pagos)
+        ORDER BY p.id, j.key
+    ''')
+
+
+def _m4_busqueda(cursor):
+    crear_busqueda(cursor)
+
+
+def _m5_resumen_pagos(cursor):
+    crear_resumen_pagos(cursor)
+
+
+def _m6_usuarios_default(cursor):
+    # Mismo hash que Database.hash_password
+    cursor.executemany(
+        'INSERT OR IGNORE INTO usuarios (usuario, password, rol, nombre) VALUES (?, ?, ?, ?)',
+        [(usuario, hashlib.sha256(password.encode()).hexdigest(), rol, nombre)
+         for usuario, password, rol, nombre in USUARIOS_DEFAULT]
+    )
+
+
+def _vence_plazo(cursor, esquema):
+    """Agrega ingresos.vence_plazo, la calcula para los plazos ya guardados y crea su índice.
+
+    fecha_inicio_plazo está en hora local; 'utc' la pasa a UTC antes de sacar el epoch.
+    """
+    cursor.execute(f'ALTER TABLE {esquema}.ingresos ADD COLUMN vence_plazo INTEGER')
+    cursor.execute(f'''
+        UPDATE {esquema}.ingresos
+        SET vence_plazo = CAST(strftime('%s', fecha_inicio_plazo, 'utc') AS INTEGER)
+                          + COALESCE(plazo_dias, 0) * 86400 + COALESCE(plazo_horas, 0) * 3600
+                          + COALESCE(plazo_minutos, 0) * 60
+        WHERE fecha_inicio_plazo IS NOT NULL
+    ''')
+    _crear_indices(cursor, INDICES_MIGRACION_10, esquema)
+
+
+def _m7_indice_telefono(cursor):
+    _crear_indices(cursor, INDICES_MIGRACION_7)
+
+
+def _m8_indice_servicios_fecha(cursor):
+    _crear_indices(cursor, INDICES_MIGRACION_8)
+
+
+def _m9_indice_mensajes_recibidos(cursor):
+    _crear_indices(cursor, INDICES_MIGRACION_9)
+
+
+def _m10_vence_plazo(cursor):
+    _vence_plazo(cursor, 'main')
+
+
+def _m11_indices_taller(cursor):
+    _crear_indices(cursor, INDICES_MIGRACION_11)
+
+
+# (versión, descripción, función(cursor)); la versión de una base es la última aplicada
+MIGRACIONES = [
+    (1, 'esquema base y tabla pagos unificada', _m1_esquema_base),
+    (2, 'índices secundarios', _m2_indices),
+    (3, 'libro movimientos_pago desde pagos.historial_pagos', _m3_movimientos_pago),
+    (4, 'búsqueda de texto FTS5', _m4_busqueda),
+    (5, 'resumen financiero por mes', _m5_resumen_pagos),
+    (6, 'usuarios predeterminados', _m6_usuarios_default),
+    (7, 'índice de clientes por teléfono', _m7_indice_telefono),
+    (8, 'índice de servicios por fecha', _m8_indice_servicios_fecha),
+    (9, 'índice de mensajes recibidos por id', _m9_indice_mensajes_recibidos),
+    (10, 'vencimiento de plazos en segundos epoch, con índice', _m10_vence_plazo),
+    (11, 'índices de ingresos en taller y de mensajes recibidos por fecha', _m11_indices_taller),
+]
+
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+# ======================== MIGRACIONES DEL ARCHIVO ========================
+def _tabla_de_archivo(tabla):
+    """CREATE TABLE de la migración 1 en el esquema del archivo, sin FOREIGN KEY:
+    clientes, vehículos y usuarios quedan en la base de trabajo"""
+    definicion = re.sub(r',\s*FOREIGN KEY \(\w+\) REFERENCES \w+\(\w+\)', '',
+                        TABLAS_MIGRACION_1[tabla])
+    return definicion.replace(f'IF NOT EXISTS {tabla} (', f'IF NOT EXISTS {ESQUEMA_ARCHIVO}.{tabla} (')
+
+
+def crear_indices_archivo(cursor):
+    """Los índices de INDICES que son de tablas archivadas"""
+    _crear_indices(cursor, INDICES, ESQUEMA_ARCHIVO)
+
+
+def _a1_esquema_archivo(cursor):
+    archivadas = [tabla for tabla, _ in TABLAS_ARCHIVADAS]
+    for tabla in archivadas:
+        cursor.execute(_tabla_de_archivo(tabla))
+    _crear_indices(cursor, INDICES_MIGRACION_2, ESQUEMA_ARCHIVO)
+    crear_busqueda(cursor, ESQUEMA_ARCHIVO,
+                   {tabla: columnas for tabla, columnas in BUSQUEDA.items() if tabla in archivadas})
+
+
+def _a2_indice_servicios_fecha(cursor):
+    _crear_indices(cursor, INDICES_MIGRACION_8, ESQUEMA_ARCHIVO)
+
+
+def _a3_indice_mensajes_recibidos(cursor):
+    _crear_indices(cursor, INDICES_MIGRACION_9, ESQUEMA_ARCHIVO)
+
+
+def _a4_vence_plazo(cursor):
+    _vence_plazo(cursor, ESQUEMA_ARCHIVO)
+
+
+def _a5_indices_taller(cursor):
+    _crear_indices(cursor, INDICES_MIGRACION_11, ESQUEMA_ARCHIVO)
+
+
+MIGRACIONES_ARCHIVO = [
+    (1, 'tablas, índices y búsqueda del archivo', _a1_esquema_archivo),
+    (2, 'índice de servicios por fecha', _a2_indice_servicios_fecha),
+    (3, 'índice de mensajes recibidos por id', _a3_indice_mensajes_recibidos),
+    (4, 'vencimiento de plazos en segundos epoch', _a4_vence_plazo),
+    (5, 'índices de ingresos en taller y de mensajes recibidos por fecha', _a5_indices_taller),
+]
+
+
+# ======================== APLICAR ========================
+def version_actual(conn, esquema='main'):
+    return conn.execute(f'PRAGMA {esquema}.user_version').fetchone()[0]
+
+
+def migrar(conn, antes_de_migrar=None):
+    """Aplica las migraciones pendientes y devuelve las versiones aplicadas.
+
+    antes_de_migrar: función que se llama (p. ej. para respaldar) si hay
+    migraciones pendientes y la base ya tiene tablas.
+    """
+    if version_actual(conn) >= VERSION_ESQUEMA:
+        return []
+    if antes_de_migrar is not None and conn.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()[0]:
+        antes_de_migrar()
+    return _aplicar(conn, 'main', MIGRACIONES)
+
+
+def migrar_archivo(conn):
+    """Como migrar(), para la base de archivo adjunta como ESQUEMA_ARCHIVO"""
+    if version_actual(conn, ESQUEMA_ARCHIVO) >= MIGRACIONES_ARCHIVO[-1][0]:
+        return []
+    return _aplicar(conn, ESQUEMA_ARCHIVO, MIGRACIONES_ARCHIVO)
+
+
+def _aplicar(conn, esquema, migraciones):
+    cursor = conn.cursor()
+    # IMMEDIATE toma el bloqueo de escritura antes de leer la versión: si dos
+    # programas abren una base vieja a la vez, el segundo espera y ya no migra
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        version = version_actual(conn, esquema)
+        aplicadas = []
+        for numero, descripcion, funcion in migraciones:
+            if numero <= version:
+                continue
+            registro.info('Migración %s %d: %s', esquema, numero, descripcion)
+            funcion(cursor)
+            aplicadas.append(numero)
+        if aplicadas:
+            cursor.execute(f'PRAGMA {esquema}.user_version = {aplicadas[-1]}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return aplicadas
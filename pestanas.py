@@ -0,0 +1,67 @@
+"""
+Pestañas de un ttk.Notebook que se construyen la primera vez que se abren.
+
+Al iniciar sesión solo se arma la pestaña visible; las demás quedan como un
+Frame vacío y se construyen (con sus consultas de carga) en el primer
+<<NotebookTabChanged>> que las selecciona. Así el tiempo hasta que la
+ventana responde no depende de cuántas pestañas ni cuántos datos haya.
+"""
+
+import logging
+import time
+
+registro = logging.getLogger('alan_automotriz.arranque')
+
+
+class PestanasDiferidas:
+    def __init__(self, notebook, ventana):
+        """ventana: nombre con que aparece en el reporte de arranque (p. ej. 'EjecutivoWindow')"""
+        self.notebook = notebook
+        self.ventana = ventana
+        # ruta del Frame -> (texto de la pestaña, función que la construye)
+        self.constructores = {}
+        self.construidas = set()
+        # (texto de la pestaña, ms que tardó en construirse)
+        self.tiempos = []
+        self.notebook.bind('<<NotebookTabChanged>>', self._al_cambiar, add='+')
+
+    def agregar(self, frame, texto, construir):
+        self.constructores[str(frame)] = (texto, construir)
+        self.notebook.add(frame, text=texto)
+
+    def construir(self, frame):
+        """Construye la pestaña si todavía no existe"""
+        clave = str(frame)
+        if clave in self.construidas:
+            return
+        self.construidas.add(clave)
+        texto, construir = self.constructores[clave]
+        inicio = time.perf_counter()
+        construir()
+        self.tiempos.append((texto, (time.perf_counter() - inicio) * 1000))
+
+    def construida(self, frame):
+        return str(frame) in self.construidas
+
+    def refrescar(self, frame, recargar):
+        """Llama a recargar() solo si la pestaña ya está construida; si no, cargará al abrirse"""
+        if self.construida(frame):
+            recargar()
+
+    def _al_cambiar(self, event):
+        if event.widget is not self.notebook:
+            return
+        seleccionada = self.notebook.select()
+        if seleccionada:
+            self.construir(seleccionada)
+
+    def reporte_arranque(self, total_ms):
+        lineas = [f"{self.ventana} lista en {total_ms:.1f} ms"]
+        for texto, ms in self.tiempos:
+            lineas.append(f"  pestaña '{texto}': {ms:.1f} ms")
+        pendientes = len(self.constructores) - len(self.construidas)
+        lineas.append(f"  pestañas que se construirán al abrirlas: {pendientes}")
+        return "\n".join(lineas)
+
+    def registrar_arranque(self, total_ms):
+        registro.info(self.reporte_arranque(total_ms))
@@ -0,0 +1,228 @@
+"""
+Cuenta regresiva de plazos sobre un ttk.Treeview.
+
+En lugar de un hilo que cada segundo recorre todas las filas, los plazos se
+guardan en un montículo ordenado por el próximo momento en que su fila cambia
+de aspecto y un solo root.after despierta en ese momento. Las filas visibles
+cambian cada segundo (el texto muestra segundos); las que no se ven solo
+despiertan al pasar de una banda de color a otra. Cada fila se repinta
+únicamente si su texto o su banda son distintos de lo que ya muestra.
+"""
+
+import heapq
+import time
+
+# Fracción del plazo en que empieza cada banda de color
+BANDAS = ((0.33, 'naranja'), (0.66, 'rojo'), (1.0, 'morado'))
+BANDA_INICIAL = 'verde'
+
+# Segundos que se espera después del cambio de segundo para no despertar justo antes
+MARGEN = 0.01
+
+
+def banda_plazo(transcurrido, plazo):
+    """Tag de color según la fracción del plazo ya usada"""
+    banda = BANDA_INICIAL
+    for fraccion, nombre in BANDAS:
+        if transcurrido >= plazo * fraccion:
+            banda = nombre
+    return banda
+
+
+def texto_plazo(segundos_restantes):
+    """Texto de la columna Plazo: tiempo restante o retraso"""
+    if segundos_restantes > 0:
+        prefijo = "⏳ "
+        segundos_totales = segundos_restantes
+    else:
+        prefijo = "🚨 RETRASO: "
+        segundos_totales = abs(segundos_restantes)
+
+    dias = int(segundos_totales // 86400)
+    horas = int((segundos_totales % 86400) // 3600)
+    minutos = int((segundos_totales % 3600) // 60)
+    segundos = int(segundos_totales % 60)
+
+    if dias > 0:
+        return f"{prefijo}{dias}d {horas}h {minutos}m {segundos}s"
+    elif horas > 0:
+        return f"{prefijo}{horas}h {minutos}m {segundos}s"
+    return f"{prefijo}{minutos}m {segundos}s"
+
+
+class ProgramadorPlazos:
+    def __init__(self, tree, columna):
+        """
+        tree: Treeview cuyas filas usan como iid la clave con que se agregan los plazos.
+        columna: columna del Treeview donde se muestra el texto del plazo.
+        """
+        self.tree = tree
+        self.columna = columna
+
+        # iid -> (inicio, fin) en segundos epoch
+        self.plazos = {}
+        # iid -> (texto, banda) que la fila muestra ahora
+        self.mostrado = {}
+        # Montículo de (momento, iid); una entrada vale solo si coincide con proximo[iid]
+        self.monticulo = []
+        self.proximo = {}
+
+        self._despertar = None
+        self._momento_despertar = None
+        self._refresco = None
+
+        self.tree.bind('<Destroy>', lambda e: self.detener(), add='+')
+
+    # ========== PLAZOS ==========
+    def agregar_epoch(self, iid, comienzo, fin):
+        """Registra (o reemplaza) el plazo de la fila, con inicio y vencimiento en
+        segundos epoch (p. ej. ingresos.vence_plazo)"""
+        self.plazos[iid] = (comienzo, fin)
+        self.mostrado.pop(iid, None)
+        if self.tree.exists(iid):
+            self._pintar(iid, time.time())
+        self._programar(iid, time.time())
+
+    def quitar(self, iid):
+        self.plazos.pop(iid, None)
+        self.mostrado.pop(iid, None)
+        self.proximo.pop(iid, None)
+        self._compactar()
+
+    def plazo_de(self, iid):
+        """(inicio, fin) en segundos epoch, o None si la fila no tiene plazo activo"""
+        return self.plazos.get(iid)
+
+    def vista(self, iid):
+        """(texto, banda) actuales de la fila, para quien la va a insertar en el Treeview"""
+        comienzo, fin = self.plazos[iid]
+        ahora = time.time()
+        vista = (texto_plazo(fin - ahora), banda_plazo(ahora - comienzo, fin - comienzo))
+        self.mostrado[iid] = vista
+        self._programar(iid, ahora)
+        # Al insertarse la fila todavía no se sabe si queda a la vista
+        self.refrescar()
+        return vista
+
+    def refrescar(self):
+        """Repinta pronto las filas que quedaron a la vista (p. ej. tras desplazar)"""
+        if self._refresco is None:
+            self._refresco = self.tree.after_idle(self._repintar_visibles)
+
+    def detener(self):
+        for tarea in (self._despertar, self._refresco):
+            if tarea is not None:
+                try:
+                    self.tree.after_cancel(tarea)
+                except Exception:
+                    pass
+        self._despertar = self._refresco = None
+        self._momento_despertar = None
+
+    # ========== PROGRAMACIÓN ==========
+    def _siguiente_cambio(self, iid, ahora, visible):
+        """Próximo momento en que la fila cambia: el siguiente segundo si se ve,
+        si no, la siguiente banda (None si ya está retrasado)"""
+        comienzo, fin = self.plazos[iid]
+        if visible:
+            # El texto cambia justo después de que el tiempo restante cruza un segundo entero
+            return ahora + (fin - ahora) % 1.0 + MARGEN
+        for fraccion, _ in BANDAS:
+            momento = comienzo + (fin - comienzo) * fraccion
+            if momento > ahora:
+                return momento
+        return None
+
+    def _programar(self, iid, ahora):
+        self._compactar()
+        momento = self._siguiente_cambio(iid, ahora, self._visible(iid))
+        if momento is None:
+            self.proximo.pop(iid, None)
+            return
+        self.proximo[iid] = momento
+        heapq.heappush(self.monticulo, (momento, iid))
+        self._reprogramar_despertar()
+
+    def _compactar(self):
+        """Rehace el montículo cuando las entradas que ya no valen (plazos
+        reprogramados o quitados) superan a las vigentes"""
+        if len(self.monticulo) > 2 * len(self.proximo):
+            self.monticulo = [(momento, iid) for iid, momento in self.proximo.items()]
+            heapq.heapify(self.monticulo)
+
+    def _reprogramar_despertar(self):
+        # Descartar entradas que ya no valen
+        while self.monticulo and self.proximo.get(self.monticulo[0][1]) != self.monticulo[0][0]:
+            heapq.heappop(self.monticulo)
+        if not self.monticulo:
+            return
+
+        momento = self.monticulo[0][0]
+        if self._momento_despertar is not None and self._momento_despertar <= momento:
+            return
+        if self._despertar is not None:
+            self.tree.after_cancel(self._despertar)
+        espera = max(int((momento - time.time()) * 1000) + 1, 1)
+        self._momento_despertar = momento
+        self._despertar = self.tree.after(espera, self._al_despertar)
+
+    def _al_despertar(self):
+        self._despertar = None
+        self._momento_despertar = None
+        ahora = time.time()
+
+        vencidos = []
+        while self.monticulo and self.monticulo[0][0] <= ahora:
+            momento, iid = heapq.heappop(self.monticulo)
+            if self.proximo.get(iid) == momento:
+                del self.proximo[iid]
+                vencidos.append(iid)
+
+        for iid in vencidos:
+            if iid not in self.plazos:
+                continue
+            self._pintar(iid, ahora)
+            self._programar(iid, ahora)
+
+        self._reprogramar_despertar()
+
+    # ========== PINTADO ==========
+    def _visible(self, iid):
+        try:
+            return bool(self.tree.bbox(iid))
+        except Exception:
+            return False
+
+    def _pintar(self, iid, ahora):
+        """Actualiza la fila solo si su texto o su banda cambiaron"""
+        if not self.tree.exists(iid):
+            self.mostrado.pop(iid, None)
+            return
+        comienzo, fin = self.plazos[iid]
+        texto = texto_plazo(fin - ahora)
+        banda = banda_plazo(ahora - comienzo, fin - comienzo)
+        texto_anterior, banda_anterior = self.mostrado.get(iid, (None, None))
+
+        if banda != banda_anterior:
+            self.tree.item(iid, tags=(banda,))
+        if texto != texto_anterior and self._visible(iid):
+            self.tree.set(iid, self.columna, texto)
+        else:
+            # Una fila oculta conserva su texto viejo; se pinta al volver a verse
+            texto = texto_anterior
+        self.mostrado[iid] = (texto, banda)
+
+    def _repintar_visibles(self):
+        self._refresco = None
+        hijos = self.tree.get_children()
+        if not hijos:
+            return
+        primera, ultima = self.tree.yview()
+        desde = max(int(primera * len(hijos)) - 1, 0)
+        hasta = min(int(ultima * len(hijos)) + 2, len(hijos))
+
+        ahora = time.time()
+        for iid in hijos[desde:hasta]:
+            if iid in self.plazos:
+                self._pintar(iid, ahora)
+                self._programar(iid, ahora)
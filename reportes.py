@@ -0,0 +1,209 @@
+"""
+Texto de los reportes del taller.
+
+Las mismas funciones arman el reporte para la ventana (un Text de Tk) y para
+la consola (consola.py); este módulo no depende de tkinter.
+"""
+
+
+def texto_reporte_general(conteos):
+    """Reporte general a partir de IngresoRepo.conteos(): totales por estado,
+    por técnico y por semana, sumados en memoria"""
+    por_estado = {}
+    por_tecnico = {}
+    por_semana = {}
+    for estado, tecnico, semana, cantidad in conteos:
+        por_estado[estado] = por_estado.get(estado, 0) + cantidad
+
+        tecnico = tecnico or 'Sin asignar'
+        asignados, entregados_tec = por_tecnico.get(tecnico, (0, 0))
+        por_tecnico[tecnico] = (asignados + cantidad,
+                                entregados_tec + (cantidad if estado == 'Entregado' else 0))
+
+        ingresados, entregados_sem = por_semana.get(semana, (0, 0))
+        por_semana[semana] = (ingresados + cantidad,
+                              entregados_sem + (cantidad if estado == 'Entregado' else 0))
+
+    total = sum(por_estado.values())
+    entregados = por_estado.get('Entregado', 0)
+    en_proceso = total - entregados
+
+    texto = []
+    texto.append("REPORTE GENERAL DEL TALLER\n")
+    texto.append("=" * 60 + "\n\n")
+
+    texto.append(f"Total de vehículos ingresados: {total}\n")
+    texto.append(f"Vehículos entregados: {entregados}\n")
+    texto.append(f"Vehículos en proceso: {en_proceso}\n\n")
+
+    texto.append("VEHÍCULOS POR ESTADO:\n")
+    texto.append("-" * 60 + "\n")
+
+    estados = ['Ingreso', 'Diagnóstico', 'Hojalatería', 'Pintura', 'Ensamble', 'Listo', 'Entregado']
+    # Estados que no están en la lista (datos antiguos) también se muestran
+    estados += sorted(e for e in por_estado if e not in estados and e is not None)
+    for estado in estados:
+        count = por_estado.get(estado, 0)
+        texto.append(f"  {estado:<20} {count:>6}\n")
+
+    texto.append("\nVEHÍCULOS POR TÉCNICO (asignados / entregados):\n")
+    texto.append("-" * 60 + "\n")
+    for tecnico, (asignados, entregados_tec) in sorted(por_tecnico.items(), key=lambda t: -t[1][0]):
+        texto.append(f"  {tecnico:<30} {asignados:>6} / {entregados_tec}\n")
+
+    texto.append("\nINGRESOS POR SEMANA - últimas 12 (ingresados / entregados):\n")
+    texto.append("-" * 60 + "\n")
+    semanas = sorted((s for s in por_semana if s), reverse=True)[:12]
+    for semana in semanas:
+        ingresados, entregados_sem = por_semana[semana]
+        texto.append(f"  Semana del {semana:<18} {ingresados:>6} / {entregados_sem}\n")
+    if not semanas:
+        texto.append("  Sin ingresos registrados\n")
+
+    return "".join(texto)
+
+
+def texto_historial(historial):
+    """Historial de servicios de HistorialRepo.cargar(), ya agrupado por ingreso"""
+    # El reporte se arma en una lista y se une una sola vez al final
+    texto = []
+
+    # Encabezado
+    texto.append("╔" + "═" * 78 + "╗\n")
+    texto.append(f"║  📋 HISTORIAL DE SERVICIOS - {len(historial)} resultado(s) encontrado(s)".ljust(
+        79) + "║\n")
+    texto.append("║  Ordenado por: Última actividad (más reciente primero)".ljust(79) + "║\n")
+    texto.append("╚" + "═" * 78 + "╝\n\n")
+
+    for idx, (ingreso, pago, movimientos, servicios, mensajes) in enumerate(historial, 1):
+        ing_id, cli_nom, cli_tel, cli_corr, v_marca, v_modelo, v_placa, v_anio, v_color, \
+            estado, f_ing, f_ent, motivo, ultima_actividad = ingreso
+
+        # Separador
+        texto.append("╔" + "═" * 78 + "╗\n")
+        texto.append(f"║  SERVICIO #{idx} - FOLIO: {ing_id}".ljust(79) + "║\n")
+        texto.append("╚" + "═" * 78 + "╝\n\n")
+
+        # CLIENTE
+        texto.append("👤 CLIENTE:\n")
+        texto.append("─" * 80 + "\n")
+        texto.append(f"   Nombre:    {cli_nom}\n")
+        texto.append(f"   Teléfono:  {cli_tel}\n")
+        texto.append(f"   Correo:    {cli_corr if cli_corr else 'N/A'}\n\n")
+
+        # VEHÍCULO
+        texto.append("🚗 VEHÍCULO:\n")
+        texto.append("─" * 80 + "\n")
+        texto.append(f"   {v_marca} {v_modelo}\n")
+        texto.append(f"   Placa:  {v_placa}\n")
+        texto.append(f"   Año:    {v_anio if v_anio else 'N/A'}\n")
+        texto.append(f"   Color:  {v_color if v_color else 'N/A'}\n\n")
+
+        # SERVICIO
+        texto.append("📊 INFORMACIÓN DEL SERVICIO:\n")
+        texto.append("─" * 80 + "\n")
+        texto.append(f"   Estado Actual:      {estado}\n")
+        texto.append(f"   Fecha de Ingreso:   {f_ing}\n")
+        texto.append(f"   Fecha de Entrega:   {f_ent if f_ent else 'Pendiente'}\n")
+        texto.append(f"   Última Actividad:   {ultima_actividad if ultima_actividad else 'N/A'}\n")
+        texto.append(f"   Motivo:             {motivo}\n\n")
+
+        # ========== FACTURACIÓN Y PAGOS (CORREGIDO) ==========
+        texto.append("💰 FACTURACIÓN Y PAGOS:\n")
+        texto.append("─" * 80 + "\n")
+
+        if pago:
+            monto_total, monto_pagado = pago.monto_total, pago.monto_pagado
+            estado_pago, fecha_pago = pago.estado_pago, pago.fecha_creacion
+            pendiente = monto_total - monto_pagado
+
+            # Símbolo según estado
+            if estado_pago == 'Pagado':
+                simbolo = "✅"
+            elif estado_pago == 'Parcial':
+                simbolo = "⏳"
+            else:
+                simbolo = "⏰"
+
+            texto.append(f"   {simbolo} Estado: {estado_pago}\n")
+            texto.append(f"   💵 Monto Total:     ${monto_total:,.2f}\n")
+            texto.append(f"   ✅ Monto Pagado:    ${monto_pagado:,.2f}\n")
+            texto.append(f"   ⏳ Pendiente:       ${pendiente:,.2f}\n")
+            texto.append(f"   📅 Fecha:           {fecha_pago}\n\n")
+
+            # Mostrar historial de pagos
+            if movimientos:
+                texto.append(f"   💳 HISTORIAL ({len(movimientos)} pago(s)):\n")
+                texto.append("   " + "·" * 76 + "\n")
+
+                for idx_pago, p in enumerate(movimientos, 1):
+                    texto.append(f"\n   Pago #{idx_pago}:\n")
+                    texto.append(f"      • Fecha:  {p.fecha}\n")
+                    texto.append(f"      • Monto:  ${p.monto:.2f}\n")
+                    texto.append(f"      • Método: {p.metodo or 'N/A'}\n")
+                    if p.notas:
+                        texto.append(f"      • Notas:  {p.notas}\n")
+                texto.append("\n")
+            else:
+                texto.append("   📭 Sin pagos registrados\n\n")
+        else:
+            texto.append("   ❌ SIN PRECIO ESTABLECIDO\n")
+            texto.append("   Este servicio aún no tiene un precio asignado.\n\n")
+
+        # ========== HISTORIAL DE SERVICIOS ==========
+        texto.append("🔧 HISTORIAL DE SERVICIOS:\n")
+        texto.append("─" * 80 + "\n")
+
+        if servicios:
+            for servicio in servicios:
+                tipo, desc, fecha, usuario = servicio
+                texto.append(f"   📅 [{fecha}] {tipo}\n")
+                texto.append(f"      {desc}\n")
+                texto.append(f"      👤 Por: {usuario if usuario else 'Sistema'}\n\n")
+        else:
+            texto.append("   Sin actividad registrada\n\n")
+
+        # ========== MENSAJES/REPORTES ==========
+        if mensajes:
+            texto.append("💬 REPORTES Y COMUNICACIONES:\n")
+            texto.append("─" * 80 + "\n")
+            for msg in mensajes:
+                mensaje, tipo, fecha, de_user, para_user = msg
+                texto.append(f"   📅 [{fecha}] {tipo}\n")
+                texto.append(f"      De: {de_user} → Para: {para_user}\n")
+                texto.append(f"      💬 {mensaje}\n\n")
+
+        # Separador final
+        texto.append("\n" + "═" * 80 + "\n\n")
+
+    # Resumen final
+    texto.append("\n╔" + "═" * 78 + "╗\n")
+    texto.append(f"║  ✅ Fin del historial - {len(historial)} servicio(s) mostrado(s)".ljust(79) + "║\n")
+    texto.append("╚" + "═" * 78 + "╝\n")
+
+    return "".join(texto)
+
+
+def texto_resumen_financiero(mes, anio, resumen_mes, resumen_anio, estadisticas):
+    """Resumen financiero del mes y del año (ResumenPagos) y totales de todos los cobros"""
+    texto = []
+    texto.append("RESUMEN FINANCIERO\n")
+    texto.append("=" * 60 + "\n\n")
+
+    for titulo, resumen in ((f"MES {anio}-{mes:02d}", resumen_mes), (f"AÑO {anio}", resumen_anio)):
+        texto.append(f"{titulo}:\n")
+        texto.append("-" * 60 + "\n")
+        if resumen and resumen.servicios:
+            texto.append(f"  Servicios:   {resumen.servicios:>10}  "
+                         f"(pagados {resumen.pagados}, pendientes {resumen.pendientes})\n")
+            texto.append(f"  Total:       ${resumen.total:>14,.2f}\n")
+            texto.append(f"  Pagado:      ${resumen.pagado:>14,.2f}\n")
+            texto.append(f"  Pendiente:   ${resumen.pendiente:>14,.2f}\n\n")
+        else:
+            texto.append("  Sin servicios registrados\n\n")
+
+    total, pagados, pendientes = estadisticas or (0, 0, 0)
+    texto.append("TODOS LOS SERVICIOS:\n")
+    texto.append("-" * 60 + "\n")
+    texto.append(f"  Servicios: {total or 0} | Pagados: {pagados or 0} | Pendientes: {pendientes or 0}\n")
+    return "".join(texto)
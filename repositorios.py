@@ -0,0 +1,1023 @@
+"""
+Repositorios de acceso a datos de Alan Automotriz.
+
+Cada repositorio es dueño del SQL de una entidad. Las ventanas llaman a sus
+métodos en lugar de escribir consultas, de modo que una consulta se ajusta en
+un solo lugar. Cada operación usa su propio cursor (conn.execute) y las
+sentencias son constantes del módulo, así que la caché de sentencias de la
+conexión las reutiliza sin volver a compilarlas.
+
+Las filas se devuelven como namedtuple: se pueden desempacar igual que una
+tupla y pasarse directo a Treeview.insert(values=...).
+
+Las escrituras sobre un ingreso publican su id en el BusEventos (si el
+repositorio tiene uno) después de confirmar, para que las grillas abiertas
+corrijan solo esa fila. Cada listado tiene su consulta de una fila por id.
+"""
+
+import json
+import re
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from eventos import INGRESO, INGRESOS
+from migraciones import ESQUEMA_ARCHIVO
+from plazos import BANDA_INICIAL, BANDAS
+
+
+# ======================== FILAS ========================
+Cliente = namedtuple('Cliente', 'id nombre telefono correo direccion')
+ClienteBreve = namedtuple('ClienteBreve', 'id nombre telefono')
+Vehiculo = namedtuple('Vehiculo', 'id marca modelo placa anio color')
+VehiculoBreve = namedtuple('VehiculoBreve', 'id marca modelo placa')
+Usuario = namedtuple('Usuario', 'id nombre')
+
+IngresoListado = namedtuple('IngresoListado', 'id cliente vehiculo placa estado fecha_ingreso asignado')
+IngresoPendiente = namedtuple('IngresoPendiente', 'id cliente vehiculo placa estado fecha_ingreso')
+IngresoMensaje = namedtuple('IngresoMensaje', 'id cliente vehiculo placa asignado')
+IngresoPlazo = namedtuple('IngresoPlazo', 'id cliente vehiculo placa estado asignado plazo_dias plazo_horas '
+                                          'plazo_minutos fecha_inicio_plazo plazo_activo fecha_ingreso '
+                                          'vence_plazo')
+IngresoHistorial = namedtuple('IngresoHistorial', 'id cliente telefono correo marca modelo placa anio color '
+                                                  'estado fecha_ingreso fecha_entrega motivo ultima_actividad')
+ServicioHistorial = namedtuple('ServicioHistorial', 'tipo descripcion fecha usuario')
+# Cantidad de ingresos por estado, técnico y semana (lunes de la semana de ingreso)
+ConteoIngresos = namedtuple('ConteoIngresos', 'estado tecnico semana cantidad')
+
+Facturacion = namedtuple('Facturacion', 'pago_id ingreso_id cliente vehiculo placa total pagado pendiente estado '
+                                        'fecha_ingreso')
+Pago = namedtuple('Pago', 'id ingreso_id monto_total monto_pagado estado_pago fecha_creacion')
+DetallePago = namedtuple('DetallePago', 'monto_total monto_pagado estado_pago fecha_creacion '
+                                        'ingreso_id cliente vehiculo placa')
+MovimientoPago = namedtuple('MovimientoPago', 'id ingreso_id fecha monto metodo notas registrado_por usuario')
+ResumenPagos = namedtuple('ResumenPagos', 'servicios total pagado pendiente pagados pendientes')
+
+MensajeHistorial = namedtuple('MensajeHistorial', 'mensaje tipo fecha de_usuario para_usuario')
+ReporteRecibido = namedtuple('ReporteRecibido', 'id fecha placa vehiculo tecnico mensaje leido cliente')
+Tarea = namedtuple('Tarea', 'id fecha placa vehiculo cliente mensaje leido')
+
+# Un ingreso del historial con todo lo relacionado (pago puede ser None)
+HistorialIngreso = namedtuple('HistorialIngreso', 'ingreso pago movimientos servicios mensajes')
+
+TIPO_TAREA = 'Tarea del Gerente'
+TIPO_REPORTE = 'Reporte del Técnico'
+
+
+# ======================== SQL ========================
+SQL_USUARIO_INSERTAR = 'INSERT INTO usuarios (usuario, password, rol, nombre) VALUES (?, ?, ?, ?)'
+SQL_USUARIO_AUTENTICAR = 'SELECT id, rol, nombre FROM usuarios WHERE usuario = ? AND password = ? AND activo = 1'
+SQL_USUARIO_NOMBRE = 'SELECT nombre FROM usuarios WHERE id = ?'
+SQL_TECNICOS_ACTIVOS = "SELECT id, nombre FROM usuarios WHERE rol='Tecnico' AND activo=1"
+SQL_PRIMER_GERENTE = "SELECT id FROM usuarios WHERE rol='Gerente' LIMIT 1"
+
+SQL_CLIENTES_ACTIVOS = '''
+    SELECT id, nombre, telefono, correo, direccion FROM clientes WHERE activo=1 ORDER BY nombre
+'''
+SQL_CLIENTES_BREVE = 'SELECT id, nombre, telefono FROM clientes WHERE activo=1 ORDER BY nombre'
+SQL_CLIENTE_INSERTAR = 'INSERT INTO clientes (nombre, telefono, correo, direccion) VALUES (?, ?, ?, ?)'
+SQL_CLIENTE_ACTUALIZAR = 'UPDATE clientes SET nombre=?, telefono=?, correo=?, direccion=? WHERE id=?'
+SQL_CLIENTE_DESACTIVAR = 'UPDATE clientes SET activo=0 WHERE id=?'
+
+SQL_VEHICULOS_ACTIVOS = '''
+    SELECT id, marca, modelo, placa, anio, color FROM vehiculos WHERE activo=1 ORDER BY marca, modelo
+'''
+SQL_VEHICULOS_BREVE = 'SELECT id, marca, modelo, placa FROM vehiculos WHERE activo=1 ORDER BY marca, modelo'
+SQL_VEHICULO_INSERTAR = 'INSERT INTO vehiculos (marca, modelo, placa, anio, color) VALUES (?, ?, ?, ?, ?)'
+SQL_VEHICULO_ACTUALIZAR = 'UPDATE vehiculos SET marca=?, modelo=?, placa=?, anio=?, color=? WHERE id=?'
+SQL_VEHICULO_DESACTIVAR = 'UPDATE vehiculos SET activo=0 WHERE id=?'
+
+# Los listados de ingresos se leen por páginas (ver sql_pagina), así que estas
+# consultas no llevan WHERE ni ORDER BY
+SQL_INGRESOS_LISTADO = '''
+    SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado,
+           i.fecha_ingreso, COALESCE(u.nombre, 'Sin asignar')
+    FROM ingresos i
+    JOIN clientes c ON i.cliente_id = c.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+    LEFT JOIN usuarios u ON i.asignado_a = u.id
+'''
+SQL_INGRESOS_CON_PLAZO = '''
+    SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado,
+           COALESCE(u.nombre, 'Sin asignar'),
+           i.plazo_dias, i.plazo_horas, i.plazo_minutos,
+           i.fecha_inicio_plazo, i.plazo_activo, i.fecha_ingreso, i.vence_plazo
+    FROM ingresos i
+    JOIN clientes c ON i.cliente_id = c.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+    LEFT JOIN usuarios u ON i.asignado_a = u.id
+'''
+SQL_INGRESO_BREVE = '''
+    SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, i.estado, i.fecha_ingreso
+    FROM ingresos i
+    JOIN clientes c ON i.cliente_id = c.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+'''
+SQL_INGRESOS_PENDIENTES = SQL_INGRESO_BREVE + '''
+    WHERE i.asignado_a IS NULL AND i.estado != 'Entregado'
+    ORDER BY i.fecha_ingreso
+'''
+SQL_INGRESOS_DE_TECNICO = SQL_INGRESO_BREVE + '''
+    WHERE i.asignado_a = ? AND i.estado != 'Entregado'
+    ORDER BY i.fecha_ingreso
+'''
+SQL_INGRESO_MENSAJE = '''
+    SELECT i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa, u.nombre
+    FROM ingresos i
+    JOIN clientes c ON i.cliente_id = c.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+    LEFT JOIN usuarios u ON i.asignado_a = u.id
+'''
+SQL_INGRESOS_EN_TALLER = SQL_INGRESO_MENSAJE + '''
+    WHERE i.estado != 'Entregado'
+    ORDER BY i.fecha_ingreso DESC
+'''
+# Una parte por esquema (base de trabajo y archivo), que parte de los ingresos
+# que coinciden con la búsqueda; ver sql_historial()
+SQL_INGRESOS_HISTORIAL = '''
+    SELECT i.id, c.nombre, c.telefono, c.correo, v.marca, v.modelo, v.placa,
+           v.anio, v.color, i.estado, i.fecha_ingreso, i.fecha_entrega, i.motivo_ingreso,
+           (SELECT MAX(s.fecha) FROM {esquema}.servicios s WHERE s.ingreso_id = i.id) as ultima_actividad
+    FROM ({coincidencias}) k
+    JOIN {esquema}.ingresos i ON i.id = k.ingreso_id
+    JOIN clientes c ON i.cliente_id = c.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+'''
+ORDEN_HISTORIAL = ' ORDER BY ultima_actividad DESC, fecha_ingreso DESC'
+
+# Una fila de cada listado, para corregirla después de una escritura (ver eventos.py)
+SQL_INGRESO_LISTADO = SQL_INGRESOS_LISTADO + ' WHERE i.id = ?'
+SQL_INGRESO_CON_PLAZO = SQL_INGRESOS_CON_PLAZO + ' WHERE i.id = ?'
+SQL_INGRESO_PENDIENTE = SQL_INGRESO_BREVE + " WHERE i.id = ? AND i.asignado_a IS NULL AND i.estado != 'Entregado'"
+SQL_INGRESO_DE_TECNICO = SQL_INGRESO_BREVE + " WHERE i.id = ? AND i.asignado_a = ? AND i.estado != 'Entregado'"
+SQL_INGRESO_EN_TALLER = SQL_INGRESO_MENSAJE + " WHERE i.id = ? AND i.estado != 'Entregado'"
+
+SQL_INGRESO_TECNICO = 'SELECT asignado_a FROM ingresos WHERE id=?'
+SQL_INGRESO_INSERTAR = 'INSERT INTO ingresos (cliente_id, vehiculo_id, motivo_ingreso) VALUES (?, ?, ?)'
+SQL_INGRESO_ESTADO = 'UPDATE ingresos SET estado=? WHERE id=?'
+SQL_INGRESO_ENTREGA = 'UPDATE ingresos SET fecha_entrega=CURRENT_TIMESTAMP WHERE id=?'
+SQL_INGRESO_ASIGNAR = 'UPDATE ingresos SET asignado_a=? WHERE id=?'
+SQL_INGRESO_PLAZO = '''
+    UPDATE ingresos
+    SET plazo_dias = ?,
+        plazo_horas = ?,
+        plazo_minutos = ?,
+        fecha_inicio_plazo = ?,
+        vence_plazo = ?,
+        plazo_activo = 1
+    WHERE id = ?
+'''
+SQL_INGRESO_FIN_PLAZO = 'UPDATE ingresos SET plazo_activo = 0 WHERE id = ?'
+
+# Plazos activos por su vencimiento (vence_plazo, segundos epoch), con idx_ingresos_vence
+SQL_PLAZOS_ENTRE = SQL_INGRESOS_CON_PLAZO + '''
+    WHERE i.plazo_activo = 1 AND i.vence_plazo >= ? AND i.vence_plazo < ?
+    ORDER BY i.vence_plazo
+'''
+# Misma regla que plazos.banda_plazo: la banda empieza cuando ya pasó esa fracción del plazo
+SQL_PLAZOS_BANDAS = f'''
+    SELECT CASE {' '.join(f"WHEN transcurrido >= duracion * {fraccion} THEN '{nombre}'"
+                          for fraccion, nombre in reversed(BANDAS))}
+                ELSE '{BANDA_INICIAL}' END AS banda,
+           COUNT(*)
+    FROM (SELECT ?1 - vence_plazo + duracion AS transcurrido, duracion
+          FROM (SELECT vence_plazo, COALESCE(plazo_dias, 0) * 86400 + COALESCE(plazo_horas, 0) * 3600
+                                    + COALESCE(plazo_minutos, 0) * 60 AS duracion
+                FROM ingresos
+                WHERE plazo_activo = 1 AND vence_plazo IS NOT NULL))
+    GROUP BY banda
+'''
+# Incluye los ingresos archivados
+SQL_INGRESOS_CONTEOS = f'''
+    SELECT g.estado, u.nombre, g.semana, g.cantidad
+    FROM (
+        SELECT estado, asignado_a, date(fecha_ingreso, 'weekday 0', '-6 days') AS semana,
+               COUNT(*) AS cantidad
+        FROM (SELECT estado, asignado_a, fecha_ingreso FROM main.ingresos
+              UNION ALL
+              SELECT estado, asignado_a, fecha_ingreso FROM {ESQUEMA_ARCHIVO}.ingresos)
+        GROUP BY estado, asignado_a, semana
+    ) g
+    LEFT JOIN usuarios u ON g.asignado_a = u.id
+'''
+
+SQL_SERVICIO_INSERTAR = '''
+    INSERT INTO servicios (ingreso_id, tipo_servicio, descripcion, realizado_por) VALUES (?, ?, ?, ?)
+'''
+SQL_SERVICIOS_DE_INGRESO = '''
+    SELECT s.tipo_servicio, s.descripcion, s.fecha, u.nombre
+    FROM servicios s
+    LEFT JOIN usuarios u ON s.realizado_por = u.id
+    WHERE s.ingreso_id = ?
+    ORDER BY s.fecha DESC
+'''
+
+SQL_FACTURACION_LISTADO = '''
+    SELECT f.id, i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa,
+           COALESCE(f.monto_total, 0),
+           COALESCE(f.monto_pagado, 0),
+           COALESCE(f.monto_total, 0) - COALESCE(f.monto_pagado, 0),
+           COALESCE(f.estado_pago, 'Sin precio'),
+           i.fecha_ingreso
+    FROM ingresos i
+    JOIN clientes c ON i.cliente_id = c.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+    LEFT JOIN pagos f ON i.id = f.ingreso_id
+'''
+SQL_FACTURACION_DE_INGRESO = SQL_FACTURACION_LISTADO + ' WHERE i.id = ?'
+SQL_PAGO_DE_INGRESO = '''
+    SELECT id, ingreso_id, monto_total, monto_pagado, estado_pago, fecha_creacion
+    FROM pagos
+    WHERE ingreso_id = ?
+'''
+SQL_PAGO_DETALLE = '''
+    SELECT p.monto_total, p.monto_pagado, p.estado_pago, p.fecha_creacion,
+           i.id, c.nombre, v.marca || ' ' || v.modelo, v.placa
+    FROM pagos p
+    JOIN ingresos i ON p.ingreso_id = i.id
+    JOIN clientes c ON i.cliente_id = c.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+    WHERE p.id = ?
+'''
+SQL_PAGO_INSERTAR = '''
+    INSERT INTO pagos (ingreso_id, monto_total, monto_pagado, estado_pago)
+    VALUES (?, ?, 0, 'Pendiente')
+'''
+SQL_PAGO_PRECIO = 'UPDATE pagos SET monto_total = ?, estado_pago = ? WHERE id = ?'
+SQL_PAGO_ABONO = '''
+    UPDATE pagos
+    SET monto_pagado = ?,
+        estado_pago = ?,
+        ultimo_pago = ?,
+        ultimo_metodo_pago = ?,
+        ultimo_fecha_pago = CURRENT_TIMESTAMP,
+        ultimo_registrado_por = ?
+    WHERE id = ?
+'''
+SQL_MOVIMIENTO_INSERTAR = '''
+    INSERT INTO movimientos_pago (pago_id, ingreso_id, fecha, monto, metodo, notas, registrado_por)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_MOVIMIENTOS_DE_INGRESO = '''
+    SELECT m.id, m.ingreso_id, m.fecha, m.monto, m.metodo, m.notas, m.registrado_por, u.nombre
+    FROM movimientos_pago m
+    LEFT JOIN usuarios u ON m.registrado_por = u.id
+    WHERE m.ingreso_id = ?
+    ORDER BY m.fecha, m.id
+'''
+# Los resúmenes leen resumen_pagos_mes, que los triggers de pagos mantienen al día
+SQL_PAGOS_RESUMEN_MES = '''
+    SELECT servicios, total, pagado, total - pagado, pagados, pendientes
+    FROM resumen_pagos_mes
+    WHERE periodo = ?
+'''
+SQL_PAGOS_RESUMEN_ANIO = '''
+    SELECT
+        COALESCE(SUM(servicios), 0),
+        COALESCE(SUM(total), 0),
+        COALESCE(SUM(pagado), 0),
+        COALESCE(SUM(total - pagado), 0),
+        COALESCE(SUM(pagados), 0),
+        COALESCE(SUM(pendientes), 0)
+    FROM resumen_pagos_mes
+    WHERE periodo BETWEEN ? AND ?
+'''
+SQL_PAGOS_ESTADISTICAS = '''
+    SELECT COALESCE(SUM(servicios), 0), COALESCE(SUM(pagados), 0), COALESCE(SUM(pendientes), 0)
+    FROM resumen_pagos_mes
+'''
+
+# ======================== HISTORIAL POR LOTES ========================
+# Lo relacionado a un conjunto de ingresos en una sola consulta por tabla.
+# Los ids llegan como un arreglo JSON (?1) para no armar un IN (?, ?, ...)
+# distinto por cada tamaño de resultado. Cada consulta parte del arreglo
+# (json_each) y busca cada id por el índice de ingreso_id de su tabla; CROSS
+# JOIN fija ese orden, que con una tabla chica SQLite invertiría para recorrerla
+# completa. Leen la base de trabajo y el archivo: un ingreso está en uno de los
+# dos, con todo lo suyo.
+def en_ambos_esquemas(plantilla, orden=''):
+    """La consulta {esquema} sobre la base de trabajo y el archivo, unida con UNION ALL"""
+    return ' UNION ALL '.join(plantilla.format(esquema=esquema)
+                              for esquema in ('main', ESQUEMA_ARCHIVO)) + orden
+
+
+SQL_PAGOS_DE_INGRESOS = en_ambos_esquemas('''
+    SELECT p.id, p.ingreso_id, p.monto_total, p.monto_pagado, p.estado_pago, p.fecha_creacion
+    FROM json_each(?1)
+    CROSS JOIN {esquema}.pagos p ON p.ingreso_id = json_each.value
+''')
+SQL_MOVIMIENTOS_DE_INGRESOS = en_ambos_esquemas('''
+    SELECT m.id, m.ingreso_id, m.fecha, m.monto, m.metodo, m.notas, m.registrado_por, u.nombre
+    FROM json_each(?1)
+    CROSS JOIN {esquema}.movimientos_pago m ON m.ingreso_id = json_each.value
+    LEFT JOIN usuarios u ON m.registrado_por = u.id
+''', ' ORDER BY 2, 3, 1')
+SQL_SERVICIOS_DE_INGRESOS = en_ambos_esquemas('''
+    SELECT s.ingreso_id, s.tipo_servicio, s.descripcion, s.fecha, u.nombre
+    FROM json_each(?1)
+    CROSS JOIN {esquema}.servicios s ON s.ingreso_id = json_each.value
+    LEFT JOIN usuarios u ON s.realizado_por = u.id
+''', ' ORDER BY 1, 4 DESC')
+# Con pocos mensajes por ingreso las estadísticas empatan idx_mensajes_ingreso
+# con recorrer la tabla; INDEXED BY fija el plan (y falla si el índice falta)
+SQL_MENSAJES_DE_INGRESOS = en_ambos_esquemas('''
+    SELECT m.ingreso_id, m.mensaje, m.tipo, m.fecha, u1.nombre, u2.nombre
+    FROM json_each(?1)
+    CROSS JOIN {esquema}.mensajes m INDEXED BY idx_mensajes_ingreso ON m.ingreso_id = json_each.value
+    JOIN usuarios u1 ON m.de_usuario = u1.id
+    JOIN usuarios u2 ON m.para_usuario = u2.id
+''', ' ORDER BY 1, 4 DESC')
+
+# ======================== EXPORTACIÓN ========================
+# Una fila por registro para exportar/exportar.py, entre dos fechas (?1
+# inclusive, ?2 exclusiva) y de la base de trabajo y el archivo. Cada parte
+# recorre el índice de su fecha en orden, así SQLite intercala las dos
+# (MERGE) sin ordenar el resultado completo y las filas salen mientras se leen.
+# CROSS JOIN mantiene la tabla del rango de fechas como el ciclo exterior: con
+# pocos vehículos o clientes, las estadísticas harían empezar por ellos y
+# ordenar todo al final. Los alias son los encabezados del archivo exportado.
+SQL_EXPORTAR_FACTURACION = en_ambos_esquemas('''
+    SELECT i.id AS ingreso, i.fecha_ingreso, c.nombre AS cliente, c.telefono,
+           v.marca || ' ' || v.modelo AS vehiculo, v.placa, i.estado,
+           COALESCE(f.monto_total, 0) AS total,
+           COALESCE(f.monto_pagado, 0) AS pagado,
+           COALESCE(f.monto_total, 0) - COALESCE(f.monto_pagado, 0) AS pendiente,
+           COALESCE(f.estado_pago, 'Sin precio') AS estado_pago,
+           f.ultimo_fecha_pago AS fecha_ultimo_pago
+    FROM {esquema}.ingresos i
+    CROSS JOIN clientes c ON i.cliente_id = c.id
+    CROSS JOIN vehiculos v ON i.vehiculo_id = v.id
+    LEFT JOIN {esquema}.pagos f ON f.ingreso_id = i.id
+    WHERE i.fecha_ingreso >= ?1 AND i.fecha_ingreso < ?2
+''', ' ORDER BY 2, 1')
+SQL_EXPORTAR_MOVIMIENTOS = en_ambos_esquemas('''
+    SELECT m.id AS movimiento, m.fecha, m.ingreso_id AS ingreso, c.nombre AS cliente, v.placa,
+           m.monto, m.metodo, m.notas, u.nombre AS registrado_por
+    FROM {esquema}.movimientos_pago m
+    CROSS JOIN {esquema}.ingresos i ON m.ingreso_id = i.id
+    CROSS JOIN clientes c ON i.cliente_id = c.id
+    CROSS JOIN vehiculos v ON i.vehiculo_id = v.id
+    LEFT JOIN usuarios u ON m.registrado_por = u.id
+    WHERE m.fecha >= ?1 AND m.fecha < ?2
+''', ' ORDER BY 2, 1')
+SQL_EXPORTAR_INGRESOS = en_ambos_esquemas('''
+    SELECT i.id AS ingreso, i.fecha_ingreso, i.estado, c.nombre AS cliente, c.telefono,
+           v.marca, v.modelo, v.placa, v.anio, i.motivo_ingreso AS motivo,
+           u.nombre AS tecnico, i.fecha_entrega
+    FROM {esquema}.ingresos i
+    CROSS JOIN clientes c ON i.cliente_id = c.id
+    CROSS JOIN vehiculos v ON i.vehiculo_id = v.id
+    LEFT JOIN usuarios u ON i.asignado_a = u.id
+    WHERE i.fecha_ingreso >= ?1 AND i.fecha_ingreso < ?2
+''', ' ORDER BY 2, 1')
+SQL_EXPORTAR_SERVICIOS = en_ambos_esquemas('''
+    SELECT s.id AS servicio, s.fecha, s.ingreso_id AS ingreso, c.nombre AS cliente, v.placa,
+           s.tipo_servicio AS tipo, s.descripcion, u.nombre AS realizado_por
+    FROM {esquema}.servicios s
+    CROSS JOIN {esquema}.ingresos i ON s.ingreso_id = i.id
+    CROSS JOIN clientes c ON i.cliente_id = c.id
+    CROSS JOIN vehiculos v ON i.vehiculo_id = v.id
+    LEFT JOIN usuarios u ON s.realizado_por = u.id
+    WHERE s.fecha >= ?1 AND s.fecha < ?2
+''', ' ORDER BY 2, 1')
+
+EXPORTACIONES = {
+    'facturacion': SQL_EXPORTAR_FACTURACION,
+    'movimientos': SQL_EXPORTAR_MOVIMIENTOS,
+    'ingresos': SQL_EXPORTAR_INGRESOS,
+    'servicios': SQL_EXPORTAR_SERVICIOS,
+}
+
+# ======================== BÚSQUEDA ========================
+# Las tablas *_fts (ver migraciones.BUSQUEDA) indexan el texto de clientes,
+# vehículos, ingresos, servicios y mensajes. rank es el puntaje bm25 de FTS5:
+# más negativo es más relevante.
+SQL_BUSCAR_CLIENTES = '''
+    SELECT c.id, c.nombre, c.telefono, c.correo, c.direccion
+    FROM clientes_fts
+    JOIN clientes c ON c.id = clientes_fts.rowid
+    WHERE clientes_fts MATCH ? AND c.activo = 1
+    ORDER BY clientes_fts.rank
+'''
+SQL_BUSCAR_VEHICULOS = '''
+    SELECT v.id, v.marca, v.modelo, v.placa, v.anio, v.color
+    FROM vehiculos_fts
+    JOIN vehiculos v ON v.id = vehiculos_fts.rowid
+    WHERE vehiculos_fts MATCH ? AND v.activo = 1
+    ORDER BY vehiculos_fts.rank
+'''
+
+# Ingresos que coinciden con un término, por cualquiera de los textos relacionados.
+# {esquema} es main o el archivo; las tablas FTS del esquema se consultan con
+# la forma tabla(?) porque MATCH no acepta un nombre con esquema.
+SQL_COINCIDENCIAS_TERMINO = '''
+    SELECT {n} AS termino, i.id AS ingreso_id, clientes_fts.rank AS rango
+    FROM clientes_fts JOIN {esquema}.ingresos i ON i.cliente_id = clientes_fts.rowid
+    WHERE clientes_fts MATCH ?
+    UNION ALL
+    SELECT {n}, i.id, vehiculos_fts.rank
+    FROM vehiculos_fts JOIN {esquema}.ingresos i ON i.vehiculo_id = vehiculos_fts.rowid
+    WHERE vehiculos_fts MATCH ?
+    UNION ALL
+    SELECT {n}, rowid, rank FROM {esquema}.ingresos_fts(?)
+    UNION ALL
+    SELECT {n}, (SELECT ingreso_id FROM {esquema}.servicios WHERE id = f.rowid), f.rank
+    FROM {esquema}.servicios_fts(?) f
+    UNION ALL
+    SELECT {n}, (SELECT ingreso_id FROM {esquema}.mensajes WHERE id = f.rowid), f.rank
+    FROM {esquema}.mensajes_fts(?) f
+'''
+FUENTES_POR_TERMINO = 5
+
+# Un ingreso coincide si cada término aparece en alguno de sus textos (el
+# nombre en el cliente y la marca en el vehículo, por ejemplo)
+SQL_COINCIDENCIAS_INGRESO = '''
+    SELECT ingreso_id, SUM(mejor_rango) AS rango
+    FROM (
+        SELECT termino, ingreso_id, MIN(rango) AS mejor_rango
+        FROM ({uniones})
+        GROUP BY termino, ingreso_id
+    )
+    GROUP BY ingreso_id
+    HAVING COUNT(*) = {terminos}
+'''
+
+
+def terminos_busqueda(texto):
+    """Palabras de una caja de búsqueda; los signos se ignoran ('E$R-12' -> e, r, 12)"""
+    return re.findall(r'\w+', texto or '')
+
+
+def expresion_fts(terminos):
+    """Consulta FTS5 donde cada término se busca como prefijo: 'hern' encuentra 'Hernández'"""
+    return ' '.join(f'"{t}"*' for t in terminos)
+
+
+def sql_coincidencias_ingreso(texto, esquema='main'):
+    """SQL (ingreso_id, rango) de los ingresos que coinciden con el texto, y sus parámetros"""
+    terminos = terminos_busqueda(texto)
+    uniones = ' UNION ALL '.join(SQL_COINCIDENCIAS_TERMINO.format(n=n, esquema=esquema)
+                                 for n in range(len(terminos)))
+    parametros = []
+    for termino in terminos:
+        parametros += [expresion_fts([termino])] * FUENTES_POR_TERMINO
+    return SQL_COINCIDENCIAS_INGRESO.format(uniones=uniones, terminos=len(terminos)), parametros
+
+
+def filtro_busqueda_ingresos(texto, esquema='main'):
+    """Condición WHERE sobre el alias i de ingresos para el texto de una caja de búsqueda"""
+    if not terminos_busqueda(texto):
+        return '0', []
+    sql, parametros = sql_coincidencias_ingreso(texto, esquema)
+    return f'i.id IN (SELECT ingreso_id FROM ({sql}))', parametros
+
+
+def sql_historial(texto):
+    """Historial de los ingresos que coinciden, de la base de trabajo y del archivo
+    (el texto debe tener al menos un término)"""
+    partes, parametros = [], []
+    for esquema in ('main', ESQUEMA_ARCHIVO):
+        coincidencias, parametros_esquema = sql_coincidencias_ingreso(texto, esquema)
+        partes.append(SQL_INGRESOS_HISTORIAL.format(esquema=esquema, coincidencias=coincidencias))
+        parametros += parametros_esquema
+    return ' UNION ALL '.join(partes) + ORDEN_HISTORIAL, parametros
+
+
+SQL_MENSAJE_INSERTAR = '''
+    INSERT INTO mensajes (ingreso_id, de_usuario, para_usuario, mensaje, tipo) VALUES (?, ?, ?, ?, ?)
+'''
+SQL_MENSAJES_DE_INGRESO = '''
+    SELECT m.mensaje, m.tipo, m.fecha, u1.nombre, u2.nombre
+    FROM mensajes m
+    JOIN usuarios u1 ON m.de_usuario = u1.id
+    JOIN usuarios u2 ON m.para_usuario = u2.id
+    WHERE m.ingreso_id = ?
+    ORDER BY m.fecha DESC
+'''
+SQL_REPORTES_DE_USUARIO = '''
+    SELECT m.id, m.fecha, v.placa, v.marca || ' ' || v.modelo, u.nombre, m.mensaje, m.leido, c.nombre
+    FROM mensajes m
+    JOIN ingresos i ON m.ingreso_id = i.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+    JOIN clientes c ON i.cliente_id = c.id
+    JOIN usuarios u ON m.de_usuario = u.id
+    WHERE m.para_usuario = ? AND m.tipo = 'Reporte del Técnico'
+'''
+SQL_TAREAS_DE_USUARIO = '''
+    SELECT m.id, m.fecha, v.placa, v.marca || ' ' || v.modelo, c.nombre, m.mensaje, m.leido
+    FROM mensajes m
+    JOIN ingresos i ON m.ingreso_id = i.id
+    JOIN vehiculos v ON i.vehiculo_id = v.id
+    JOIN clientes c ON i.cliente_id = c.id
+    WHERE m.para_usuario = ? AND m.tipo = 'Tarea del Gerente'
+'''
+SQL_REPORTES_RECIBIDOS = SQL_REPORTES_DE_USUARIO + ' ORDER BY m.leido ASC, m.fecha DESC'
+SQL_TAREAS_RECIBIDAS = SQL_TAREAS_DE_USUARIO + ' ORDER BY m.fecha DESC'
+# Los que llegaron después del último que la ventana ya muestra (ver buzon.py)
+SQL_REPORTES_NUEVOS = SQL_REPORTES_DE_USUARIO + ' AND m.id > ? ORDER BY m.id'
+SQL_TAREAS_NUEVAS = SQL_TAREAS_DE_USUARIO + ' AND m.id > ? ORDER BY m.id'
+SQL_MENSAJES_ULTIMO_RECIBIDO = 'SELECT COALESCE(MAX(id), 0) FROM mensajes WHERE para_usuario = ? AND tipo = ?'
+SQL_MENSAJES_CONTAR_NO_LEIDOS = '''
+    SELECT COUNT(*) FROM mensajes
+    WHERE para_usuario = ? AND tipo = ? AND leido = 0
+'''
+SQL_MENSAJES_MARCAR_LEIDOS = '''
+    UPDATE mensajes SET leido = 1
+    WHERE para_usuario = ? AND tipo = ? AND leido = 0
+'''
+
+
+def sql_pagina(select, filtro='', direccion=None):
+    """Arma la consulta de una página por keyset sobre (fecha_ingreso, id) de ingresos.
+
+    Las páginas van de la más reciente a la más antigua. direccion 'siguiente'
+    pide las filas posteriores a una clave y 'anterior' las previas (en orden
+    ascendente; el repositorio las invierte). El índice idx_ingresos_fecha
+    resuelve el orden y el límite sin ordenar toda la tabla.
+    """
+    condiciones = [filtro] if filtro else []
+    orden = 'DESC'
+    if direccion == 'siguiente':
+        condiciones.append('(i.fecha_ingreso, i.id) < (?, ?)')
+    elif direccion == 'anterior':
+        condiciones.append('(i.fecha_ingreso, i.id) > (?, ?)')
+        orden = 'ASC'
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+    return f'{select} {where} ORDER BY i.fecha_ingreso {orden}, i.id {orden} LIMIT ?'
+
+
+def estado_de_pago(monto_pagado, monto_total):
+    """Estado de un cobro según lo pagado frente al total"""
+    if monto_pagado >= monto_total:
+        return 'Pagado'
+    elif monto_pagado > 0:
+        return 'Parcial'
+    return 'Pendiente'
+
+
+# ======================== REPOSITORIOS ========================
+class _Repositorio:
+    def __init__(self, conn, eventos=None):
+        self.conn = conn
+        self.eventos = eventos
+
+    def _publicar(self, *ingreso_ids):
+        """Avisa que los ingresos cambiaron (INGRESO por cada uno, INGRESOS una vez
+        con todos); se llama después de confirmar la transacción"""
+        if self.eventos is None or not ingreso_ids:
+            return
+        for ingreso_id in ingreso_ids:
+            self.eventos.publicar(INGRESO, ingreso_id)
+        self.eventos.publicar(INGRESOS, list(ingreso_ids))
+
+    def _todas(self, fila, sql, parametros=()):
+        return [fila._make(r) for r in self.conn.execute(sql, parametros)]
+
+    def _una(self, fila, sql, parametros=()):
+        r = self.conn.execute(sql, parametros).fetchone()
+        return fila._make(r) if r else None
+
+    def _valor(self, sql, parametros=()):
+        r = self.conn.execute(sql, parametros).fetchone()
+        return r[0] if r else None
+
+    def _pagina(self, fila, select, limite, despues_de=None, antes_de=None, texto=None):
+        """Una página de a lo más 'limite' filas, en orden de fecha_ingreso descendente.
+
+        despues_de / antes_de son claves (fecha_ingreso, id) del borde de la
+        página ya mostrada. texto filtra con el índice de búsqueda (ver BusquedaRepo).
+        """
+        filtro, parametros = '', []
+        if texto:
+            filtro, parametros = filtro_busqueda_ingresos(texto)
+
+        if despues_de is not None:
+            direccion = 'siguiente'
+            parametros += list(despues_de)
+        elif antes_de is not None:
+            direccion = 'anterior'
+            parametros += list(antes_de)
+        else:
+            direccion = None
+
+        filas = self._todas(fila, sql_pagina(select, filtro, direccion), parametros + [limite])
+        if direccion == 'anterior':
+            filas.reverse()
+        return filas
+
+
+class UsuarioRepo(_Repositorio):
+    def registrar(self, usuario, password_hash, rol, nombre):
+        with self.conn:
+            return self.conn.execute(SQL_USUARIO_INSERTAR, (usuario, password_hash, rol, nombre)).lastrowid
+
+    def autenticar(self, usuario, password_hash):
+        return self.conn.execute(SQL_USUARIO_AUTENTICAR, (usuario, password_hash)).fetchone()
+
+    def nombre(self, usuario_id):
+        return self._valor(SQL_USUARIO_NOMBRE, (usuario_id,))
+
+    def tecnicos_activos(self):
+        return self._todas(Usuario, SQL_TECNICOS_ACTIVOS)
+
+    def primer_gerente(self):
+        return self._valor(SQL_PRIMER_GERENTE)
+
+
+class ClienteRepo(_Repositorio):
+    def listar(self):
+        return self._todas(Cliente, SQL_CLIENTES_ACTIVOS)
+
+    def listar_breve(self):
+        return self._todas(ClienteBreve, SQL_CLIENTES_BREVE)
+
+    def registrar(self, nombre, telefono, correo, direccion):
+        with self.conn:
+            return self.conn.execute(SQL_CLIENTE_INSERTAR, (nombre, telefono, correo, direccion)).lastrowid
+
+    def actualizar(self, cliente_id, nombre, telefono, correo, direccion):
+        with self.conn:
+            self.conn.execute(SQL_CLIENTE_ACTUALIZAR, (nombre, telefono, correo, direccion, cliente_id))
+
+    def desactivar(self, cliente_id):
+        with self.conn:
+            self.conn.execute(SQL_CLIENTE_DESACTIVAR, (cliente_id,))
+
+
+class VehiculoRepo(_Repositorio):
+    def listar(self):
+        return self._todas(Vehiculo, SQL_VEHICULOS_ACTIVOS)
+
+    def listar_breve(self):
+        return self._todas(VehiculoBreve, SQL_VEHICULOS_BREVE)
+
+    def registrar(self, marca, modelo, placa, anio, color):
+        """Lanza sqlite3.IntegrityError si la placa ya existe"""
+        with self.conn:
+            return self.conn.execute(SQL_VEHICULO_INSERTAR, (marca, modelo, placa, anio, color)).lastrowid
+
+    def actualizar(self, vehiculo_id, marca, modelo, placa, anio, color):
+        """Lanza sqlite3.IntegrityError si la placa ya existe"""
+        with self.conn:
+            self.conn.execute(SQL_VEHICULO_ACTUALIZAR, (marca, modelo, placa, anio, color, vehiculo_id))
+
+    def desactivar(self, vehiculo_id):
+        with self.conn:
+            self.conn.execute(SQL_VEHICULO_DESACTIVAR, (vehiculo_id,))
+
+
+class IngresoRepo(_Repositorio):
+    def pagina(self, limite, despues_de=None, antes_de=None, texto=None):
+        return self._pagina(IngresoListado, SQL_INGRESOS_LISTADO, limite, despues_de, antes_de, texto)
+
+    def pagina_con_plazo(self, limite, despues_de=None, antes_de=None):
+        return self._pagina(IngresoPlazo, SQL_INGRESOS_CON_PLAZO, limite, despues_de, antes_de)
+
+    def fila_listado(self, ingreso_id):
+        return self._una(IngresoListado, SQL_INGRESO_LISTADO, (ingreso_id,))
+
+    def fila_con_plazo(self, ingreso_id):
+        return self._una(IngresoPlazo, SQL_INGRESO_CON_PLAZO, (ingreso_id,))
+
+    def fila_pendiente(self, ingreso_id):
+        """El ingreso si sigue pendiente de asignar; None si no"""
+        return self._una(IngresoPendiente, SQL_INGRESO_PENDIENTE, (ingreso_id,))
+
+    def fila_de_tecnico(self, ingreso_id, tecnico_id):
+        """El ingreso si sigue asignado al técnico y sin entregar; None si no"""
+        return self._una(IngresoPendiente, SQL_INGRESO_DE_TECNICO, (ingreso_id, tecnico_id))
+
+    def fila_en_taller(self, ingreso_id):
+        """El ingreso si sigue en el taller (sin entregar); None si no"""
+        return self._una(IngresoMensaje, SQL_INGRESO_EN_TALLER, (ingreso_id,))
+
+    def pendientes_de_asignar(self):
+        return self._todas(IngresoPendiente, SQL_INGRESOS_PENDIENTES)
+
+    def asignados_a(self, tecnico_id):
+        return self._todas(IngresoPendiente, SQL_INGRESOS_DE_TECNICO, (tecnico_id,))
+
+    def en_taller(self):
+        return self._todas(IngresoMensaje, SQL_INGRESOS_EN_TALLER)
+
+    def historial(self, texto):
+        """Incluye los ingresos archivados"""
+        if not terminos_busqueda(texto):
+            return []
+        sql, parametros = sql_historial(texto)
+        return self._todas(IngresoHistorial, sql, parametros)
+
+    def servicios(self, ingreso_id):
+        return self._todas(ServicioHistorial, SQL_SERVICIOS_DE_INGRESO, (ingreso_id,))
+
+    def tecnico_asignado(self, ingreso_id):
+        return self._valor(SQL_INGRESO_TECNICO, (ingreso_id,))
+
+    def plazos_vencidos(self, ahora=None):
+        """Plazos activos ya vencidos, del más atrasado al más reciente"""
+        ahora = int(time.time()) if ahora is None else ahora
+        return self._todas(IngresoPlazo, SQL_PLAZOS_ENTRE, (0, ahora))
+
+    def plazos_por_vencer(self, horas, ahora=None):
+        """Plazos activos que vencen dentro de las próximas 'horas', del más próximo al más lejano"""
+        ahora = int(time.time()) if ahora is None else ahora
+        return self._todas(IngresoPlazo, SQL_PLAZOS_ENTRE, (ahora, ahora + int(horas * 3600)))
+
+    def conteo_bandas(self, ahora=None):
+        """{banda: cantidad} de los plazos activos según su color en este momento"""
+        ahora = int(time.time()) if ahora is None else ahora
+        return dict(self.conn.execute(SQL_PLAZOS_BANDAS, (ahora,)).fetchall())
+
+    def conteos(self):
+        """Conteos agrupados de todos los ingresos en un solo recorrido de la tabla;
+        los totales por estado, técnico o semana salen de sumar estas filas."""
+        return self._todas(ConteoIngresos, SQL_INGRESOS_CONTEOS)
+
+    def registrar(self, cliente_id, vehiculo_id, motivo, usuario_id):
+        """Registra el ingreso y su primer servicio en una sola transacción"""
+        with self.conn:
+            ingreso_id = self.conn.execute(SQL_INGRESO_INSERTAR, (cliente_id, vehiculo_id, motivo)).lastrowid
+            self.conn.execute(SQL_SERVICIO_INSERTAR, (
+                ingreso_id, 'Ingreso', f'Vehículo ingresado al taller. Motivo: {motivo}', usuario_id))
+        self._publicar(ingreso_id)
+        return ingreso_id
+
+    def cambiar_estado(self, ingreso_id, estado, usuario_id, tipo_servicio='Cambio de estado'):
+        self.cambiar_estados([ingreso_id], estado, usuario_id, tipo_servicio)
+
+    def cambiar_estados(self, ingreso_ids, estado, usuario_id, tipo_servicio='Cambio de estado'):
+        """Cambia el estado de varios ingresos y anota su servicio en una sola transacción"""
+        with self.conn:
+            self.conn.executemany(SQL_INGRESO_ESTADO, [(estado, i) for i in ingreso_ids])
+            self.conn.executemany(SQL_SERVICIO_INSERTAR, [
+                (i, tipo_servicio, f'Estado actualizado a: {estado}', usuario_id) for i in ingreso_ids])
+            if estado == 'Entregado':
+                self.conn.executemany(SQL_INGRESO_ENTREGA, [(i,) for i in ingreso_ids])
+        self._publicar(*ingreso_ids)
+
+    def asignar_tecnico(self, ingreso_id, tecnico_id, usuario_id):
+        self.asignar_tecnicos([ingreso_id], tecnico_id, usuario_id)
+
+    def asignar_tecnicos(self, ingreso_ids, tecnico_id, usuario_id):
+        """Asigna varios ingresos al mismo técnico en una sola transacción"""
+        with self.conn:
+            self.conn.executemany(SQL_INGRESO_ASIGNAR, [(tecnico_id, i) for i in ingreso_ids])
+            self.conn.executemany(SQL_SERVICIO_INSERTAR, [
+                (i, 'Asignación', f'Servicio asignado a técnico ID:{tecnico_id}', usuario_id)
+                for i in ingreso_ids])
+        self._publicar(*ingreso_ids)
+
+    def asignar_plazo(self, ingreso_id, dias, horas, minutos, inicio, usuario_id):
+        """inicio es datetime local; el vencimiento se guarda también en segundos epoch"""
+        vence = int(inicio.timestamp()) + dias * 86400 + horas * 3600 + minutos * 60
+        with self.conn:
+            self.conn.execute(SQL_INGRESO_PLAZO, (
+                dias, horas, minutos, inicio.strftime('%Y-%m-%d %H:%M:%S'), vence, ingreso_id))
+            self.conn.execute(SQL_SERVICIO_INSERTAR, (
+                ingreso_id, 'Plazo Asignado',
+                f'Plazo establecido: {dias} días, {horas} horas, {minutos} minutos', usuario_id))
+        self._publicar(ingreso_id)
+
+    def finalizar_plazo(self, ingreso_id, categoria, descripcion, usuario_id):
+        with self.conn:
+            self.conn.execute(SQL_INGRESO_FIN_PLAZO, (ingreso_id,))
+            self.conn.execute(SQL_SERVICIO_INSERTAR, (
+                ingreso_id, f'Plazo Finalizado - {categoria}', descripcion, usuario_id))
+        self._publicar(ingreso_id)
+
+
+class PagoRepo(_Repositorio):
+    def pagina_facturacion(self, limite, despues_de=None, antes_de=None, texto=None):
+        return self._pagina(Facturacion, SQL_FACTURACION_LISTADO, limite, despues_de, antes_de, texto)
+
+    def fila_facturacion(self, ingreso_id):
+        return self._una(Facturacion, SQL_FACTURACION_DE_INGRESO, (ingreso_id,))
+
+    def de_ingreso(self, ingreso_id):
+        return self._una(Pago, SQL_PAGO_DE_INGRESO, (ingreso_id,))
+
+    def detalle(self, pago_id):
+        return self._una(DetallePago, SQL_PAGO_DETALLE, (pago_id,))
+
+    def movimientos(self, ingreso_id):
+        """Abonos del ingreso en el orden en que se registraron"""
+        return self._todas(MovimientoPago, SQL_MOVIMIENTOS_DE_INGRESO, (ingreso_id,))
+
+    def establecer_precio(self, ingreso_id, monto):
+        """Crea o actualiza el cobro del ingreso y devuelve el estado resultante"""
+        with self.conn:
+            pago = self._una(Pago, SQL_PAGO_DE_INGRESO, (ingreso_id,))
+            if pago:
+                estado = estado_de_pago(pago.monto_pagado, monto)
+                self.conn.execute(SQL_PAGO_PRECIO, (monto, estado, pago.id))
+            else:
+                estado = 'Pendiente'
+                self.conn.execute(SQL_PAGO_INSERTAR, (ingreso_id, monto))
+        self._publicar(ingreso_id)
+        return estado
+
+    def registrar_abono(self, ingreso_id, monto, metodo, notas, usuario_id):
+        """Suma un pago al cobro del ingreso.
+
+        Devuelve (nuevo_monto_pagado, nuevo_estado, monto_total), o None si el
+        ingreso todavía no tiene precio establecido.
+        """
+        with self.conn:
+            pago = self._una(Pago, SQL_PAGO_DE_INGRESO, (ingreso_id,))
+            if not pago:
+                return None
+
+            self.conn.execute(SQL_MOVIMIENTO_INSERTAR, (
+                pago.id, ingreso_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                monto, metodo, notas if notas else None, usuario_id))
+
+            nuevo_monto_pagado = (pago.monto_pagado or 0) + monto
+            nuevo_estado = estado_de_pago(nuevo_monto_pagado, pago.monto_total)
+            self.conn.execute(SQL_PAGO_ABONO, (nuevo_monto_pagado, nuevo_estado, monto, metodo,
+                                               usuario_id, pago.id))
+        self._publicar(ingreso_id)
+        return nuevo_monto_pagado, nuevo_estado, pago.monto_total
+
+    def resumen_mes(self, mes, anio):
+        resumen = self._una(ResumenPagos, SQL_PAGOS_RESUMEN_MES, (f'{anio}-{mes:02d}',))
+        return resumen or ResumenPagos(0, 0, 0, 0, 0, 0)
+
+    def resumen_anio(self, anio):
+        return self._una(ResumenPagos, SQL_PAGOS_RESUMEN_ANIO, (f'{anio}-01', f'{anio}-12'))
+
+    def estadisticas(self):
+        """Devuelve (total, pagados, pendientes) de todos los cobros"""
+        return self.conn.execute(SQL_PAGOS_ESTADISTICAS).fetchone()
+
+
+class BusquedaRepo(_Repositorio):
+    """Búsqueda de texto con prefijos y orden por relevancia para todas las cajas de búsqueda"""
+
+    def clientes(self, texto):
+        terminos = terminos_busqueda(texto)
+        if not terminos:
+            return []
+        return self._todas(Cliente, SQL_BUSCAR_CLIENTES, (expresion_fts(terminos),))
+
+    def clientes_breve(self, texto):
+        return [ClienteBreve(c.id, c.nombre, c.telefono) for c in self.clientes(texto)]
+
+    def vehiculos(self, texto):
+        terminos = terminos_busqueda(texto)
+        if not terminos:
+            return []
+        return self._todas(Vehiculo, SQL_BUSCAR_VEHICULOS, (expresion_fts(terminos),))
+
+    def vehiculos_breve(self, texto):
+        return [VehiculoBreve(v.id, v.marca, v.modelo, v.placa) for v in self.vehiculos(texto)]
+
+    def ingresos(self, texto, limite=-1):
+        """Ids de los ingresos que coinciden, del más relevante al menos relevante"""
+        if not terminos_busqueda(texto):
+            return []
+        sql, parametros = sql_coincidencias_ingreso(texto)
+        filas = self.conn.execute(f'{sql} ORDER BY rango LIMIT ?', parametros + [limite])
+        return [ingreso_id for ingreso_id, _ in filas]
+
+
+class MensajeRepo(_Repositorio):
+    def enviar(self, ingreso_id, de_usuario, para_usuario, mensaje, tipo):
+        with self.conn:
+            return self.conn.execute(SQL_MENSAJE_INSERTAR,
+                                     (ingreso_id, de_usuario, para_usuario, mensaje, tipo)).lastrowid
+
+    def de_ingreso(self, ingreso_id):
+        return self._todas(MensajeHistorial, SQL_MENSAJES_DE_INGRESO, (ingreso_id,))
+
+    def reportes_recibidos(self, usuario_id):
+        return self._todas(ReporteRecibido, SQL_REPORTES_RECIBIDOS, (usuario_id,))
+
+    def tareas_recibidas(self, usuario_id):
+        return self._todas(Tarea, SQL_TAREAS_RECIBIDAS, (usuario_id,))
+
+    def recibidos_desde(self, usuario_id, tipo, ultimo_id):
+        """Reportes o tareas (según tipo) con id mayor a ultimo_id, del más antiguo al más nuevo"""
+        if tipo == TIPO_REPORTE:
+            return self._todas(ReporteRecibido, SQL_REPORTES_NUEVOS, (usuario_id, ultimo_id))
+        return self._todas(Tarea, SQL_TAREAS_NUEVAS, (usuario_id, ultimo_id))
+
+    def ultimo_recibido(self, usuario_id, tipo):
+        return self._valor(SQL_MENSAJES_ULTIMO_RECIBIDO, (usuario_id, tipo))
+
+    def contar_no_leidos(self, usuario_id, tipo):
+        return self._valor(SQL_MENSAJES_CONTAR_NO_LEIDOS, (usuario_id, tipo))
+
+    def marcar_leidos(self, usuario_id, tipo):
+        with self.conn:
+            return self.conn.execute(SQL_MENSAJES_MARCAR_LEIDOS, (usuario_id, tipo)).rowcount
+
+
+class HistorialRepo(_Repositorio):
+    def cargar(self, texto):
+        """Historial de los ingresos que coinciden con texto, con pagos,
+        servicios y mensajes. Hace cinco consultas sin importar cuántos
+        ingresos haya."""
+        ingresos = IngresoRepo(self.conn).historial(texto)
+        if not ingresos:
+            return []
+        ids = json.dumps([ingreso.id for ingreso in ingresos])
+
+        pagos = {pago.ingreso_id: pago for pago in self._todas(Pago, SQL_PAGOS_DE_INGRESOS, (ids,))}
+        movimientos = {}
+        for movimiento in self._todas(MovimientoPago, SQL_MOVIMIENTOS_DE_INGRESOS, (ids,)):
+            movimientos.setdefault(movimiento.ingreso_id, []).append(movimiento)
+        servicios = {}
+        for ingreso_id, *resto in self.conn.execute(SQL_SERVICIOS_DE_INGRESOS, (ids,)):
+            servicios.setdefault(ingreso_id, []).append(ServicioHistorial._make(resto))
+        mensajes = {}
+        for ingreso_id, *resto in self.conn.execute(SQL_MENSAJES_DE_INGRESOS, (ids,)):
+            mensajes.setdefault(ingreso_id, []).append(MensajeHistorial._make(resto))
+
+        return [HistorialIngreso(ingreso, pagos.get(ingreso.id), movimientos.get(ingreso.id, []),
+                                 servicios.get(ingreso.id, []), mensajes.get(ingreso.id, []))
+                for ingreso in ingresos]
+
+
+class ExportacionRepo(_Repositorio):
+    def cursor(self, tipo, desde=None, hasta=None):
+        """Cursor con las filas de EXPORTACIONES[tipo] entre las fechas 'AAAA-MM-DD'
+        (ambas inclusive; None es sin límite). Se recorre sin traer todo a memoria."""
+        inicio = self._fecha(desde).strftime('%Y-%m-%d') if desde else '0000-00-00'
+        fin = (self._fecha(hasta) + timedelta(days=1)).strftime('%Y-%m-%d') if hasta else '9999-99-99'
+        return self.conn.execute(EXPORTACIONES[tipo], (inicio, fin))
+
+    @staticmethod
+    def _fecha(texto):
+        try:
+            return datetime.strptime(texto, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f"Fecha inválida: {texto} (se espera AAAA-MM-DD)")
+
+
+# ======================== AUDITORÍA ========================
+# Consultas que usan las ventanas para llenar tablas y detalles, con parámetros
+# de ejemplo. Database.auditar_consultas verifica, con estadísticas al día, que
+# ninguna recorra una tabla o un índice completo (SCAN) salvo lo que permite
+# RECORRIDOS_PERMITIDOS. Las búsquedas pasan por las tablas FTS5; las
+# estadísticas generales suman todos los meses de resumen_pagos_mes y no se incluyen.
+CONSULTAS_AUDITADAS = {
+    'UsuarioRepo.autenticar': (SQL_USUARIO_AUTENTICAR, ('', '')),
+    'UsuarioRepo.tecnicos_activos': (SQL_TECNICOS_ACTIVOS, ()),
+    'UsuarioRepo.primer_gerente': (SQL_PRIMER_GERENTE, ()),
+    'ClienteRepo.listar': (SQL_CLIENTES_ACTIVOS, ()),
+    'ClienteRepo.listar_breve': (SQL_CLIENTES_BREVE, ()),
+    'VehiculoRepo.listar': (SQL_VEHICULOS_ACTIVOS, ()),
+    'VehiculoRepo.listar_breve': (SQL_VEHICULOS_BREVE, ()),
+    'IngresoRepo.pagina': (sql_pagina(SQL_INGRESOS_LISTADO), (100,)),
+    'IngresoRepo.pagina (siguiente)': (sql_pagina(SQL_INGRESOS_LISTADO, direccion='siguiente'), ('', 0, 100)),
+    'IngresoRepo.pagina (anterior)': (sql_pagina(SQL_INGRESOS_LISTADO, direccion='anterior'), ('', 0, 100)),
+    'IngresoRepo.pagina_con_plazo': (sql_pagina(SQL_INGRESOS_CON_PLAZO, direccion='siguiente'), ('', 0, 100)),
+    'IngresoRepo.pendientes_de_asignar': (SQL_INGRESOS_PENDIENTES, ()),
+    'IngresoRepo.asignados_a': (SQL_INGRESOS_DE_TECNICO, (0,)),
+    'IngresoRepo.en_taller': (SQL_INGRESOS_EN_TALLER, ()),
+    'IngresoRepo.servicios': (SQL_SERVICIOS_DE_INGRESO, (0,)),
+    'IngresoRepo.tecnico_asignado': (SQL_INGRESO_TECNICO, (0,)),
+    'IngresoRepo.fila_listado': (SQL_INGRESO_LISTADO, (0,)),
+    'IngresoRepo.fila_con_plazo': (SQL_INGRESO_CON_PLAZO, (0,)),
+    'IngresoRepo.fila_pendiente': (SQL_INGRESO_PENDIENTE, (0,)),
+    'IngresoRepo.fila_de_tecnico': (SQL_INGRESO_DE_TECNICO, (0, 0)),
+    'IngresoRepo.fila_en_taller': (SQL_INGRESO_EN_TALLER, (0,)),
+    'IngresoRepo.historial': sql_historial('a b'),
+    'IngresoRepo.plazos_vencidos': (SQL_PLAZOS_ENTRE, (0, 0)),
+    'IngresoRepo.conteo_bandas': (SQL_PLAZOS_BANDAS, (0,)),
+    'PagoRepo.pagina_facturacion': (sql_pagina(SQL_FACTURACION_LISTADO, direccion='siguiente'), ('', 0, 100)),
+    'PagoRepo.fila_facturacion': (SQL_FACTURACION_DE_INGRESO, (0,)),
+    'PagoRepo.de_ingreso': (SQL_PAGO_DE_INGRESO, (0,)),
+    'PagoRepo.detalle': (SQL_PAGO_DETALLE, (0,)),
+    'PagoRepo.movimientos': (SQL_MOVIMIENTOS_DE_INGRESO, (0,)),
+    'PagoRepo.resumen_mes': (SQL_PAGOS_RESUMEN_MES, ('',)),
+    'PagoRepo.resumen_anio': (SQL_PAGOS_RESUMEN_ANIO, ('', '')),
+    'BusquedaRepo.clientes': (SQL_BUSCAR_CLIENTES, ('"a"*',)),
+    'BusquedaRepo.vehiculos': (SQL_BUSCAR_VEHICULOS, ('"a"*',)),
+    'BusquedaRepo.ingresos': (sql_coincidencias_ingreso('a b')[0], ['"a"*'] * 5 + ['"b"*'] * 5),
+    'MensajeRepo.de_ingreso': (SQL_MENSAJES_DE_INGRESO, (0,)),
+    'MensajeRepo.reportes_recibidos': (SQL_REPORTES_RECIBIDOS, (0,)),
+    'MensajeRepo.tareas_recibidas': (SQL_TAREAS_RECIBIDAS, (0,)),
+    'MensajeRepo.recibidos_desde (reportes)': (SQL_REPORTES_NUEVOS, (0, 0)),
+    'MensajeRepo.recibidos_desde (tareas)': (SQL_TAREAS_NUEVAS, (0, 0)),
+    'MensajeRepo.ultimo_recibido': (SQL_MENSAJES_ULTIMO_RECIBIDO, (0, TIPO_TAREA)),
+    'MensajeRepo.contar_no_leidos': (SQL_MENSAJES_CONTAR_NO_LEIDOS, (0, TIPO_REPORTE)),
+    'HistorialRepo.cargar (pagos)': (SQL_PAGOS_DE_INGRESOS, ('[1, 2]',)),
+    'HistorialRepo.cargar (movimientos)': (SQL_MOVIMIENTOS_DE_INGRESOS, ('[1, 2]',)),
+    'HistorialRepo.cargar (servicios)': (SQL_SERVICIOS_DE_INGRESOS, ('[1, 2]',)),
+    'HistorialRepo.cargar (mensajes)': (SQL_MENSAJES_DE_INGRESOS, ('[1, 2]',)),
+    **{f'ExportacionRepo.cursor ({tipo})': (sql, ('2025-01-01', '2025-02-01'))
+       for tipo, sql in EXPORTACIONES.items()},
+}
+
+# Pasos SCAN aceptados a propósito, por consulta, con el motivo. 'subquery-N'
+# reemplaza el número que SQLite da a cada subconsulta.
+RECORRIDOS_PERMITIDOS = {
+    # Primera página: el índice se lee en orden y LIMIT corta en las primeras filas
+    'IngresoRepo.pagina': ('SCAN i USING INDEX idx_ingresos_fecha',),
+    # Índice parcial: solo tiene los ingresos sin entregar, que son los que se muestran
+    'IngresoRepo.en_taller': ('SCAN i USING INDEX idx_ingresos_en_taller',),
+    # Resultados de las tablas FTS5 ya filtrados por MATCH, agrupados por término e ingreso
+    'IngresoRepo.historial': ('SCAN (subquery-N)', 'SCAN k'),
+    'BusquedaRepo.ingresos': ('SCAN (subquery-N)',),
+}
@@ -0,0 +1,377 @@
+"""
+Respaldos de la base de datos con la API de respaldo de SQLite.
+
+La copia se hace con Connection.backup por tramos de
+respaldo_paginas_por_paso páginas, con una pausa entre tramos: entre uno y
+otro las demás terminales siguen leyendo y guardando, y si alguna escribe
+SQLite vuelve a copiar lo que cambió, así que la copia siempre es una
+imagen consistente (a diferencia de copiar el archivo mientras se escribe).
+
+Cada respaldo pasa PRAGMA integrity_check antes de darse por bueno, se
+comprime con gzip si respaldo_comprimir = si, y se conservan solo los
+respaldos_conservar más recientes de la carpeta. Una carpeta_respaldos
+relativa se toma desde la carpeta de la base, no desde donde se ejecuta.
+
+La base de archivo (ver archivo.py) se respalda junto con la de trabajo, con
+la misma marca de fecha: <base>_archivo_respaldo_AAAAMMDD_HHMMSS.db. Se
+restauran juntas; un respaldo sin su archivo solo se restaura si la base de
+archivo actual no tiene ingresos.
+
+Uso:
+    python respaldos.py respaldar
+    python respaldos.py listar
+    python respaldos.py verificar respaldos/alan_automotriz_respaldo_20250101_120000.db.gz
+    python respaldos.py restaurar respaldos/alan_automotriz_respaldo_20250101_120000.db.gz
+
+Restaurar reemplaza el contenido de la base con el del respaldo, después de
+respaldar la base actual. Conviene hacerlo con las terminales cerradas.
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from migraciones import ESQUEMA_ARCHIVO
+
+registro = logging.getLogger('alan_automotriz.respaldos')
+
+SUFIJO_COMPRIMIDO = '.gz'
+# Tamaño de bloque al comprimir y descomprimir
+BLOQUE = 1024 * 1024
+
+
+class ErrorRespaldo(Exception):
+    pass
+
+
+class Respaldos:
+    def __init__(self, ruta, configuracion, ruta_archivo=None):
+        """ruta: base a respaldar; configuracion: la de cargar_configuracion();
+        ruta_archivo: base de archivo que se respalda y restaura con ella"""
+        self.ruta = ruta
+        self.ruta_archivo = ruta_archivo
+        # os.path.join deja tal cual una carpeta absoluta
+        self.carpeta = os.path.join(os.path.dirname(os.path.abspath(ruta)), configuracion['carpeta_respaldos'])
+        self.conservar = int(configuracion['respaldos_conservar'])
+        self.comprimir = configuracion['respaldo_comprimir'].strip().lower() in ('si', 'sí', 'true', '1')
+        self.paginas_por_paso = int(configuracion['respaldo_paginas_por_paso'])
+        self.pausa = int(configuracion['respaldo_pausa_ms']) / 1000
+        self.espera = int(configuracion['busy_timeout_ms']) / 1000
+        # Prefijo de los archivos: alan_automotriz_respaldo_AAAAMMDD_HHMMSS[_motivo].db[.gz]
+        self.prefijo = os.path.splitext(os.path.basename(ruta))[0] + '_respaldo_'
+        self.prefijo_archivo = (os.path.splitext(os.path.basename(ruta_archivo))[0] + '_respaldo_'
+                                if ruta_archivo else None)
+
+    # ========== RESPALDAR ==========
+    def respaldar(self, origen=None, motivo='', rotar=True):
+        """Copia la base (y la de archivo, si existe) a la carpeta de respaldos
+        y devuelve la ruta del respaldo de la base.
+
+        origen: conexión ya abierta a la base; si no se da se abre una.
+        """
+        os.makedirs(self.carpeta, exist_ok=True)
+        destino = self._nuevo_nombre(motivo)
+        inicio = time.perf_counter()
+
+        propia = origen is None
+        if propia:
+            origen = sqlite3.connect(self.ruta, timeout=self.espera)
+        try:
+            # La base de trabajo primero: un lote que archivo.py mueve mientras
+            # tanto queda en las dos copias (la siguiente corrida lo termina de
+            # mover), nunca en ninguna
+            destino = self._copiar(origen, 'main', destino)
+            if self.ruta_archivo and os.path.exists(self.ruta_archivo):
+                try:
+                    self._copiar_archivo(origen, self.respaldo_de_archivo(destino))
+                except Exception:
+                    self._borrar(destino)
+                    raise
+        finally:
+            if propia:
+                origen.close()
+
+        registro.info('Respaldo %s (%.1f MB) en %.1f s', destino,
+                      os.path.getsize(destino) / 1e6, time.perf_counter() - inicio)
+        if rotar:
+            self.rotar()
+        return destino
+
+    def _copiar_archivo(self, origen, destino):
+        adjuntas = [fila[1] for fila in origen.execute('PRAGMA database_list')]
+        if ESQUEMA_ARCHIVO in adjuntas:
+            return self._copiar(origen, ESQUEMA_ARCHIVO, destino)
+        conn = sqlite3.connect(self.ruta_archivo, timeout=self.espera)
+        try:
+            return self._copiar(conn, 'main', destino)
+        finally:
+            conn.close()
+
+    def _copiar(self, origen, esquema, destino):
+        """Copia el esquema de la conexión a destino (+ .gz) y devuelve la ruta final"""
+        temporal = destino + '.tmp'
+        try:
+            copia = sqlite3.connect(temporal)
+            try:
+                origen.backup(copia, pages=self.paginas_por_paso, sleep=self.pausa, name=esquema)
+                # La copia queda en modo DELETE: un solo archivo, sin -wal
+                copia.execute('PRAGMA journal_mode = DELETE')
+                problemas = self._revisar_integridad(copia)
+            finally:
+                copia.close()
+        except Exception:
+            self._borrar(temporal)
+            raise
+
+        if problemas:
+            self._borrar(temporal)
+            raise ErrorRespaldo(f"La copia no pasó la verificación: {'; '.join(problemas[:5])}")
+
+        if self.comprimir:
+            destino += SUFIJO_COMPRIMIDO
+            with open(temporal, 'rb') as entrada, gzip.open(destino + '.tmp', 'wb') as salida:
+                shutil.copyfileobj(entrada, salida, BLOQUE)
+            os.remove(temporal)
+            temporal = destino + '.tmp'
+        os.replace(temporal, destino)
+        return destino
+
+    def _nuevo_nombre(self, motivo):
+        marca = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if motivo:
+            marca += '_' + motivo
+        nombre = os.path.join(self.carpeta, f'{self.prefijo}{marca}.db')
+        # Dos respaldos en el mismo segundo
+        numero = 1
+        while os.path.exists(nombre) or os.path.exists(nombre + SUFIJO_COMPRIMIDO):
+            numero += 1
+            nombre = os.path.join(self.carpeta, f'{self.prefijo}{marca}_{numero}.db')
+        return nombre
+
+    def respaldo_de_archivo(self, respaldo):
+        """Ruta del respaldo de la base de archivo tomado junto con respaldo"""
+        if not self.prefijo_archivo:
+            return None
+        carpeta, nombre = os.path.split(respaldo)
+        if not nombre.startswith(self.prefijo):
+            return None
+        return os.path.join(carpeta, self.prefijo_archivo + nombre[len(self.prefijo):])
+
+    # ========== CONSULTAR Y ROTAR ==========
+    def listar(self):
+        """Respaldos de la carpeta, del más reciente al más antiguo"""
+        if not os.path.isdir(self.carpeta):
+            return []
+        archivos = [os.path.join(self.carpeta, nombre) for nombre in os.listdir(self.carpeta)
+                    if nombre.startswith(self.prefijo)
+                    and (nombre.endswith('.db') or nombre.endswith('.db' + SUFIJO_COMPRIMIDO))]
+        return sorted(archivos, key=os.path.getmtime, reverse=True)
+
+    def rotar(self):
+        """Elimina los respaldos que pasan de respaldos_conservar (0 conserva todos)"""
+        if self.conservar <= 0:
+            return []
+        sobrantes = self.listar()[self.conservar:]
+        for archivo in sobrantes:
+            self._borrar(archivo)
+            par = self.respaldo_de_archivo(archivo)
+            if par:
+                self._borrar(par)
+            registro.info('Respaldo eliminado por antigüedad: %s', archivo)
+        return sobrantes
+
+    def horas_desde_ultimo(self):
+        """Horas desde el respaldo más reciente, o None si no hay ninguno"""
+        respaldos = self.listar()
+        if not respaldos:
+            return None
+        return (time.time() - os.path.getmtime(respaldos[0])) / 3600
+
+    # ========== VERIFICAR Y RESTAURAR ==========
+    def verificar(self, respaldo):
+        """Lista de problemas encontrados en el respaldo y en el de su archivo; vacía si están bien"""
+        problemas = self._verificar_uno(respaldo)
+        par = self.respaldo_de_archivo(respaldo)
+        if par and os.path.exists(par):
+            problemas += [f'{os.path.basename(par)}: {problema}' for problema in self._verificar_uno(par)]
+        return problemas
+
+    def _verificar_uno(self, respaldo):
+        try:
+            with self._abrir_respaldo(respaldo) as ruta:
+                conn = sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)
+                try:
+                    return self._revisar_integridad(conn)
+                finally:
+                    conn.close()
+        except (OSError, EOFError, sqlite3.DatabaseError) as e:
+            return [str(e)]
+
+    def restaurar(self, respaldo):
+        """Reemplaza el contenido de la base (y el de la de archivo) por el del respaldo.
+
+        Antes respalda las bases actuales (motivo 'antes_de_restaurar') y
+        devuelve la ruta de ese respaldo. Si el respaldo no trae la base de
+        archivo y la actual tiene ingresos archivados no restaura nada: las
+        dos bases quedarían desparejas.
+        """
+        problemas = self.verificar(respaldo)
+        if problemas:
+            raise ErrorRespaldo(f"El respaldo {respaldo} está dañado: {'; '.join(problemas[:5])}")
+        par = self.respaldo_de_archivo(respaldo)
+        if par and not os.path.exists(par):
+            par = None
+            if self._archivo_con_ingresos():
+                raise ErrorRespaldo(f"El respaldo {respaldo} no incluye la base de archivo y "
+                                    f"{self.ruta_archivo} tiene ingresos archivados; restaurarlo "
+                                    f"dejaría las dos bases desparejas")
+
+        # Sin rotar todavía: la rotación podría borrar el respaldo que se va a restaurar
+        anterior = self.respaldar(motivo='antes_de_restaurar', rotar=False) if os.path.exists(self.ruta) else None
+        self._restaurar_uno(respaldo, self.ruta)
+        if par:
+            self._restaurar_uno(par, self.ruta_archivo)
+        registro.info('Base %s restaurada desde %s', self.ruta, respaldo)
+        self.rotar()
+        return anterior
+
+    def _restaurar_uno(self, respaldo, ruta):
+        with self._abrir_respaldo(respaldo) as origen:
+            fuente = sqlite3.connect(f'file:{origen}?mode=ro', uri=True)
+            destino = sqlite3.connect(ruta, timeout=self.espera)
+            try:
+                # En un solo paso: nadie ve la base a medio restaurar
+                fuente.backup(destino)
+            finally:
+                destino.close()
+                fuente.close()
+
+    def _archivo_con_ingresos(self):
+        if not self.ruta_archivo or not os.path.exists(self.ruta_archivo):
+            return False
+        conn = sqlite3.connect(f'file:{self.ruta_archivo}?mode=ro', uri=True)
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ingresos'").fetchone():
+                return False
+            return conn.execute('SELECT 1 FROM ingresos LIMIT 1').fetchone() is not None
+        finally:
+            conn.close()
+
+    def _abrir_respaldo(self, respaldo):
+        return _RespaldoDescomprimido(respaldo)
+
+    @staticmethod
+    def _revisar_integridad(conn):
+        filas = conn.execute('PRAGMA integrity_check').fetchall()
+        return [] if filas == [('ok',)] else [fila[0] for fila in filas]
+
+    @staticmethod
+    def _borrar(archivo):
+        try:
+            os.remove(archivo)
+        except FileNotFoundError:
+            pass
+
+
+class _RespaldoDescomprimido:
+    """Contexto que da la ruta de un respaldo .db; si está comprimido lo descomprime a un temporal"""
+
+    def __init__(self, respaldo):
+        self.respaldo = respaldo
+        self.temporal = None
+
+    def __enter__(self):
+        if not os.path.exists(self.respaldo):
+            raise FileNotFoundError(f"No existe el respaldo {self.respaldo}")
+        if not self.respaldo.endswith(SUFIJO_COMPRIMIDO):
+            return self.respaldo
+        self.temporal = self.respaldo[:-len(SUFIJO_COMPRIMIDO)] + '.verificando'
+        # gzip revisa el CRC al terminar de leer: un archivo truncado falla aquí
+        with gzip.open(self.respaldo, 'rb') as entrada, open(self.temporal, 'wb') as salida:
+            shutil.copyfileobj(entrada, salida, BLOQUE)
+        return self.temporal
+
+    def __exit__(self, *exc):
+        if self.temporal is not None:
+            Respaldos._borrar(self.temporal)
+
+
+# ======================== RESPALDO PERIÓDICO ========================
+class RespaldoPeriodico:
+    """Hilo que respalda la base cada respaldo_cada_horas mientras el sistema está abierto"""
+
+    def __init__(self, respaldos, cada_horas):
+        self.respaldos = respaldos
+        self.intervalo = cada_horas * 3600
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._trabajar, name='respaldos', daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+
+    def _trabajar(self):
+        # Si otra terminal (o el arranque anterior) respaldó hace poco, esperar lo que falta
+        horas = self.respaldos.horas_desde_ultimo()
+        espera = 0 if horas is None else max(0, self.intervalo - horas * 3600)
+        while not self._detener.wait(espera):
+            try:
+                self.respaldos.respaldar()
+            except Exception:
+                registro.exception('No se pudo respaldar la base')
+            espera = self.intervalo
+
+
+# ======================== LÍNEA DE COMANDOS ========================
+def main(argv=None):
+    from base_datos import cargar_configuracion, ruta_de_archivo
+
+    parser = argparse.ArgumentParser(description='Respaldos de la base de Alan Automotriz')
+    parser.add_argument('--ruta', help='Base de datos (por defecto la de alan_automotriz.ini)')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    comandos.add_parser('respaldar', help='Respalda la base ahora')
+    comandos.add_parser('listar', help='Lista los respaldos, del más reciente al más antiguo')
+    verificar = comandos.add_parser('verificar', help='Revisa la integridad de un respaldo')
+    verificar.add_argument('respaldo')
+    restaurar = comandos.add_parser('restaurar', help='Reemplaza la base con un respaldo')
+    restaurar.add_argument('respaldo')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    configuracion = cargar_configuracion()
+    ruta = args.ruta or configuracion['ruta']
+    respaldos = Respaldos(ruta, configuracion, ruta_de_archivo(ruta, configuracion))
+
+    try:
+        if args.comando == 'respaldar':
+            respaldos.respaldar()
+        elif args.comando == 'listar':
+            for archivo in respaldos.listar():
+                fecha = datetime.fromtimestamp(os.path.getmtime(archivo)).strftime('%Y-%m-%d %H:%M')
+                print(f"{fecha}  {os.path.getsize(archivo) / 1e6:8.1f} MB  {archivo}")
+        elif args.comando == 'verificar':
+            problemas = respaldos.verificar(args.respaldo)
+            print('✅ Respaldo íntegro' if not problemas else '❌ ' + '\n❌ '.join(problemas))
+            return 1 if problemas else 0
+        elif args.comando == 'restaurar':
+            anterior = respaldos.restaurar(args.respaldo)
+            if anterior:
+                print(f"La base anterior quedó respaldada en {anterior}")
+    except (ErrorRespaldo, OSError, sqlite3.Error) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Fixtures de las pruebas.
+
+Cada prueba trabaja en su propia carpeta temporal: sin alan_automotriz.ini se
+usa la configuración por defecto de base_datos.py y la base de archivo y los
+respaldos quedan junto a la base temporal.
+
+Uso:
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from base_datos import Database  # noqa: E402
+
+# Usuarios de USUARIOS_DEFAULT (migración 6)
+EJECUTIVO = 1
+GERENTE = 2
+
+
+@pytest.fixture
+def carpeta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def db(carpeta):
+    base = Database(str(carpeta / 'taller.db'))
+    yield base
+    base.conn.close()
+
+
+@pytest.fixture
+def registrar_ingreso(db):
+    """Función que da de alta cliente, vehículo e ingreso y devuelve el id del ingreso"""
+    contador = iter(range(1, 10_000))
+
+    def registrar(motivo='Servicio de frenos', placa=None):
+        n = next(contador)
+        cliente_id = db.clientes.registrar(f'Cliente {n}', f'55500000{n:02d}', None, None)
+        vehiculo_id = db.vehiculos.registrar('Nissan', 'Versa', placa or f'ABC-{n:03d}', '2020', 'Rojo')
+        return db.ingresos.registrar(cliente_id, vehiculo_id, motivo, EJECUTIVO)
+
+    return registrar
@@ -0,0 +1,91 @@
+"""Archivo de ingresos entregados: copia, borrado y resumen_pagos_mes"""
+
+from archivo import _columnas, archivar
+from conftest import EJECUTIVO, GERENTE
+from migraciones import ESQUEMA_ARCHIVO, TABLAS_ARCHIVADAS
+
+SQL_RESUMEN_RECALCULADO = f'''
+    SELECT strftime('%Y-%m', fecha_creacion), COUNT(*),
+           COALESCE(SUM(monto_total), 0), COALESCE(SUM(monto_pagado), 0),
+           SUM(estado_pago = 'Pagado'), SUM(estado_pago != 'Pagado')
+    FROM (SELECT * FROM main.pagos UNION ALL SELECT * FROM {ESQUEMA_ARCHIVO}.pagos)
+    GROUP BY 1 ORDER BY 1
+'''
+
+
+def _resumen(db):
+    # Los triggers dejan en cero (sin borrarlo) el periodo del que sale un cobro
+    return db.conn.execute('SELECT * FROM resumen_pagos_mes WHERE servicios != 0 ORDER BY periodo').fetchall()
+
+
+def _filas(db, esquema, ingreso_ids):
+    marcas = ', '.join('?' * len(ingreso_ids))
+    return {tabla: db.conn.execute(f'SELECT COUNT(*) FROM {esquema}.{tabla} WHERE {columna} IN ({marcas})',
+                                   ingreso_ids).fetchone()[0]
+            for tabla, columna in TABLAS_ARCHIVADAS}
+
+
+def _entregado_hace(db, registrar_ingreso, dias, periodo, placa=None):
+    """Ingreso cobrado, con abono y mensaje, entregado hace 'dias' días y cobrado en 'periodo'"""
+    ingreso_id = registrar_ingreso(placa=placa)
+    db.pagos.establecer_precio(ingreso_id, 1000)
+    db.pagos.registrar_abono(ingreso_id, 1000, 'Efectivo', None, EJECUTIVO)
+    db.mensajes.enviar(ingreso_id, EJECUTIVO, GERENTE, 'Listo para entrega', 'reporte')
+    db.ingresos.cambiar_estado(ingreso_id, 'Entregado', EJECUTIVO)
+    with db.conn:
+        db.conn.execute(f"UPDATE ingresos SET fecha_ingreso = datetime('now', '-{dias + 2} days'), "
+                        f"fecha_entrega = datetime('now', '-{dias} days') WHERE id = ?", (ingreso_id,))
+        db.conn.execute("UPDATE pagos SET fecha_creacion = ? || '-15 10:00:00' WHERE ingreso_id = ?",
+                        (periodo, ingreso_id))
+    return ingreso_id
+
+
+def test_archivar(db, registrar_ingreso):
+    viejos = [_entregado_hace(db, registrar_ingreso, 400, '2024-01', placa='VIE-001'),
+              _entregado_hace(db, registrar_ingreso, 500, '2024-02')]
+    reciente = _entregado_hace(db, registrar_ingreso, 10, '2024-01')
+    en_taller = registrar_ingreso()
+    db.pagos.establecer_precio(en_taller, 500)
+    resumen = _resumen(db)
+    por_tabla = _filas(db, 'main', viejos)
+
+    assert archivar(db.conn, 365, lote=1) == 2
+
+    assert _filas(db, 'main', viejos) == dict.fromkeys(por_tabla, 0)
+    assert _filas(db, ESQUEMA_ARCHIVO, viejos) == por_tabla
+    assert por_tabla == {'ingresos': 2, 'servicios': 4, 'pagos': 2, 'movimientos_pago': 2, 'mensajes': 2}
+    assert {i for (i,) in db.conn.execute('SELECT id FROM main.ingresos')} == {reciente, en_taller}
+
+    # El resumen incluye lo archivado: no cambia, y coincide con recalcularlo de ambas bases
+    assert _resumen(db) == resumen
+    assert _resumen(db) == db.conn.execute(SQL_RESUMEN_RECALCULADO).fetchall()
+    assert db.pagos.resumen_mes(1, 2024).servicios == 2
+
+    # El historial y su búsqueda siguen encontrando los ingresos archivados
+    historial = db.historial.cargar('VIE-001')
+    assert [h.ingreso.id for h in historial] == [viejos[0]]
+    assert historial[0].pago.monto_pagado == 1000
+    assert len(historial[0].movimientos) == 1
+
+    # Una segunda corrida no tiene nada que mover
+    assert archivar(db.conn, 365) == 0
+    assert _resumen(db) == resumen
+
+
+def test_corrida_interrumpida(db, registrar_ingreso):
+    """Un lote que quedó copiado al archivo sin borrarse de la base de trabajo"""
+    ingreso_id = _entregado_hace(db, registrar_ingreso, 400, '2024-01')
+    resumen = _resumen(db)
+    with db.conn:
+        for tabla, columna in TABLAS_ARCHIVADAS:
+            columnas = _columnas(db.conn, tabla)
+            db.conn.execute(f'INSERT INTO {ESQUEMA_ARCHIVO}.{tabla} ({columnas}) '
+                            f'SELECT {columnas} FROM main.{tabla} WHERE {columna} = ?', (ingreso_id,))
+
+    # Ya no cumple la antigüedad pedida, pero se termina de mover igual
+    assert archivar(db.conn, 1000) == 1
+
+    assert set(_filas(db, 'main', [ingreso_id]).values()) == {0}
+    assert _filas(db, ESQUEMA_ARCHIVO, [ingreso_id])['pagos'] == 1
+    assert _resumen(db) == resumen == db.conn.execute(SQL_RESUMEN_RECALCULADO).fetchall()
+    assert [r.id for r in db.ingresos.historial('Cliente 1')] == [ingreso_id]
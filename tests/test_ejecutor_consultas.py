@@ -0,0 +1,64 @@
+"""EjecutorConsultas cuando el hilo no puede abrir su conexión"""
+
+import sqlite3
+import time
+
+from base_datos import cargar_configuracion
+from ejecutor_consultas import TEXTO_CARGANDO, EjecutorConsultas
+
+
+class WidgetDePrueba:
+    """after() guarda la función; correr() hace de bucle de eventos de Tk"""
+
+    def __init__(self):
+        self.programadas = {}
+        self.siguiente = 0
+
+    def after(self, ms, funcion):
+        self.siguiente += 1
+        self.programadas[self.siguiente] = funcion
+        return self.siguiente
+
+    def after_cancel(self, identificador):
+        self.programadas.pop(identificador, None)
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def correr(self, hasta, espera=5):
+        limite = time.monotonic() + espera
+        while not hasta() and time.monotonic() < limite:
+            for identificador in list(self.programadas):
+                self.programadas.pop(identificador)()
+            time.sleep(0.01)
+
+
+class Indicador:
+    def __init__(self):
+        self.texto = ''
+
+    def configure(self, text):
+        self.texto = text
+
+
+def test_sin_conexion_fallan_todas_las_tareas(carpeta):
+    widget = WidgetDePrueba()
+    ejecutor = EjecutorConsultas(widget, str(carpeta / 'no_existe' / 'taller.db'), cargar_configuracion())
+    errores = {}
+    indicador = Indicador()
+
+    def fallo(canal):
+        return lambda error: errores.__setitem__(canal, error)
+
+    ejecutor.enviar('historial', lambda repos: 1, print, fallo('historial'), indicador=indicador)
+    assert indicador.texto == TEXTO_CARGANDO
+    widget.correr(lambda: 'historial' in errores)
+    # Una tarea enviada después de la falla también recibe el error
+    ejecutor.enviar('grilla', lambda repos: 2, print, fallo('grilla'))
+    widget.correr(lambda: 'grilla' in errores)
+
+    assert set(errores) == {'historial', 'grilla'}
+    assert all(isinstance(e, sqlite3.OperationalError) for e in errores.values())
+    assert indicador.texto == ''
+    assert not ejecutor.pendiente('historial') and not ejecutor.pendiente('grilla')
+    ejecutor.detener()
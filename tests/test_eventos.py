@@ -0,0 +1,23 @@
+"""Eventos que publican los repositorios después de cada escritura"""
+
+from conftest import EJECUTIVO
+from eventos import INGRESO, INGRESOS
+
+
+def test_un_evento_por_lote(db, registrar_ingreso):
+    ids = [registrar_ingreso() for _ in range(3)]
+    filas, lotes = [], []
+    db.eventos.suscribir(INGRESO, filas.append)
+    db.eventos.suscribir(INGRESOS, lotes.append)
+
+    db.ingresos.cambiar_estados(ids, 'En Proceso', EJECUTIVO)
+    assert (filas, lotes) == (ids, [ids])
+
+    db.ingresos.asignar_tecnicos(ids[:2], 3, EJECUTIVO)
+    db.pagos.establecer_precio(ids[2], 800)
+    assert lotes == [ids, ids[:2], [ids[2]]]
+    assert filas == ids + ids[:2] + [ids[2]]
+
+    # Sin ingresos no se publica nada
+    db.ingresos.cambiar_estados([], 'Entregado', EJECUTIVO)
+    assert len(lotes) == 3
@@ -0,0 +1,45 @@
+"""Exportación en streaming a un archivo"""
+
+import sqlite3
+
+import pytest
+
+from exportar import exportar
+
+
+class ReposConCursor:
+    """Guarda el cursor que entrega la exportación para revisar que quede cerrado"""
+
+    def __init__(self, db):
+        self.db = db
+        self.cursores = []
+        self.exportacion = self
+
+    def cursor(self, tipo, desde=None, hasta=None):
+        cursor = self.db.exportacion.cursor(tipo, desde, hasta)
+        self.cursores.append(cursor)
+        return cursor
+
+
+def _cerrado(cursor):
+    with pytest.raises(sqlite3.ProgrammingError):
+        cursor.fetchone()
+    return True
+
+
+def test_cierra_el_cursor(db, carpeta, registrar_ingreso):
+    for _ in range(3):
+        registrar_ingreso()
+    repos = ReposConCursor(db)
+
+    assert exportar(repos, 'ingresos', str(carpeta / 'ingresos.csv')) == 3
+    assert (carpeta / 'ingresos.csv').read_text(encoding='utf-8-sig').count('\n') == 4
+    assert _cerrado(repos.cursores[-1])
+
+    def interrumpir(total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        exportar(repos, 'ingresos', str(carpeta / 'otra.jsonl'), progreso=interrumpir)
+    assert _cerrado(repos.cursores[-1])
+    assert not list(carpeta.glob('otra.jsonl*'))
@@ -0,0 +1,169 @@
+"""GrillaVirtual.actualizar_fila sobre un Treeview de prueba (sin Tk)"""
+
+from collections import namedtuple
+
+import pytest
+
+from grilla_virtual import GrillaVirtual
+
+Fila = namedtuple('Fila', 'id fecha texto')
+
+
+class TreeDePrueba:
+    """Lo que GrillaVirtual usa de ttk.Treeview, con los iid como texto igual que Tk"""
+
+    def __init__(self):
+        self.orden = []
+        self.valores = {}
+
+    def configure(self, **opciones):
+        pass
+
+    def get_children(self, item=''):
+        return tuple(self.orden)
+
+    def exists(self, iid):
+        return str(iid) in self.valores
+
+    def insert(self, padre, indice, iid=None, values=(), tags=()):
+        iid = str(iid)
+        assert iid not in self.valores
+        self.orden.insert(len(self.orden) if indice == 'end' else indice, iid)
+        self.valores[iid] = values
+        return iid
+
+    def item(self, iid, values=None, tags=None):
+        self.valores[str(iid)] = values
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.orden.remove(str(iid))
+            del self.valores[str(iid)]
+
+    def yview(self):
+        return 0.0, 1.0
+
+    def yview_moveto(self, fraccion):
+        pass
+
+
+class Base:
+    """Filas de la 'tabla' y consultas por keyset como las de IngresoRepo"""
+
+    def __init__(self, filas):
+        self.filas = {fila.id: fila for fila in filas}
+
+    def pagina(self, repos, limite, despues_de=None, antes_de=None):
+        filas = sorted(self.filas.values(), key=clave, reverse=True)
+        if despues_de is not None:
+            return [f for f in filas if clave(f) < despues_de][:limite]
+        if antes_de is not None:
+            return [f for f in filas if clave(f) > antes_de][-limite:]
+        return filas[:limite]
+
+    def fila(self, repos, id_fila):
+        return self.filas.get(id_fila)
+
+
+def clave(fila):
+    return fila.fecha, fila.id
+
+
+def _grilla(filas, tamano_pagina=10):
+    base = Base(filas)
+    grilla = GrillaVirtual(TreeDePrueba(), None, base.pagina, clave, identificador=lambda f: str(f.id),
+                           tamano_pagina=tamano_pagina, fila=base.fila)
+    grilla.recargar()
+    return grilla, base
+
+
+def _ids(grilla):
+    return [int(iid) for iid in grilla.tree.get_children()]
+
+
+def _en_paginas(grilla):
+    return [int(iid) for iids, _, _ in grilla.paginas for iid in iids]
+
+
+@pytest.fixture
+def filas():
+    return [Fila(i, f'2025-01-{i:02d}', f'fila {i}') for i in range(1, 6)]
+
+
+def test_corrige_en_su_lugar(filas):
+    grilla, base = _grilla(filas)
+    base.filas[3] = base.filas[3]._replace(texto='corregida')
+    grilla.actualizar_fila(3)
+    assert _ids(grilla) == [5, 4, 3, 2, 1]
+    assert grilla.tree.valores['3'] == (3, '2025-01-03', 'corregida')
+
+
+def test_agrega_en_orden(filas):
+    grilla, base = _grilla(filas)
+    base.filas[6] = Fila(6, '2025-01-02 12:00', 'nueva')
+    grilla.actualizar_fila(6)
+    assert _ids(grilla) == [5, 4, 3, 6, 2, 1]
+    assert _en_paginas(grilla) == _ids(grilla)
+    assert grilla.claves['6'] == ('2025-01-02 12:00', 6)
+
+
+def test_no_agrega_fuera_de_lo_cargado(filas):
+    grilla, base = _grilla(filas, tamano_pagina=3)
+    assert (_ids(grilla), grilla.hay_mas_abajo) == ([5, 4, 3], True)
+    base.filas[6] = Fila(6, '2024-12-31', 'más vieja que la página')
+    grilla.actualizar_fila(6)
+    assert _ids(grilla) == [5, 4, 3]
+
+    base.filas[7] = Fila(7, '2025-02-01', 'la más nueva')
+    grilla.actualizar_fila(7)
+    assert _ids(grilla) == [7, 5, 4, 3]
+    assert grilla.paginas[0][1] == ('2025-02-01', 7)
+
+
+def test_mueve_si_cambia_la_clave(filas):
+    grilla, base = _grilla(filas)
+    base.filas[1] = base.filas[1]._replace(fecha='2025-01-04 08:00', texto='movida')
+    grilla.actualizar_fila(1)
+    assert _ids(grilla) == [5, 1, 4, 3, 2]
+    assert _en_paginas(grilla) == _ids(grilla)
+    assert grilla.claves['1'] == ('2025-01-04 08:00', 1)
+    assert grilla.tree.valores['1'][2] == 'movida'
+    # Mismo orden que daría recargar
+    assert _ids(grilla) == [f.id for f in base.pagina(None, 10)]
+
+
+def test_mueve_fuera_de_lo_cargado(filas):
+    grilla, base = _grilla(filas, tamano_pagina=3)
+    base.filas[4] = base.filas[4]._replace(fecha='2024-12-01')
+    grilla.actualizar_fila(4)
+    # Su nuevo lugar está en una página que no se cargó: se quita
+    assert _ids(grilla) == [5, 3]
+    assert '4' not in grilla.claves
+
+
+def test_quita(filas):
+    grilla, base = _grilla(filas)
+    del base.filas[4]
+    grilla.actualizar_fila(4)
+    assert _ids(grilla) == [5, 3, 2, 1]
+    assert _en_paginas(grilla) == [5, 3, 2, 1]
+    assert '4' not in grilla.claves
+
+
+def test_filtrada_no_agrega(filas):
+    grilla, base = _grilla(filas)
+    grilla.recargar(filtrada=True)
+    base.filas[6] = Fila(6, '2025-01-06', 'nueva')
+    base.filas[2] = base.filas[2]._replace(fecha='2025-01-09')
+    grilla.actualizar_fila(6)
+    grilla.actualizar_fila(2)
+    # La que ya estaba se mueve; la nueva podría no coincidir con la búsqueda
+    assert _ids(grilla) == [2, 5, 4, 3, 1]
+
+
+def test_grilla_vacia():
+    grilla, base = _grilla([])
+    base.filas[1] = Fila(1, '2025-01-01', 'primera')
+    grilla.actualizar_fila(1)
+    assert _ids(grilla) == [1]
+    assert grilla.paginas == [(['1'], ('2025-01-01', 1), ('2025-01-01', 1))]
@@ -0,0 +1,85 @@
+"""Importación por lotes: clientes por teléfono, vehículos por placa y archivo de rechazos"""
+
+import csv
+
+import pytest
+
+from conftest import EJECUTIVO
+from importar import CAMPOS, ErrorImportacion, importar
+
+ENCABEZADO = 'Cliente,Teléfono,Correo,Dirección,Marca,Modelo,Placa,Año,Color,Motivo'
+
+
+def _escribir(ruta, *lineas):
+    ruta.write_text('\n'.join((ENCABEZADO,) + lineas) + '\n', encoding='utf-8')
+    return str(ruta)
+
+
+def _conteos(db):
+    return tuple(db.conn.execute(f'SELECT COUNT(*) FROM {tabla}').fetchone()[0]
+                 for tabla in ('clientes', 'vehiculos', 'ingresos', 'servicios'))
+
+
+def test_sin_duplicados(db, carpeta):
+    db.clientes.registrar('Ana López', '555 000 0001', None, None)
+    ruta = _escribir(
+        carpeta / 'flotilla.csv',
+        # Cliente que ya estaba en la base
+        'Ana L.,555 000 0001,,,Nissan,Versa,abc-123,2020,Rojo,Frenos',
+        'Beto Ruiz,5550000002,beto@correo.mx,,Ford,Ka,XYZ-999,2018,,Afinación',
+        # Teléfono y placa repetidos dentro del archivo, en lotes distintos
+        'Beto R.,5550000002,,,Ford,Ka,xyz-999,2018,,Revisión',
+        'Carla Díaz,5550000003,,,,,,,,',
+        ',,,,Toyota,Hilux,HIL-001,2015,Blanco,',
+    )
+
+    resultado = importar(db.conn, ruta, EJECUTIVO, lote=2)
+    assert resultado.filas == 5
+    assert (resultado.clientes_nuevos, resultado.vehiculos_nuevos, resultado.ingresos) == (2, 3, 3)
+    assert (resultado.rechazadas, resultado.archivo_rechazos) == (0, None)
+    assert _conteos(db) == (3, 3, 3, 3)
+    assert db.conn.execute('''
+        SELECT c.nombre, v.placa, i.motivo_ingreso FROM ingresos i
+        JOIN clientes c ON c.id = i.cliente_id JOIN vehiculos v ON v.id = i.vehiculo_id ORDER BY i.id
+    ''').fetchall() == [('Ana López', 'ABC-123', 'Frenos'), ('Beto Ruiz', 'XYZ-999', 'Afinación'),
+                        ('Beto Ruiz', 'XYZ-999', 'Revisión')]
+
+    # Importar de nuevo el mismo archivo solo registra los ingresos
+    resultado = importar(db.conn, ruta, EJECUTIVO)
+    assert (resultado.clientes_nuevos, resultado.vehiculos_nuevos, resultado.ingresos) == (0, 0, 3)
+    assert _conteos(db) == (3, 3, 6, 6)
+
+
+def test_rechazos(db, carpeta):
+    ruta = _escribir(
+        carpeta / 'flotilla.csv',
+        'Ana López,5550000001,,,Nissan,Versa,ABC-123,2020,Rojo,Frenos',
+        'Sin Teléfono,,,,,,,,,',
+        'Beto Ruiz,55-ABC,,,,,,,,',
+        'Carla Díaz,5550000003,carla@,,,,,,,',
+        ',,,,Ford,Ka,XYZ-999,1850,,',
+        ',,,,Ford,Ka,XYZ-998,2018,,Afinación',
+    )
+
+    resultado = importar(db.conn, ruta, EJECUTIVO)
+    assert (resultado.filas, resultado.rechazadas) == (6, 5)
+    assert _conteos(db) == (1, 1, 1, 1)
+    assert resultado.archivo_rechazos == str(carpeta / 'flotilla_rechazados.csv')
+
+    with open(resultado.archivo_rechazos, encoding='utf-8-sig', newline='') as archivo:
+        filas = list(csv.reader(archivo))
+    assert filas[0] == ['linea', 'error', *CAMPOS]
+    assert [(linea, error) for linea, error, *_ in filas[1:]] == [
+        ('3', 'Nombre y teléfono son obligatorios'),
+        ('4', 'Teléfono inválido: 55-ABC'),
+        ('5', 'Correo inválido: carla@'),
+        ('6', 'Año inválido: 1850'),
+        ('7', 'Para registrar el ingreso la fila necesita cliente y vehículo'),
+    ]
+    # Los valores originales van detrás, para corregirlos y volver a importar
+    assert filas[2][2:4] == ['Beto Ruiz', '55-ABC']
+
+
+def test_archivo_inexistente(db, carpeta):
+    with pytest.raises(ErrorImportacion):
+        importar(db.conn, str(carpeta / 'no_existe.csv'), EJECUTIVO)
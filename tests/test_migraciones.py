@@ -0,0 +1,157 @@
+"""Migraciones desde una base vacía, desde versiones intermedias y desde una base sin user_version"""
+
+import sqlite3
+import time
+
+import pytest
+
+from base_datos import abrir_conexion
+from migraciones import (ESQUEMA_ARCHIVO, INDICES, MIGRACIONES, MIGRACIONES_ARCHIVO, TABLAS_ARCHIVADAS,
+                         USUARIOS_DEFAULT, VERSION_ESQUEMA, _aplicar, migrar, migrar_archivo, version_actual)
+
+INICIO_PLAZO = '2025-03-01 08:00:00'
+
+
+def _estructura(conn, esquema='main'):
+    """Tablas con sus columnas, índices y triggers del esquema"""
+    objetos = conn.execute(f'''
+        SELECT type, name, tbl_name FROM {esquema}.sqlite_master
+        WHERE name NOT LIKE 'sqlite!_%' ESCAPE '!' ORDER BY type, name
+    ''').fetchall()
+    columnas = {nombre: conn.execute(f'PRAGMA {esquema}.table_info({nombre})').fetchall()
+                for tipo, nombre, _ in objetos if tipo == 'table'}
+    return objetos, columnas
+
+
+def _indices(conn, esquema='main'):
+    return {nombre for (nombre,) in conn.execute(
+        f"SELECT name FROM {esquema}.sqlite_master WHERE type = 'index' AND name LIKE 'idx!_%' ESCAPE '!'")}
+
+
+def _base_al_dia(ruta):
+    conn = abrir_conexion(str(ruta))
+    migrar_archivo(conn)
+    migrar(conn)
+    return conn
+
+
+def test_desde_version_0(carpeta):
+    conn = abrir_conexion(str(carpeta / 'nueva.db'))
+    assert migrar_archivo(conn) == [numero for numero, _, _ in MIGRACIONES_ARCHIVO]
+    assert migrar(conn) == [numero for numero, _, _ in MIGRACIONES]
+
+    assert version_actual(conn) == VERSION_ESQUEMA
+    assert version_actual(conn, ESQUEMA_ARCHIVO) == MIGRACIONES_ARCHIVO[-1][0]
+    assert _indices(conn) == set(INDICES)
+    archivadas = [tabla for tabla, _ in TABLAS_ARCHIVADAS]
+    assert _indices(conn, ESQUEMA_ARCHIVO) == {nombre for nombre, definicion in INDICES.items()
+                                                if definicion.split('(')[0] in archivadas}
+    for esquema in ('main', ESQUEMA_ARCHIVO):
+        columnas = {fila[1] for fila in conn.execute(f'PRAGMA {esquema}.table_info(ingresos)')}
+        assert 'vence_plazo' in columnas
+    assert conn.execute('SELECT COUNT(*) FROM usuarios').fetchone()[0] == len(USUARIOS_DEFAULT)
+
+    # Con la base al día no se aplica nada
+    assert migrar(conn) == []
+    assert migrar_archivo(conn) == []
+
+
+@pytest.mark.parametrize('version', [1, 2, 4, 6, 9, 10])
+def test_desde_version_parcial(carpeta, version):
+    conn = abrir_conexion(str(carpeta / 'parcial.db'))
+    migrar_archivo(conn)
+    _aplicar(conn, 'main', MIGRACIONES[:version])
+    assert version_actual(conn) == version
+
+    with conn:
+        conn.execute("INSERT INTO clientes (nombre, telefono) VALUES ('Ana', '5550001')")
+        conn.execute("INSERT INTO vehiculos (marca, modelo, placa) VALUES ('Nissan', 'Versa', 'ABC-123')")
+        conn.execute('''
+            INSERT INTO ingresos (cliente_id, vehiculo_id, motivo_ingreso, plazo_horas,
+                                  fecha_inicio_plazo, plazo_activo)
+            VALUES (1, 1, 'Frenos', 2, ?, 1)
+        ''', (INICIO_PLAZO,))
+        conn.execute('''
+            INSERT INTO pagos (ingreso_id, monto_total, monto_pagado, estado_pago, fecha_creacion, historial_pagos)
+            VALUES (1, 1000, 400, 'Parcial', '2025-03-01 09:00:00',
+                    '[{"fecha": "2025-03-02 10:00:00", "monto": 400, "metodo": "Efectivo"}]')
+        ''')
+
+    assert migrar(conn) == list(range(version + 1, VERSION_ESQUEMA + 1))
+    assert _estructura(conn) == _estructura(_base_al_dia(carpeta / 'nueva.db'))
+
+    # La migración 10 calcula vence_plazo de los plazos que ya estaban guardados
+    if version < 10:
+        vence = int(time.mktime(time.strptime(INICIO_PLAZO, '%Y-%m-%d %H:%M:%S'))) + 2 * 3600
+        assert conn.execute('SELECT vence_plazo FROM ingresos').fetchone()[0] == vence
+    if version < 3:
+        assert conn.execute('SELECT fecha, monto, metodo FROM movimientos_pago').fetchall() == [
+            ('2025-03-02 10:00:00', 400, 'Efectivo')]
+    assert conn.execute('SELECT periodo, servicios, total, pagado FROM resumen_pagos_mes').fetchall() == [
+        ('2025-03', 1, 1000, 400)]
+
+
+@pytest.mark.parametrize('version', [1, 3])
+def test_archivo_desde_version_parcial(carpeta, version):
+    conn = abrir_conexion(str(carpeta / 'parcial.db'))
+    _aplicar(conn, ESQUEMA_ARCHIVO, MIGRACIONES_ARCHIVO[:version])
+    with conn:
+        conn.execute(f'''
+            INSERT INTO {ESQUEMA_ARCHIVO}.ingresos (id, cliente_id, vehiculo_id, estado, plazo_dias,
+                                                    fecha_inicio_plazo, plazo_activo)
+            VALUES (7, 1, 1, 'Entregado', 1, ?, 0)
+        ''', (INICIO_PLAZO,))
+
+    assert migrar_archivo(conn) == list(range(version + 1, MIGRACIONES_ARCHIVO[-1][0] + 1))
+    assert _estructura(conn, ESQUEMA_ARCHIVO) == _estructura(_base_al_dia(carpeta / 'nueva.db'), ESQUEMA_ARCHIVO)
+    vence = int(time.mktime(time.strptime(INICIO_PLAZO, '%Y-%m-%d %H:%M:%S'))) + 86400
+    assert conn.execute(f'SELECT vence_plazo FROM {ESQUEMA_ARCHIVO}.ingresos').fetchone()[0] == vence
+
+
+def test_base_sin_user_version(carpeta):
+    """Base de antes de las migraciones: facturacion y abonos aparte, ingresos sin plazos"""
+    ruta = carpeta / 'vieja.db'
+    vieja = sqlite3.connect(ruta)
+    vieja.executescript('''
+        CREATE TABLE clientes (id INTEGER PRIMARY KEY AUTOINCREMENT, nombre TEXT NOT NULL,
+                               telefono TEXT NOT NULL, correo TEXT, direccion TEXT, activo INTEGER DEFAULT 1);
+        CREATE TABLE vehiculos (id INTEGER PRIMARY KEY AUTOINCREMENT, marca TEXT NOT NULL, modelo TEXT NOT NULL,
+                                placa TEXT UNIQUE NOT NULL, anio TEXT, color TEXT, activo INTEGER DEFAULT 1);
+        CREATE TABLE ingresos (id INTEGER PRIMARY KEY AUTOINCREMENT, cliente_id INTEGER NOT NULL,
+                               vehiculo_id INTEGER NOT NULL, estado TEXT DEFAULT 'Ingreso',
+                               fecha_ingreso TIMESTAMP DEFAULT CURRENT_TIMESTAMP, fecha_entrega TIMESTAMP,
+                               asignado_a INTEGER, motivo_ingreso TEXT);
+        CREATE TABLE facturacion (id INTEGER PRIMARY KEY AUTOINCREMENT, ingreso_id INTEGER, monto_total REAL,
+                                  monto_pagado REAL, estado_pago TEXT, fecha_creacion TIMESTAMP);
+        CREATE TABLE pagos (id INTEGER PRIMARY KEY AUTOINCREMENT, facturacion_id INTEGER, monto REAL,
+                            metodo_pago TEXT, fecha_pago TIMESTAMP, registrado_por INTEGER, notas TEXT);
+
+        INSERT INTO clientes (nombre, telefono) VALUES ('Ana', '5550001');
+        INSERT INTO vehiculos (marca, modelo, placa) VALUES ('Nissan', 'Versa', 'ABC-123');
+        INSERT INTO ingresos (cliente_id, vehiculo_id, motivo_ingreso) VALUES (1, 1, 'Frenos');
+        INSERT INTO facturacion (ingreso_id, monto_total, monto_pagado, estado_pago, fecha_creacion)
+        VALUES (1, 1000, 1000, 'Pagado', '2024-11-05 12:00:00');
+        INSERT INTO pagos (facturacion_id, monto, metodo_pago, fecha_pago, registrado_por)
+        VALUES (1, 600, 'Efectivo', '2024-11-05 12:00:00', 1), (1, 400, 'Tarjeta', '2024-11-20 17:00:00', 1);
+    ''')
+    vieja.close()
+
+    conn = _base_al_dia(ruta)
+    assert version_actual(conn) == VERSION_ESQUEMA
+    assert _indices(conn) == set(INDICES)
+
+    tablas = {nombre for (nombre,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert not {'facturacion', 'facturacion_anterior', 'pagos_anterior'} & tablas
+    objetos, columnas = _estructura(conn)
+    objetos_nueva, columnas_nueva = _estructura(_base_al_dia(carpeta / 'nueva.db'))
+    assert objetos == objetos_nueva
+    # Las columnas agregadas con ALTER TABLE quedan al final: se comparan sin orden
+    assert ({tabla: {fila[1] for fila in filas} for tabla, filas in columnas.items()}
+            == {tabla: {fila[1] for fila in filas} for tabla, filas in columnas_nueva.items()})
+
+    assert conn.execute('SELECT monto_total, monto_pagado, ultimo_pago, ultimo_metodo_pago FROM pagos').fetchall() == [
+        (1000, 1000, 400, 'Tarjeta')]
+    assert conn.execute('SELECT monto, metodo FROM movimientos_pago ORDER BY id').fetchall() == [
+        (600, 'Efectivo'), (400, 'Tarjeta')]
+    assert conn.execute('SELECT periodo, servicios, pagados FROM resumen_pagos_mes').fetchall() == [
+        ('2024-11', 1, 1)]
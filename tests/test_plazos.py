@@ -0,0 +1,72 @@
+"""ProgramadorPlazos sobre un Treeview de prueba (sin Tk)"""
+
+import time
+
+from plazos import ProgramadorPlazos
+
+
+class TreeDePrueba:
+    def __init__(self, iids):
+        self.iids = list(iids)
+        self.tags = {}
+        self.programadas = {}
+        self.siguiente = 0
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def exists(self, iid):
+        return iid in self.iids
+
+    def bbox(self, iid):
+        # Ninguna fila a la vista: despiertan solo al cambiar de banda
+        return ''
+
+    def item(self, iid, tags=()):
+        self.tags[iid] = tags
+
+    def set(self, iid, columna, valor):
+        pass
+
+    def get_children(self):
+        return tuple(self.iids)
+
+    def yview(self):
+        return 0.0, 1.0
+
+    def after(self, ms, funcion):
+        self.siguiente += 1
+        self.programadas[self.siguiente] = funcion
+        return self.siguiente
+
+    after_idle = after
+
+    def after_cancel(self, identificador):
+        self.programadas.pop(identificador, None)
+
+
+def _vigentes(programador):
+    return {(momento, iid) for momento, iid in programador.monticulo if programador.proximo.get(iid) == momento}
+
+
+def _esperadas(programador):
+    """Una entrada por fila, con su próximo cambio"""
+    return {(momento, iid) for iid, momento in programador.proximo.items()}
+
+
+def test_el_monticulo_no_crece_al_reprogramar():
+    iids = [str(i) for i in range(20)]
+    programador = ProgramadorPlazos(TreeDePrueba(iids), 'plazo')
+    ahora = time.time()
+    for vuelta in range(50):
+        for numero, iid in enumerate(iids):
+            programador.agregar_epoch(iid, ahora - vuelta, ahora + 3600 + numero)
+        assert len(programador.monticulo) <= 2 * len(programador.proximo) + 1
+
+    assert _vigentes(programador) == _esperadas(programador)
+
+    for iid in iids[:15]:
+        programador.quitar(iid)
+    assert len(programador.proximo) == 5
+    assert len(programador.monticulo) <= 2 * len(programador.proximo)
+    assert _vigentes(programador) == _esperadas(programador)
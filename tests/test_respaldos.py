@@ -0,0 +1,77 @@
+"""Respaldos de la base junto con la de archivo"""
+
+import os
+
+import pytest
+
+from archivo import archivar
+from base_datos import Database
+from respaldos import ErrorRespaldo
+
+
+def _conteo(db, esquema):
+    return db.conn.execute(f'SELECT COUNT(*) FROM {esquema}.ingresos').fetchone()[0]
+
+
+def _archivar_uno(db, registrar_ingreso):
+    ingreso_id = registrar_ingreso()
+    db.ingresos.cambiar_estado(ingreso_id, 'Entregado', 1)
+    with db.conn:
+        db.conn.execute("UPDATE ingresos SET fecha_ingreso = datetime('now', '-400 days'), "
+                        "fecha_entrega = datetime('now', '-400 days') WHERE id = ?", (ingreso_id,))
+    assert archivar(db.conn, 365) == 1
+
+
+def test_carpeta_junto_a_la_base(carpeta):
+    (carpeta / 'datos').mkdir()
+    db = Database(str(carpeta / 'datos' / 'taller.db'))
+    respaldo = db.respaldos.respaldar(db.conn)
+    db.conn.close()
+
+    assert os.path.dirname(respaldo) == str(carpeta / 'datos' / 'respaldos')
+    assert os.path.exists(db.respaldos.respaldo_de_archivo(respaldo))
+    assert db.respaldos.listar() == [respaldo]
+    assert not (carpeta / 'respaldos').exists()
+
+
+def test_restaura_las_dos_bases(db, registrar_ingreso):
+    registrar_ingreso()
+    _archivar_uno(db, registrar_ingreso)
+    respaldo = db.respaldos.respaldar(db.conn)
+    assert db.respaldos.verificar(respaldo) == []
+
+    _archivar_uno(db, registrar_ingreso)
+    assert (_conteo(db, 'main'), _conteo(db, 'archivo')) == (1, 2)
+    db.conn.close()
+
+    anterior = db.respaldos.restaurar(respaldo)
+    assert os.path.exists(db.respaldos.respaldo_de_archivo(anterior))
+    db = Database(db.ruta)
+    assert (_conteo(db, 'main'), _conteo(db, 'archivo')) == (1, 1)
+    db.conn.close()
+
+
+def test_no_restaura_sin_el_archivo(db, registrar_ingreso):
+    registrar_ingreso()
+    respaldo = db.respaldos.respaldar(db.conn)
+    # Respaldo de antes de que se respaldara el archivo junto con la base
+    os.remove(db.respaldos.respaldo_de_archivo(respaldo))
+    _archivar_uno(db, registrar_ingreso)
+    db.conn.close()
+
+    with pytest.raises(ErrorRespaldo, match='desparejas'):
+        db.respaldos.restaurar(respaldo)
+    db = Database(db.ruta)
+    assert (_conteo(db, 'main'), _conteo(db, 'archivo')) == (1, 1)
+    db.conn.close()
+
+
+def test_rotar_borra_el_archivo(db):
+    db.respaldos.conservar = 1
+    viejo = db.respaldos.respaldar(db.conn, motivo='viejo', rotar=False)
+    nuevo = db.respaldos.respaldar(db.conn, motivo='nuevo', rotar=False)
+    os.utime(viejo, (0, 0))
+
+    assert db.respaldos.rotar() == [viejo]
+    assert not os.path.exists(db.respaldos.respaldo_de_archivo(viejo))
+    assert os.path.exists(db.respaldos.respaldo_de_archivo(nuevo))